@@ -6,6 +6,7 @@ CgraRTL.py
 Author : Cheng Tan
   Date : Dec 22, 2024
 """
+from ..controller.BitstreamLoaderRTL import BitstreamLoaderRTL
 from ..controller.ControllerRTL import ControllerRTL
 from ..lib.basic.val_rdy.ifcs import ValRdyRecvIfcRTL as RecvIfcRTL
 from ..lib.basic.val_rdy.ifcs import ValRdySendIfcRTL as SendIfcRTL
@@ -34,7 +35,13 @@ class CgraRTL(Component):
                 FunctionUnit, FuList, cgra_topology,
                 controller2addr_map, idTo2d_map,
                 is_multi_cgra = True,
-                has_ctrl_ring = True):
+                has_ctrl_ring = True,
+                has_traffic_class_vcs = False,
+                double_buffer_ctrl = False,
+                ctrl_store_size = 0,
+                routing_dict_size = 0,
+                has_bitstream_loader = False,
+                num_prologue_slots = None):
 
     # Derives all types from CgraPayloadType.
     DataType = CgraPayloadType.get_field_type(kAttrData)
@@ -45,6 +52,10 @@ class CgraRTL(Component):
     
     num_tiles = width * height
     num_rd_tiles = height + width - 1
+    # The bitstream loader reads the SPM via an additional read port, which
+    # the inter-CGRA packets then account for.
+    if has_bitstream_loader:
+      num_rd_tiles += 1
     
     CgraIdType = mk_cgra_id_type(multi_cgra_columns, multi_cgra_rows)
     
@@ -67,7 +78,7 @@ class CgraRTL(Component):
     s.has_ctrl_ring = has_ctrl_ring
     s.num_tiles = width * height
     # The left and bottom tiles are connected to the data memory.
-    data_mem_num_rd_tiles = height + width - 1
+    data_mem_num_rd_tiles = num_rd_tiles
     data_mem_num_wr_tiles = height + width - 1
 
     num_cgras = multi_cgra_rows * multi_cgra_columns
@@ -102,7 +113,11 @@ class CgraRTL(Component):
                       total_steps, 4, 2, s.num_mesh_ports,
                       s.num_mesh_ports, num_cgras, s.num_tiles,
                       num_registers_per_reg_bank,
-                      FuList = FuList)
+                      FuList = FuList,
+                      num_prologue_slots = num_prologue_slots,
+                      double_buffer_ctrl = double_buffer_ctrl,
+                      ctrl_store_size = ctrl_store_size,
+                      routing_dict_size = routing_dict_size)
               for i in range(s.num_tiles)]
     s.data_mem = DataMemControllerRTL(NocPktType,
                                       data_mem_size_global,
@@ -117,7 +132,10 @@ class CgraRTL(Component):
                                       idTo2d_map)
     s.controller = ControllerRTL(NocPktType,
                                   multi_cgra_rows, multi_cgra_columns,
-                                  s.num_tiles, controller2addr_map, idTo2d_map)
+                                  s.num_tiles, controller2addr_map, idTo2d_map,
+                                  has_traffic_class_vcs)
+    if has_bitstream_loader:
+      s.bitstream_loader = BitstreamLoaderRTL(CtrlPktType)
     # An additional router for controller to receive CMD_COMPLETE signal from Ring to CPU.
     # The last argument of 1 is for the latency per hop.
     if has_ctrl_ring:
@@ -157,6 +175,17 @@ class CgraRTL(Component):
     s.recv_from_cpu_pkt //= s.controller.recv_from_cpu_pkt
     s.send_to_cpu_pkt //=  s.controller.send_to_cpu_pkt
 
+    # Connects the bitstream loader to the last read port of the SPM.
+    if has_bitstream_loader:
+      s.controller.send_to_bitstream_loader //= s.bitstream_loader.recv_start
+      s.bitstream_loader.send_pkt //= s.controller.recv_from_bitstream_loader
+      s.bitstream_loader.to_mem_raddr //= s.data_mem.recv_raddr[data_mem_num_rd_tiles - 1]
+      s.bitstream_loader.from_mem_rdata //= s.data_mem.send_rdata[data_mem_num_rd_tiles - 1]
+    else:
+      s.controller.send_to_bitstream_loader.rdy //= 0
+      s.controller.recv_from_bitstream_loader.val //= 0
+      s.controller.recv_from_bitstream_loader.msg //= CtrlPktType()
+
     # Assigns tile id.
     for i in range(s.num_tiles):
       s.tile[i].tile_id //= i
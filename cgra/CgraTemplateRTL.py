@@ -28,18 +28,21 @@ from ..fu.single.CompRTL import CompRTL
 from ..fu.double.SeqMulAdderRTL import SeqMulAdderRTL
 from ..fu.single.RetRTL import RetRTL
 from ..fu.single.MulRTL import MulRTL
-from ..fu.single.ExclusiveDivRTL import ExclusiveDivRTL
+from ..fu.single.Radix4DivRTL import Radix4DivRTL
 from ..fu.single.LogicRTL import LogicRTL
 from ..fu.single.GrantRTL import GrantRTL
 from ..fu.single.LoopControlRTL import LoopControlRTL
 from ..fu.single.ConstRTL import ConstRTL
 from ..fu.float.FpAddRTL import FpAddRTL
 from ..fu.float.FpMulRTL import FpMulRTL
+from ..fu.float.FpMulAddRTL import FpMulAddRTL
 
 fu_map = {
   "add": AdderRTL,
   "mul": MulRTL,
-  "div": ExclusiveDivRTL,
+  # Retires each result under the ctrl word issuing it, so that the
+  # fu_crossbar routes it as scheduled (see test_tile_pipelined_radix4_div).
+  "div": Radix4DivRTL,
   "fadd": FpAddRTL,
   "fmul": FpMulRTL,
   "fdiv": None,
@@ -49,7 +52,7 @@ fu_map = {
   "type_conv": None,
   "vfmul": None,
   "fadd_fadd": None,
-  "fmul_fadd": None,
+  "fmul_fadd": FpMulAddRTL,
   "grant": GrantRTL,
   "loop_control": LoopControlRTL,
   "phi": PhiRTL,
@@ -79,7 +82,9 @@ class CgraTemplateRTL(Component):
                 total_steps, mem_access_is_combinational,
                 FunctionUnit, FuList, TileList, LinkList,
                 dataSPM, controller2addr_map, idTo2d_map,
-                is_multi_cgra = True, cgra_id = 0):
+                is_multi_cgra = True, cgra_id = 0,
+                has_traffic_class_vcs = False,
+                num_prologue_slots = None):
 
     DataType = CgraPayloadType.get_field_type(kAttrData)
     PredicateType = DataType.get_field_type(kAttrPredicate)
@@ -133,7 +138,10 @@ class CgraTemplateRTL(Component):
                       total_steps, 4, 2, s.num_mesh_ports,
                       s.num_mesh_ports, num_cgras, s.num_tiles,
                       num_registers_per_reg_bank,
-                      FuList = map_fu2rtl(TileList[i].getAllValidFuTypes()))
+                      FuList = map_fu2rtl(TileList[i].getAllValidFuTypes()),
+                      num_prologue_slots = num_prologue_slots,
+                      input_fifo_depths = TileList[i].getInputFifoDepths(),
+                      output_skid_depth = TileList[i].getOutputSkidDepth())
               for i in range(s.num_tiles)]
     # FIXME: Need to enrish data-SPM-related user-controlled parameters, e.g., number of banks.
     s.data_mem = DataMemControllerRTL(NocPktType,
@@ -150,7 +158,8 @@ class CgraTemplateRTL(Component):
     s.cgra_id = InPort(CgraIdType)
     s.controller = ControllerRTL(NocPktType,
                                   multi_cgra_rows, multi_cgra_columns,
-                                  s.num_tiles, controller2addr_map, idTo2d_map)
+                                  s.num_tiles, controller2addr_map, idTo2d_map,
+                                  has_traffic_class_vcs)
     # Connects controller id.
     s.controller.cgra_id //= s.cgra_id
     # An additional router for controller to receive CMD_COMPLETE signal from Ring to CPU.
@@ -188,6 +197,11 @@ class CgraTemplateRTL(Component):
     s.recv_from_cpu_pkt //= s.controller.recv_from_cpu_pkt
     s.send_to_cpu_pkt //= s.controller.send_to_cpu_pkt
 
+    # No bitstream loader.
+    s.controller.send_to_bitstream_loader.rdy //= 0
+    s.controller.recv_from_bitstream_loader.val //= 0
+    s.controller.recv_from_bitstream_loader.msg //= CtrlPktType()
+
     # Assigns tile id.
     for i in range(s.num_tiles):
       s.tile[i].cgra_id //= s.cgra_id
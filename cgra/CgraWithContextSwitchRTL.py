@@ -3,6 +3,10 @@
 Cgra_Context_Switch_RTL.py
 =========================================================================
 
+With a non-zero `num_context_slots`, each tile saves/restores its whole
+context into/from that many slots of its local context scratchpad upon
+CMD_SAVE_CONTEXT/CMD_RESTORE_CONTEXT (see TileWithContextSwitchRTL).
+
 Author : Yufei Yang
   Date : Oct 17, 2025
 """
@@ -32,7 +36,9 @@ class CgraWithContextSwitchRTL(Component):
                 total_steps, mem_access_is_combinational,
                 FunctionUnit, FuList, cgra_topology,
                 controller2addr_map, idTo2d_map,
-                is_multi_cgra = True):
+                is_multi_cgra = True,
+                has_traffic_class_vcs = False,
+                num_context_slots = 0):
 
     DataType = CgraPayloadType.get_field_type(kAttrData)
     PredicateType = DataType.get_field_type(kAttrPredicate)
@@ -96,7 +102,8 @@ class CgraWithContextSwitchRTL(Component):
                       total_steps, 4, 2, s.num_mesh_ports,
                       s.num_mesh_ports, num_cgras, s.num_tiles,
                       num_registers_per_reg_bank,
-                      FuList = FuList)
+                      FuList = FuList,
+                      num_context_slots = num_context_slots)
               for i in range(s.num_tiles)]
     s.data_mem = DataMemControllerRTL(NocPktType,
                                       data_mem_size_global,
@@ -111,7 +118,8 @@ class CgraWithContextSwitchRTL(Component):
                                       idTo2d_map)
     s.controller = ControllerRTL(NocPktType,
                                  multi_cgra_rows, multi_cgra_columns,
-                                 s.num_tiles, controller2addr_map, idTo2d_map)
+                                 s.num_tiles, controller2addr_map, idTo2d_map,
+                                 has_traffic_class_vcs)
     # An additional router for controller to receive CMD_COMPLETE signal from Ring to CPU.
     # The last argument of 1 is for the latency per hop.
     s.ctrl_ring = RingNetworkRTL(CtrlPktType, CtrlRingPos, s.num_tiles + 1, 1)
@@ -150,6 +158,11 @@ class CgraWithContextSwitchRTL(Component):
     s.recv_from_cpu_pkt //= s.controller.recv_from_cpu_pkt
     s.send_to_cpu_pkt //=  s.controller.send_to_cpu_pkt
 
+    # No bitstream loader.
+    s.controller.send_to_bitstream_loader.rdy //= 0
+    s.controller.recv_from_bitstream_loader.val //= 0
+    s.controller.recv_from_bitstream_loader.msg //= CtrlPktType()
+
     # Assigns tile id.
     for i in range(s.num_tiles):
       s.tile[i].tile_id //= i
@@ -157,6 +157,11 @@ class CgraWithStreamingLoadRTL(Component):
     s.recv_from_cpu_pkt //= s.controller.recv_from_cpu_pkt
     s.send_to_cpu_pkt //=  s.controller.send_to_cpu_pkt
 
+    # No bitstream loader.
+    s.controller.send_to_bitstream_loader.rdy //= 0
+    s.controller.recv_from_bitstream_loader.val //= 0
+    s.controller.recv_from_bitstream_loader.msg //= CtrlPktType()
+
     # Assigns tile id.
     for i in range(s.num_tiles):
       s.tile[i].tile_id //= i
@@ -0,0 +1,96 @@
+"""
+==========================================================================
+CgraRTL_buffer_depth_test.py
+==========================================================================
+Benchmark of the cycles taken by the FIR and the systolic kernels versus
+the depth of the tile input FIFOs and the output skid buffers, each of
+the kernels being also checked for its results at every depth. The
+tables are printed, e.g., with `pytest -s`.
+
+  Date : Oct 19, 2026
+"""
+
+from pymtl3.passes.backends.verilog import (VerilogVerilatorImportPass)
+from pymtl3.stdlib.test_utils import (run_sim,
+                                      config_model_with_cmdline_opts)
+
+from . import CgraRTL_fir_2x2_test
+from . import CgraRTL_test
+from ...fu.double.SeqMulAdderRTL import SeqMulAdderRTL
+from ...fu.float.FpAddRTL import FpAddRTL
+from ...fu.float.FpMulAddRTL import FpMulAddRTL
+from ...fu.float.FpMulRTL import FpMulRTL
+from ...fu.single.AdderRTL import AdderRTL
+from ...fu.single.CompRTL import CompRTL
+from ...fu.single.GrantRTL import GrantRTL
+from ...fu.single.LogicRTL import LogicRTL
+from ...fu.single.MemUnitRTL import MemUnitRTL
+from ...fu.single.MulRTL import MulRTL
+from ...fu.single.PhiRTL import PhiRTL
+from ...fu.single.SelRTL import SelRTL
+from ...fu.single.ShifterRTL import ShifterRTL
+from ...fu.vector.VectorAdderComboRTL import VectorAdderComboRTL
+from ...fu.vector.VectorMulComboRTL import VectorMulComboRTL
+
+# (input_fifo_depth, output_skid_depth) configurations to sweep, the
+# first one being the default.
+kBufferDepths = [(2, 0), (1, 0), (3, 0), (4, 0), (2, 1), (4, 2)]
+
+def print_table(kernel, cycles):
+  print()
+  print(f"{kernel}: cycles versus buffer depth")
+  print(f"{'input_fifo_depth':>16} {'output_skid_depth':>17} {'cycles':>8} {'speedup':>8}")
+  baseline = cycles[kBufferDepths[0]]
+  for (input_fifo_depth, output_skid_depth) in kBufferDepths:
+    count = cycles[(input_fifo_depth, output_skid_depth)]
+    print(f"{input_fifo_depth:>16} {output_skid_depth:>17} {count:>8} "
+          f"{baseline / count:>8.3f}")
+
+def sim_systolic(cmdline_opts, input_fifo_depths, output_skid_depth):
+  FuList = [AdderRTL,
+            MulRTL,
+            LogicRTL,
+            ShifterRTL,
+            PhiRTL,
+            CompRTL,
+            GrantRTL,
+            MemUnitRTL,
+            SelRTL,
+            FpAddRTL,
+            FpMulRTL,
+            FpMulAddRTL,
+            SeqMulAdderRTL,
+            VectorMulComboRTL,
+            VectorAdderComboRTL]
+
+  th = CgraRTL_test.init_param("Mesh", FuList, x_tiles = 3, y_tiles = 3,
+                               data_bitwidth = 32, test_name = 'systolic')
+  th.set_param("top.dut.tile*.construct",
+               input_fifo_depths = input_fifo_depths,
+               output_skid_depth = output_skid_depth)
+  th.elaborate()
+  th.dut.set_metadata(VerilogVerilatorImportPass.vl_Wno_list,
+                      ['UNSIGNED', 'UNOPTFLAT', 'WIDTH', 'WIDTHCONCAT',
+                       'ALWCOMBORDER'])
+  th = config_model_with_cmdline_opts(th, cmdline_opts, duts = ['dut'])
+  run_sim(th)
+  return th.sim_cycle_count()
+
+def test_fir_2x2_buffer_depth(cmdline_opts):
+  cycles = {}
+  for (input_fifo_depth, output_skid_depth) in kBufferDepths:
+    cycles[(input_fifo_depth, output_skid_depth)] = \
+        CgraRTL_fir_2x2_test.sim_fir_return(cmdline_opts,
+                                            mem_access_is_combinational = False,
+                                            has_ctrl_ring = True,
+                                            input_fifo_depths = input_fifo_depth,
+                                            output_skid_depth = output_skid_depth)
+  print_table("FIR 2x2", cycles)
+
+def test_systolic_3x3_buffer_depth(cmdline_opts):
+  cycles = {}
+  for (input_fifo_depth, output_skid_depth) in kBufferDepths:
+    cycles[(input_fifo_depth, output_skid_depth)] = \
+        sim_systolic(cmdline_opts, input_fifo_depth, output_skid_depth)
+  print_table("Systolic 3x3", cycles)
+
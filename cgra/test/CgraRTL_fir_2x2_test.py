@@ -9,6 +9,8 @@ Author : Cheng Tan
   Date : Aug 30, 2025
 """
 
+import pytest
+
 from pymtl3.passes.backends.verilog import (VerilogVerilatorImportPass)
 from pymtl3.stdlib.test_utils import (run_sim,
                                       config_model_with_cmdline_opts)
@@ -17,6 +19,7 @@ from ..CgraRTL import CgraRTL
 from ...fu.double.SeqMulAdderRTL import SeqMulAdderRTL
 from ...fu.flexible.FlexibleFuRTL import FlexibleFuRTL
 from ...fu.float.FpAddRTL import FpAddRTL
+from ...fu.float.FpMulAddRTL import FpMulAddRTL
 from ...fu.float.FpMulRTL import FpMulRTL
 from ...fu.quadra.FourIncCmpNotGrantRTL import FourIncCmpNotGrantRTL
 from ...fu.single.AdderRTL import AdderRTL
@@ -37,6 +40,7 @@ from ...lib.basic.val_rdy.SourceRTL import SourceRTL as TestSrcRTL
 from ...lib.messages import *
 from ...lib.opt_type import *
 from ...lib.util.common import *
+from ...lib.util.config_helper import check_prologue_slots, compress_config_pkts
 
 #-------------------------------------------------------------------------
 # Test harness
@@ -160,6 +164,7 @@ FuList = [AdderRTL,
           SelRTL,
           RetRTL,
           FourIncCmpNotGrantRTL,
+          FpMulAddRTL,
          ]
 x_tiles = 2
 y_tiles = 2
@@ -336,7 +341,10 @@ for (int i = 2; i < ?; ++i) {
 // expected sum = 2212 + 3 = 2215 (0x8a7)
 '''
 
-def sim_fir_return(cmdline_opts, mem_access_is_combinational, has_ctrl_ring):
+def mk_fir_return_th(mem_access_is_combinational, has_ctrl_ring,
+                     input_fifo_depths = DEFAULT_TILE_INPUT_FIFO_DEPTH,
+                     output_skid_depth = 0, routing_dict_size = 0,
+                     num_prologue_slots = None):
   src_ctrl_pkt = []
   complete_signal_sink_out = []
   src_query_pkt = []
@@ -720,6 +728,11 @@ def sim_fir_return(cmdline_opts, mem_access_is_combinational, has_ctrl_ring):
   complete_signal_sink_out.extend(expected_complete_sink_out_pkg)
   complete_signal_sink_out.extend(expected_mem_sink_out_pkt)
 
+  if routing_dict_size > 0:
+    src_ctrl_pkt = compress_config_pkts(src_ctrl_pkt, IntraCgraPktType,
+                                        routing_dict_size)
+  check_prologue_slots(src_ctrl_pkt, num_prologue_slots)
+
   th = TestHarness(DUT, FunctionUnit, FuList,
                    IntraCgraPktType,
                    cgra_id, x_tiles, y_tiles,
@@ -733,12 +746,27 @@ def sim_fir_return(cmdline_opts, mem_access_is_combinational, has_ctrl_ring):
                    num_cgra_rows, num_cgra_columns,
                    src_query_pkt)
 
+  th.set_param("top.dut.tile*.construct",
+               input_fifo_depths = input_fifo_depths,
+               output_skid_depth = output_skid_depth,
+               routing_dict_size = routing_dict_size)
+  th.set_param("top.dut.construct", num_prologue_slots = num_prologue_slots)
+  return th
+
+def sim_fir_return(cmdline_opts, mem_access_is_combinational, has_ctrl_ring,
+                   input_fifo_depths = DEFAULT_TILE_INPUT_FIFO_DEPTH,
+                   output_skid_depth = 0, routing_dict_size = 0,
+                   num_prologue_slots = None):
+  th = mk_fir_return_th(mem_access_is_combinational, has_ctrl_ring,
+                        input_fifo_depths, output_skid_depth,
+                        routing_dict_size, num_prologue_slots)
   th.elaborate()
   th.dut.set_metadata(VerilogVerilatorImportPass.vl_Wno_list,
                        ['UNSIGNED', 'UNOPTFLAT', 'WIDTH', 'WIDTHCONCAT',
                         'ALWCOMBORDER'])
   th = config_model_with_cmdline_opts(th, cmdline_opts, duts = ['dut'])
   run_sim(th)
+  return th.sim_cycle_count()
 
 def test_homogeneous_2x2_fir_combinational_mem_access_return(cmdline_opts):
   sim_fir_return(cmdline_opts, mem_access_is_combinational = True, has_ctrl_ring = True)
@@ -748,3 +776,12 @@ def test_homogeneous_2x2_fir_non_combinational_mem_access_return(cmdline_opts):
 
 def test_homogeneous_2x2_fir_non_combinational_mem_access_no_ctrl_ring(cmdline_opts):
   sim_fir_return(cmdline_opts, mem_access_is_combinational = False, has_ctrl_ring = False)
+
+def test_homogeneous_2x2_fir_prologue_slots(cmdline_opts):
+  # Tile 1 has the most prologue counters, i.e., three in its routing
+  # crossbar.
+  sim_fir_return(cmdline_opts, mem_access_is_combinational = True,
+                 has_ctrl_ring = True, num_prologue_slots = 3)
+  with pytest.raises(AssertionError, match = "routing_crossbar"):
+    mk_fir_return_th(mem_access_is_combinational = True, has_ctrl_ring = True,
+                     num_prologue_slots = 2)
@@ -17,6 +17,7 @@ from ..CgraRTL import CgraRTL
 from ...fu.double.SeqMulAdderRTL import SeqMulAdderRTL
 from ...fu.flexible.FlexibleFuRTL import FlexibleFuRTL
 from ...fu.float.FpAddRTL import FpAddRTL
+from ...fu.float.FpMulAddRTL import FpMulAddRTL
 from ...fu.float.FpMulRTL import FpMulRTL
 from ...fu.single.AdderRTL import AdderRTL
 from ...fu.single.GrantRTL import GrantRTL
@@ -151,6 +152,7 @@ FuList = [AdderRTL,
           MemUnitRTL,
           SelRTL,
           RetRTL,
+          FpMulAddRTL,
           ]
 x_tiles = 4
 y_tiles = 4
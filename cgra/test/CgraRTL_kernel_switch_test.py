@@ -0,0 +1,293 @@
+"""
+==========================================================================
+CgraRTL_kernel_switch_test.py
+==========================================================================
+Benchmark of the kernel-switch latency (see kernel_switch_helper), i.e.,
+the cycles from kernel A's last CMD_COMPLETE to kernel B's first useful
+op, broken down into the config, const, prologue and launch phases, on
+CgraRTL and CgraWithContextSwitchRTL versus the array size and the
+ctrl_mem_size. Both kernels fill the ctrl memory and the const queue of
+every tile, and the packets of kernel B are only sent by the CPU once
+all the tiles completed kernel A. CgraRTL switches with its double-
+buffered ctrl memory, the single-bank one, which cannot be relaunched,
+being reset and reconfigured as a baseline, while CgraWithContextSwitchRTL
+is torn down by CMD_TERMINATE first.
+
+The table is printed, e.g., with `pytest -s`, and the reports are dumped
+into the JSON file named by the KERNEL_SWITCH_REPORT environment variable
+(or into the temporary directory of the test).
+
+  Date : Oct 19, 2026
+"""
+
+import os
+
+from pymtl3.passes.backends.verilog import (VerilogVerilatorImportPass)
+from pymtl3.stdlib.test_utils import (config_model_with_cmdline_opts)
+
+from ..CgraRTL import CgraRTL
+from ..CgraWithContextSwitchRTL import CgraWithContextSwitchRTL
+from ...fu.flexible.FlexibleFuRTL import FlexibleFuRTL
+from ...fu.single.AdderRTL import AdderRTL
+from ...fu.single.MemUnitRTL import MemUnitRTL
+from ...lib.basic.val_rdy.SinkRTL import SinkRTL as TestSinkRTL
+from ...lib.basic.val_rdy.SourceRTL import SourceRTL as TestSrcRTL
+from ...lib.messages import *
+from ...lib.opt_type import *
+from ...lib.util.common import *
+from ...lib.util.kernel_switch_helper import *
+
+#-------------------------------------------------------------------------
+# Test harness
+#-------------------------------------------------------------------------
+
+class TestHarness(Component):
+
+  def construct(s, DUT, FunctionUnit, FuList, CtrlPktType,
+                cgra_id, width, height, ctrl_mem_size,
+                data_mem_size_global, data_mem_size_per_bank,
+                num_banks_per_cgra, num_registers_per_reg_bank,
+                topology, controller2addr_map, idTo2d_map,
+                multi_cgra_rows, multi_cgra_columns,
+                kernel_a_pkts, kernel_b_pkts):
+
+    CgraPayloadType = CtrlPktType.get_field_type(kAttrPayload)
+    DataType = CgraPayloadType.get_field_type(kAttrData)
+    DataAddrType = mk_bits(clog2(data_mem_size_global))
+    s.num_tiles = width * height
+    s.src_kernel_a = TestSrcRTL(CtrlPktType, kernel_a_pkts)
+    s.src_kernel_b = TestSrcRTL(CtrlPktType, kernel_b_pkts)
+
+    s.dut = DUT(CgraPayloadType,
+                multi_cgra_rows, multi_cgra_columns,
+                width, height, ctrl_mem_size,
+                data_mem_size_global, data_mem_size_per_bank,
+                num_banks_per_cgra, num_registers_per_reg_bank,
+                ctrl_mem_size, ctrl_mem_size, False,
+                FunctionUnit, FuList, topology,
+                controller2addr_map, idTo2d_map,
+                is_multi_cgra = False)
+
+    # Each tile completes both kernels. Without kernel_b_pkts, kernel A is
+    # sent again once the harness is reset (see reset_dut()), each run
+    # completing once.
+    num_kernels = 2 if kernel_b_pkts else 1
+    complete_pkts = [CtrlPktType(payload = CgraPayloadType(CMD_COMPLETE))
+                     for _ in range(num_kernels * s.num_tiles)]
+    cmp_fn = lambda a, b : a.payload.cmd == b.payload.cmd
+    s.complete_signal_sink_out = TestSinkRTL(CtrlPktType, complete_pkts,
+                                             cmp_fn = cmp_fn)
+
+    s.dut.cgra_id //= cgra_id
+    s.complete_signal_sink_out.recv //= s.dut.send_to_cpu_pkt
+
+    CompleteCountType = mk_bits(clog2(s.num_tiles + 1))
+    s.complete_count = Wire(CompleteCountType)
+
+    # Kernel B is only sent once all the tiles completed kernel A.
+    @update
+    def issue_kernel_a_then_b():
+      s.dut.recv_from_cpu_pkt.val @= s.src_kernel_a.send.val
+      s.dut.recv_from_cpu_pkt.msg @= s.src_kernel_a.send.msg
+      s.src_kernel_a.send.rdy @= 0
+      s.src_kernel_b.send.rdy @= 0
+      if (s.complete_count >= s.num_tiles) & ~s.src_kernel_a.send.val:
+        s.dut.recv_from_cpu_pkt.val @= s.src_kernel_b.send.val
+        s.dut.recv_from_cpu_pkt.msg @= s.src_kernel_b.send.msg
+        s.src_kernel_b.send.rdy @= s.dut.recv_from_cpu_pkt.rdy
+      else:
+        s.src_kernel_a.send.rdy @= s.dut.recv_from_cpu_pkt.rdy
+
+    @update_ff
+    def update_complete_count():
+      if s.reset:
+        s.complete_count <<= 0
+      elif s.complete_signal_sink_out.recv.val & s.complete_signal_sink_out.recv.rdy & \
+           (s.complete_count < s.num_tiles):
+        s.complete_count <<= s.complete_count + CompleteCountType(1)
+
+    s.dut.address_lower //= DataAddrType(controller2addr_map[cgra_id][0])
+    s.dut.address_upper //= DataAddrType(controller2addr_map[cgra_id][1])
+
+    for tile_col in range(width):
+      s.dut.send_data_on_boundary_north[tile_col].rdy //= 0
+      s.dut.recv_data_on_boundary_north[tile_col].val //= 0
+      s.dut.recv_data_on_boundary_north[tile_col].msg //= DataType()
+
+      s.dut.send_data_on_boundary_south[tile_col].rdy //= 0
+      s.dut.recv_data_on_boundary_south[tile_col].val //= 0
+      s.dut.recv_data_on_boundary_south[tile_col].msg //= DataType()
+
+    for tile_row in range(height):
+      s.dut.send_data_on_boundary_west[tile_row].rdy //= 0
+      s.dut.recv_data_on_boundary_west[tile_row].val //= 0
+      s.dut.recv_data_on_boundary_west[tile_row].msg //= DataType()
+
+      s.dut.send_data_on_boundary_east[tile_row].rdy //= 0
+      s.dut.recv_data_on_boundary_east[tile_row].val //= 0
+      s.dut.recv_data_on_boundary_east[tile_row].msg //= DataType()
+
+  def done(s):
+    return (s.src_kernel_a.done() and s.src_kernel_b.done()
+            and s.complete_signal_sink_out.done())
+
+  def line_trace(s):
+    return s.dut.line_trace()
+
+# Sizes to sweep.
+kArraySizes = [(2, 2), (4, 4)]
+kCtrlMemSizes = [4, 8, 16]
+
+def mk_kernel_pkts(pkt, DataType, ctrl, ctrl_mem_size, num_tiles):
+  # Fills the ctrl memory and the const queue of every tile, with one
+  # prologue count per ctrl signal, and runs each ctrl signal once. The
+  # packets are sent phase by phase across the tiles.
+  tiles = range(num_tiles)
+  return [pkt(i, CMD_CONFIG, ctrl_addr = addr, ctrl = ctrl)
+          for addr in range(ctrl_mem_size) for i in tiles] + \
+         [pkt(i, CMD_CONFIG_COUNT_PER_ITER, data = DataType(ctrl_mem_size, 1))
+          for i in tiles] + \
+         [pkt(i, CMD_CONFIG_TOTAL_CTRL_COUNT, data = DataType(ctrl_mem_size, 1))
+          for i in tiles] + \
+         [pkt(i, CMD_CONST, data = DataType(addr, 1))
+          for addr in range(ctrl_mem_size) for i in tiles] + \
+         [pkt(i, CMD_CONFIG_PROLOGUE_FU, ctrl_addr = addr, data = DataType(0, 1))
+          for addr in range(ctrl_mem_size) for i in tiles] + \
+         [pkt(i, CMD_LAUNCH) for i in tiles]
+
+def sim_kernel_switch(DUT, x_tiles, y_tiles, ctrl_mem_size, cmdline_opts,
+                      double_buffer_ctrl = True):
+  topology = MESH
+  num_tile_inports = 4
+  num_tile_outports = 4
+  num_fu_inports = 4
+  num_fu_outports = 2
+  num_routing_outports = num_tile_outports + num_fu_inports
+  data_mem_size_global = 128
+  data_mem_size_per_bank = 16
+  num_banks_per_cgra = 2
+  num_cgra_columns = 4
+  num_cgra_rows = 1
+  num_cgras = num_cgra_columns * num_cgra_rows
+  num_registers_per_reg_bank = 16
+  num_tiles = x_tiles * y_tiles
+  per_cgra_data_size = int(data_mem_size_global / num_cgras)
+  TileInType = mk_bits(clog2(num_tile_inports + num_fu_inports + 1))
+  FuInType = mk_bits(clog2(num_fu_inports + 1))
+  FuOutType = mk_bits(clog2(num_fu_outports + 1))
+  RegIdxType = mk_bits(clog2(num_registers_per_reg_bank))
+  DataAddrType = mk_bits(clog2(data_mem_size_global))
+  DataType = mk_data(32, 1)
+  cgra_id = 0
+  controller2addr_map = {}
+  for i in range(num_cgras):
+    controller2addr_map[i] = [i * per_cgra_data_size,
+                              (i + 1) * per_cgra_data_size - 1]
+  idTo2d_map = {0: [0, 0], 1: [1, 0], 2: [2, 0], 3: [3, 0]}
+
+  CtrlType = mk_ctrl(num_fu_inports,
+                     num_fu_outports,
+                     num_tile_inports,
+                     num_tile_outports,
+                     num_registers_per_reg_bank)
+  CtrlAddrType = mk_bits(clog2(ctrl_mem_size))
+  CgraPayloadType = mk_cgra_payload(DataType,
+                                    DataAddrType,
+                                    CtrlType,
+                                    CtrlAddrType)
+  IntraCgraPktType = mk_intra_cgra_pkt(num_cgra_columns,
+                                       num_cgra_rows,
+                                       num_tiles,
+                                       CgraPayloadType)
+  pkt = lambda dst, cmd, **kwargs: IntraCgraPktType(0, dst, payload = CgraPayloadType(cmd, **kwargs))
+
+  # Increments register 2 of bank 0 through the fu crossbar, without
+  # waiting for any data from the neighbours.
+  fu_xbar_code = [FuOutType(0) for _ in range(num_routing_outports)]
+  fu_xbar_code[num_tile_outports] = FuOutType(1)
+  ctrl = CtrlType(OPT_INC,
+                  [FuInType(1), FuInType(0), FuInType(0), FuInType(0)],
+                  [TileInType(0) for _ in range(num_routing_outports)],
+                  fu_xbar_code,
+                  read_reg_towards = [b2(READ_TOWARDS_FU), b2(0), b2(0), b2(0)],
+                  read_reg_idx = [RegIdxType(2), RegIdxType(0),
+                                  RegIdxType(0), RegIdxType(0)],
+                  write_reg_from = [b2(PORT_FU_CROSSBAR), b2(0), b2(0), b2(0)],
+                  write_reg_idx = [RegIdxType(2), RegIdxType(0),
+                                   RegIdxType(0), RegIdxType(0)])
+  kernel_pkts = mk_kernel_pkts(pkt, DataType, ctrl, ctrl_mem_size, num_tiles)
+  teardown_pkts = []
+  kernel_b_pkts = kernel_pkts
+  if DUT is CgraWithContextSwitchRTL:
+    teardown_pkts = [pkt(i, CMD_TERMINATE) for i in range(num_tiles)]
+    switch = "terminate"
+  elif double_buffer_ctrl:
+    switch = "double_buffer"
+  else:
+    # The single-bank ctrl memory cannot be relaunched once completed, so
+    # the CGRA is reset and kernel A's packets are sent again as kernel B.
+    kernel_b_pkts = []
+    switch = "reset"
+
+  th = TestHarness(DUT, FlexibleFuRTL, [AdderRTL, MemUnitRTL],
+                   IntraCgraPktType, cgra_id, x_tiles, y_tiles,
+                   ctrl_mem_size, data_mem_size_global,
+                   data_mem_size_per_bank, num_banks_per_cgra,
+                   num_registers_per_reg_bank, topology,
+                   controller2addr_map, idTo2d_map,
+                   num_cgra_rows, num_cgra_columns,
+                   kernel_pkts, teardown_pkts + kernel_b_pkts)
+  if DUT is CgraRTL:
+    th.set_param("top.dut.construct", double_buffer_ctrl = double_buffer_ctrl)
+  th.elaborate()
+  th.dut.set_metadata(VerilogVerilatorImportPass.vl_Wno_list,
+                      ['UNSIGNED', 'UNOPTFLAT', 'WIDTH', 'WIDTHCONCAT',
+                       'ALWCOMBORDER'])
+  th = config_model_with_cmdline_opts(th, cmdline_opts, duts = ['dut'])
+  th.apply(DefaultPassGroup(linetrace = False))
+  th.sim_reset()
+
+  monitor = KernelSwitchMonitor(th.dut.recv_from_cpu_pkt,
+                                th.dut.send_to_cpu_pkt,
+                                th.dut.tile, num_tiles)
+  if switch != "reset":
+    while not th.done() and th.sim_cycle_count() < 10000:
+      monitor.sample()
+      th.sim_tick()
+  else:
+    # Resets the CGRA right after kernel A's last CMD_COMPLETE, and runs
+    # until kernel B completes, as the sink stays done once it got all the
+    # CMD_COMPLETE of kernel A.
+    while monitor.complete_cycle is None and th.sim_cycle_count() < 10000:
+      monitor.sample()
+      th.sim_tick()
+    reset_dut(th, monitor)
+    while monitor.completes < 2 * num_tiles and th.sim_cycle_count() < 10000:
+      monitor.sample()
+      th.sim_tick()
+  assert th.done()
+
+  report = monitor.report()
+  assert report["num_pkts"] == len(teardown_pkts + kernel_pkts)
+  assert sum(report["breakdown"].values()) == report["total_cycles"]
+  return {"dut": DUT.__name__, "switch": switch,
+          "array": f"{x_tiles}x{y_tiles}", "ctrl_mem_size": ctrl_mem_size,
+          **report}
+
+def test_kernel_switch_latency(cmdline_opts, tmp_path):
+  reports = []
+  for DUT, double_buffer_ctrl in [(CgraRTL, True), (CgraRTL, False),
+                                  (CgraWithContextSwitchRTL, True)]:
+    for x_tiles, y_tiles in kArraySizes:
+      for ctrl_mem_size in kCtrlMemSizes:
+        reports.append(sim_kernel_switch(DUT, x_tiles, y_tiles,
+                                         ctrl_mem_size, cmdline_opts,
+                                         double_buffer_ctrl))
+
+  print()
+  print("Kernel switch latency (cycles)")
+  print(format_kernel_switch_reports(reports))
+  report_path = os.environ.get("KERNEL_SWITCH_REPORT",
+                               tmp_path / "kernel_switch_latency.json")
+  write_kernel_switch_json(report_path, reports)
+  print(f"Report written into {report_path}")
@@ -0,0 +1,109 @@
+"""
+==========================================================================
+CgraRTL_routing_dict_test.py
+==========================================================================
+Benchmark of the routing dictionary of the ctrl memory (see
+CtrlMemDynamicRTL) on the FIR and the systolic kernels, i.e., the ctrl
+memory bits of the CGRA, the number of configuration packets and the
+peak memory taken by the simulation versus the dictionary size, each of
+the kernels being also checked for its results. The tables are printed,
+e.g., with `pytest -s`.
+
+  Date : Oct 19, 2026
+"""
+
+import tracemalloc
+
+from pymtl3.passes.backends.verilog import (VerilogVerilatorImportPass)
+from pymtl3.stdlib.test_utils import (run_sim,
+                                      config_model_with_cmdline_opts)
+
+from . import CgraRTL_fir_2x2_test
+from . import CgraRTL_test
+from ...fu.double.SeqMulAdderRTL import SeqMulAdderRTL
+from ...fu.float.FpAddRTL import FpAddRTL
+from ...fu.float.FpMulAddRTL import FpMulAddRTL
+from ...fu.float.FpMulRTL import FpMulRTL
+from ...fu.single.AdderRTL import AdderRTL
+from ...fu.single.CompRTL import CompRTL
+from ...fu.single.GrantRTL import GrantRTL
+from ...fu.single.LogicRTL import LogicRTL
+from ...fu.single.MemUnitRTL import MemUnitRTL
+from ...fu.single.MulRTL import MulRTL
+from ...fu.single.PhiRTL import PhiRTL
+from ...fu.single.SelRTL import SelRTL
+from ...fu.single.ShifterRTL import ShifterRTL
+from ...fu.vector.VectorAdderComboRTL import VectorAdderComboRTL
+from ...fu.vector.VectorMulComboRTL import VectorMulComboRTL
+
+# Routing dictionary sizes to sweep, 0 being the uncompressed ctrl memory.
+kRoutingDictSizes = [0, 4, 8]
+
+def ctrl_mem_bits(th):
+  # Bits of the ctrl memory entries and of the routing dictionaries.
+  bits = 0
+  for tile in th.dut.tile:
+    bits += sum(reg.nbits for reg in tile.ctrl_mem.reg_file.regs)
+    if hasattr(tile.ctrl_mem, 'routing_dict'):
+      bits += sum(reg.nbits for reg in tile.ctrl_mem.routing_dict.regs)
+  return bits
+
+def sim_and_measure(th, cmdline_opts):
+  tracemalloc.start()
+  th.elaborate()
+  th.dut.set_metadata(VerilogVerilatorImportPass.vl_Wno_list,
+                      ['UNSIGNED', 'UNOPTFLAT', 'WIDTH', 'WIDTHCONCAT',
+                       'ALWCOMBORDER'])
+  th = config_model_with_cmdline_opts(th, cmdline_opts, duts = ['dut'])
+  run_sim(th)
+  peak_memory = tracemalloc.get_traced_memory()[1]
+  tracemalloc.stop()
+  return (ctrl_mem_bits(th), len(th.src_ctrl_pkt.msgs), peak_memory,
+          th.sim_cycle_count())
+
+def print_table(kernel, rows):
+  print()
+  print(f"{kernel}: routing dictionary")
+  print(f"{'dict size':>9} {'ctrl mem bits':>13} {'config pkts':>11} "
+        f"{'peak sim mem (MB)':>17} {'cycles':>6}")
+  for routing_dict_size in kRoutingDictSizes:
+    (bits, num_pkts, peak_memory, ncycles) = rows[routing_dict_size]
+    print(f"{routing_dict_size:>9} {bits:>13} {num_pkts:>11} "
+          f"{peak_memory / 1e6:>17.1f} {ncycles:>6}")
+
+def test_fir_2x2_routing_dict(cmdline_opts):
+  rows = {}
+  for routing_dict_size in kRoutingDictSizes:
+    th = CgraRTL_fir_2x2_test.mk_fir_return_th(
+        mem_access_is_combinational = False, has_ctrl_ring = True,
+        routing_dict_size = routing_dict_size)
+    rows[routing_dict_size] = sim_and_measure(th, cmdline_opts)
+  print_table("FIR 2x2", rows)
+  # The compressed kernel takes as many cycles.
+  assert all(row[3] == rows[0][3] for row in rows.values())
+
+def test_systolic_3x3_routing_dict(cmdline_opts):
+  FuList = [AdderRTL,
+            MulRTL,
+            LogicRTL,
+            ShifterRTL,
+            PhiRTL,
+            CompRTL,
+            GrantRTL,
+            MemUnitRTL,
+            SelRTL,
+            FpAddRTL,
+            FpMulRTL,
+            FpMulAddRTL,
+            SeqMulAdderRTL,
+            VectorMulComboRTL,
+            VectorAdderComboRTL]
+
+  rows = {}
+  for routing_dict_size in kRoutingDictSizes:
+    th = CgraRTL_test.init_param("Mesh", FuList, x_tiles = 3, y_tiles = 3,
+                                 data_bitwidth = 32, test_name = 'systolic',
+                                 routing_dict_size = routing_dict_size)
+    rows[routing_dict_size] = sim_and_measure(th, cmdline_opts)
+  print_table("Systolic 3x3", rows)
+  assert all(row[3] == rows[0][3] for row in rows.values())
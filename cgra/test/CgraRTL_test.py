@@ -17,6 +17,7 @@ from ..CgraRTL import CgraRTL
 from ...fu.double.SeqMulAdderRTL import SeqMulAdderRTL
 from ...fu.flexible.FlexibleFuRTL import FlexibleFuRTL
 from ...fu.float.FpAddRTL import FpAddRTL
+from ...fu.float.FpMulAddRTL import FpMulAddRTL
 from ...fu.float.FpMulRTL import FpMulRTL
 from ...fu.single.AdderRTL import AdderRTL
 from ...fu.single.GrantRTL import GrantRTL
@@ -36,6 +37,7 @@ from ...lib.basic.val_rdy.SourceRTL import SourceRTL as TestSrcRTL
 from ...lib.messages import *
 from ...lib.opt_type import *
 from ...lib.util.common import *
+from ...lib.util.config_helper import compress_config_pkts
 
 
 #-------------------------------------------------------------------------
@@ -144,7 +146,8 @@ class TestHarness(Component):
 
 def init_param(topology, FuList = [MemUnitRTL, AdderRTL],
                x_tiles = 2, y_tiles = 2, data_bitwidth = 32,
-               test_name = 'default', total_execute_ctrl_count = 1):
+               test_name = 'default', total_execute_ctrl_count = 1,
+               routing_dict_size = 0):
   tile_ports = 4
   assert(topology == MESH or topology == KING_MESH)
   if topology == MESH:
@@ -579,6 +582,10 @@ def init_param(topology, FuList = [MemUnitRTL, AdderRTL],
       complete_signal_sink_out.extend(expected_complete_sink_out_pkg)
       complete_signal_sink_out.extend(expected_mem_sink_out_pkt)
 
+  if routing_dict_size > 0:
+    src_ctrl_pkt = compress_config_pkts(src_ctrl_pkt, IntraCgraPktType,
+                                        routing_dict_size)
+
   mem_access_is_combinational = True
   th = TestHarness(DUT, FunctionUnit, FuList,
                    IntraCgraPktType,
@@ -591,6 +598,7 @@ def init_param(topology, FuList = [MemUnitRTL, AdderRTL],
                    controller2addr_map, idTo2d_map, complete_signal_sink_out,
                    num_cgra_rows, num_cgra_columns,
                    src_query_pkt)
+  th.set_param("top.dut.construct", routing_dict_size = routing_dict_size)
   return th
 
 def test_homogeneous_2x2(cmdline_opts):
@@ -717,6 +725,7 @@ def test_systolic_3x3(cmdline_opts):
             SelRTL,
             FpAddRTL,
             FpMulRTL,
+            FpMulAddRTL,
             SeqMulAdderRTL,
             VectorMulComboRTL,
             VectorAdderComboRTL]
@@ -19,7 +19,7 @@ from ...fu.double.SeqMulAdderRTL import SeqMulAdderRTL
 from ...fu.flexible.FlexibleFuRTL import FlexibleFuRTL
 from ...fu.single.AdderRTL import AdderRTL
 from ...fu.single.CompRTL import CompRTL
-from ...fu.single.ExclusiveDivRTL import ExclusiveDivRTL
+from ...fu.single.Radix4DivRTL import Radix4DivRTL
 from ...fu.single.GrantRTL import GrantRTL
 from ...fu.single.LogicRTL import LogicRTL
 from ...fu.single.MemUnitRTL import MemUnitRTL
@@ -52,7 +52,7 @@ fuType2RTL["Ret"  ] = RetRTL
 fuType2RTL["Mul"  ] = MulRTL
 fuType2RTL["Logic"] = LogicRTL
 fuType2RTL["Grant"] = GrantRTL
-fuType2RTL["Div"  ] = ExclusiveDivRTL
+fuType2RTL["Div"  ] = Radix4DivRTL
 
 #-------------------------------------------------------------------------
 # Test harness
@@ -144,7 +144,7 @@ def test_cgra_universal(cmdline_opts, arch_yaml_path = "arch.yaml", cgra_param =
   num_tiles = width * height
   DUT = CgraTemplateRTL
   FunctionUnit = FlexibleFuRTL
-  FuList = [PhiRTL, AdderRTL, ShifterRTL, MemUnitRTL, SelRTL, CompRTL, SeqMulAdderRTL, RetRTL, MulRTL, LogicRTL, GrantRTL, ExclusiveDivRTL]
+  FuList = [PhiRTL, AdderRTL, ShifterRTL, MemUnitRTL, SelRTL, CompRTL, SeqMulAdderRTL, RetRTL, MulRTL, LogicRTL, GrantRTL, Radix4DivRTL]
   data_nbits = 32
   DataType = mk_data(data_nbits, 1)
   PredicateType = mk_predicate(1, 1)
@@ -53,7 +53,8 @@ class TestHarness(Component):
                 src_ctrl_pkt, kCtrlCountPerIter, kTotalCtrlSteps,
                 mem_access_is_combinational, controller2addr_map,
                 idTo2d_map, complete_signal_sink_out,
-                multi_cgra_rows, multi_cgra_columns, src_query_pkt):
+                multi_cgra_rows, multi_cgra_columns, src_query_pkt,
+                num_context_slots = 0):
 
     CgraPayloadType = CtrlPktType.get_field_type(kAttrPayload)
     DataType = CgraPayloadType.get_field_type(kAttrData)
@@ -73,7 +74,8 @@ class TestHarness(Component):
                 mem_access_is_combinational,
                 FunctionUnit, FuList, "KingMesh",
                 controller2addr_map, idTo2d_map,
-                is_multi_cgra = False)
+                is_multi_cgra = False,
+                num_context_slots = num_context_slots)
 
     cmp_fn = lambda a, b : a.payload.data == b.payload.data and a.payload.cmd == b.payload.cmd
     s.complete_signal_sink_out = TestSinkRTL(CtrlPktType, complete_signal_sink_out, cmp_fn = cmp_fn)
@@ -86,7 +88,7 @@ class TestHarness(Component):
             sum(1 for pkt in complete_signal_sink_out \
                 if pkt.payload.cmd == CMD_COMPLETE)
 
-    CompleteCountType = mk_bits(clog2(complete_count_value + 1))
+    CompleteCountType = mk_bits(max(1, clog2(complete_count_value + 1)))
     s.complete_count = Wire(CompleteCountType)
 
     @update
@@ -1497,3 +1499,45 @@ def test_sim_fir_combinational_mem_access_return_two_tasks(cmdline_opts):
 
 def test_sim_fir_multi_cycle_mem_access_return_two_tasks(cmdline_opts):
   sim_fir_return_two_tasks(cmdline_opts, mem_access_is_combinational = False)
+
+def test_context_switch_latency():
+  # Measures the cycles from the first tile accepting CMD_SAVE_CONTEXT to
+  # all the tiles resuming, i.e., the whole CGRA is preempted by saving
+  # the context of every tile into slot 0, terminated, and resumed by
+  # restoring the context. The latency is printed, e.g., with `pytest -s`.
+  tiles = range(num_tiles)
+  src_ctrl_pkt = \
+      [IntraCgraPktType(0, i, payload = CgraPayloadType(CMD_SAVE_CONTEXT, data = DataType(0, 1))) for i in tiles] + \
+      [IntraCgraPktType(0, i, payload = CgraPayloadType(CMD_TERMINATE)) for i in tiles] + \
+      [IntraCgraPktType(0, i, payload = CgraPayloadType(CMD_RESTORE_CONTEXT, data = DataType(0, 1))) for i in tiles] + \
+      [IntraCgraPktType(0, i, payload = CgraPayloadType(CMD_RESUME)) for i in tiles]
+
+  th = TestHarness(DUT, FunctionUnit, FuList,
+                   IntraCgraPktType,
+                   cgra_id, x_tiles, y_tiles,
+                   ctrl_mem_size, data_mem_size_global,
+                   data_mem_size_per_bank, num_banks_per_cgra,
+                   num_registers_per_reg_bank,
+                   src_ctrl_pkt, 1, 1, True,
+                   controller2addr_map, idTo2d_map, [],
+                   num_cgra_rows, num_cgra_columns, [],
+                   num_context_slots = 2)
+  th.elaborate()
+  th.apply(DefaultPassGroup())
+  th.sim_reset()
+
+  ncycles = 0
+  save_cycle = None
+  while not all(tile.ctrl_mem.start_iterate_ctrl for tile in th.dut.tile) and \
+        ncycles < 1000:
+    if (save_cycle is None) and \
+       any(tile.context_save_restore.saving for tile in th.dut.tile):
+      save_cycle = ncycles
+    th.sim_tick()
+    ncycles += 1
+
+  save_to_resume = ncycles - save_cycle
+  print()
+  print(f"{x_tiles}x{y_tiles} CGRA, {num_registers_per_reg_bank} registers/bank: "
+        f"save-to-resume latency {save_to_resume} cycles")
+  assert save_to_resume < 300
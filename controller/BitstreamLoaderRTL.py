@@ -0,0 +1,223 @@
+"""
+==========================================================================
+BitstreamLoaderRTL.py
+==========================================================================
+Streams a config bitstream (see lib/util/bitstream_helper.py) out of the
+SPM into the tiles. Upon receiving the start address, the loader keeps
+fetching the consecutive words of the bitstream into a shift buffer, one
+outstanding read at a time, while decoding the header, the sections and
+the records at the bottom of the buffer. Each record is expanded back
+into the packet it was serialized from, i.e., with the route of its
+section and the omitted payload fields being zero, and sent towards the
+ctrl ring, one packet per cycle as long as the buffer holds the record.
+
+The loader may read ahead a few words past the end of the bitstream,
+whose data is dropped.
+
+  Date : Oct 19, 2026
+"""
+
+from pymtl3 import *
+from ..lib.basic.val_rdy.ifcs import ValRdyRecvIfcRTL as RecvIfcRTL
+from ..lib.basic.val_rdy.ifcs import ValRdySendIfcRTL as SendIfcRTL
+from ..lib.cmd_type import *
+from ..lib.util.bitstream_helper import BITSTREAM_RECORD_FIELDS
+from ..lib.util.common import *
+from ..lib.util.data_struct_attr import *
+
+# Loader states.
+LOADER_STATE_IDLE    = 0
+LOADER_STATE_HEADER  = 1
+LOADER_STATE_SECTION = 2
+LOADER_STATE_RECORD  = 3
+
+class BitstreamLoaderRTL(Component):
+
+  def construct(s, IntraCgraPktType):
+
+    # Derives the types from IntraCgraPktType.
+    CgraPayloadType = IntraCgraPktType.get_field_type(kAttrPayload)
+    DataType = CgraPayloadType.get_field_type(kAttrData)
+    CmdType = CgraPayloadType.get_field_type(kAttrCmd)
+    DataBitsType = mk_bits(DataType.nbits)
+    DataAddrType = CgraPayloadType.get_field_type(kAttrDataAddr)
+    CtrlBitsType = mk_bits(CgraPayloadType.get_field_type(kAttrCtrl).nbits)
+    CtrlAddrType = CgraPayloadType.get_field_type(kAttrCtrlAddr)
+
+    # Constants.
+    word_nbits = DataType.get_field_type(kAttrPayload).nbits
+    route_nbits = IntraCgraPktType.nbits - CgraPayloadType.nbits
+    mask_nbits = len(BITSTREAM_RECORD_FIELDS)
+    record_header_nbits = CmdType.nbits + mask_nbits
+    section_nbits = route_nbits + BITSTREAM_COUNT_NBITS
+    max_record_nbits = record_header_nbits + DataType.nbits + \
+                       DataAddrType.nbits + CtrlBitsType.nbits + \
+                       CtrlAddrType.nbits
+    # The buffer takes one more word whenever it is short of a record.
+    buffer_nbits = max(section_nbits, max_record_nbits) + word_nbits
+    BufferType = mk_bits(buffer_nbits)
+    BitCountType = mk_bits(clog2(buffer_nbits + 1))
+    CountType = mk_bits(BITSTREAM_COUNT_NBITS)
+    RouteType = mk_bits(route_nbits)
+    MaskType = mk_bits(mask_nbits)
+    StateType = mk_bits(2)
+
+    # Interface
+    # Receives the SPM address of the bitstream.
+    s.recv_start = RecvIfcRTL(DataAddrType)
+    # Reads the bitstream out of the SPM.
+    s.to_mem_raddr = SendIfcRTL(DataAddrType)
+    s.from_mem_rdata = RecvIfcRTL(DataType)
+    # Sends the decoded packets towards the ctrl ring.
+    s.send_pkt = SendIfcRTL(IntraCgraPktType)
+
+    # Components
+    s.state = Wire(StateType)
+    s.addr = Wire(DataAddrType)
+    s.requested = Wire(b1)
+    s.buffer = Wire(BufferType)
+    s.bit_count = Wire(BitCountType)
+    s.sections_left = Wire(CountType)
+    s.records_left = Wire(CountType)
+    s.route = Wire(RouteType)
+    s.consumed = Wire(BitCountType)
+
+    # The record at the bottom of the buffer.
+    s.record_cmd = Wire(CmdType)
+    s.record_mask = Wire(MaskType)
+    s.record_nbits = Wire(BitCountType)
+    s.record_data = Wire(DataBitsType)
+    s.record_data_addr = Wire(DataAddrType)
+    s.record_ctrl = Wire(CtrlBitsType)
+    s.record_ctrl_addr = Wire(CtrlAddrType)
+    # The remaining bits of the record after each of its fields.
+    s.record_rest = [Wire(BufferType) for _ in range(mask_nbits)]
+
+    @update
+    def update_mem_access():
+      # Only fetches the next word if it fits into the buffer once the
+      # outstanding read has come back.
+      s.to_mem_raddr.val @= (s.state != LOADER_STATE_IDLE) & ~s.requested & \
+                            (s.bit_count <= BitCountType(buffer_nbits - word_nbits))
+      s.to_mem_raddr.msg @= s.addr
+      s.from_mem_rdata.rdy @= s.requested | s.to_mem_raddr.val
+      s.recv_start.rdy @= (s.state == LOADER_STATE_IDLE) & ~s.requested
+
+    @update
+    def decode_record():
+      s.record_cmd @= s.buffer[0:CmdType.nbits]
+      s.record_mask @= s.buffer[CmdType.nbits:record_header_nbits]
+      s.record_rest[0] @= s.buffer >> record_header_nbits
+      s.record_nbits @= BitCountType(record_header_nbits)
+
+      s.record_data @= 0
+      s.record_rest[1] @= s.record_rest[0]
+      if s.record_mask[0]:
+        s.record_data @= s.record_rest[0][0:DataType.nbits]
+        s.record_rest[1] @= s.record_rest[0] >> DataType.nbits
+        s.record_nbits @= s.record_nbits + BitCountType(DataType.nbits)
+
+      s.record_data_addr @= 0
+      s.record_rest[2] @= s.record_rest[1]
+      if s.record_mask[1]:
+        s.record_data_addr @= s.record_rest[1][0:DataAddrType.nbits]
+        s.record_rest[2] @= s.record_rest[1] >> DataAddrType.nbits
+        s.record_nbits @= s.record_nbits + BitCountType(DataAddrType.nbits)
+
+      s.record_ctrl @= 0
+      s.record_rest[3] @= s.record_rest[2]
+      if s.record_mask[2]:
+        s.record_ctrl @= s.record_rest[2][0:CtrlBitsType.nbits]
+        s.record_rest[3] @= s.record_rest[2] >> CtrlBitsType.nbits
+        s.record_nbits @= s.record_nbits + BitCountType(CtrlBitsType.nbits)
+
+      s.record_ctrl_addr @= 0
+      if s.record_mask[3]:
+        s.record_ctrl_addr @= s.record_rest[3][0:CtrlAddrType.nbits]
+        s.record_nbits @= s.record_nbits + BitCountType(CtrlAddrType.nbits)
+
+    @update
+    def update_send_pkt():
+      s.send_pkt.val @= 0
+      s.send_pkt.msg @= concat(s.route, s.record_cmd, s.record_data,
+                               s.record_data_addr, s.record_ctrl,
+                               s.record_ctrl_addr)
+      s.consumed @= 0
+      if s.state == LOADER_STATE_HEADER:
+        if s.bit_count >= BitCountType(BITSTREAM_COUNT_NBITS):
+          s.consumed @= BitCountType(BITSTREAM_COUNT_NBITS)
+      elif s.state == LOADER_STATE_SECTION:
+        if s.bit_count >= BitCountType(section_nbits):
+          s.consumed @= BitCountType(section_nbits)
+      elif s.state == LOADER_STATE_RECORD:
+        # The bits above `bit_count` are zero, so that the record length
+        # decoded out of an incomplete header never exceeds the one of the
+        # complete record.
+        if s.bit_count >= s.record_nbits:
+          s.send_pkt.val @= 1
+          if s.send_pkt.rdy:
+            s.consumed @= s.record_nbits
+
+    @update_ff
+    def update_buffer():
+      if s.reset:
+        s.requested <<= 0
+        s.addr <<= 0
+        s.buffer <<= 0
+        s.bit_count <<= 0
+      else:
+        if s.to_mem_raddr.val & s.to_mem_raddr.rdy:
+          s.addr <<= s.addr + DataAddrType(1)
+          if ~(s.from_mem_rdata.val & s.from_mem_rdata.rdy):
+            s.requested <<= 1
+        elif s.from_mem_rdata.val & s.from_mem_rdata.rdy:
+          s.requested <<= 0
+
+        if s.recv_start.val & s.recv_start.rdy:
+          s.addr <<= s.recv_start.msg
+          s.buffer <<= 0
+          s.bit_count <<= 0
+        # The words read ahead past the end of the bitstream are dropped.
+        elif s.from_mem_rdata.val & s.from_mem_rdata.rdy & \
+             (s.state != LOADER_STATE_IDLE):
+          s.buffer <<= (s.buffer >> zext(s.consumed, BufferType)) | \
+                       (zext(s.from_mem_rdata.msg.payload, BufferType) << \
+                        zext(s.bit_count - s.consumed, BufferType))
+          s.bit_count <<= s.bit_count - s.consumed + BitCountType(word_nbits)
+        else:
+          s.buffer <<= s.buffer >> zext(s.consumed, BufferType)
+          s.bit_count <<= s.bit_count - s.consumed
+
+    @update_ff
+    def update_state():
+      if s.reset:
+        s.state <<= LOADER_STATE_IDLE
+        s.sections_left <<= 0
+        s.records_left <<= 0
+        s.route <<= 0
+      elif s.recv_start.val & s.recv_start.rdy:
+        s.state <<= LOADER_STATE_HEADER
+      elif s.consumed != BitCountType(0):
+        if s.state == LOADER_STATE_HEADER:
+          s.sections_left <<= s.buffer[0:BITSTREAM_COUNT_NBITS]
+          if s.buffer[0:BITSTREAM_COUNT_NBITS] == CountType(0):
+            s.state <<= LOADER_STATE_IDLE
+          else:
+            s.state <<= LOADER_STATE_SECTION
+        elif s.state == LOADER_STATE_SECTION:
+          s.route <<= s.buffer[0:route_nbits]
+          s.records_left <<= s.buffer[route_nbits:section_nbits]
+          s.state <<= LOADER_STATE_RECORD
+        elif s.state == LOADER_STATE_RECORD:
+          s.records_left <<= s.records_left - CountType(1)
+          if s.records_left == CountType(1):
+            s.sections_left <<= s.sections_left - CountType(1)
+            if s.sections_left == CountType(1):
+              s.state <<= LOADER_STATE_IDLE
+            else:
+              s.state <<= LOADER_STATE_SECTION
+
+  def line_trace(s):
+    return f'state: {s.state} | addr: {s.addr} | bits: {s.bit_count} | ' \
+           f'sections_left: {s.sections_left} | records_left: {s.records_left} | ' \
+           f'send_pkt: {s.send_pkt}'
@@ -17,6 +17,7 @@ from ..lib.opt_type import *
 from ..lib.util.common import *
 from ..noc.PyOCN.pymtl3_net.channel.ChannelRTL import ChannelRTL
 from ..noc.PyOCN.pymtl3_net.xbar.XbarRTL import XbarRTL
+from ..noc.PriorityXbarRTL import PriorityXbarRTL
 
 from .GlobalReduceUnitRTL import GlobalReduceUnitRTL
 from ..lib.util.data_struct_attr import *
@@ -29,12 +30,14 @@ class ControllerRTL(Component):
                 multi_cgra_columns,
                 num_tiles,
                 controller2addr_map,
-                idTo2d_map):
+                idTo2d_map,
+                has_traffic_class_vcs = False):
 
     # Derives types from InterCgraPktType.
     CgraPayloadType = InterCgraPktType.get_field_type(kAttrPayload)
     DataType = CgraPayloadType.get_field_type(kAttrData)
     DataAddrType = CgraPayloadType.get_field_type(kAttrDataAddr)
+    VcIdType = InterCgraPktType.get_field_type(kAttrVcId)
     
     # Derives CgraIdType from grid dimensions.
     CgraIdType = mk_cgra_id_type(multi_cgra_columns, multi_cgra_rows)
@@ -75,6 +78,11 @@ class ControllerRTL(Component):
     s.send_to_tile_load_response = SendIfcRTL(InterCgraPktType)
     s.send_to_mem_store_request = SendIfcRTL(InterCgraPktType)
 
+    # Starts the bitstream loader upon CMD_LOAD_BITSTREAM, whose packets
+    # towards the tiles then share the ctrl ring with the ones from NoC.
+    s.send_to_bitstream_loader = SendIfcRTL(DataAddrType)
+    s.recv_from_bitstream_loader = RecvIfcRTL(IntraCgraPktType)
+
     # Component
     s.recv_from_tile_load_request_pkt_queue = ChannelRTL(InterCgraPktType, latency = 1)
     s.recv_from_tile_load_response_pkt_queue = ChannelRTL(InterCgraPktType, latency = 1)
@@ -88,7 +96,21 @@ class ControllerRTL(Component):
     # memory, load response from local memory, ctrl&data packet from cpu,
     # and command signal from inter-tile, i.e., intra-cgra, ring) and 1 
     # outport (only allow one request be sent out per cycle).
-    s.crossbar = XbarRTL(ControllerXbarPktType, CONTROLLER_CROSSBAR_INPORTS, 1)
+    if has_traffic_class_vcs:
+      # Each inport is prioritized by the traffic class (i.e., the VC on
+      # the inter-CGRA NoC) it carries, so that the responses are never
+      # stuck behind the requests.
+      crossbar_inport_vcs = [INTER_CGRA_VC_LOAD_REQUEST,  # load request
+                             INTER_CGRA_VC_LOAD_RESPONSE, # load response
+                             INTER_CGRA_VC_STORE_REQUEST, # store request
+                             INTER_CGRA_VC_CTRL,          # from cpu
+                             INTER_CGRA_VC_CTRL,          # from ctrl ring
+                             INTER_CGRA_VC_CTRL]          # from reduce unit
+      s.crossbar = PriorityXbarRTL(ControllerXbarPktType,
+                                   CONTROLLER_CROSSBAR_INPORTS, 1,
+                                   crossbar_inport_vcs)
+    else:
+      s.crossbar = XbarRTL(ControllerXbarPktType, CONTROLLER_CROSSBAR_INPORTS, 1)
     s.recv_from_cpu_pkt_queue = NormalQueueRTL(IntraCgraPktType)
     s.send_to_cpu_pkt_queue = NormalQueueRTL(IntraCgraPktType)
 
@@ -122,6 +144,7 @@ class ControllerRTL(Component):
       s.idTo2d_y_lut[cgra_id] //= YType(xy[1])
 
     s.addr_dst_id = Wire(CgraIdType)
+    s.send_to_inter_cgra_noc_vc_id = Wire(VcIdType)
 
     # Connections.
     # Requests towards others, 1 cycle delay to improve timing.
@@ -242,6 +265,9 @@ class ControllerRTL(Component):
       s.global_reduce_unit.recv_count.msg @= InterCgraPktType(0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0)
       s.global_reduce_unit.recv_data.val @= 0
       s.global_reduce_unit.recv_data.msg @= InterCgraPktType(0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0)
+      s.send_to_bitstream_loader.val @= 0
+      s.send_to_bitstream_loader.msg @= DataAddrType(0)
+      s.recv_from_bitstream_loader.rdy @= 0
 
       # For the load request from NoC.
       received_pkt = s.recv_from_inter_cgra_noc.msg
@@ -286,7 +312,8 @@ class ControllerRTL(Component):
             s.send_to_tile_load_response_queue.recv.msg @= received_pkt
             s.send_to_tile_load_response_queue.recv.val @= 1
 
-        elif s.recv_from_inter_cgra_noc.msg.payload.cmd == CMD_COMPLETE:
+        elif (s.recv_from_inter_cgra_noc.msg.payload.cmd == CMD_COMPLETE) | \
+             (s.recv_from_inter_cgra_noc.msg.payload.cmd == CMD_CONFIG_REJECTED):
           s.recv_from_inter_cgra_noc.rdy @= s.send_to_cpu_pkt_queue.recv.rdy
           s.send_to_cpu_pkt_queue.recv.val @= 1
           s.send_to_cpu_pkt_queue.recv.msg @= \
@@ -317,10 +344,21 @@ class ControllerRTL(Component):
           s.global_reduce_unit.recv_count.val @= 1
           s.global_reduce_unit.recv_count.msg @= s.recv_from_inter_cgra_noc.msg
 
+        elif s.recv_from_inter_cgra_noc.msg.payload.cmd == CMD_LOAD_BITSTREAM:
+          s.recv_from_inter_cgra_noc.rdy @= s.send_to_bitstream_loader.rdy
+          s.send_to_bitstream_loader.val @= 1
+          s.send_to_bitstream_loader.msg @= s.recv_from_inter_cgra_noc.msg.payload.data_addr
+
         elif (s.recv_from_inter_cgra_noc.msg.payload.cmd == CMD_CONFIG) | \
              (s.recv_from_inter_cgra_noc.msg.payload.cmd == CMD_CONFIG_PROLOGUE_FU) | \
              (s.recv_from_inter_cgra_noc.msg.payload.cmd == CMD_CONFIG_PROLOGUE_FU_CROSSBAR) | \
              (s.recv_from_inter_cgra_noc.msg.payload.cmd == CMD_CONFIG_PROLOGUE_ROUTING_CROSSBAR) | \
+             (s.recv_from_inter_cgra_noc.msg.payload.cmd == CMD_CONFIG_PACKED) | \
+             (s.recv_from_inter_cgra_noc.msg.payload.cmd == CMD_CONFIG_PACKED_OPS) | \
+             (s.recv_from_inter_cgra_noc.msg.payload.cmd == CMD_CONFIG_PROLOGUE_FU_PACKED) | \
+             (s.recv_from_inter_cgra_noc.msg.payload.cmd == CMD_CONFIG_CTRL_STORE) | \
+             (s.recv_from_inter_cgra_noc.msg.payload.cmd == CMD_CONFIG_ROUTING_DICT) | \
+             (s.recv_from_inter_cgra_noc.msg.payload.cmd == CMD_CONFIG_DEFAULT_NOP) | \
              (s.recv_from_inter_cgra_noc.msg.payload.cmd == CMD_CONFIG_TOTAL_CTRL_COUNT) | \
              (s.recv_from_inter_cgra_noc.msg.payload.cmd == CMD_CONFIG_COUNT_PER_ITER) | \
              (s.recv_from_inter_cgra_noc.msg.payload.cmd == CMD_CONFIG_CTRL_LOWER_BOUND) | \
@@ -334,6 +372,8 @@ class ControllerRTL(Component):
              (s.recv_from_inter_cgra_noc.msg.payload.cmd == CMD_PRESERVE) | \
              (s.recv_from_inter_cgra_noc.msg.payload.cmd == CMD_RESUME) | \
              (s.recv_from_inter_cgra_noc.msg.payload.cmd == CMD_RECORD_PHI_ADDR) | \
+             (s.recv_from_inter_cgra_noc.msg.payload.cmd == CMD_SAVE_CONTEXT) | \
+             (s.recv_from_inter_cgra_noc.msg.payload.cmd == CMD_RESTORE_CONTEXT) | \
              (s.recv_from_inter_cgra_noc.msg.payload.cmd == CMD_TERMINATE) | \
              (s.recv_from_inter_cgra_noc.msg.payload.cmd == CMD_LAUNCH) | \
              (s.recv_from_inter_cgra_noc.msg.payload.cmd == CMD_CONFIG_LOOP_LOWER) | \
@@ -358,11 +398,21 @@ class ControllerRTL(Component):
         #   # TODO: Handle other cmd types.
         #   assert(False)
 
+      # The bitstream loader takes the ctrl ring whenever NoC does not.
+      if ~s.send_to_ctrl_ring_pkt.val:
+        s.recv_from_bitstream_loader.rdy @= s.send_to_ctrl_ring_pkt.rdy
+        s.send_to_ctrl_ring_pkt.val @= s.recv_from_bitstream_loader.val
+        s.send_to_ctrl_ring_pkt.msg @= s.recv_from_bitstream_loader.msg
+
+    # The NoC could decide its readiness based on the VC of the message,
+    # so the ready signal is directly connected.
+    s.crossbar.send[0].rdy //= s.send_to_inter_cgra_noc.rdy
+
     @update
     def update_sending_to_noc_msg():
       s.send_to_inter_cgra_noc.val @= s.crossbar.send[0].val
-      s.crossbar.send[0].rdy @= s.send_to_inter_cgra_noc.rdy
       s.send_to_inter_cgra_noc.msg @= s.crossbar.send[0].msg.inter_cgra_pkt
+      s.send_to_inter_cgra_noc.msg.vc_id @= s.send_to_inter_cgra_noc_vc_id
       # addr_dst_id = 0
       if (s.crossbar.send[0].msg.inter_cgra_pkt.payload.cmd == CMD_LOAD_REQUEST) | \
          (s.crossbar.send[0].msg.inter_cgra_pkt.payload.cmd == CMD_STORE_REQUEST):
@@ -370,6 +420,19 @@ class ControllerRTL(Component):
         s.send_to_inter_cgra_noc.msg.dst_x @= s.idTo2d_x_lut[s.addr_dst_id]
         s.send_to_inter_cgra_noc.msg.dst_y @= s.idTo2d_y_lut[s.addr_dst_id]
 
+    if has_traffic_class_vcs:
+      @update
+      def update_sending_to_noc_vc():
+        s.send_to_inter_cgra_noc_vc_id @= INTER_CGRA_VC_CTRL
+        if s.crossbar.send[0].msg.inter_cgra_pkt.payload.cmd == CMD_LOAD_REQUEST:
+          s.send_to_inter_cgra_noc_vc_id @= INTER_CGRA_VC_LOAD_REQUEST
+        elif s.crossbar.send[0].msg.inter_cgra_pkt.payload.cmd == CMD_STORE_REQUEST:
+          s.send_to_inter_cgra_noc_vc_id @= INTER_CGRA_VC_STORE_REQUEST
+        elif s.crossbar.send[0].msg.inter_cgra_pkt.payload.cmd == CMD_LOAD_RESPONSE:
+          s.send_to_inter_cgra_noc_vc_id @= INTER_CGRA_VC_LOAD_RESPONSE
+    else:
+      s.send_to_inter_cgra_noc_vc_id //= s.crossbar.send[0].msg.inter_cgra_pkt.vc_id
+
     @update
     def capture_addr_dst_id():
       s.addr_dst_id @= s.addr2controller_lut[trunc(s.crossbar.send[0].msg.inter_cgra_pkt.payload.data_addr >> addr_offset_nbits, CgraIdType)]
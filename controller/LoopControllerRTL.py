@@ -24,6 +24,19 @@ Each target is dispatched in a single cycle:
   - shadow_only targets: CMD_UPDATE_COUNTER_SHADOW_VALUE (delivery DCU)
   - normal targets:      CMD_RESET_LEAF_COUNTER (leaf DCU)
 
+With `dispatch_width` > 1, up to that many targets are dispatched per
+cycle, the target at offset j of each group going through lane j of the
+tile side (`send_to_tile` being lane 0, `send_to_tile_extra[j - 1]` the
+other ones), or through `send_to_remote` for the remote ones, one per
+cycle. A group only moves on once all of its targets went through, so
+the inter-iteration bubble of a CCU with N targets shrinks from N to
+ceil(N / dispatch_width) cycles. `ccu_dispatch_cycles` and
+`ccu_dispatch_rounds` account for the cycles each CCU spent DISPATCHING
+and the number of outer iterations it dispatched since CMD_LC_LAUNCH.
+
+The CCUs are addressed by the `ctrl_addr` of the configuration packets,
+so there can be up to `ctrl_mem_size` of them.
+
 NOTE: The `target.ctrl_addr` sent from LC acts as a Loop ID (Context ID) 
 to the target DCU. If a CGRA is spatial-only (ctrl_mem_size == 1), each DCU 
 only has 1 `ctrl_addr`. Therefore, a spatial-only DCU can only host 1 loop. 
@@ -55,7 +68,12 @@ class LoopControllerRTL(Component):
                 ctrl_mem_size = 8,
                 num_tiles = 4,
                 num_cgra_columns = 1,
-                num_cgra_rows = 1):
+                num_cgra_rows = 1,
+                dispatch_width = 1):
+
+    assert 1 <= dispatch_width <= max_targets_per_ccu
+    assert num_ccus <= ctrl_mem_size, \
+        f"The {num_ccus} CCUs cannot be addressed by the ctrl_addr of {ctrl_mem_size} entries."
 
     # ===== Derived Types =====
     AddrType = mk_bits(clog2(data_mem_size))
@@ -65,13 +83,18 @@ class LoopControllerRTL(Component):
     TileIdType = mk_bits(clog2(num_tiles + 1))
     CgraIdType = mk_bits(max(clog2(num_cgra_columns * num_cgra_rows), 1))
     StateType = mk_bits(2)
-    CountType = mk_bits(4)
+    # Counts the targets, and the completions of the child DCUs and CCUs.
+    CountType = mk_bits(max(4, clog2(max_targets_per_ccu + num_ccus + 1)))
     TargetIdxType = mk_bits(max(clog2(max_targets_per_ccu), 1))
+    CycleCountType = mk_bits(16)
 
     # ===== Interfaces =====
     s.recv_config = RecvIfcRTL(CgraPayloadType)
     s.recv_from_tile = RecvIfcRTL(CgraPayloadType)
     s.send_to_tile = SendIfcRTL(CgraPayloadType)
+    if dispatch_width > 1:
+      s.send_to_tile_extra = [SendIfcRTL(CgraPayloadType)
+                              for _ in range(dispatch_width - 1)]
     s.recv_from_remote = RecvIfcRTL(CgraPayloadType)
     s.send_to_remote = SendIfcRTL(CgraPayloadType)
     s.all_loops_complete = OutPort(1)
@@ -115,13 +138,44 @@ class LoopControllerRTL(Component):
     # Config target write pointer.
     s.ccu_config_target_idx = [Wire(CountType) for _ in range(num_ccus)]
 
+    # Dispatch accounting, since CMD_LC_LAUNCH.
+    s.ccu_dispatch_cycles = [Wire(CycleCountType) for _ in range(num_ccus)]
+    s.ccu_dispatch_rounds = [Wire(CycleCountType) for _ in range(num_ccus)]
+
     # ===== Internal Control Signals =====
     s.active_dispatch_ccu = Wire(CCUIdType)
     s.has_active_dispatch = Wire(1)
+    # The tile-side lanes of the dispatch.
+    s.lane_val = [Wire(1) for _ in range(dispatch_width)]
+    s.lane_msg = [Wire(CgraPayloadType) for _ in range(dispatch_width)]
+    s.lane_rdy = [Wire(1) for _ in range(dispatch_width)]
+    # Whether the target at each offset of the current group is within
+    # the targets, goes through this cycle, or already went through.
+    s.lane_in_group = [Wire(1) for _ in range(dispatch_width)]
+    s.lane_fired = [Wire(1) for _ in range(dispatch_width)]
+    s.lane_sent = [Wire(1) for _ in range(dispatch_width)]
+    s.dispatch_group_done = Wire(1)
+    s.dispatch_round_done = Wire(1)
+    # The CCU whose group went partially through, which keeps dispatching
+    # until the group completes.
+    s.dispatch_partial = Wire(1)
+    s.dispatch_owner = Wire(CCUIdType)
     s.config_cmd_valid = Wire(1)
     s.tile_event_valid = Wire(1)
     s.remote_event_valid = Wire(1)
 
+    # ===================================================================
+    # Connections
+    # ===================================================================
+
+    s.send_to_tile.val //= s.lane_val[0]
+    s.send_to_tile.msg //= s.lane_msg[0]
+    s.lane_rdy[0] //= s.send_to_tile.rdy
+    for j in range(1, dispatch_width):
+      s.send_to_tile_extra[j - 1].val //= s.lane_val[j]
+      s.send_to_tile_extra[j - 1].msg //= s.lane_msg[j]
+      s.lane_rdy[j] //= s.send_to_tile_extra[j - 1].rdy
+
     # ===================================================================
     # Combinational Logic
     # ===================================================================
@@ -133,8 +187,13 @@ class LoopControllerRTL(Component):
       s.recv_config.rdy @= b1(0)
       s.recv_from_tile.rdy @= b1(0)
       s.recv_from_remote.rdy @= b1(0)
-      s.send_to_tile.val @= b1(0)
-      s.send_to_tile.msg @= CgraPayloadType(0, DataType(0, 0), 0, CtrlType(0), 0)
+      for j in range(dispatch_width):
+        s.lane_val[j] @= b1(0)
+        s.lane_msg[j] @= CgraPayloadType(0, DataType(0, 0), 0, CtrlType(0), 0)
+        s.lane_in_group[j] @= b1(0)
+        s.lane_fired[j] @= b1(0)
+      s.dispatch_group_done @= b1(0)
+      s.dispatch_round_done @= b1(0)
       s.send_to_remote.val @= b1(0)
       s.send_to_remote.msg @= CgraPayloadType(0, DataType(0, 0), 0, CtrlType(0), 0)
       s.config_cmd_valid @= b1(0)
@@ -152,35 +211,58 @@ class LoopControllerRTL(Component):
       # ----- Priority encoder: find first DISPATCHING CCU -----
       s.has_active_dispatch @= b1(0)
       s.active_dispatch_ccu @= CCUIdType(0)
-      for i in range(num_ccus):
-        if (s.ccu_state[i] == StateType(CCU_STATE_DISPATCHING)) & ~s.has_active_dispatch:
-          s.has_active_dispatch @= b1(1)
-          s.active_dispatch_ccu @= CCUIdType(i)
+      if s.dispatch_partial:
+        s.has_active_dispatch @= b1(1)
+        s.active_dispatch_ccu @= s.dispatch_owner
+      else:
+        for i in range(num_ccus):
+          if (s.ccu_state[i] == StateType(CCU_STATE_DISPATCHING)) & ~s.has_active_dispatch:
+            s.has_active_dispatch @= b1(1)
+            s.active_dispatch_ccu @= CCUIdType(i)
 
-      # ----- Dispatch output generation (1 cycle per target) -----
+      # ----- Dispatch output generation (1 cycle per group of targets) -----
       if s.has_active_dispatch:
         ccu_id = s.active_dispatch_ccu
-        tidx = s.ccu_dispatch_idx[ccu_id]
-
-        # shadow_only → CMD_UPDATE_COUNTER_SHADOW_VALUE (delivery DCU)
-        # normal      → CMD_RESET_LEAF_COUNTER (leaf DCU)
-        if s.ccu_target_shadow_only[ccu_id][tidx]:
-          out_cmd = CMD_UPDATE_COUNTER_SHADOW_VALUE
-          out_data = s.ccu_current_value[ccu_id]
-        else:
-          out_cmd = CMD_RESET_LEAF_COUNTER
-          out_data = DataType(0, 0)
-
-        if s.ccu_target_is_remote[ccu_id][tidx]:
-          s.send_to_remote.val @= b1(1)
-          s.send_to_remote.msg @= CgraPayloadType(
-            out_cmd, out_data, 0, CtrlType(0),
-            s.ccu_target_ctrl_addrs[ccu_id][tidx])
-        else:
-          s.send_to_tile.val @= b1(1)
-          s.send_to_tile.msg @= CgraPayloadType(
-            out_cmd, out_data, 0, CtrlType(0),
-            s.ccu_target_ctrl_addrs[ccu_id][tidx])
+        remote_taken = b1(0)
+        group_done = b1(1)
+        for j in range(dispatch_width):
+          s.lane_in_group[j] @= \
+              (zext(s.ccu_dispatch_idx[ccu_id], CountType) + CountType(j)) < \
+              s.ccu_num_targets[ccu_id]
+          if s.lane_in_group[j] & ~s.lane_sent[j]:
+            tidx = trunc(zext(s.ccu_dispatch_idx[ccu_id], CountType) + CountType(j),
+                         TargetIdxType)
+
+            # shadow_only → CMD_UPDATE_COUNTER_SHADOW_VALUE (delivery DCU)
+            # normal      → CMD_RESET_LEAF_COUNTER (leaf DCU)
+            if s.ccu_target_shadow_only[ccu_id][tidx]:
+              out_cmd = CMD_UPDATE_COUNTER_SHADOW_VALUE
+              out_data = s.ccu_current_value[ccu_id]
+            else:
+              out_cmd = CMD_RESET_LEAF_COUNTER
+              out_data = DataType(0, 0)
+
+            # The remote targets share a single port, one per cycle.
+            if s.ccu_target_is_remote[ccu_id][tidx]:
+              if ~remote_taken:
+                remote_taken = b1(1)
+                s.send_to_remote.val @= b1(1)
+                s.send_to_remote.msg @= CgraPayloadType(
+                  out_cmd, out_data, 0, CtrlType(0),
+                  s.ccu_target_ctrl_addrs[ccu_id][tidx])
+                s.lane_fired[j] @= s.send_to_remote.rdy
+            else:
+              s.lane_val[j] @= b1(1)
+              s.lane_msg[j] @= CgraPayloadType(
+                out_cmd, out_data, 0, CtrlType(0),
+                s.ccu_target_ctrl_addrs[ccu_id][tidx])
+              s.lane_fired[j] @= s.lane_rdy[j]
+            if ~s.lane_fired[j]:
+              group_done = b1(0)
+        s.dispatch_group_done @= group_done
+        s.dispatch_round_done @= group_done & \
+            ((zext(s.ccu_dispatch_idx[ccu_id], CountType) + CountType(dispatch_width)) >= \
+             s.ccu_num_targets[ccu_id])
 
       # ----- Configuration commands -----
       if s.recv_config.val:
@@ -246,6 +328,10 @@ class LoopControllerRTL(Component):
           s.ccu_current_value[i] <<= DataType(0, 0)
           s.ccu_received_complete_count[i] <<= CountType(0)
           s.ccu_dispatch_idx[i] <<= TargetIdxType(0)
+        for j in range(dispatch_width):
+          s.lane_sent[j] <<= b1(0)
+        s.dispatch_partial <<= b1(0)
+        s.dispatch_owner <<= CCUIdType(0)
       else:
         # ===== Configuration =====
         if s.config_cmd_valid:
@@ -263,7 +349,7 @@ class LoopControllerRTL(Component):
 
           elif s.recv_config.msg.cmd == CMD_LC_CONFIG_CHILD_COUNT:
             s.ccu_child_complete_count[ccu_idx] <<= \
-                CountType(s.recv_config.msg.data.payload[0:4])
+                CountType(s.recv_config.msg.data.payload[0:CountType.nbits])
 
           elif s.recv_config.msg.cmd == CMD_LC_CONFIG_TARGET:
             tidx = s.ccu_config_target_idx[ccu_idx]
@@ -296,21 +382,16 @@ class LoopControllerRTL(Component):
                 s.ccu_received_complete_count[i] <<= CountType(0)
                 s.ccu_dispatch_idx[i] <<= TargetIdxType(0)
 
-        # ===== Dispatch progress (1 cycle per target) =====
+        # ===== Dispatch progress (1 cycle per group of targets) =====
         if s.has_active_dispatch:
           ccu_id = s.active_dispatch_ccu
-          tidx = s.ccu_dispatch_idx[ccu_id]
-          sent = b1(0)
-
-          if s.ccu_target_is_remote[ccu_id][tidx]:
-            sent = s.send_to_remote.val & s.send_to_remote.rdy
-          else:
-            sent = s.send_to_tile.val & s.send_to_tile.rdy
 
-          if sent:
-            next_idx = s.ccu_dispatch_idx[ccu_id] + TargetIdxType(1)
+          if s.dispatch_group_done:
+            for j in range(dispatch_width):
+              s.lane_sent[j] <<= b1(0)
+            s.dispatch_partial <<= b1(0)
 
-            if zext(next_idx, CountType) >= s.ccu_num_targets[ccu_id]:
+            if s.dispatch_round_done:
               # All targets dispatched → back to RUNNING.
               s.ccu_dispatch_idx[ccu_id] <<= TargetIdxType(0)
               s.ccu_state[ccu_id] <<= StateType(CCU_STATE_RUNNING)
@@ -324,7 +405,16 @@ class LoopControllerRTL(Component):
                   s.ccu_received_complete_count[c] <<= CountType(0)
                   s.ccu_dispatch_idx[c] <<= TargetIdxType(0)
             else:
-              s.ccu_dispatch_idx[ccu_id] <<= next_idx
+              s.ccu_dispatch_idx[ccu_id] <<= \
+                  trunc(zext(s.ccu_dispatch_idx[ccu_id], CountType) + \
+                        CountType(dispatch_width), TargetIdxType)
+          else:
+            # Keeps the targets that went through from being sent again.
+            for j in range(dispatch_width):
+              if s.lane_fired[j]:
+                s.lane_sent[j] <<= b1(1)
+                s.dispatch_partial <<= b1(1)
+                s.dispatch_owner <<= ccu_id
 
         # ===== Tile events (DCU completion) =====
         if s.tile_event_valid:
@@ -387,6 +477,18 @@ class LoopControllerRTL(Component):
                     s.ccu_state[i] <<= StateType(CCU_STATE_DISPATCHING)
                     s.ccu_dispatch_idx[i] <<= TargetIdxType(0)
 
+    @update_ff
+    def update_dispatch_accounting():
+      for i in range(num_ccus):
+        if s.reset | (s.config_cmd_valid & (s.recv_config.msg.cmd == CMD_LC_LAUNCH)):
+          s.ccu_dispatch_cycles[i] <<= CycleCountType(0)
+          s.ccu_dispatch_rounds[i] <<= CycleCountType(0)
+        elif s.ccu_state[i] == StateType(CCU_STATE_DISPATCHING):
+          s.ccu_dispatch_cycles[i] <<= s.ccu_dispatch_cycles[i] + CycleCountType(1)
+          if s.has_active_dispatch & (s.active_dispatch_ccu == CCUIdType(i)) & \
+             s.dispatch_round_done:
+            s.ccu_dispatch_rounds[i] <<= s.ccu_dispatch_rounds[i] + CycleCountType(1)
+
   def line_trace(s):
     states = ['IDLE', 'RUN', 'DISP', 'DONE']
     traces = []
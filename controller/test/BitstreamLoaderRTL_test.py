@@ -0,0 +1,254 @@
+"""
+==========================================================================
+BitstreamLoaderRTL_test.py
+==========================================================================
+Test cases for BitstreamLoaderRTL and the bitstream serialization.
+
+  Date : Oct 19, 2026
+"""
+
+import pytest
+
+from pymtl3.stdlib.test_utils import config_model_with_cmdline_opts
+
+from ..BitstreamLoaderRTL import BitstreamLoaderRTL
+from ..ControllerRTL import ControllerRTL
+from ...lib.basic.val_rdy.SinkRTL import SinkRTL as TestSinkRTL
+from ...lib.basic.val_rdy.SourceRTL import SourceRTL as TestSrcRTL
+from ...lib.basic.val_rdy.queues import NormalQueueRTL
+from ...lib.cmd_type import *
+from ...lib.messages import *
+from ...lib.opt_type import *
+from ...lib.util.bitstream_helper import *
+from ...lib.util.common import *
+from ...mem.data.DataMemRTL import DataMemRTL
+
+#-------------------------------------------------------------------------
+# TestHarness
+#-------------------------------------------------------------------------
+
+class TestHarness(Component):
+
+  def construct(s, IntraCgraPktType, data_mem_size, base_addr, words,
+                expected_pkts, mem_latency, sink_interval_delay):
+
+    CgraPayloadType = IntraCgraPktType.get_field_type(kAttrPayload)
+    DataType = CgraPayloadType.get_field_type(kAttrData)
+    DataAddrType = CgraPayloadType.get_field_type(kAttrDataAddr)
+
+    preload_data = [DataType(0, 0) for _ in range(base_addr)] + \
+                   [DataType(word, 1) for word in words]
+    s.src_start = TestSrcRTL(DataAddrType, [DataAddrType(base_addr)])
+    s.data_mem = DataMemRTL(DataType, data_mem_size,
+                            preload_data = preload_data)
+    s.sink_pkt = TestSinkRTL(IntraCgraPktType, expected_pkts,
+                             interval_delay = sink_interval_delay)
+    s.dut = BitstreamLoaderRTL(IntraCgraPktType)
+
+    s.src_start.send //= s.dut.recv_start
+    s.dut.to_mem_raddr //= s.data_mem.recv_raddr[0]
+    if mem_latency == 0:
+      s.data_mem.send_rdata[0] //= s.dut.from_mem_rdata
+    else:
+      # Defers the read data by one cycle, same as a non-combinational
+      # memory access.
+      s.rdata_queue = NormalQueueRTL(DataType, 1)
+      s.data_mem.send_rdata[0] //= s.rdata_queue.recv
+      s.rdata_queue.send //= s.dut.from_mem_rdata
+    s.dut.send_pkt //= s.sink_pkt.recv
+
+    s.data_mem.recv_waddr[0].val //= 0
+    s.data_mem.recv_waddr[0].msg //= 0
+    s.data_mem.recv_wdata[0].val //= 0
+    s.data_mem.recv_wdata[0].msg //= DataType(0, 0)
+
+  def done(s):
+    return s.src_start.done() and s.sink_pkt.done()
+
+  def line_trace(s):
+    return s.dut.line_trace()
+
+class ControllerTestHarness(Component):
+
+  def construct(s, IntraCgraPktType, num_tiles, data_mem_size, base_addr,
+                words, from_noc_pkts, expected_pkts):
+
+    CgraPayloadType = IntraCgraPktType.get_field_type(kAttrPayload)
+    DataType = CgraPayloadType.get_field_type(kAttrData)
+    InterCgraPktType = mk_inter_cgra_pkt(1, 1, num_tiles, 1, CgraPayloadType)
+
+    preload_data = [DataType(0, 0) for _ in range(base_addr)] + \
+                   [DataType(word, 1) for word in words]
+    s.src_from_noc = TestSrcRTL(InterCgraPktType, from_noc_pkts)
+    s.data_mem = DataMemRTL(DataType, data_mem_size,
+                            preload_data = preload_data)
+    s.sink_to_ctrl_ring = TestSinkRTL(IntraCgraPktType, expected_pkts)
+    s.controller = ControllerRTL(InterCgraPktType, 1, 1, num_tiles,
+                                 {0: [0, data_mem_size - 1]}, {0: [0, 0]})
+    s.dut = BitstreamLoaderRTL(IntraCgraPktType)
+
+    s.controller.cgra_id //= 0
+    s.src_from_noc.send //= s.controller.recv_from_inter_cgra_noc
+    s.controller.send_to_ctrl_ring_pkt //= s.sink_to_ctrl_ring.recv
+    s.controller.send_to_bitstream_loader //= s.dut.recv_start
+    s.dut.send_pkt //= s.controller.recv_from_bitstream_loader
+    s.dut.to_mem_raddr //= s.data_mem.recv_raddr[0]
+    s.data_mem.send_rdata[0] //= s.dut.from_mem_rdata
+
+    s.data_mem.recv_waddr[0].val //= 0
+    s.data_mem.recv_waddr[0].msg //= 0
+    s.data_mem.recv_wdata[0].val //= 0
+    s.data_mem.recv_wdata[0].msg //= DataType(0, 0)
+
+    s.controller.recv_from_cpu_pkt.val //= 0
+    s.controller.recv_from_cpu_pkt.msg //= IntraCgraPktType()
+    s.controller.send_to_cpu_pkt.rdy //= 0
+    s.controller.recv_from_ctrl_ring_pkt.val //= 0
+    s.controller.recv_from_ctrl_ring_pkt.msg //= IntraCgraPktType()
+    s.controller.send_to_inter_cgra_noc.rdy //= 0
+    s.controller.recv_from_tile_load_request_pkt.val //= 0
+    s.controller.recv_from_tile_load_request_pkt.msg //= InterCgraPktType()
+    s.controller.recv_from_tile_load_response_pkt.val //= 0
+    s.controller.recv_from_tile_load_response_pkt.msg //= InterCgraPktType()
+    s.controller.recv_from_tile_store_request_pkt.val //= 0
+    s.controller.recv_from_tile_store_request_pkt.msg //= InterCgraPktType()
+    s.controller.send_to_mem_load_request.rdy //= 0
+    s.controller.send_to_tile_load_response.rdy //= 0
+    s.controller.send_to_mem_store_request.rdy //= 0
+
+  def done(s):
+    return s.src_from_noc.done() and s.sink_to_ctrl_ring.done()
+
+  def line_trace(s):
+    return s.dut.line_trace()
+
+def run_sim(test_harness, max_cycles = 200):
+  test_harness.apply(DefaultPassGroup())
+  test_harness.sim_reset()
+
+  # Run simulation
+  ncycles = 0
+  print()
+  print("{}:{}".format(ncycles, test_harness.line_trace()))
+  while not test_harness.done() and ncycles < max_cycles:
+    test_harness.sim_tick()
+    ncycles += 1
+    print("{}:{}".format(ncycles, test_harness.line_trace()))
+
+  # Check timeout
+  assert ncycles < max_cycles
+
+  test_harness.sim_tick()
+  test_harness.sim_tick()
+  test_harness.sim_tick()
+  return ncycles
+
+#-------------------------------------------------------------------------
+# Test cases
+#-------------------------------------------------------------------------
+
+num_tiles = 4
+data_mem_size = 64
+ctrl_mem_size = 8
+num_fu_inports = 4
+num_fu_outports = 2
+num_tile_inports = 4
+num_tile_outports = 4
+num_registers_per_reg_bank = 16
+
+DataType = mk_data(32, 1)
+DataAddrType = mk_bits(clog2(data_mem_size))
+CtrlType = mk_ctrl(num_fu_inports, num_fu_outports, num_tile_inports,
+                   num_tile_outports, num_registers_per_reg_bank)
+CtrlAddrType = mk_bits(clog2(ctrl_mem_size))
+CgraPayloadType = mk_cgra_payload(DataType, DataAddrType, CtrlType,
+                                  CtrlAddrType)
+IntraCgraPktType = mk_intra_cgra_pkt(1, 1, num_tiles, CgraPayloadType)
+FuInType = mk_bits(clog2(num_fu_inports + 1))
+TileInType = mk_bits(clog2(num_tile_inports + num_fu_inports + 1))
+FuOutType = mk_bits(clog2(num_fu_outports + 1))
+
+def mk_kernel_pkts():
+  # The config packets of two tiles, interleaved the way the CPU could
+  # send them.
+  ctrl_add = CtrlType(OPT_ADD,
+                      [FuInType(1), FuInType(2), FuInType(0), FuInType(0)],
+                      [TileInType(2), TileInType(0), TileInType(0), TileInType(0),
+                       TileInType(0), TileInType(0), TileInType(0), TileInType(0)],
+                      [FuOutType(0), FuOutType(0), FuOutType(1), FuOutType(0),
+                       FuOutType(0), FuOutType(0), FuOutType(0), FuOutType(0)])
+  ctrl_mul = CtrlType(OPT_MUL, [FuInType(1), FuInType(2), FuInType(0), FuInType(0)])
+  pkts = []
+  for tile in [0, 3]:
+    pkts.extend([
+        IntraCgraPktType(num_tiles, tile, payload = CgraPayloadType(CMD_CONFIG, ctrl = ctrl_add, ctrl_addr = 0)),
+        IntraCgraPktType(num_tiles, tile, payload = CgraPayloadType(CMD_CONFIG, ctrl = ctrl_mul, ctrl_addr = 1)),
+    ])
+  for tile in [0, 3]:
+    pkts.extend([
+        IntraCgraPktType(num_tiles, tile, payload = CgraPayloadType(CMD_CONFIG_COUNT_PER_ITER, data = DataType(2, 1))),
+        IntraCgraPktType(num_tiles, tile, payload = CgraPayloadType(CMD_CONFIG_TOTAL_CTRL_COUNT, data = DataType(6, 1))),
+        IntraCgraPktType(num_tiles, tile, payload = CgraPayloadType(CMD_CONST, data = DataType(tile + 7, 1))),
+        IntraCgraPktType(num_tiles, tile, payload = CgraPayloadType(CMD_CONFIG_PROLOGUE_FU, data = DataType(1, 1), ctrl_addr = 1)),
+    ])
+  for tile in [0, 3]:
+    pkts.append(IntraCgraPktType(num_tiles, tile, payload = CgraPayloadType(CMD_LAUNCH)))
+  return pkts
+
+def grouped_by_tile(pkts):
+  tiles = []
+  for pkt in pkts:
+    if int(pkt.dst) not in tiles:
+      tiles.append(int(pkt.dst))
+  return [pkt for tile in tiles for pkt in pkts if int(pkt.dst) == tile]
+
+def test_bitstream_roundtrip():
+  pkts = mk_kernel_pkts()
+  words = pkts_to_bitstream(pkts, IntraCgraPktType)
+  assert bitstream_to_pkts(words, IntraCgraPktType) == grouped_by_tile(pkts)
+  # The bitstream is denser than the packets themselves.
+  word_nbits = bitstream_word_nbits(IntraCgraPktType)
+  assert len(words) * word_nbits < len(pkts) * IntraCgraPktType.nbits / 2
+
+def test_bitstream_empty():
+  words = pkts_to_bitstream([], IntraCgraPktType)
+  assert bitstream_to_pkts(words, IntraCgraPktType) == []
+
+def test_bitstream_rejects_non_tile_cmds():
+  pkt = IntraCgraPktType(0, 0, payload = CgraPayloadType(CMD_STORE_REQUEST,
+                                                         data = DataType(1, 1)))
+  with pytest.raises(AssertionError):
+    pkts_to_bitstream([pkt], IntraCgraPktType)
+
+@pytest.mark.parametrize('mem_latency, sink_interval_delay',
+                         [(0, 0), (1, 0), (0, 2), (1, 1)])
+def test_loader(cmdline_opts, mem_latency, sink_interval_delay):
+  pkts = mk_kernel_pkts()
+  words = pkts_to_bitstream(pkts, IntraCgraPktType)
+  base_addr = 5
+  th = TestHarness(IntraCgraPktType, data_mem_size, base_addr, words,
+                   grouped_by_tile(pkts), mem_latency, sink_interval_delay)
+  th.elaborate()
+  th = config_model_with_cmdline_opts(th, cmdline_opts, duts = ['dut'])
+  ncycles = run_sim(th)
+  if mem_latency == 0 and sink_interval_delay == 0:
+    # Bounded by fetching one word per cycle.
+    assert ncycles <= len(words) + 8
+
+def test_controller_load_bitstream(cmdline_opts):
+  pkts = mk_kernel_pkts()
+  words = pkts_to_bitstream(pkts, IntraCgraPktType)
+  base_addr = 3
+  InterCgraPktType = mk_inter_cgra_pkt(1, 1, num_tiles, 1, CgraPayloadType)
+  const_pkt = IntraCgraPktType(0, 1, payload = CgraPayloadType(CMD_CONST, data = DataType(9, 1)))
+  from_noc_pkts = [
+      # The packets from NoC are forwarded to the ring as usual.
+      InterCgraPktType(0, 0, 0, 0, 0, 0, 0, 1, 0, 0, 0, CgraPayloadType(CMD_CONST, data = DataType(9, 1))),
+      InterCgraPktType(0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, CgraPayloadType(CMD_LOAD_BITSTREAM, data_addr = base_addr)),
+  ]
+  th = ControllerTestHarness(IntraCgraPktType, num_tiles, data_mem_size,
+                             base_addr, words, from_noc_pkts,
+                             [const_pkt] + grouped_by_tile(pkts))
+  th.elaborate()
+  th = config_model_with_cmdline_opts(th, cmdline_opts, duts = ['dut'])
+  run_sim(th)
@@ -15,6 +15,7 @@ from ...lib.basic.val_rdy.SinkRTL import SinkRTL as TestSinkRTL
 from ...lib.basic.val_rdy.SourceRTL import SourceRTL as TestSrcRTL
 from ...lib.messages import *
 from ...lib.opt_type import *
+from ...lib.util.common import *
 
 
 #-------------------------------------------------------------------------
@@ -39,7 +40,8 @@ class TestHarness(Component):
                 num_rd_tiles,
                 num_cgra_columns,
                 num_cgra_rows,
-                num_tiles):
+                num_tiles,
+                has_traffic_class_vcs = False):
 
     num_cgras = num_cgra_columns * num_cgra_rows
     PktType = mk_inter_cgra_pkt(num_cgra_columns,
@@ -70,7 +72,8 @@ class TestHarness(Component):
                           num_cgras,
                           num_tiles,
                           controller2addr_map,
-                          idTo2d_map)
+                          idTo2d_map,
+                          has_traffic_class_vcs)
 
     # Connections
     s.dut.cgra_id //= cgra_id
@@ -283,3 +286,40 @@ def test_simple(cmdline_opts):
   th = config_model_with_cmdline_opts(th, cmdline_opts, duts = ['dut'])
   run_sim(th)
 
+
+def test_traffic_class_vcs(cmdline_opts):
+  # The load responses go out first, then the store requests, and the
+  # load requests last, each one being tagged with the VC of its traffic
+  # class.
+  expected_to_noc_pkts_with_vcs = [
+                     # src  dst src_x src_y dst_x dst_y src_tile dst_tile opq vc                           cmd
+      InterCgraPktType(0,   0,  0,    0,    0,    0,    0,       0,    0, 0,  INTER_CGRA_VC_LOAD_RESPONSE, CgraPayloadType(CMD_LOAD_RESPONSE, data = DataType(11,  1), data_addr = 11)),
+      InterCgraPktType(0,   0,  0,    0,    0,    0,    0,       0,    0, 0,  INTER_CGRA_VC_LOAD_RESPONSE, CgraPayloadType(CMD_LOAD_RESPONSE, data = DataType(14,  1), data_addr = 14)),
+      InterCgraPktType(0,   0,  0,    0,    0,    0,    0,       0,    0, 0,  INTER_CGRA_VC_LOAD_RESPONSE, CgraPayloadType(CMD_LOAD_RESPONSE, data = DataType(12,  1), data_addr = 12)),
+      InterCgraPktType(0,   2,  0,    0,    2,    0,    0,       0,    0, 0,  INTER_CGRA_VC_STORE_REQUEST, CgraPayloadType(CMD_STORE_REQUEST, data = DataType(110, 1), data_addr = 11)),
+      InterCgraPktType(0,   0,  0,    0,    0,    0,    0,       0,    0, 0,  INTER_CGRA_VC_STORE_REQUEST, CgraPayloadType(CMD_STORE_REQUEST, data = DataType(300, 1), data_addr = 3)),
+      InterCgraPktType(0,   3,  0,    0,    3,    0,    0,       0,    0, 0,  INTER_CGRA_VC_STORE_REQUEST, CgraPayloadType(CMD_STORE_REQUEST, data = DataType(150, 1), data_addr = 15)),
+      InterCgraPktType(0,   0,  0,    0,    0,    0,    0,       0,    0, 0,  INTER_CGRA_VC_LOAD_REQUEST,  CgraPayloadType(CMD_LOAD_REQUEST,  data = DataType(0,   0), data_addr = 1)),
+      InterCgraPktType(0,   2,  0,    0,    2,    0,    0,       0,    0, 0,  INTER_CGRA_VC_LOAD_REQUEST,  CgraPayloadType(CMD_LOAD_REQUEST,  data = DataType(0,   0), data_addr = 8)),
+      InterCgraPktType(0,   3,  0,    0,    3,    0,    0,       0,    0, 0,  INTER_CGRA_VC_LOAD_REQUEST,  CgraPayloadType(CMD_LOAD_REQUEST,  data = DataType(0,   0), data_addr = 13)),
+  ]
+  th = TestHarness(CgraPayloadType,
+                   cgra_id,
+                   from_tile_load_request_pkts,
+                   from_tile_load_response_pkts,
+                   from_tile_store_request_pkts,
+                   expected_to_mem_load_request_msgs,
+                   expected_to_mem_load_response,
+                   expected_to_mem_store_request_msgs,
+                   from_noc_pkts,
+                   expected_to_noc_pkts_with_vcs,
+                   controller2addr_map,
+                   idTo2d_map,
+                   num_rd_tiles,
+                   num_cgra_columns,
+                   num_cgra_rows,
+                   num_tiles,
+                   has_traffic_class_vcs = True)
+  th.elaborate()
+  th = config_model_with_cmdline_opts(th, cmdline_opts, duts = ['dut'])
+  run_sim(th)
@@ -8,8 +8,10 @@ Author : Shangkun Li
   Date : February 19, 2026
 """
 
+import pytest
+
 from pymtl3 import *
-from ..LoopControllerRTL import LoopControllerRTL
+from ..LoopControllerRTL import LoopControllerRTL, CCU_STATE_COMPLETE
 from ...lib.basic.val_rdy.SourceRTL import SourceRTL as TestSrcRTL
 from ...lib.basic.val_rdy.SinkRTL import SinkRTL as TestSinkRTL
 from ...lib.messages import *
@@ -25,7 +27,8 @@ class TestHarness(Component):
                 num_ccus, max_targets_per_ccu,
                 data_mem_size, ctrl_mem_size, num_tiles,
                 src_config, src_from_tile, src_from_remote,
-                sink_to_tile, sink_to_remote):
+                sink_to_tile, sink_to_remote,
+                dispatch_width=1, sink_to_tile_extra=[]):
 
     s.src_config = TestSrcRTL(CgraPayloadType, src_config)
     s.src_from_tile = TestSrcRTL(CgraPayloadType, src_from_tile)
@@ -37,24 +40,30 @@ class TestHarness(Component):
 
     s.sink_to_tile = TestSinkRTL(CgraPayloadType, sink_to_tile, cmp_fn=cmp_fn)
     s.sink_to_remote = TestSinkRTL(CgraPayloadType, sink_to_remote, cmp_fn=cmp_fn)
+    s.sink_to_tile_extra = [TestSinkRTL(CgraPayloadType, msgs, cmp_fn=cmp_fn)
+                            for msgs in sink_to_tile_extra]
 
     s.dut = LoopControllerRTL(DataType, CtrlType,
                                  num_ccus=num_ccus,
                                  max_targets_per_ccu=max_targets_per_ccu,
                                  data_mem_size=data_mem_size,
                                  ctrl_mem_size=ctrl_mem_size,
-                                 num_tiles=num_tiles)
+                                 num_tiles=num_tiles,
+                                 dispatch_width=dispatch_width)
 
     connect(s.src_config.send, s.dut.recv_config)
     connect(s.src_from_tile.send, s.dut.recv_from_tile)
     connect(s.src_from_remote.send, s.dut.recv_from_remote)
     connect(s.dut.send_to_tile, s.sink_to_tile.recv)
     connect(s.dut.send_to_remote, s.sink_to_remote.recv)
+    for j in range(dispatch_width - 1):
+      connect(s.dut.send_to_tile_extra[j], s.sink_to_tile_extra[j].recv)
 
   def done(s):
     return s.src_config.done() and s.src_from_tile.done() and \
            s.src_from_remote.done() and s.sink_to_tile.done() and \
-           s.sink_to_remote.done()
+           s.sink_to_remote.done() and \
+           all(sink.done() for sink in s.sink_to_tile_extra)
 
   def line_trace(s):
     return s.dut.line_trace()
@@ -392,3 +401,114 @@ def test_cross_cgra_2_layer_loop():
                    src_config, src_from_tile, src_from_remote,
                    sink_to_tile, sink_to_remote)
   run_sim(th)
+
+
+#-------------------------------------------------------------------------
+# Test: Multi-target dispatch
+#
+#   for(i=0; i<3; i++) { body_a; body_b }
+#
+#   CCU[0]: root, i=0..2, child_count=2
+#     targets = [leaf DCU at ctrl_addr=0, leaf DCU at ctrl_addr=1,
+#                i-delivery DCU at ctrl_addr=2 (shadow_only)]
+#
+#   With dispatch_width lanes, the target at offset j of each group of
+#   dispatch_width targets goes through lane j, so that each outer
+#   iteration takes ceil(3 / dispatch_width) dispatch cycles.
+#-------------------------------------------------------------------------
+
+@pytest.mark.parametrize('dispatch_width', [1, 2, 3])
+def test_multi_target_dispatch(dispatch_width):
+  src_config = [
+    CgraPayloadType(CMD_LC_CONFIG_LOWER, DataType(0, 1), 0, CtrlType(0), 0),
+    CgraPayloadType(CMD_LC_CONFIG_UPPER, DataType(3, 1), 0, CtrlType(0), 0),
+    CgraPayloadType(CMD_LC_CONFIG_STEP,  DataType(1, 1), 0, CtrlType(0), 0),
+    CgraPayloadType(CMD_LC_CONFIG_CHILD_COUNT, DataType(2, 0), 0, CtrlType(0), 0),
+    CgraPayloadType(CMD_LC_CONFIG_TARGET,
+                    *mk_target_config(0, 0), CtrlType(0), 0),
+    CgraPayloadType(CMD_LC_CONFIG_TARGET,
+                    *mk_target_config(1, 1), CtrlType(0), 0),
+    CgraPayloadType(CMD_LC_CONFIG_TARGET,
+                    *mk_target_config(2, 2, shadow_only=True), CtrlType(0), 0),
+    CgraPayloadType(CMD_LC_CONFIG_PARENT,
+                    DataType(mk_parent_payload(parent_id=0, is_root=True), 0), 0, CtrlType(0), 0),
+    CgraPayloadType(CMD_LC_LAUNCH, DataType(0, 0), 0, CtrlType(0), 0),
+  ]
+
+  src_from_tile = [
+    CgraPayloadType(CMD_LEAF_COUNTER_COMPLETE, DataType(0, 0), 0, CtrlType(0), 0),
+    CgraPayloadType(CMD_LEAF_COUNTER_COMPLETE, DataType(0, 0), 0, CtrlType(0), 1),
+  ] * 3
+
+  # i=1 and i=2 are dispatched, i=3 completes.
+  sinks = [[] for _ in range(dispatch_width)]
+  for i in [1, 2]:
+    targets = [
+      CgraPayloadType(CMD_RESET_LEAF_COUNTER, DataType(0, 0), 0, CtrlType(0), 0),
+      CgraPayloadType(CMD_RESET_LEAF_COUNTER, DataType(0, 0), 0, CtrlType(0), 1),
+      CgraPayloadType(CMD_UPDATE_COUNTER_SHADOW_VALUE, DataType(i, 1), 0, CtrlType(0), 2),
+    ]
+    for t, target in enumerate(targets):
+      sinks[t % dispatch_width].append(target)
+
+  th = TestHarness(DataType, CtrlType, CgraPayloadType,
+                   num_ccus, max_targets, data_mem_size, ctrl_mem_size,
+                   num_tiles,
+                   src_config, src_from_tile, [],
+                   sinks[0], [],
+                   dispatch_width=dispatch_width,
+                   sink_to_tile_extra=sinks[1:])
+  run_sim(th)
+
+  # The sinks never stall, so each dispatched iteration takes one cycle
+  # per group of targets.
+  assert th.dut.ccu_dispatch_rounds[0] == 2
+  assert th.dut.ccu_dispatch_cycles[0] == 2 * ((3 + dispatch_width - 1) // dispatch_width)
+
+
+#-------------------------------------------------------------------------
+# Test: More CCUs than the default, addressed by a wider ctrl_addr.
+#   for(i=0; i<2; i++) { body } driven by CCU[12] of 16.
+#-------------------------------------------------------------------------
+
+def test_many_ccus():
+  many_ccus = 16
+  many_ctrl_mem_size = 16
+  ManyCtrlAddrType = mk_bits(clog2(many_ctrl_mem_size))
+  ManyCgraPayloadType = mk_cgra_payload(DataType, AddrType, CtrlType,
+                                        ManyCtrlAddrType)
+  ccu = 12
+
+  def mk_many_target_config(ctrl_addr, tile_id):
+    payload = ctrl_addr | (tile_id << clog2(many_ctrl_mem_size))
+    return DataType(payload, 0), 0
+
+  many_ccu_id_bits = clog2(many_ccus)
+  src_config = [
+    ManyCgraPayloadType(CMD_LC_CONFIG_LOWER, DataType(0, 1), 0, CtrlType(0), ccu),
+    ManyCgraPayloadType(CMD_LC_CONFIG_UPPER, DataType(2, 1), 0, CtrlType(0), ccu),
+    ManyCgraPayloadType(CMD_LC_CONFIG_STEP,  DataType(1, 1), 0, CtrlType(0), ccu),
+    ManyCgraPayloadType(CMD_LC_CONFIG_CHILD_COUNT, DataType(1, 0), 0, CtrlType(0), ccu),
+    ManyCgraPayloadType(CMD_LC_CONFIG_TARGET,
+                        *mk_many_target_config(9, 1), CtrlType(0), ccu),
+    ManyCgraPayloadType(CMD_LC_CONFIG_PARENT,
+                        DataType(ccu | (1 << many_ccu_id_bits), 0), 0, CtrlType(0), ccu),
+    ManyCgraPayloadType(CMD_LC_LAUNCH, DataType(0, 0), 0, CtrlType(0), 0),
+  ]
+
+  src_from_tile = [
+    ManyCgraPayloadType(CMD_LEAF_COUNTER_COMPLETE, DataType(0, 0), 0, CtrlType(0), 9),
+  ] * 2
+
+  sink_to_tile = [
+    ManyCgraPayloadType(CMD_RESET_LEAF_COUNTER, DataType(0, 0), 0, CtrlType(0), 9),
+  ]
+
+  th = TestHarness(DataType, CtrlType, ManyCgraPayloadType,
+                   many_ccus, max_targets, data_mem_size, many_ctrl_mem_size,
+                   num_tiles,
+                   src_config, src_from_tile, [],
+                   sink_to_tile, [])
+  run_sim(th)
+
+  assert th.dut.ccu_state[ccu] == CCU_STATE_COMPLETE
@@ -0,0 +1,123 @@
+"""
+==========================================================================
+PipelinedFu.py
+==========================================================================
+Generic fully pipelined wrapper of a single-cycle functional unit. The
+wrapped unit computes the result at issue, which then goes through
+`latency` pipeline stages before leaving the unit. A new operation is
+issued every cycle (II = 1) as long as the pipeline is not stalled by the
+downstream, so the recv_opt is acknowledged at issue and the ctrl memory
+keeps advancing while the results are in flight. Each stage carries the
+ctrl address of the operation it holds as a tag, i.e., the in-flight tag
+queue, which identifies the ctrl word a retiring result belongs to.
+
+In a tile, the fu_crossbar routes whatever leaves the unit with the
+current ctrl word, so a result only leaves the unit while its tag matches
+the current ctrl address, i.e., it is routed (and predicated) by the ctrl
+word that issued it, whose fu_crossbar hence waits until the result
+drains. A result whose ctrl word has already moved on, e.g., skipped by
+the fu_crossbar prologue, is dropped instead of being routed by another
+ctrl word.
+
+  Date : Oct 19, 2026
+"""
+
+from pymtl3 import *
+from .Fu import Fu
+from ...lib.opt_type import *
+
+class PipelinedFu(Fu):
+
+  def construct(s, CtrlPktType, num_inports, num_outports, FuType,
+                latency = 3, vector_factor_power = 0, fu_kwargs = {}):
+
+    super(PipelinedFu, s).construct(CtrlPktType, num_inports, num_outports,
+                                    latency, vector_factor_power)
+
+    assert latency >= 1
+    s.num_stages = latency
+
+    # Components.
+    s.inner = FuType(CtrlPktType, num_inports, num_outports, **fu_kwargs)
+
+    s.stage_val = [[Wire(b1) for _ in range(num_outports)]
+                   for _ in range(latency)]
+    s.stage_msg = [[Wire(s.DataType) for _ in range(num_outports)]
+                   for _ in range(latency)]
+    s.stage_tag = [Wire(s.CtrlAddrType) for _ in range(latency)]
+    # The pipeline shifts (and accepts a new operation) unless the last
+    # stage holds a result the downstream is not ready for.
+    s.advance = Wire(b1)
+    s.last_blocked = Wire(num_outports)
+    # Whether the ctrl word that issued the last stage is still current.
+    s.last_current = Wire(b1)
+
+    # Connections.
+    for i in range(num_inports):
+      s.recv_in[i] //= s.inner.recv_in[i]
+    s.recv_const //= s.inner.recv_const
+    s.recv_opt //= s.inner.recv_opt
+    s.send_to_ctrl_mem.val //= s.inner.send_to_ctrl_mem.val
+    s.send_to_ctrl_mem.msg //= s.inner.send_to_ctrl_mem.msg
+    s.recv_from_ctrl_mem.rdy //= s.inner.recv_from_ctrl_mem.rdy
+    s.inner.from_mem_rdata.val //= 0
+    s.inner.from_mem_rdata.msg //= s.DataType()
+    s.inner.to_mem_raddr.rdy //= 0
+    s.inner.to_mem_waddr.rdy //= 0
+    s.inner.to_mem_wdata.rdy //= 0
+
+    # The input ports only used by some of the units are left unconnected
+    # in the tests of the standalone units, so they are forwarded through
+    # a combinational block instead of being merged into the same nets.
+    @update
+    def update_inner_inports():
+      s.inner.send_to_ctrl_mem.rdy @= s.send_to_ctrl_mem.rdy
+      s.inner.recv_from_ctrl_mem.val @= s.recv_from_ctrl_mem.val
+      s.inner.recv_from_ctrl_mem.msg @= s.recv_from_ctrl_mem.msg
+      s.inner.ctrl_addr_inport @= s.ctrl_addr_inport
+      s.inner.clear @= s.clear
+
+    @update
+    def update_advance():
+      s.last_current @= s.stage_tag[latency - 1] == s.ctrl_addr_inport
+      for j in range(num_outports):
+        s.last_blocked[j] @= s.stage_val[latency - 1][j] & s.last_current & \
+                             ~s.send_out[j].rdy
+      s.advance @= s.last_blocked == 0
+
+    @update
+    def update_send_out():
+      for j in range(num_outports):
+        s.send_out[j].val @= s.stage_val[latency - 1][j] & s.last_current
+        s.send_out[j].msg @= s.stage_msg[latency - 1][j]
+        s.inner.send_out[j].rdy @= s.advance
+
+    @update_ff
+    def update_pipeline():
+      if s.reset:
+        for k in range(latency):
+          for j in range(num_outports):
+            s.stage_val[k][j] <<= 0
+            s.stage_msg[k][j] <<= s.DataType()
+          s.stage_tag[k] <<= s.CtrlAddrType(0)
+      elif s.advance:
+        for j in range(num_outports):
+          s.stage_val[0][j] <<= s.inner.send_out[j].val
+          s.stage_msg[0][j] <<= s.inner.send_out[j].msg
+        s.stage_tag[0] <<= s.ctrl_addr_inport
+        for k in range(1, latency):
+          for j in range(num_outports):
+            s.stage_val[k][j] <<= s.stage_val[k - 1][j]
+            s.stage_msg[k][j] <<= s.stage_msg[k - 1][j]
+          s.stage_tag[k] <<= s.stage_tag[k - 1]
+      else:
+        # Only the results that are not accepted yet are kept, the stale
+        # ones are dropped.
+        for j in range(num_outports):
+          s.stage_val[latency - 1][j] <<= s.last_blocked[j]
+
+  def line_trace(s):
+    in_flight = "|".join([(f"{s.stage_tag[k]}" if s.stage_val[k][0] else ".")
+                          for k in range(s.num_stages)])
+    return f'{s.inner.line_trace()} [in-flight: {in_flight}]'
+
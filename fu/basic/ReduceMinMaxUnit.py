@@ -0,0 +1,53 @@
+'''
+==========================================================================
+ReduceMinMaxUnit.py
+==========================================================================
+A parameterized reduce unit that calculates the unsigned minimum (or the
+maximum if `is_max` is set) of N inputs. The inputs are compared by a
+balanced tree, i.e., clog2(N) levels of comparators instead of a chain of
+N - 1 ones. N does not need to be a power of two, the missing leaves of
+the tree being all ones for the minimum and zeros for the maximum.
+
+  Date : Oct 19, 2026
+'''
+
+from pymtl3 import *
+
+class ReduceMinMaxUnit( Component ):
+
+  def construct( s, DataType, num_inputs ):
+    # Local parameter
+    s.DataType   = DataType
+    s.num_inputs = num_inputs
+
+    # Interface
+    s.in_ = [ InPort( s.DataType ) for _ in range( s.num_inputs ) ]
+    s.is_max = InPort( b1 )
+    s.out = OutPort( s.DataType )
+
+    # Components
+    # Level 0 holds the (padded) inputs, and level `num_levels` the result.
+    # Level l only uses its first 2^(num_levels - l) entries, all the levels
+    # having the same size to be translatable.
+    s.num_levels = clog2( s.num_inputs )
+    s.partial_result = [ [ Wire( s.DataType ) for _ in range( 1 << s.num_levels ) ]
+                         for l in range( s.num_levels + 1 ) ]
+
+    # Each node of the tree is a combinational block indexed by constants.
+    for i in range( s.num_inputs ):
+      s.partial_result[0][i] //= s.in_[i]
+    for i in range( s.num_inputs, 1 << s.num_levels ):
+      s.partial_result[0][i] //= lambda: s.DataType( 0 ) if s.is_max else ~s.DataType( 0 )
+    for l in range( s.num_levels ):
+      for i in range( 1 << ( s.num_levels - l - 1 ) ):
+        s.partial_result[l+1][i] //= lambda: ( s.partial_result[l][2*i]
+            if ( s.partial_result[l][2*i] < s.partial_result[l][2*i+1] ) == ~s.is_max
+            else s.partial_result[l][2*i+1] )
+
+    s.out //= s.partial_result[s.num_levels][0]
+
+  def line_trace( s ):
+    in_trace = ','.join([str(p) for p in s.in_])
+    op = 'max' if s.is_max else 'min'
+    return f'{op}({in_trace}){s.out}'
+
@@ -3,9 +3,10 @@
 ReduceMulUnit.py
 ==========================================================================
 A parameterized reduce integer multiply unit that calculates the product
-of N inputs. This unit simply has a chain of multipliers. A potentially
-more optimized implementation could use a tree of multipliers instead of a
-chain.
+of N inputs. The inputs are multiplied by a balanced tree of multipliers,
+i.e., clog2(N) levels of multipliers instead of a chain of N - 1 ones. N
+does not need to be a power of two, the missing leaves of the tree being
+ones.
 
 This unit assumes no overflow.
 
@@ -27,17 +28,25 @@ class ReduceMulUnit( Component ):
     s.out = OutPort( s.DataType )
 
     # Components
-    s.partial_sum = [ Wire( s.DataType ) for _ in range( s.num_inputs ) ]
-
-    @update
-    def up_sum():
-      s.partial_sum[0] @= s.in_[0]
-      for i in range( 1, s.num_inputs ):
-        s.partial_sum[i] @= s.partial_sum[i-1] * s.in_[i]
-
-    s.out //= s.partial_sum[s.num_inputs-1]
+    # Level 0 holds the (padded) inputs, and level `num_levels` the result.
+    # Level l only uses its first 2^(num_levels - l) entries, all the levels
+    # having the same size to be translatable.
+    s.num_levels = clog2( s.num_inputs )
+    s.partial_product = [ [ Wire( s.DataType ) for _ in range( 1 << s.num_levels ) ]
+                          for l in range( s.num_levels + 1 ) ]
+
+    # Each node of the tree is a combinational block indexed by constants.
+    for i in range( s.num_inputs ):
+      s.partial_product[0][i] //= s.in_[i]
+    for i in range( s.num_inputs, 1 << s.num_levels ):
+      s.partial_product[0][i] //= s.DataType( 1 )
+    for l in range( s.num_levels ):
+      for i in range( 1 << ( s.num_levels - l - 1 ) ):
+        s.partial_product[l+1][i] //= lambda: s.partial_product[l][2*i] * s.partial_product[l][2*i+1]
+
+    s.out //= s.partial_product[s.num_levels][0]
 
   def line_trace( s ):
     in_trace = '*'.join([str(p) for p in s.in_])
-    return f'{s.in_trace}(){s.out}'
+    return f'{in_trace}(){s.out}'
 
@@ -2,9 +2,10 @@
 ==========================================================================
 SumUnit.py
 ==========================================================================
-A parameterized sum unit that calculates the sum of N inputs. This unit
-simply has a chain of adders. A potentially more optimized implementation
-could use an adder tree instead of an adder chain.
+A parameterized sum unit that calculates the sum of N inputs. The inputs
+are summed up by a balanced tree of adders, i.e., clog2(N) levels of
+adders instead of a chain of N - 1 ones. N does not need to be a power of
+two, the missing leaves of the tree being zeros.
 
 This unit assumes no overflow.
 
@@ -26,17 +27,25 @@ class SumUnit( Component ):
     s.out = OutPort( s.DataType )
 
     # Components
-    s.partial_sum = [ Wire( s.DataType ) for _ in range( s.num_inputs ) ]
-
-    @update
-    def up_sum():
-      s.partial_sum[0] @= s.in_[0]
-      for i in range( 1, s.num_inputs ):
-        s.partial_sum[i] @= s.partial_sum[i-1] + s.in_[i]
-
-    s.out //= lambda: s.partial_sum[s.num_inputs-1]
+    # Level 0 holds the (padded) inputs, and level `num_levels` the result.
+    # Level l only uses its first 2^(num_levels - l) entries, all the levels
+    # having the same size to be translatable.
+    s.num_levels = clog2( s.num_inputs )
+    s.partial_sum = [ [ Wire( s.DataType ) for _ in range( 1 << s.num_levels ) ]
+                      for l in range( s.num_levels + 1 ) ]
+
+    # Each node of the tree is a combinational block indexed by constants.
+    for i in range( s.num_inputs ):
+      s.partial_sum[0][i] //= s.in_[i]
+    for i in range( s.num_inputs, 1 << s.num_levels ):
+      s.partial_sum[0][i] //= s.DataType( 0 )
+    for l in range( s.num_levels ):
+      for i in range( 1 << ( s.num_levels - l - 1 ) ):
+        s.partial_sum[l+1][i] //= lambda: s.partial_sum[l][2*i] + s.partial_sum[l][2*i+1]
+
+    s.out //= s.partial_sum[s.num_levels][0]
 
   def line_trace( s ):
     in_trace = '+'.join([str(p) for p in s.in_])
-    return f'{s.in_trace}(){s.out}'
+    return f'{in_trace}(){s.out}'
 
@@ -0,0 +1,31 @@
+'''
+==========================================================================
+SumUnit_test.py
+==========================================================================
+Translation tests for the adder tree, with a number of inputs that is
+not a power of two.
+
+  Date : Oct 19, 2026
+'''
+
+from pymtl3 import *
+from pymtl3.passes.backends.verilog import VerilogTranslationPass
+
+from ..SumUnit import SumUnit
+
+def test_translate( tmp_path, monkeypatch ):
+  monkeypatch.chdir( tmp_path )
+  for num_inputs in [ 2, 5, 16 ]:
+    dut = SumUnit( mk_bits( 32 ), num_inputs )
+    dut.elaborate()
+    dut.set_metadata( VerilogTranslationPass.enable, True )
+    dut.apply( VerilogTranslationPass() )
+
+def test_sum():
+  dut = SumUnit( mk_bits( 32 ), 5 )
+  dut.apply( DefaultPassGroup() )
+  dut.sim_reset()
+  for i in range( 5 ):
+    dut.in_[i] @= i + 1
+  dut.sim_eval_combinational()
+  assert dut.out == 15
@@ -0,0 +1,201 @@
+"""
+==========================================================================
+DualIssueFlexibleFuRTL.py
+==========================================================================
+A flexible functional unit with two issue slots, each of which is a
+FlexibleFuRTL with its own FuList. The first slot executes the
+`operation` of the ctrl signal on its `fu_in` operands, and the second
+slot executes the `second_operation` on its `second_fu_in` operands
+(see `mk_ctrl(dual_issue = True)`), so that two operations on disjoint
+FUs can fire in the same cycle. The outports of the second slot follow
+the ones of the first slot, i.e., `send_out` has `2 * num_outports`
+ports towards the fu crossbar.
+
+The ctrl signal is consumed once both slots have done their job, each
+slot only firing once per ctrl signal. The operands shared by both slots
+are only consumed once both slots have fired, so a slot firing later
+still receives them.
+
+  Date : Oct 19, 2026
+"""
+
+from pymtl3 import *
+from .FlexibleFuRTL import FlexibleFuRTL
+from ...fu.single.NahRTL import NahRTL
+from ...fu.single.StreamingMemUnitRTL import StreamingMemUnitRTL
+from ...lib.basic.val_rdy.ifcs import ValRdyRecvIfcRTL as RecvIfcRTL
+from ...lib.basic.val_rdy.ifcs import ValRdySendIfcRTL as SendIfcRTL
+from ...lib.messages import *
+from ...lib.opt_type import *
+from ...lib.util.common import *
+
+class DualIssueFlexibleFuRTL(Component):
+  def construct(s,
+                CtrlPktType,
+                num_inports,
+                num_outports,
+                num_tiles,
+                FuList,
+                SecondFuList,
+                exec_lantency = {}):
+
+    # Constants.
+    num_slots = 2
+    s.DataType = CtrlPktType.get_field_type(kAttrPayload).get_field_type(kAttrData)
+    s.AddrType = CtrlPktType.get_field_type(kAttrPayload).get_field_type(kAttrDataAddr)
+    s.CtrlType = CtrlPktType.get_field_type(kAttrPayload).get_field_type(kAttrCtrl)
+    s.CtrlAddrType = CtrlPktType.get_field_type(kAttrPayload).get_field_type(kAttrCtrlAddr)
+    s.CgraPayloadType = CtrlPktType.get_field_type(kAttrPayload)
+    PrologueCountType = mk_bits(clog2(PROLOGUE_MAX_COUNT + 1))
+    assert kAttrSecondOperation in s.CtrlType.__bitstruct_fields__, \
+        "DualIssueFlexibleFuRTL requires mk_ctrl(dual_issue = True)"
+    assert StreamingMemUnitRTL not in SecondFuList
+
+    # Each slot is completed with its own NahRTL, on copies of the given
+    # lists. `fu_list` lists the units of both slots in the order of the
+    # memory and clear ports.
+    slot_fu_lists = [list(fu_list) + ([] if NahRTL in fu_list else [NahRTL])
+                     for fu_list in [FuList, SecondFuList]]
+    s.fu_list = slot_fu_lists[0] + slot_fu_lists[1]
+    s.fu_list_size = len(s.fu_list)
+    first_size = len(slot_fu_lists[0])
+
+    # Components.
+    s.slot = [FlexibleFuRTL(CtrlPktType, num_inports, num_outports,
+                            num_tiles, slot_fu_lists[k], exec_lantency)
+              for k in range(num_slots)]
+
+    # Interfaces.
+    s.recv_in = [RecvIfcRTL(s.DataType) for _ in range(num_inports)]
+    s.recv_const = RecvIfcRTL(s.DataType)
+    s.recv_opt = RecvIfcRTL(s.CtrlType)
+    s.send_out = [SendIfcRTL(s.DataType) for _ in range(num_slots * num_outports)]
+    s.send_to_ctrl_mem = SendIfcRTL(s.CgraPayloadType)
+    s.recv_from_ctrl_mem = RecvIfcRTL(s.CgraPayloadType)
+    s.recv_pkt_from_controller = RecvIfcRTL(CtrlPktType)
+    s.ctrl_addr_inport = InPort(s.CtrlAddrType)
+
+    s.to_mem_raddr = [SendIfcRTL(s.AddrType) for _ in range(s.fu_list_size)]
+    s.from_mem_rdata = [RecvIfcRTL(s.DataType) for _ in range(s.fu_list_size)]
+    s.to_mem_waddr = [SendIfcRTL(s.AddrType) for _ in range(s.fu_list_size)]
+    s.to_mem_wdata = [SendIfcRTL(s.DataType) for _ in range(s.fu_list_size)]
+    s.clear = [InPort(b1) for _ in range(s.fu_list_size)]
+
+    s.prologue_count_inport = InPort(PrologueCountType)
+    s.tile_id = InPort(mk_bits(clog2(num_tiles + 1)))
+
+    # Signals indicating whether a slot already fired for the current ctrl
+    # signal, or has nothing to do.
+    s.slot_done = [Wire(b1) for _ in range(num_slots)]
+    s.second_slot_idle = Wire(b1)
+    s.recv_in_rdy_vector = [Wire(num_slots) for _ in range(num_inports)]
+    # Whether each slot takes an operand from the inport.
+    s.slot_uses_inport = [Wire(num_inports) for _ in range(num_slots)]
+
+    # Connections.
+    for k in range(num_slots):
+      for j in range(num_outports):
+        s.slot[k].send_out[j] //= s.send_out[k * num_outports + j]
+
+    s.slot[1].recv_pkt_from_controller.val //= 0
+    s.slot[1].recv_pkt_from_controller.msg //= CtrlPktType()
+
+    for i in range(s.fu_list_size):
+      k = 0 if i < first_size else 1
+      idx = i if i < first_size else i - first_size
+      s.to_mem_raddr[i] //= s.slot[k].to_mem_raddr[idx]
+      s.from_mem_rdata[i] //= s.slot[k].from_mem_rdata[idx]
+      s.to_mem_waddr[i] //= s.slot[k].to_mem_waddr[idx]
+      s.to_mem_wdata[i] //= s.slot[k].to_mem_wdata[idx]
+      s.clear[i] //= s.slot[k].clear[idx]
+
+    # The input ports only used by some of the tiles are forwarded through
+    # a combinational block instead of being merged into the same nets, so
+    # that they can be left unconnected.
+    @update
+    def update_inports():
+      for k in range(num_slots):
+        s.slot[k].ctrl_addr_inport @= s.ctrl_addr_inport
+        s.slot[k].prologue_count_inport @= s.prologue_count_inport
+        s.slot[k].tile_id @= s.tile_id
+      s.slot[0].recv_pkt_from_controller.val @= s.recv_pkt_from_controller.val
+      s.slot[0].recv_pkt_from_controller.msg @= s.recv_pkt_from_controller.msg
+      s.recv_pkt_from_controller.rdy @= s.slot[0].recv_pkt_from_controller.rdy
+
+    @update
+    def update_opt():
+      s.second_slot_idle @= (s.recv_opt.msg.second_operation == OPT_START) | \
+                            (s.recv_opt.msg.second_operation == OPT_NAH)
+
+      s.slot[0].recv_opt.msg @= s.recv_opt.msg
+      s.slot[0].recv_opt.val @= s.recv_opt.val & ~s.slot_done[0]
+
+      s.slot[1].recv_opt.msg @= s.recv_opt.msg
+      s.slot[1].recv_opt.msg.operation @= s.recv_opt.msg.second_operation
+      for i in range(num_inports):
+        s.slot[1].recv_opt.msg.fu_in[i] @= s.recv_opt.msg.second_fu_in[i]
+      s.slot[1].recv_opt.val @= s.recv_opt.val & ~s.slot_done[1] & \
+                                ~s.second_slot_idle
+
+      s.recv_opt.rdy @= (s.slot[0].recv_opt.rdy | s.slot_done[0]) & \
+                        (s.slot[1].recv_opt.rdy | s.slot_done[1] | s.second_slot_idle)
+
+    @update
+    def update_slot_uses_inport():
+      for k in range(num_slots):
+        s.slot_uses_inport[k] @= 0
+      for port in range(num_inports):
+        for i in range(num_inports):
+          if s.recv_opt.msg.fu_in[i] == port + 1:
+            s.slot_uses_inport[0][port] @= 1
+          if ~s.second_slot_idle & (s.recv_opt.msg.second_fu_in[i] == port + 1):
+            s.slot_uses_inport[1][port] @= 1
+
+    @update
+    def update_operands():
+      for k in range(num_slots):
+        s.slot[k].recv_const.msg @= s.recv_const.msg
+        s.slot[k].recv_const.val @= s.recv_const.val
+        for port in range(num_inports):
+          s.slot[k].recv_in[port].msg @= s.recv_in[port].msg
+          s.slot[k].recv_in[port].val @= s.recv_in[port].val
+          s.recv_in_rdy_vector[port][k] @= s.slot[k].recv_in[port].rdy
+      s.recv_const.rdy @= s.slot[0].recv_const.rdy | s.slot[1].recv_const.rdy
+      for port in range(num_inports):
+        if s.slot_uses_inport[0][port] & s.slot_uses_inport[1][port]:
+          # A shared operand is kept until the later slot fires.
+          s.recv_in[port].rdy @= \
+              (s.recv_in_rdy_vector[port][0] | s.slot_done[0]) & \
+              (s.recv_in_rdy_vector[port][1] | s.slot_done[1])
+        else:
+          s.recv_in[port].rdy @= reduce_or(s.recv_in_rdy_vector[port])
+
+    @update
+    def connect_to_controller():
+      for k in range(num_slots):
+        s.slot[k].recv_from_ctrl_mem.msg @= s.recv_from_ctrl_mem.msg
+        s.slot[k].recv_from_ctrl_mem.val @= s.recv_from_ctrl_mem.val
+        s.slot[k].send_to_ctrl_mem.rdy @= s.send_to_ctrl_mem.rdy
+      s.recv_from_ctrl_mem.rdy @= s.slot[0].recv_from_ctrl_mem.rdy | \
+                                  s.slot[1].recv_from_ctrl_mem.rdy
+
+      s.send_to_ctrl_mem.msg @= s.CgraPayloadType(0, 0, 0, 0, 0)
+      s.send_to_ctrl_mem.val @= 0
+      for k in range(num_slots):
+        if s.slot[k].send_to_ctrl_mem.val:
+          s.send_to_ctrl_mem.msg @= s.slot[k].send_to_ctrl_mem.msg
+          s.send_to_ctrl_mem.val @= 1
+
+    @update_ff
+    def update_slot_done():
+      if s.reset | (s.recv_opt.val & s.recv_opt.rdy):
+        for k in range(num_slots):
+          s.slot_done[k] <<= 0
+      else:
+        for k in range(num_slots):
+          if s.slot[k].recv_opt.val & s.slot[k].recv_opt.rdy:
+            s.slot_done[k] <<= 1
+
+  def line_trace(s):
+    return f'[slot0: {s.slot[0].line_trace()}] [slot1: {s.slot[1].line_trace()}]'
+
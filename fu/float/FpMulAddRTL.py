@@ -0,0 +1,129 @@
+"""
+==========================================================================
+FpMulAddRTL.py
+==========================================================================
+Fused floating-point multiply-add for CGRA tile, which computes
+in0 * in1 + in2 (OPT_FMUL_FADD) or in0 * const + in1
+(OPT_FMUL_CONST_FADD) with a single rounding step (round to nearest
+even), so a float MAC takes one FU instead of a FpMulRTL and a FpAddRTL.
+
+  Date : Oct 19, 2026
+"""
+
+from pymtl3 import *
+from .FusedMulAddFNRTL import FusedMulAddFN
+from ..basic.Fu import Fu
+from ...lib.opt_type import *
+from ...lib.util.data_struct_attr import *
+
+class FpMulAddRTL(Fu):
+
+  def construct(s, CtrlPktType,
+                num_inports, num_outports,
+                exp_nbits = 8,
+                sig_nbits = 23):
+
+    super(FpMulAddRTL, s).construct(CtrlPktType, num_inports, num_outports)
+
+    # Local parameters
+    assert s.DataType.get_field_type(kAttrPayload).nbits == exp_nbits + sig_nbits + 1
+    assert num_inports >= 3
+
+    FuInType = mk_bits(clog2(num_inports + 1))
+
+    # Components
+    s.fma = FusedMulAddFN(exp_nbits, sig_nbits)
+
+    # Wires
+    s.in0 = Wire(FuInType)
+    s.in1 = Wire(FuInType)
+    s.in2 = Wire(FuInType)
+
+    idx_nbits = clog2(num_inports)
+    s.in0_idx = Wire(idx_nbits)
+    s.in1_idx = Wire(idx_nbits)
+    s.in2_idx = Wire(idx_nbits)
+
+    s.in0_idx //= s.in0[0:idx_nbits]
+    s.in1_idx //= s.in1[0:idx_nbits]
+    s.in2_idx //= s.in2[0:idx_nbits]
+
+    s.recv_all_val = Wire(1)
+
+    @update
+    def comb_logic():
+
+      s.recv_all_val @= 0
+      # For pick input register
+      s.in0 @= 0
+      s.in1 @= 0
+      s.in2 @= 0
+      for i in range(num_inports):
+        s.recv_in[i].rdy @= b1(0)
+
+      for i in range(num_outports):
+        s.send_out[i].val @= 0
+        s.send_out[i].msg @= s.DataType()
+
+      s.recv_const.rdy @= 0
+      s.recv_opt.rdy @= 0
+
+      s.send_to_ctrl_mem.val @= 0
+      s.send_to_ctrl_mem.msg @= s.CgraPayloadType(0, 0, 0, 0, 0)
+
+      s.recv_from_ctrl_mem.rdy @= 0
+
+      s.fma.a @= 0
+      s.fma.b @= 0
+      s.fma.c @= 0
+
+      if s.recv_opt.val:
+        if s.recv_opt.msg.fu_in[0] != 0:
+          s.in0 @= zext(s.recv_opt.msg.fu_in[0] - 1, FuInType)
+        if s.recv_opt.msg.fu_in[1] != 0:
+          s.in1 @= zext(s.recv_opt.msg.fu_in[1] - 1, FuInType)
+        if s.recv_opt.msg.fu_in[2] != 0:
+          s.in2 @= zext(s.recv_opt.msg.fu_in[2] - 1, FuInType)
+
+      if s.recv_opt.val:
+        if s.recv_opt.msg.operation == OPT_FMUL_FADD:
+          s.fma.a @= s.recv_in[s.in0_idx].msg.payload
+          s.fma.b @= s.recv_in[s.in1_idx].msg.payload
+          s.fma.c @= s.recv_in[s.in2_idx].msg.payload
+          s.send_out[0].msg.predicate @= s.recv_in[s.in0_idx].msg.predicate & \
+                                         s.recv_in[s.in1_idx].msg.predicate & \
+                                         s.recv_in[s.in2_idx].msg.predicate
+          s.recv_all_val @= s.recv_in[s.in0_idx].val & \
+                            s.recv_in[s.in1_idx].val & \
+                            s.recv_in[s.in2_idx].val
+          s.send_out[0].val @= s.recv_all_val
+          s.recv_in[s.in0_idx].rdy @= s.recv_all_val & s.send_out[0].rdy
+          s.recv_in[s.in1_idx].rdy @= s.recv_all_val & s.send_out[0].rdy
+          s.recv_in[s.in2_idx].rdy @= s.recv_all_val & s.send_out[0].rdy
+          s.recv_opt.rdy @= s.recv_all_val & s.send_out[0].rdy
+
+        elif s.recv_opt.msg.operation == OPT_FMUL_CONST_FADD:
+          s.fma.a @= s.recv_in[s.in0_idx].msg.payload
+          s.fma.b @= s.recv_const.msg.payload
+          s.fma.c @= s.recv_in[s.in1_idx].msg.payload
+          s.send_out[0].msg.predicate @= s.recv_in[s.in0_idx].msg.predicate & \
+                                         s.recv_in[s.in1_idx].msg.predicate
+          s.recv_all_val @= s.recv_in[s.in0_idx].val & \
+                            s.recv_in[s.in1_idx].val & \
+                            s.recv_const.val
+          s.send_out[0].val @= s.recv_all_val
+          s.recv_in[s.in0_idx].rdy @= s.recv_all_val & s.send_out[0].rdy
+          s.recv_in[s.in1_idx].rdy @= s.recv_all_val & s.send_out[0].rdy
+          s.recv_const.rdy @= s.recv_all_val & s.send_out[0].rdy
+          s.recv_opt.rdy @= s.recv_all_val & s.send_out[0].rdy
+
+        else:
+          for j in range(num_outports):
+            s.send_out[j].val @= b1(0)
+          s.recv_opt.rdy @= 0
+          s.recv_in[s.in0_idx].rdy @= 0
+          s.recv_in[s.in1_idx].rdy @= 0
+          s.recv_in[s.in2_idx].rdy @= 0
+
+        s.send_out[0].msg.payload @= s.fma.out
+
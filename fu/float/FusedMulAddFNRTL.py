@@ -0,0 +1,254 @@
+"""
+==========================================================================
+FusedMulAddFNRTL.py
+==========================================================================
+Combinational fused multiply-add on IEEE-754 binary floating-point
+numbers, i.e., out = a * b + c with a single rounding step (round to
+nearest even). The product is kept exact (2 * (sig_nbits + 1) bits) and
+aligned with the addend before the sum is rounded, so the result differs
+from a FpMulRTL followed by a FpAddRTL whenever the product is inexact.
+Subnormals are supported; NaN results are the canonical quiet NaN.
+
+  Date : Oct 19, 2026
+"""
+
+from pymtl3 import *
+
+class FusedMulAddFN(Component):
+
+  def construct(s, exp_nbits = 8, sig_nbits = 23):
+
+    # Constants.
+    E = exp_nbits
+    M = sig_nbits
+    bias = (1 << (E - 1)) - 1
+    exp_max = (1 << E) - 1
+    # Width of the exact product, in which both operands are normalized.
+    N = 2 * M + 2
+    # Accumulator with 3 guard bits and 1 carry bit.
+    AW = N + 4
+    # The exponents are offset by `OFF`, so that they are never negative.
+    OFF = 2 * bias + 4 * M + 8
+    XW = clog2(2 * OFF + 4 * (1 << E) + 4 * N)
+    DataType = mk_bits(E + M + 1)
+    ExpType = mk_bits(E)
+    SigType = mk_bits(M + 1)
+    MantType = mk_bits(N)
+    AccType = mk_bits(AW)
+    XType = mk_bits(XW)
+    PackType = mk_bits(E + M + 2)
+    PosType = mk_bits(clog2(AW + 2))
+
+    # Interfaces.
+    s.a = InPort(DataType)
+    s.b = InPort(DataType)
+    s.c = InPort(DataType)
+    s.out = OutPort(DataType)
+
+    # Unpacked operands.
+    s.sign = [Wire(b1) for _ in range(3)]
+    s.exp_field = [Wire(ExpType) for _ in range(3)]
+    s.frac = [Wire(mk_bits(M)) for _ in range(3)]
+    s.exp = [Wire(ExpType) for _ in range(3)]
+    s.sig = [Wire(SigType) for _ in range(3)]
+    s.is_zero = [Wire(b1) for _ in range(3)]
+    s.is_inf = [Wire(b1) for _ in range(3)]
+    s.is_nan = [Wire(b1) for _ in range(3)]
+
+    # Normalized product and addend.
+    s.product = Wire(MantType)
+    s.msb_p = Wire(PosType)
+    s.msb_c = Wire(PosType)
+    s.mant_p = Wire(MantType)
+    s.mant_c = Wire(MantType)
+    s.exp_p = Wire(XType)
+    s.exp_c = Wire(XType)
+    s.sign_p = Wire(b1)
+
+    # Alignment and sum.
+    s.p_is_big = Wire(b1)
+    s.exp_big = Wire(XType)
+    s.diff = Wire(XType)
+    s.small_full = Wire(AccType)
+    s.small_shifted = Wire(AccType)
+    s.sum = Wire(AccType)
+    s.sign_sum = Wire(b1)
+
+    # Normalization and rounding.
+    s.msb_s = Wire(PosType)
+    s.lead_exp = Wire(XType)
+    s.is_normal = Wire(b1)
+    s.pos = Wire(XType)
+    s.right_shift = Wire(XType)
+    s.left_shift = Wire(XType)
+    s.kept = Wire(AccType)
+    s.round_part = Wire(AccType)
+    s.round_bit = Wire(b1)
+    s.sticky_bit = Wire(b1)
+    s.rounded = Wire(PackType)
+    s.packed = Wire(PackType)
+
+    # Connections.
+    s.sign[0] //= s.a[E + M]
+    s.sign[1] //= s.b[E + M]
+    s.sign[2] //= s.c[E + M]
+    s.exp_field[0] //= s.a[M:E + M]
+    s.exp_field[1] //= s.b[M:E + M]
+    s.exp_field[2] //= s.c[M:E + M]
+    s.frac[0] //= s.a[0:M]
+    s.frac[1] //= s.b[0:M]
+    s.frac[2] //= s.c[0:M]
+
+    @update
+    def update_unpack():
+      for i in range(3):
+        s.is_zero[i] @= (s.exp_field[i] == 0) & (s.frac[i] == 0)
+        s.is_inf[i] @= (s.exp_field[i] == exp_max) & (s.frac[i] == 0)
+        s.is_nan[i] @= (s.exp_field[i] == exp_max) & (s.frac[i] != 0)
+        # The normal numbers have the hidden bit, and the subnormal ones
+        # have the exponent of 1.
+        if s.exp_field[i] != 0:
+          s.sig[i] @= concat(b1(1), s.frac[i])
+          s.exp[i] @= s.exp_field[i]
+        else:
+          s.sig[i] @= concat(b1(0), s.frac[i])
+          s.exp[i] @= ExpType(1)
+
+    @update
+    def update_normalize():
+      s.product @= zext(s.sig[0], MantType) * zext(s.sig[1], MantType)
+      s.sign_p @= s.sign[0] ^ s.sign[1]
+
+      s.msb_p @= 0
+      s.msb_c @= 0
+      for i in range(N):
+        if s.product[i]:
+          s.msb_p @= i
+      for i in range(M + 1):
+        if s.sig[2][i]:
+          s.msb_c @= i
+
+      # mant * 2^(exp - OFF) is the value of the product/addend, with the
+      # leading one of mant at the MSB.
+      s.mant_p @= s.product << (MantType(N - 1) - zext(s.msb_p, MantType))
+      s.mant_c @= zext(s.sig[2], MantType) << (MantType(N - 1) - zext(s.msb_c, MantType))
+      s.exp_p @= zext(s.exp[0], XType) + zext(s.exp[1], XType) + \
+                 zext(s.msb_p, XType) + XType(OFF - 2 * bias - 2 * M - (N - 1))
+      s.exp_c @= zext(s.exp[2], XType) + zext(s.msb_c, XType) + \
+                 XType(OFF - bias - M - (N - 1))
+      # A zero operand never outweighs the other one.
+      if s.product == 0:
+        s.exp_p @= 0
+      if s.sig[2] == 0:
+        s.exp_c @= 0
+
+    @update
+    def update_align_add():
+      s.p_is_big @= (s.exp_p > s.exp_c) | \
+                    ((s.exp_p == s.exp_c) & (s.mant_p >= s.mant_c))
+      if s.p_is_big:
+        s.exp_big @= s.exp_p
+        s.diff @= s.exp_p - s.exp_c
+        s.small_full @= zext(s.mant_c, AccType) << 3
+        s.sign_sum @= s.sign_p
+      else:
+        s.exp_big @= s.exp_c
+        s.diff @= s.exp_c - s.exp_p
+        s.small_full @= zext(s.mant_p, AccType) << 3
+        s.sign_sum @= s.sign[2]
+
+      # The bits shifted out of the smaller operand are jammed into its
+      # LSB, i.e., the sticky bit.
+      if s.diff >= AW:
+        s.small_shifted @= zext(s.small_full != 0, AccType)
+      else:
+        s.small_shifted @= s.small_full >> zext(s.diff, AccType)
+        if (s.small_shifted << zext(s.diff, AccType)) != s.small_full:
+          s.small_shifted[0] @= 1
+
+      if s.p_is_big:
+        if s.sign_p == s.sign[2]:
+          s.sum @= (zext(s.mant_p, AccType) << 3) + s.small_shifted
+        else:
+          s.sum @= (zext(s.mant_p, AccType) << 3) - s.small_shifted
+      else:
+        if s.sign_p == s.sign[2]:
+          s.sum @= (zext(s.mant_c, AccType) << 3) + s.small_shifted
+        else:
+          s.sum @= (zext(s.mant_c, AccType) << 3) - s.small_shifted
+
+    @update
+    def update_round():
+      s.msb_s @= 0
+      for i in range(AW):
+        if s.sum[i]:
+          s.msb_s @= i
+
+      # sum * 2^(exp_big - OFF - 3) is the exact result, whose leading one
+      # has the biased exponent `lead_exp - OFF`.
+      s.lead_exp @= s.exp_big + zext(s.msb_s, XType) + XType(bias - 3)
+      s.is_normal @= s.lead_exp > XType(OFF)
+
+      # Position of the leading one within the rounded significand, i.e.,
+      # M for the normal numbers and less for the subnormal ones.
+      if s.is_normal:
+        s.pos @= zext(s.msb_s, XType)
+      else:
+        s.pos @= zext(s.msb_s, XType) + XType(OFF + 1) - s.lead_exp
+
+      s.right_shift @= 0
+      s.left_shift @= 0
+      if s.pos >= M:
+        s.right_shift @= s.pos - M
+      else:
+        s.left_shift @= M - s.pos
+
+      # The round bit is the LSB of `round_part`, below which the sticky
+      # bit gathers the remaining bits.
+      s.round_part @= 0
+      s.round_bit @= 0
+      s.sticky_bit @= 0
+      if s.right_shift > AW:
+        s.kept @= 0
+        s.sticky_bit @= s.sum != 0
+      elif s.right_shift > 0:
+        s.kept @= s.sum >> zext(s.right_shift, AccType)
+        s.round_part @= s.sum >> zext(s.right_shift - 1, AccType)
+        s.round_bit @= s.round_part[0]
+        s.sticky_bit @= (s.round_part << zext(s.right_shift - 1, AccType)) != s.sum
+      else:
+        s.kept @= s.sum << zext(s.left_shift, AccType)
+
+      # Round to nearest even.
+      s.rounded @= zext(s.kept[0:M + 1], PackType)
+      if s.round_bit & (s.sticky_bit | s.kept[0]):
+        s.rounded @= zext(s.kept[0:M + 1], PackType) + PackType(1)
+
+      # The hidden bit carries into the exponent, as well as the carry of
+      # the rounding.
+      if s.is_normal:
+        s.packed @= (zext(s.lead_exp - XType(OFF + 1), PackType) << M) + s.rounded
+      else:
+        s.packed @= s.rounded
+
+    @update
+    def update_out():
+      if s.is_nan[0] | s.is_nan[1] | s.is_nan[2] | \
+         (s.is_inf[0] & s.is_zero[1]) | (s.is_zero[0] & s.is_inf[1]) | \
+         ((s.is_inf[0] | s.is_inf[1]) & s.is_inf[2] & (s.sign_p != s.sign[2])):
+        s.out @= concat(b1(0), ExpType(exp_max), b1(1), mk_bits(M - 1)(0))
+      elif s.is_inf[0] | s.is_inf[1]:
+        s.out @= concat(s.sign_p, ExpType(exp_max), mk_bits(M)(0))
+      elif s.is_inf[2]:
+        s.out @= concat(s.sign[2], ExpType(exp_max), mk_bits(M)(0))
+      elif s.sum == 0:
+        # Exact zero, the sign is only negative for -0 + -0.
+        s.out @= concat(s.sign_p & s.sign[2], mk_bits(E + M)(0))
+      elif s.packed >= (PackType(exp_max) << M):
+        s.out @= concat(s.sign_sum, ExpType(exp_max), mk_bits(M)(0))
+      else:
+        s.out @= concat(s.sign_sum, s.packed[0:E + M])
+
+  def line_trace(s):
+    return f'{s.a}*{s.b}+{s.c}={s.out}'
+
@@ -0,0 +1,24 @@
+"""
+==========================================================================
+PipelinedFpAddRTL.py
+==========================================================================
+Fully pipelined floating-point adder for CGRA tile, i.e., FpAddRTL whose
+result takes `latency` cycles while a new operation is accepted every cycle.
+
+  Date : Oct 19, 2026
+"""
+
+from pymtl3 import *
+from ..basic.PipelinedFu import PipelinedFu
+from .FpAddRTL import FpAddRTL
+
+class PipelinedFpAddRTL(PipelinedFu):
+
+  def construct(s, CtrlPktType, num_inports, num_outports, latency = 3,
+                exp_nbits = 8, sig_nbits = 23):
+
+    super(PipelinedFpAddRTL, s).construct(CtrlPktType, num_inports,
+                                          num_outports, FpAddRTL, latency,
+                                          fu_kwargs = {"exp_nbits": exp_nbits,
+                                                       "sig_nbits": sig_nbits})
+
@@ -0,0 +1,25 @@
+"""
+==========================================================================
+PipelinedFpMulRTL.py
+==========================================================================
+Fully pipelined floating-point multiplier for CGRA tile, i.e., FpMulRTL
+whose result takes `latency` cycles while a new operation is accepted
+every cycle.
+
+  Date : Oct 19, 2026
+"""
+
+from pymtl3 import *
+from ..basic.PipelinedFu import PipelinedFu
+from .FpMulRTL import FpMulRTL
+
+class PipelinedFpMulRTL(PipelinedFu):
+
+  def construct(s, CtrlPktType, num_inports, num_outports, latency = 3,
+                exp_nbits = 8, sig_nbits = 23):
+
+    super(PipelinedFpMulRTL, s).construct(CtrlPktType, num_inports,
+                                          num_outports, FpMulRTL, latency,
+                                          fu_kwargs = {"exp_nbits": exp_nbits,
+                                                       "sig_nbits": sig_nbits})
+
@@ -0,0 +1,148 @@
+"""
+==========================================================================
+FpMulAddRTL_test.py
+==========================================================================
+Test cases for fused floating-point multiply-add on single-precision
+numbers.
+
+  Date : Oct 19, 2026
+"""
+
+import struct
+
+from pymtl3 import *
+from pymtl3.stdlib.test_utils import (run_sim,
+                                      config_model_with_cmdline_opts)
+from ..FpMulAddRTL import FpMulAddRTL
+from ..FusedMulAddFNRTL import FusedMulAddFN
+from ....lib.basic.val_rdy.SinkRTL import SinkRTL as TestSinkRTL
+from ....lib.basic.val_rdy.SourceRTL import SourceRTL as TestSrcRTL
+from ....lib.messages import *
+from ....lib.opt_type import *
+from ....mem.const.ConstQueueRTL import ConstQueueRTL
+
+exp_nbits = 8
+sig_nbits = 23
+
+def float_to_bits(f_value):
+  return struct.unpack('>I', struct.pack('>f', f_value))[0]
+
+#-------------------------------------------------------------------------
+# FusedMulAddFN
+#-------------------------------------------------------------------------
+
+# (a, b, c, a * b + c) with a single rounding.
+fma_vectors = [
+  # 1.5 * 2.0 + 0.25 = 3.25.
+  (0x3fc00000, 0x40000000, 0x3e800000, 0x40500000),
+  # (1 + 2^-12)^2 - (1 + 2^-11) = 2^-24, which is 0 if the product is
+  # rounded first.
+  (0x3f800800, 0x3f800800, 0xbf801000, 0x33800000),
+  # 0.1 * 10.0 - 1.0 keeps the rounding error of 0.1.
+  (0x3dcccccd, 0x41200000, 0xbf800000, 0x32800000),
+  # Exact cancellation gives +0.
+  (0x40400000, 0xc0000000, 0x40c00000, 0x00000000),
+  # Subnormals, 1.5 * 2^-149 ties to even.
+  (0x00000001, 0x3f000000, 0x00000001, 0x00000002),
+  # Overflow to infinity.
+  (0x7f7fffff, 0x40000000, 0x00000000, 0x7f800000),
+  # inf * 0 is NaN.
+  (0x7f800000, 0x00000000, 0x3f800000, 0x7fc00000),
+  # inf - inf is NaN.
+  (0x7f800000, 0x3f800000, 0xff800000, 0x7fc00000),
+]
+
+def test_fused_mul_add_fn():
+  dut = FusedMulAddFN(exp_nbits, sig_nbits)
+  dut.elaborate()
+  dut.apply(DefaultPassGroup())
+  dut.sim_reset()
+  for a, b, c, out in fma_vectors:
+    dut.a @= a
+    dut.b @= b
+    dut.c @= c
+    dut.sim_eval_combinational()
+    assert dut.out == out, dut.line_trace()
+
+#-------------------------------------------------------------------------
+# Test harness
+#-------------------------------------------------------------------------
+
+class TestHarness(Component):
+
+  def construct(s, FunctionUnit, IntraCgraPktType, DataType, ConfigType,
+                num_inports, num_outports,
+                src0_msgs, src1_msgs, src2_msgs, src_const,
+                ctrl_msgs, sink_msgs):
+
+    s.src_in0  = TestSrcRTL (DataType,   src0_msgs)
+    s.src_in1  = TestSrcRTL (DataType,   src1_msgs)
+    s.src_in2  = TestSrcRTL (DataType,   src2_msgs)
+    s.src_opt  = TestSrcRTL (ConfigType, ctrl_msgs)
+    s.sink_out = TestSinkRTL(DataType,   sink_msgs)
+
+    s.const_queue = ConstQueueRTL(DataType, src_const)
+    s.dut = FunctionUnit(IntraCgraPktType,
+                         num_inports, num_outports,
+                         exp_nbits,
+                         sig_nbits)
+
+    connect(s.src_in0.send,    s.dut.recv_in[0]        )
+    connect(s.src_in1.send,    s.dut.recv_in[1]        )
+    connect(s.src_in2.send,    s.dut.recv_in[2]        )
+    connect(s.dut.recv_const,  s.const_queue.send_const)
+    connect(s.src_opt.send,    s.dut.recv_opt          )
+    connect(s.dut.send_out[0], s.sink_out.recv         )
+
+  def done(s):
+    return s.src_in0.done() and s.src_in1.done() and \
+           s.src_in2.done() and s.src_opt.done() and \
+           s.sink_out.done()
+
+  def line_trace(s):
+    return s.dut.line_trace()
+
+def mk_types(num_inports, num_outports):
+  data_mem_size = 8
+  ctrl_mem_size = 4
+  DataType      = mk_data(1 + exp_nbits + sig_nbits, 1)
+  ConfigType    = mk_ctrl(num_inports, num_outports)
+  DataAddrType  = mk_bits(clog2(data_mem_size))
+  CtrlAddrType  = mk_bits(clog2(ctrl_mem_size))
+  CgraPayloadType = mk_cgra_payload(DataType, DataAddrType, ConfigType, CtrlAddrType)
+  IntraCgraPktType = mk_intra_cgra_pkt(1, 1, 1, CgraPayloadType)
+  return DataType, ConfigType, IntraCgraPktType
+
+def test_elaborate(cmdline_opts):
+  num_inports  = 4
+  num_outports = 2
+  DataType, ConfigType, IntraCgraPktType = mk_types(num_inports, num_outports)
+  dut = FpMulAddRTL(IntraCgraPktType, num_inports, num_outports,
+                    exp_nbits = exp_nbits,
+                    sig_nbits = sig_nbits)
+  dut = config_model_with_cmdline_opts(dut, cmdline_opts, duts = [])
+
+def test_mul_add():
+  FU            = FpMulAddRTL
+  num_inports   = 4
+  num_outports  = 2
+  DataType, ConfigType, IntraCgraPktType = mk_types(num_inports, num_outports)
+  f2b           = lambda f_value, predicate: DataType(float_to_bits(f_value), predicate)
+  FuInType      = mk_bits(clog2(num_inports + 1))
+  pick_register = [FuInType(x + 1) for x in range(num_inports)]
+  # 1.5 * 2.0 + 1.0, then 0.5 * const + 4.0 and -3.0 * const + 4.0, the
+  # predicate of the last one being cleared by its addend.
+  src_in0       = [f2b(1.5,  1), f2b(0.5,  1), f2b(-3.0,  1)]
+  src_in1       = [f2b(2.0,  1), f2b(4.0,  1), f2b(4.0,   0)]
+  src_in2       = [f2b(1.0,  1)                             ]
+  src_const     = [              f2b(4.0,  1), f2b(0.25,  1)]
+  sink_out      = [f2b(4.0,  1), f2b(6.0,  1), f2b(3.25,  0)]
+  src_opt       = [ConfigType(OPT_FMUL_FADD,       pick_register),
+                   ConfigType(OPT_FMUL_CONST_FADD, pick_register),
+                   ConfigType(OPT_FMUL_CONST_FADD, pick_register)]
+  th = TestHarness(FU, IntraCgraPktType, DataType, ConfigType,
+                   num_inports, num_outports,
+                   src_in0, src_in1, src_in2, src_const, src_opt,
+                   sink_out)
+  run_sim(th)
+
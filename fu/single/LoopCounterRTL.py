@@ -25,6 +25,20 @@ Configuration methods:
 1. Initial config (via Controller): Configure leaf counter parameters
 2. Runtime updates (via LC): Reset leaf counter or update shadow register
 
+Loop-nest flattening (num_loop_dims > 1):
+A perfect loop nest can be iterated by a single DCU, without any LC
+dispatch between the outer iterations. Each ctrl_addr then holds one
+counter per dimension, dimension 0 being the innermost (i.e., the leaf
+counter), configured by CMD_CONFIG_LOOP_LOWER/UPPER/STEP carrying the
+dimension in `data_addr`. Once the innermost counter reaches its upper
+bound, it wraps around to its lower bound and carries into the next
+configured dimension, the nest terminating when the outermost one
+reaches its upper bound. OPT_LOOP_COUNT then also emits the index of
+each configured outer dimension d on send_out[d] (if any), with the same
+predicate as the innermost index. The dimensions whose upper bound was
+never configured are skipped, so that a DCU configured as before keeps
+counting a single loop.
+
 Author : Shangkun Li
   Date : January 27, 2026
 """
@@ -38,7 +52,8 @@ from ...lib.cmd_type import *
 
 class LoopCounterRTL(Fu):
   
-  def construct(s, CtrlPktType, num_inports, num_outports, vector_factor_power = 0):
+  def construct(s, CtrlPktType, num_inports, num_outports, vector_factor_power = 0,
+                num_loop_dims = 1):
 
     super(LoopCounterRTL, s).construct(CtrlPktType, num_inports, num_outports, 1, vector_factor_power)    
    
@@ -49,9 +64,21 @@ class LoopCounterRTL(Fu):
     s.leaf_upper_bound = [Wire(s.DataType) for _ in range(ctrl_mem_size)]
     s.leaf_step = [Wire(s.DataType) for _ in range(ctrl_mem_size)]
     s.leaf_current_value = [Wire(s.DataType) for _ in range(ctrl_mem_size)]
-    
 
-    
+    # Counters of the outer dimensions 1..num_loop_dims-1 (indexed by d - 1)
+    # for the loop-nest flattening, and whether each of them is configured.
+    num_outer_dims = num_loop_dims - 1
+    s.outer_lower_bound = [[Wire(s.DataType) for _ in range(ctrl_mem_size)]
+                           for _ in range(num_outer_dims)]
+    s.outer_upper_bound = [[Wire(s.DataType) for _ in range(ctrl_mem_size)]
+                           for _ in range(num_outer_dims)]
+    s.outer_step = [[Wire(s.DataType) for _ in range(ctrl_mem_size)]
+                    for _ in range(num_outer_dims)]
+    s.outer_current_value = [[Wire(s.DataType) for _ in range(ctrl_mem_size)]
+                             for _ in range(num_outer_dims)]
+    s.outer_active = [[Wire(1) for _ in range(ctrl_mem_size)]
+                      for _ in range(num_outer_dims)]
+
     # Shadow register for each ctrl_addr (stores relay/root counter values).
     s.shadow_regs = [Wire(s.DataType) for _ in range(ctrl_mem_size)]
     s.shadow_valid = [Wire(1) for _ in range(ctrl_mem_size)]
@@ -72,7 +99,31 @@ class LoopCounterRTL(Fu):
     
     s.target_ctrl_addr = Wire(s.CtrlAddrType)
     s.target_ctrl_data = Wire(s.DataType)
-    
+    s.target_dim = Wire(s.DataAddrType)
+
+    # Whether the carry of the counters at the current ctrl_addr reaches
+    # dimension d, i.e., all the counters below it wrap around, the carry
+    # reaching num_loop_dims meaning the whole nest terminates.
+    s.dim_carry = [Wire(1) for _ in range(num_loop_dims + 1)]
+    # Whether the outer dimension d (indexed by d - 1) advances.
+    s.outer_advance = [Wire(1) for _ in range(num_outer_dims)]
+    # Whether the emitted outer indices are accepted.
+    s.outer_out_rdy = Wire(1)
+    # The outer dimensions that are emitted.
+    num_emitted_dims = max(1, min(num_loop_dims, num_outports))
+
+    @update
+    def update_dim_carry():
+      addr = s.current_ctrl_addr
+      s.dim_carry[0] @= b1(1)
+      s.dim_carry[1] @= (s.leaf_current_value[addr].payload + s.leaf_step[addr].payload) >= \
+                        s.leaf_upper_bound[addr].payload
+      for d in range(1, num_loop_dims):
+        s.outer_advance[d - 1] @= s.dim_carry[d] & s.outer_active[d - 1][addr] & \
+            ((s.outer_current_value[d - 1][addr].payload + s.outer_step[d - 1][addr].payload) <
+             s.outer_upper_bound[d - 1][addr].payload)
+        s.dim_carry[d + 1] @= s.dim_carry[d] & ~s.outer_advance[d - 1]
+
     @update
     def comb_logic():
       # Default values.
@@ -87,6 +138,7 @@ class LoopCounterRTL(Fu):
       s.send_to_ctrl_mem.val @= b1(0)
       s.send_to_ctrl_mem.msg @= s.CgraPayloadType(0, 0, 0, 0, 0)
       s.recv_from_ctrl_mem.rdy @= b1(0)
+      s.outer_out_rdy @= b1(1)
       
       # Gets current ctrl_addr for operation.
       s.current_ctrl_addr @= s.ctrl_addr_inport
@@ -101,6 +153,7 @@ class LoopCounterRTL(Fu):
       s.cmd_config_step @= b1(0)
       s.target_ctrl_addr @= s.CtrlAddrType(0)
       s.target_ctrl_data @= s.DataType(0, 0)
+      s.target_dim @= s.DataAddrType(0)
       
       if s.recv_opt.val:
         # ===== OPT_LOOP_COUNT: Loop-Driven Mode (Leaf Counter) =====
@@ -110,6 +163,14 @@ class LoopCounterRTL(Fu):
           # Execution phase: output current counter value.
           s.recv_const.rdy @= b1(0)
           s.send_out[0].msg.payload @= s.leaf_current_value[addr].payload
+
+          # Emits the indices of the configured outer dimensions.
+          for d in range(1, num_emitted_dims):
+            if s.outer_active[d - 1][addr]:
+              s.send_out[d].val @= b1(1)
+              s.send_out[d].msg.payload @= s.outer_current_value[d - 1][addr].payload
+              s.send_out[d].msg.predicate @= ~s.loop_terminated
+              s.outer_out_rdy @= s.outer_out_rdy & s.send_out[d].rdy
           
           if s.loop_terminated:
             # Loop terminated: predicate = 0.
@@ -122,16 +183,16 @@ class LoopCounterRTL(Fu):
                 CMD_LEAF_COUNTER_COMPLETE, s.DataType(0, 0), 0, s.recv_opt.msg, addr
               )
               s.send_out[0].val @= b1(1)
-              s.recv_opt.rdy @= s.send_to_ctrl_mem.rdy & s.send_out[0].rdy
+              s.recv_opt.rdy @= s.send_to_ctrl_mem.rdy & s.send_out[0].rdy & s.outer_out_rdy
             else:
               # Already sent completion.
               s.send_out[0].val @= b1(1)
-              s.recv_opt.rdy @= s.send_out[0].rdy
+              s.recv_opt.rdy @= s.send_out[0].rdy & s.outer_out_rdy
           else:
             # Valid iteration: predicate = 1.
             s.send_out[0].msg.predicate @= 1
             s.send_out[0].val @= b1(1)
-            s.recv_opt.rdy @= s.send_out[0].rdy
+            s.recv_opt.rdy @= s.send_out[0].rdy & s.outer_out_rdy
         
         # ===== OPT_LOOP_DELIVERY: Loop-Delivery Mode (Shadow Register) =====
         elif s.recv_opt.msg.operation == OPT_LOOP_DELIVERY:
@@ -151,6 +212,7 @@ class LoopCounterRTL(Fu):
         s.recv_from_ctrl_mem.rdy @= b1(1)
         s.target_ctrl_addr @= s.recv_from_ctrl_mem.msg.ctrl_addr
         s.target_ctrl_data @= s.recv_from_ctrl_mem.msg.data
+        s.target_dim @= s.recv_from_ctrl_mem.msg.data_addr
         
         if s.recv_from_ctrl_mem.msg.cmd == CMD_RESET_LEAF_COUNTER:
           s.cmd_reset_counter @= b1(1)
@@ -177,31 +239,70 @@ class LoopCounterRTL(Fu):
           s.leaf_upper_bound[i] <<= s.DataType(0, 0)
           s.leaf_step[i] <<= s.DataType(0, 0)
           s.leaf_current_value[i] <<= s.DataType(0, 0)
+        for d in range(num_outer_dims):
+          for i in range(ctrl_mem_size):
+            s.outer_lower_bound[d][i] <<= s.DataType(0, 0)
+            s.outer_upper_bound[d][i] <<= s.DataType(0, 0)
+            s.outer_step[d][i] <<= s.DataType(0, 0)
+            s.outer_current_value[d][i] <<= s.DataType(0, 0)
+            s.outer_active[d][i] <<= b1(0)
       else:
-        # CMD Config Updates
-        if s.cmd_config_lower:
-          s.leaf_lower_bound[s.target_ctrl_addr] <<= s.target_ctrl_data
-          # Also initialize current value when lower bound is set (optional but safe)
-          s.leaf_current_value[s.target_ctrl_addr] <<= s.target_ctrl_data
-          
-        if s.cmd_config_upper:
-          s.leaf_upper_bound[s.target_ctrl_addr] <<= s.target_ctrl_data
-          
-        if s.cmd_config_step:
-          s.leaf_step[s.target_ctrl_addr] <<= s.target_ctrl_data
+        # CMD Config Updates, whose data_addr tells the loop dimension.
+        if s.target_dim == s.DataAddrType(0):
+          if s.cmd_config_lower:
+            s.leaf_lower_bound[s.target_ctrl_addr] <<= s.target_ctrl_data
+            # Also initialize current value when lower bound is set (optional but safe)
+            s.leaf_current_value[s.target_ctrl_addr] <<= s.target_ctrl_data
+            
+          if s.cmd_config_upper:
+            s.leaf_upper_bound[s.target_ctrl_addr] <<= s.target_ctrl_data
+            
+          if s.cmd_config_step:
+            s.leaf_step[s.target_ctrl_addr] <<= s.target_ctrl_data
+
+        for d in range(1, num_loop_dims):
+          if s.target_dim == s.DataAddrType(d):
+            if s.cmd_config_lower:
+              s.outer_lower_bound[d - 1][s.target_ctrl_addr] <<= s.target_ctrl_data
+              s.outer_current_value[d - 1][s.target_ctrl_addr] <<= s.target_ctrl_data
+
+            if s.cmd_config_upper:
+              s.outer_upper_bound[d - 1][s.target_ctrl_addr] <<= s.target_ctrl_data
+              s.outer_active[d - 1][s.target_ctrl_addr] <<= b1(1)
+
+            if s.cmd_config_step:
+              s.outer_step[d - 1][s.target_ctrl_addr] <<= s.target_ctrl_data
         
         # Execution phase: increments counter.
         if s.recv_opt.val & (s.recv_opt.msg.operation == OPT_LOOP_COUNT):
            addr = s.current_ctrl_addr
-           if s.send_out[0].val & s.send_out[0].rdy & ~s.loop_terminated:
-             s.leaf_current_value[addr] <<= s.DataType(
-               s.leaf_current_value[addr].payload + s.leaf_step[addr].payload, b1(1)
-             )
+           if s.send_out[0].val & s.send_out[0].rdy & s.outer_out_rdy & ~s.loop_terminated:
+             # The innermost counter wraps around unless the whole nest
+             # terminates, so that it stays at its terminated value.
+             if s.dim_carry[1] & ~s.dim_carry[num_loop_dims]:
+               s.leaf_current_value[addr] <<= s.leaf_lower_bound[addr]
+             else:
+               s.leaf_current_value[addr] <<= s.DataType(
+                 s.leaf_current_value[addr].payload + s.leaf_step[addr].payload, b1(1)
+               )
+             # Advances the first outer counter the carry stops at, and wraps
+             # around the ones below it.
+             if ~s.dim_carry[num_loop_dims]:
+               for d in range(1, num_loop_dims):
+                 if s.outer_advance[d - 1]:
+                   s.outer_current_value[d - 1][addr] <<= s.DataType(
+                     s.outer_current_value[d - 1][addr].payload +
+                     s.outer_step[d - 1][addr].payload, b1(1)
+                   )
+                 elif s.dim_carry[d] & s.outer_active[d - 1][addr]:
+                   s.outer_current_value[d - 1][addr] <<= s.outer_lower_bound[d - 1][addr]
         
         # Runtime reset from LC.
         if s.cmd_reset_counter:
           addr = s.target_ctrl_addr
           s.leaf_current_value[addr] <<= s.leaf_lower_bound[addr]
+          for d in range(num_outer_dims):
+            s.outer_current_value[d][addr] <<= s.outer_lower_bound[d][addr]
     
     @update_ff
     def update_shadow_registers():
@@ -245,8 +346,12 @@ class LoopCounterRTL(Fu):
       opt_str = OPT_SYMBOL_DICT[s.recv_opt.msg.operation]
     
     if s.recv_opt.val and s.recv_opt.msg.operation == OPT_LOOP_COUNT:
+      outer_str = ''.join(f'outer{d + 1}={s.outer_current_value[d][addr].payload}|'
+                          for d in range(len(s.outer_active))
+                          if s.outer_active[d][addr])
       return f'[DCU|addr={addr}|{opt_str}|' + \
              f'cnt={s.leaf_current_value[addr].payload}/{s.leaf_upper_bound[addr].payload}|' + \
+             outer_str + \
              f'step={s.leaf_step[addr].payload}|' + \
              f'rdy={s.recv_opt.rdy}/{s.send_out[0].rdy}|' + \
              f'cmd={s.cmd_config_lower}{s.cmd_config_upper}{s.cmd_config_step}|' + \
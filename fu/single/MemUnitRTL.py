@@ -4,6 +4,15 @@ MemUnitRTL.py
 ==========================================================================
 Scratchpad memory access unit for CGRA tiles.
 
+Besides the plain loads and stores, the indexed accesses compute the
+address as base + index in one operation, e.g., for the `x[col[j]]` of
+SpMV:
+
+  OPT_ADD_CONST_LD:  out = mem[const + in0]   (gather off a constant base)
+  OPT_LD_IDX:        out = mem[in0 + in1]     (gather)
+  OPT_STR_IDX:       mem[in0 + in1] = in2     (scatter, needs 3 inports)
+  OPT_STR_IDX_CONST: mem[const + in0] = in1
+
 Author : Cheng Tan
   Date : November 29, 2019
 """
@@ -55,13 +64,21 @@ class MemUnitRTL(Component):
 
     s.in0 = Wire(FuInType)
     s.in1 = Wire(FuInType)
+    s.in2 = Wire(FuInType)
 
     idx_nbits = clog2(num_inports)
     s.in0_idx = Wire(idx_nbits)
     s.in1_idx = Wire(idx_nbits)
+    s.in2_idx = Wire(idx_nbits)
 
     s.in0_idx //= s.in0[0:idx_nbits]
     s.in1_idx //= s.in1[0:idx_nbits]
+    s.in2_idx //= s.in2[0:idx_nbits]
+
+    # OPT_STR_IDX takes its data from the third operand.
+    has_in2 = (num_inports > 2) & (len(CtrlType().fu_in) > 2)
+    s.has_in2 = Wire(1)
+    s.has_in2 //= int(has_in2)
 
     # Components.
     s.recv_in_val_vector = Wire(num_inports)
@@ -77,6 +94,15 @@ class MemUnitRTL(Component):
     # Connections.
     s.vector_factor_power //= vector_factor_power
 
+    if has_in2:
+      @update
+      def update_in2():
+        s.in2 @= FuInType(0)
+        if s.recv_opt.val & (s.recv_opt.msg.fu_in[2] != 0):
+          s.in2 @= zext(s.recv_opt.msg.fu_in[2] - 1, FuInType)
+    else:
+      s.in2 //= 0
+
     @update
     def comb_logic():
 
@@ -234,6 +260,79 @@ class MemUnitRTL(Component):
 
           s.recv_opt.rdy @= s.recv_all_val & s.to_mem_waddr.rdy & s.to_mem_wdata.rdy
 
+        # LD_IDX indicates the address is the base (in0) plus the index (in1).
+        elif s.recv_opt.msg.operation == OPT_LD_IDX:
+          s.recv_all_val @= s.recv_in[s.in0_idx].val & \
+                            s.recv_in[s.in1_idx].val
+          s.recv_in[s.in0_idx].rdy @= s.recv_all_val & s.to_mem_raddr.rdy
+          s.recv_in[s.in1_idx].rdy @= s.recv_all_val & s.to_mem_raddr.rdy
+          s.to_mem_raddr.msg @= AddrType(s.recv_in[s.in0_idx].msg.payload[0:AddrType.nbits] +
+                                         s.recv_in[s.in1_idx].msg.payload[0:AddrType.nbits])
+          # Same as OPT_LD, the memory is not accessed if either operand of
+          # the address has predicate=0, but a fake data is still returned.
+          if s.recv_all_val & ((s.recv_in[s.in0_idx].msg.predicate == 0) |
+                               (s.recv_in[s.in1_idx].msg.predicate == 0)):
+            s.to_mem_raddr.val @= 0
+            s.send_out[0].val @= s.recv_all_val
+            s.send_out[0].msg.predicate @= 0
+            s.recv_opt.rdy @= s.send_out[0].rdy
+          else:
+            s.to_mem_raddr.val @= s.recv_all_val & ~s.already_sent_raddr
+            s.send_out[0].val @= s.from_mem_rdata.val
+            s.send_out[0].msg @= s.from_mem_rdata.msg
+            s.send_out[0].msg.predicate @= s.from_mem_rdata.msg.predicate & \
+                                           s.reached_vector_factor
+            s.recv_opt.rdy @= s.send_out[0].rdy & s.from_mem_rdata.val
+          s.from_mem_rdata.rdy @= s.send_out[0].rdy
+
+        # STR_IDX stores in2 to the base (in0) plus the index (in1). Same as
+        # STR_CONST, the store is dropped if any operand has predicate=0, as
+        # the address is then unknown.
+        elif (s.recv_opt.msg.operation == OPT_STR_IDX) & s.has_in2:
+          s.recv_all_val @= s.recv_in[s.in0_idx].val & \
+                            s.recv_in[s.in1_idx].val & \
+                            s.recv_in[s.in2_idx].val
+          s.recv_in[s.in0_idx].rdy @= s.recv_all_val & s.to_mem_waddr.rdy & s.to_mem_wdata.rdy
+          s.recv_in[s.in1_idx].rdy @= s.recv_all_val & s.to_mem_waddr.rdy & s.to_mem_wdata.rdy
+          s.recv_in[s.in2_idx].rdy @= s.recv_all_val & s.to_mem_waddr.rdy & s.to_mem_wdata.rdy
+          s.to_mem_waddr.msg @= AddrType(s.recv_in[s.in0_idx].msg.payload[0:AddrType.nbits] +
+                                         s.recv_in[s.in1_idx].msg.payload[0:AddrType.nbits])
+          s.to_mem_waddr.val @= s.recv_all_val & \
+                                s.recv_in[s.in0_idx].msg.predicate & \
+                                s.recv_in[s.in1_idx].msg.predicate & \
+                                s.recv_in[s.in2_idx].msg.predicate
+          s.to_mem_wdata.msg @= s.recv_in[s.in2_idx].msg
+          s.to_mem_wdata.msg.predicate @= s.reached_vector_factor
+          s.to_mem_wdata.val @= s.to_mem_waddr.val
+
+          # `send_out` is meaningless for store operation.
+          s.send_out[0].val @= b1(0)
+
+          s.recv_opt.rdy @= s.recv_all_val & s.to_mem_waddr.rdy & s.to_mem_wdata.rdy
+
+        # STR_IDX_CONST stores in1 to the const base plus the index (in0).
+        elif s.recv_opt.msg.operation == OPT_STR_IDX_CONST:
+          s.recv_all_val @= s.recv_in[s.in0_idx].val & \
+                            s.recv_in[s.in1_idx].val & \
+                            s.recv_const.val
+          s.recv_const.rdy @= s.recv_all_val & s.to_mem_waddr.rdy & s.to_mem_wdata.rdy
+          s.recv_in[s.in0_idx].rdy @= s.recv_all_val & s.to_mem_waddr.rdy & s.to_mem_wdata.rdy
+          s.recv_in[s.in1_idx].rdy @= s.recv_all_val & s.to_mem_waddr.rdy & s.to_mem_wdata.rdy
+          s.to_mem_waddr.msg @= AddrType(s.recv_const.msg.payload[0:AddrType.nbits] +
+                                         s.recv_in[s.in0_idx].msg.payload[0:AddrType.nbits])
+          s.to_mem_waddr.val @= s.recv_all_val & \
+                                s.recv_in[s.in0_idx].msg.predicate & \
+                                s.recv_in[s.in1_idx].msg.predicate & \
+                                s.recv_const.msg.predicate
+          s.to_mem_wdata.msg @= s.recv_in[s.in1_idx].msg
+          s.to_mem_wdata.msg.predicate @= s.reached_vector_factor
+          s.to_mem_wdata.val @= s.to_mem_waddr.val
+
+          # `send_out` is meaningless for store operation.
+          s.send_out[0].val @= b1(0)
+
+          s.recv_opt.rdy @= s.recv_all_val & s.to_mem_waddr.rdy & s.to_mem_wdata.rdy
+
         else:
           for j in range(num_outports):
             s.send_out[j].val @= b1(0)
@@ -0,0 +1,23 @@
+"""
+==========================================================================
+PipelinedMulRTL.py
+==========================================================================
+Fully pipelined multiplier for CGRA tile, i.e., MulRTL whose result takes
+`latency` cycles while a new operation is accepted every cycle.
+
+  Date : Oct 19, 2026
+"""
+
+from pymtl3 import *
+from ..basic.PipelinedFu import PipelinedFu
+from .MulRTL import MulRTL
+
+class PipelinedMulRTL(PipelinedFu):
+
+  def construct(s, CtrlPktType, num_inports, num_outports, latency = 3,
+                vector_factor_power = 0):
+
+    super(PipelinedMulRTL, s).construct(CtrlPktType, num_inports,
+                                        num_outports, MulRTL, latency,
+                                        vector_factor_power)
+
@@ -0,0 +1,236 @@
+"""
+==========================================================================
+Radix4DivRTL.py
+==========================================================================
+Pipelined radix-4 integer divider for CGRA tile. Each radix-4 step
+retires two quotient bits by comparing the shifted partial remainder
+against 1x, 2x and 3x the divisor, and the ceil(width / 2) steps are
+evenly split into `latency` pipeline stages. Unlike ExclusiveDivRTL and
+InclusiveDivRTL, a new OPT_DIV, OPT_DIV_CONST or OPT_REM is accepted
+every cycle (II = 1) as long as the downstream is not stalled, so the
+recv_opt is acknowledged at issue. Each stage carries the ctrl address of
+the operation it holds as a tag, and a result only leaves the unit while
+its tag matches the current ctrl address, i.e., it is routed by the ctrl
+word that issued it, the stale ones being dropped, the same as
+PipelinedFu.
+
+The operands are unsigned. Dividing by zero gives the all-ones quotient
+and the dividend as the remainder.
+
+  Date : Oct 19, 2026
+"""
+
+from pymtl3 import *
+from ..basic.Fu import Fu
+from ...lib.opt_type import *
+from ...lib.util.data_struct_attr import *
+
+class Radix4DivRTL(Fu):
+
+  def construct(s, CtrlPktType, num_inports, num_outports, latency = 4,
+                vector_factor_power = 0):
+
+    super(Radix4DivRTL, s).construct(CtrlPktType, num_inports, num_outports,
+                                     latency, vector_factor_power)
+
+    # Constants.
+    assert latency >= 1
+    s.num_stages = latency
+    data_nbits = s.DataType.get_field_type(kAttrPayload).nbits
+    num_steps = (data_nbits + 1) // 2
+    steps_per_stage = (num_steps + latency - 1) // latency
+    # The dividend is zero-extended to the bits retired by all the steps.
+    num_nbits = 2 * steps_per_stage * latency
+
+    FuInType = mk_bits(clog2(num_inports + 1))
+    RemType = mk_bits(data_nbits + 2)
+    NumType = mk_bits(num_nbits)
+
+    # Issue.
+    s.in0 = Wire(FuInType)
+    s.in1 = Wire(FuInType)
+
+    idx_nbits = clog2(num_inports)
+    s.in0_idx = Wire(idx_nbits)
+    s.in1_idx = Wire(idx_nbits)
+
+    s.in0_idx //= s.in0[0:idx_nbits]
+    s.in1_idx //= s.in1[0:idx_nbits]
+
+    s.recv_all_val = Wire(1)
+    s.issue_val = Wire(1)
+    s.issue_is_rem = Wire(1)
+    s.issue_pred = Wire(1)
+
+    # Datapath of each stage, i.e., the partial remainder and the dividend
+    # being shifted out while the quotient is shifted in, before and after
+    # each step.
+    s.rem_in = [Wire(RemType) for _ in range(latency)]
+    s.num_in = [Wire(NumType) for _ in range(latency)]
+    s.step_rem = [[Wire(RemType) for _ in range(steps_per_stage)]
+                  for _ in range(latency)]
+    s.step_num = [[Wire(NumType) for _ in range(steps_per_stage)]
+                  for _ in range(latency)]
+    s.rem = [[Wire(RemType) for _ in range(steps_per_stage)]
+             for _ in range(latency)]
+    s.num = [[Wire(NumType) for _ in range(steps_per_stage)]
+             for _ in range(latency)]
+    s.partial = [[Wire(RemType) for _ in range(steps_per_stage)]
+                 for _ in range(latency)]
+    s.divisor = [Wire(RemType) for _ in range(latency)]
+    s.divisor_x2 = [Wire(RemType) for _ in range(latency)]
+    s.divisor_x3 = [Wire(RemType) for _ in range(latency)]
+
+    # Pipeline registers.
+    s.stage_val = [Wire(b1) for _ in range(latency)]
+    s.stage_is_rem = [Wire(b1) for _ in range(latency)]
+    s.stage_pred = [Wire(b1) for _ in range(latency)]
+    s.stage_rem = [Wire(RemType) for _ in range(latency)]
+    s.stage_num = [Wire(NumType) for _ in range(latency)]
+    s.stage_divisor = [Wire(RemType) for _ in range(latency)]
+    s.stage_tag = [Wire(s.CtrlAddrType) for _ in range(latency)]
+    # The pipeline shifts (and accepts a new operation) unless the last
+    # stage holds a result the downstream is not ready for.
+    s.advance = Wire(b1)
+    # Whether the ctrl word that issued the last stage is still current.
+    s.last_current = Wire(b1)
+
+    # Connections.
+    for c in range(1, latency):
+      s.rem_in[c] //= s.stage_rem[c - 1]
+      s.num_in[c] //= s.stage_num[c - 1]
+      s.divisor[c] //= s.stage_divisor[c - 1]
+    for c in range(latency):
+      s.step_rem[c][0] //= s.rem_in[c]
+      s.step_num[c][0] //= s.num_in[c]
+      for i in range(1, steps_per_stage):
+        s.step_rem[c][i] //= s.rem[c][i - 1]
+        s.step_num[c][i] //= s.num[c][i - 1]
+
+    @update
+    def comb_logic():
+
+      s.recv_all_val @= 0
+      s.issue_val @= 0
+      s.issue_is_rem @= 0
+      s.issue_pred @= 0
+      s.rem_in[0] @= 0
+      s.num_in[0] @= 0
+      s.divisor[0] @= 0
+      # For pick input register
+      s.in0 @= 0
+      s.in1 @= 0
+      for i in range(num_inports):
+        s.recv_in[i].rdy @= b1(0)
+
+      s.recv_const.rdy @= 0
+      s.recv_opt.rdy @= 0
+
+      s.send_to_ctrl_mem.val @= 0
+      s.send_to_ctrl_mem.msg @= s.CgraPayloadType(0, 0, 0, 0, 0)
+      s.recv_from_ctrl_mem.rdy @= 0
+
+      if s.recv_opt.val:
+        if s.recv_opt.msg.fu_in[0] != 0:
+          s.in0 @= zext(s.recv_opt.msg.fu_in[0] - 1, FuInType)
+        if s.recv_opt.msg.fu_in[1] != 0:
+          s.in1 @= zext(s.recv_opt.msg.fu_in[1] - 1, FuInType)
+
+      if s.recv_opt.val:
+        if (s.recv_opt.msg.operation == OPT_DIV) | \
+           (s.recv_opt.msg.operation == OPT_REM):
+          s.num_in[0] @= zext(s.recv_in[s.in0_idx].msg.payload, NumType)
+          s.divisor[0] @= zext(s.recv_in[s.in1_idx].msg.payload, RemType)
+          s.issue_is_rem @= s.recv_opt.msg.operation == OPT_REM
+          s.issue_pred @= s.recv_in[s.in0_idx].msg.predicate & \
+                          s.recv_in[s.in1_idx].msg.predicate & \
+                          s.reached_vector_factor
+          s.recv_all_val @= s.recv_in[s.in0_idx].val & s.recv_in[s.in1_idx].val
+          s.issue_val @= s.recv_all_val & s.advance
+          s.recv_in[s.in0_idx].rdy @= s.issue_val
+          s.recv_in[s.in1_idx].rdy @= s.issue_val
+          s.recv_opt.rdy @= s.issue_val
+
+        elif s.recv_opt.msg.operation == OPT_DIV_CONST:
+          s.num_in[0] @= zext(s.recv_in[s.in0_idx].msg.payload, NumType)
+          s.divisor[0] @= zext(s.recv_const.msg.payload, RemType)
+          s.issue_pred @= s.recv_in[s.in0_idx].msg.predicate & \
+                          s.reached_vector_factor
+          s.recv_all_val @= s.recv_in[s.in0_idx].val & s.recv_const.val
+          s.issue_val @= s.recv_all_val & s.advance
+          s.recv_in[s.in0_idx].rdy @= s.issue_val
+          s.recv_const.rdy @= s.issue_val
+          s.recv_opt.rdy @= s.issue_val
+
+    @update
+    def update_steps():
+      for c in range(latency):
+        s.divisor_x2[c] @= s.divisor[c] << 1
+        s.divisor_x3[c] @= s.divisor_x2[c] + s.divisor[c]
+        for i in range(steps_per_stage):
+          # The partial remainder is always less than the divisor (or the
+          # dividend, if the divisor is zero), so it fits in data_nbits.
+          s.partial[c][i] @= concat(s.step_rem[c][i][0:data_nbits],
+                                    s.step_num[c][i][num_nbits - 2:num_nbits])
+          if s.partial[c][i] >= s.divisor_x3[c]:
+            s.rem[c][i] @= s.partial[c][i] - s.divisor_x3[c]
+            s.num[c][i] @= concat(s.step_num[c][i][0:num_nbits - 2], b2(3))
+          elif s.partial[c][i] >= s.divisor_x2[c]:
+            s.rem[c][i] @= s.partial[c][i] - s.divisor_x2[c]
+            s.num[c][i] @= concat(s.step_num[c][i][0:num_nbits - 2], b2(2))
+          elif s.partial[c][i] >= s.divisor[c]:
+            s.rem[c][i] @= s.partial[c][i] - s.divisor[c]
+            s.num[c][i] @= concat(s.step_num[c][i][0:num_nbits - 2], b2(1))
+          else:
+            s.rem[c][i] @= s.partial[c][i]
+            s.num[c][i] @= concat(s.step_num[c][i][0:num_nbits - 2], b2(0))
+
+    @update
+    def update_advance():
+      s.last_current @= s.stage_tag[latency - 1] == s.ctrl_addr_inport
+      s.advance @= ~(s.stage_val[latency - 1] & s.last_current &
+                     ~s.send_out[0].rdy)
+
+    @update
+    def update_send_out():
+      for j in range(num_outports):
+        s.send_out[j].val @= 0
+        s.send_out[j].msg @= s.DataType()
+      s.send_out[0].val @= s.stage_val[latency - 1] & s.last_current
+      s.send_out[0].msg.predicate @= s.stage_pred[latency - 1]
+      if s.stage_is_rem[latency - 1]:
+        s.send_out[0].msg.payload @= s.stage_rem[latency - 1][0:data_nbits]
+      else:
+        s.send_out[0].msg.payload @= s.stage_num[latency - 1][0:data_nbits]
+
+    @update_ff
+    def update_pipeline():
+      if s.reset:
+        for c in range(latency):
+          s.stage_val[c] <<= 0
+          s.stage_is_rem[c] <<= 0
+          s.stage_pred[c] <<= 0
+          s.stage_rem[c] <<= 0
+          s.stage_num[c] <<= 0
+          s.stage_divisor[c] <<= 0
+          s.stage_tag[c] <<= s.CtrlAddrType(0)
+      elif s.advance:
+        s.stage_val[0] <<= s.issue_val
+        s.stage_is_rem[0] <<= s.issue_is_rem
+        s.stage_pred[0] <<= s.issue_pred
+        s.stage_tag[0] <<= s.ctrl_addr_inport
+        for c in range(1, latency):
+          s.stage_val[c] <<= s.stage_val[c - 1]
+          s.stage_is_rem[c] <<= s.stage_is_rem[c - 1]
+          s.stage_pred[c] <<= s.stage_pred[c - 1]
+          s.stage_tag[c] <<= s.stage_tag[c - 1]
+        for c in range(latency):
+          s.stage_rem[c] <<= s.rem[c][steps_per_stage - 1]
+          s.stage_num[c] <<= s.num[c][steps_per_stage - 1]
+          s.stage_divisor[c] <<= s.divisor[c]
+
+  def line_trace(s):
+    in_flight = "|".join([(f"{s.stage_tag[c]}" if s.stage_val[c] else ".")
+                          for c in range(s.num_stages)])
+    return f'{super().line_trace()} [in-flight: {in_flight}]'
+
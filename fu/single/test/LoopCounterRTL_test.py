@@ -25,14 +25,15 @@ class TestHarness(Component):
                   num_inports, num_outports,
                   data_mem_size, ctrl_mem_size,
                   src_const, src_opt, src_from_ctrl, sink_out, sink_to_ctrl, ctrl_addrs,
-                  opt_initial_delay=0):
+                  opt_initial_delay=0, num_loop_dims=1, sink_outer=[]):
         s.src_const = TestSrcRTL(DataType, src_const)
         s.src_opt = TestSrcRTL(CtrlType, src_opt, initial_delay=opt_initial_delay)
         s.src_from_ctrl = TestSrcRTL(CgraPayloadType, src_from_ctrl)
         s.sink_out = TestSinkRTL(DataType, sink_out)
         s.sink_to_ctrl = TestSinkRTL(CgraPayloadType, sink_to_ctrl)
         
-        s.dut = FunctionUnit(IntraCgraPktType, num_inports, num_outports)
+        s.dut = FunctionUnit(IntraCgraPktType, num_inports, num_outports,
+                             num_loop_dims = num_loop_dims)
         
         s.ctrl_addrs = ctrl_addrs
         s.cycle_count = Wire(mk_bits(32))
@@ -42,6 +43,12 @@ class TestHarness(Component):
         connect(s.src_from_ctrl.send, s.dut.recv_from_ctrl_mem)
         connect(s.dut.send_out[0], s.sink_out.recv)
         connect(s.dut.send_to_ctrl_mem, s.sink_to_ctrl.recv)
+
+        # Receives the outer loop index of a flattened loop nest.
+        s.has_outer = num_loop_dims > 1
+        if s.has_outer:
+            s.sink_outer = TestSinkRTL(DataType, sink_outer)
+            connect(s.dut.send_out[1], s.sink_outer.recv)
     
         @update_ff
         def update_cycle():
@@ -59,7 +66,8 @@ class TestHarness(Component):
     
     def done(s):
         return (s.src_const.done() and s.src_opt.done() and s.src_from_ctrl.done() and 
-                s.sink_out.done() and s.sink_to_ctrl.done())
+                s.sink_out.done() and s.sink_to_ctrl.done() and
+                (not s.has_outer or s.sink_outer.done()))
     
     def line_trace(s):
         return s.dut.line_trace()
@@ -319,3 +327,60 @@ def test_counter_reset():
                      opt_initial_delay=3)
     
     run_sim(th)
+
+def test_flattened_loop_nest():
+    """Test flattened nest: for(i=0; i<3; i++) for(j=0; j<4; j++) at ctrl_addr=0"""
+
+    num_inports = 4
+    num_outports = 2
+    data_mem_size = 8
+    ctrl_mem_size = 8
+    DataType = mk_data(32, 1)
+    CtrlType = mk_ctrl(num_inports, num_outports, num_inports, num_outports)
+
+    AddrType = mk_bits(clog2(data_mem_size))
+    CtrlAddrType = mk_bits(clog2(ctrl_mem_size))
+    CgraPayloadType = mk_cgra_payload(DataType, AddrType, CtrlType, CtrlAddrType)
+    IntraCgraPktType = mk_intra_cgra_pkt(1, 1, 1, CgraPayloadType)
+
+    src_const = []
+
+    # 12 iterations without any bubble between the outer ones, then 2 OPTs
+    # after the nest terminates.
+    src_opt = [CtrlType(OPT_LOOP_COUNT)] * 14
+
+    # The data_addr of the config CMDs tells the loop dimension, 0 being
+    # the innermost one.
+    src_from_ctrl = [
+        # Inner loop j: [0, 4) step 1.
+        CgraPayloadType(CMD_CONFIG_LOOP_LOWER, DataType(0, 1), 0, CtrlType(0), 0),
+        CgraPayloadType(CMD_CONFIG_LOOP_UPPER, DataType(4, 1), 0, CtrlType(0), 0),
+        CgraPayloadType(CMD_CONFIG_LOOP_STEP, DataType(1, 1), 0, CtrlType(0), 0),
+        # Outer loop i: [0, 3) step 1.
+        CgraPayloadType(CMD_CONFIG_LOOP_LOWER, DataType(0, 1), 1, CtrlType(0), 0),
+        CgraPayloadType(CMD_CONFIG_LOOP_UPPER, DataType(3, 1), 1, CtrlType(0), 0),
+        CgraPayloadType(CMD_CONFIG_LOOP_STEP, DataType(1, 1), 1, CtrlType(0), 0),
+    ]
+
+    # j on send_out[0].
+    sink_out = [DataType(j, 1) for _ in range(3) for j in range(4)] + \
+               [DataType(4, 0)] * 2
+
+    # i on send_out[1], with the same predicate as j.
+    sink_outer = [DataType(i, 1) for i in range(3) for _ in range(4)] + \
+                 [DataType(2, 0)] * 2
+
+    # Completes only once the whole nest terminates.
+    sink_to_ctrl = [
+        CgraPayloadType(CMD_LEAF_COUNTER_COMPLETE, DataType(0,0), 0, CtrlType(OPT_LOOP_COUNT), 0)
+    ]
+
+    ctrl_addrs = [0]*20
+
+    th = TestHarness(LoopCounterRTL, IntraCgraPktType, DataType, CtrlType, CgraPayloadType,
+                     num_inports, num_outports,
+                     data_mem_size, ctrl_mem_size,
+                     src_const, src_opt, src_from_ctrl, sink_out, sink_to_ctrl, ctrl_addrs,
+                     opt_initial_delay=6, num_loop_dims=2, sink_outer=sink_outer)
+
+    run_sim(th)
@@ -28,16 +28,21 @@ class TestHarness(Component):
   def construct(s, FunctionUnit, DataUnit, IntraCgraPktType, DataType,
                 ConfigType, num_inports, num_outports, data_mem_size,
                 src0_msgs, src1_msgs, src_const_msgs, ctrl_msgs,
-                sink_msgs):
+                sink_msgs, src2_msgs = [], preload_data = None):
 
     s.src_in0 = TestSrcRTL(DataType, src0_msgs)
     s.src_in1 = TestSrcRTL(DataType, src1_msgs)
+    s.src_in2 = TestSrcRTL(DataType, src2_msgs)
     s.src_const = TestSrcRTL(DataType, src_const_msgs)
     s.src_opt = TestSrcRTL(ConfigType, ctrl_msgs)
     s.sink_out = TestSinkRTL(DataType, sink_msgs)
 
     s.dut = FunctionUnit(IntraCgraPktType, num_inports, num_outports)
-    s.data_mem = DataUnit(DataType, data_mem_size)
+    if preload_data is None:
+      s.data_mem = DataUnit(DataType, data_mem_size)
+    else:
+      s.data_mem = DataUnit(DataType, data_mem_size,
+                            preload_data = preload_data)
 
     connect(s.dut.to_mem_raddr,   s.data_mem.recv_raddr[0])
     connect(s.dut.from_mem_rdata, s.data_mem.send_rdata[0])
@@ -46,13 +51,17 @@ class TestHarness(Component):
 
     connect(s.src_in0.send, s.dut.recv_in[0])
     connect(s.src_in1.send, s.dut.recv_in[1])
+    if num_inports > 2:
+      connect(s.src_in2.send, s.dut.recv_in[2])
+    else:
+      s.src_in2.send.rdy //= 0
     connect(s.src_const.send, s.dut.recv_const)
     connect(s.src_opt.send, s.dut.recv_opt)
     connect(s.dut.send_out[0], s.sink_out.recv)
 
   def done(s):
     return s.src_in0.done() and s.src_in1.done() and \
-           s.src_opt.done() and s.sink_out.done()
+           s.src_in2.done() and s.src_opt.done() and s.sink_out.done()
 
   def line_trace(s):
     return s.data_mem.line_trace() + ' || ' + s.dut.line_trace()
@@ -138,3 +147,49 @@ def test_PseudoMem():
                    src_in1, src_const, src_opt, sink_out)
   run_sim(th)
 
+
+def test_gather_scatter():
+  FU = MemUnitRTL
+  DataUnit = DataMemRTL
+  DataType = mk_data(16, 1)
+  num_inports = 3
+  num_outports = 1
+  ConfigType = mk_ctrl(num_inports, num_outports)
+  data_mem_size = 16
+  ctrl_mem_size = 8
+  DataAddrType  = mk_bits(clog2(data_mem_size))
+  CtrlAddrType  = mk_bits(clog2(ctrl_mem_size))
+  CgraPayloadType = mk_cgra_payload(DataType, DataAddrType, ConfigType, CtrlAddrType)
+  IntraCgraPktType = mk_intra_cgra_pkt(1, 1, 1, CgraPayloadType)
+  FuInType = mk_bits(clog2(num_inports + 1))
+  pickRegister = [FuInType(x + 1) for x in range(num_inports)]
+  # x[0..3] = 10, 20, 30, 40 is located at base 8.
+  x_base = 8
+  preload_data = [DataType(0, 1) for _ in range(x_base)] + \
+                 [DataType(v, 1) for v in [10, 20, 30, 40]]
+  # Gathers x[col] for col = 3, 0 off the constant base, then x[1] with
+  # the base from in0, and a masked-off index returns predicate=0.
+  src_opt =   [OPT_ADD_CONST_LD, OPT_ADD_CONST_LD, OPT_LD_IDX, OPT_LD_IDX]
+  src_in0 =   [DataType(3, 1), DataType(0, 1), DataType(x_base, 1),
+               DataType(x_base, 1)]
+  src_in1 =   [DataType(1, 1), DataType(2, 0)]
+  src_in2 =   []
+  src_const = [DataType(x_base, 1)] * 2
+  sink_out =  [DataType(40, 1), DataType(10, 1), DataType(20, 1),
+               DataType(0, 0)]
+  # Scatters y[1] = 77 (base 4 from in0) and y[2] = 55 (constant base 4),
+  # drops the masked-off y[2] = 99, then gathers both back.
+  src_opt +=   [OPT_STR_IDX, OPT_STR_IDX_CONST, OPT_STR_IDX_CONST,
+                OPT_ADD_CONST_LD, OPT_ADD_CONST_LD]
+  src_in0 +=   [DataType(4, 1), DataType(2, 1), DataType(2, 0),
+                DataType(1, 1), DataType(2, 1)]
+  src_in1 +=   [DataType(1, 1), DataType(55, 1), DataType(99, 1)]
+  src_in2 +=   [DataType(77, 1)]
+  src_const += [DataType(4, 1)] * 4
+  sink_out +=  [DataType(77, 1), DataType(55, 1)]
+  th = TestHarness(FU, DataUnit, IntraCgraPktType, DataType, ConfigType,
+                   num_inports, num_outports, data_mem_size, src_in0,
+                   src_in1, src_const,
+                   [ConfigType(opt, pickRegister) for opt in src_opt],
+                   sink_out, src_in2, preload_data)
+  run_sim(th, max_cycles = 40)
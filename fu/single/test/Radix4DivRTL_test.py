@@ -0,0 +1,162 @@
+"""
+==========================================================================
+Radix4DivRTL_test.py
+==========================================================================
+Test cases for the pipelined radix-4 divider, plus the throughput
+benchmark versus the number of stages, printed, e.g., with `pytest -s`.
+
+  Date : Oct 19, 2026
+"""
+
+import random
+import time
+
+from pymtl3 import *
+from ..Radix4DivRTL import Radix4DivRTL
+from ....lib.basic.val_rdy.SinkRTL import SinkRTL as TestSinkRTL
+from ....lib.basic.val_rdy.SourceRTL import SourceRTL as TestSrcRTL
+from ....lib.messages import *
+from ....lib.opt_type import *
+from ....mem.const.ConstQueueRTL import ConstQueueRTL
+
+#-------------------------------------------------------------------------
+# Test harness
+#-------------------------------------------------------------------------
+
+class TestHarness(Component):
+
+  def construct(s, FunctionUnit, IntraCgraPktType, DataType, ConfigType,
+                num_inports, num_outports, latency,
+                src0_msgs, src1_msgs, src_const, ctrl_msgs,
+                sink_msgs, sink_interval_delay = 0):
+
+    s.src_in0 = TestSrcRTL(DataType, src0_msgs)
+    s.src_in1 = TestSrcRTL(DataType, src1_msgs)
+    s.src_opt = TestSrcRTL(ConfigType, ctrl_msgs)
+    s.sink_out = TestSinkRTL(DataType, sink_msgs,
+                             interval_delay = sink_interval_delay)
+
+    s.const_queue = ConstQueueRTL(DataType, src_const)
+    s.dut = FunctionUnit(IntraCgraPktType, num_inports, num_outports,
+                         latency = latency)
+
+    connect(s.src_in0.send, s.dut.recv_in[0])
+    connect(s.src_in1.send, s.dut.recv_in[1])
+    connect(s.dut.recv_const, s.const_queue.send_const)
+    connect(s.src_opt.send, s.dut.recv_opt)
+    connect(s.dut.send_out[0], s.sink_out.recv)
+
+  def done(s):
+    return s.src_in0.done() and s.src_in1.done() and \
+           s.src_opt.done() and s.sink_out.done()
+
+  def line_trace(s):
+    return s.dut.line_trace()
+
+def run_sim(test_harness, max_cycles = 200):
+  test_harness.elaborate()
+  test_harness.apply(DefaultPassGroup())
+  test_harness.sim_reset()
+
+  # Run simulation
+  ncycles = 0
+  print()
+  print("{}:{}".format(ncycles, test_harness.line_trace()))
+  while not test_harness.done() and ncycles < max_cycles:
+    test_harness.sim_tick()
+    ncycles += 1
+    print("{}:{}".format(ncycles, test_harness.line_trace()))
+
+  # Check timeout
+  assert ncycles < max_cycles
+
+  test_harness.sim_tick()
+  test_harness.sim_tick()
+  test_harness.sim_tick()
+  return ncycles
+
+num_inports = 2
+num_outports = 1
+data_bitwidth = 32
+DataType = mk_data(data_bitwidth, 1)
+ConfigType = mk_ctrl(num_inports, num_outports)
+FuInType = mk_bits(clog2(num_inports + 1))
+DataAddrType = mk_bits(3)
+CtrlAddrType = mk_bits(3)
+CgraPayloadType = mk_cgra_payload(DataType, DataAddrType, ConfigType, CtrlAddrType)
+IntraCgraPktType = mk_intra_cgra_pkt(1, 1, 1, CgraPayloadType)
+pick_register = [FuInType(x + 1) for x in range(num_inports)]
+all_ones = (1 << data_bitwidth) - 1
+
+def ref_div(opt, a, b):
+  if b == 0:
+    return a if opt == OPT_REM else all_ones
+  return a % b if opt == OPT_REM else a // b
+
+def mk_th(latency, ops, sink_interval_delay = 0):
+  # `ops` is a list of (opt, in0, in1 or const, predicate).
+  src_in0 = [DataType(a, p) for (_, a, _, p) in ops]
+  src_in1 = [DataType(b, 1) for (opt, _, b, _) in ops if opt != OPT_DIV_CONST]
+  src_const = [DataType(b, 1) for (opt, _, b, _) in ops if opt == OPT_DIV_CONST] \
+              or [DataType(0, 1)]
+  src_opt = [ConfigType(opt, pick_register) for (opt, _, _, _) in ops]
+  sink_out = [DataType(ref_div(opt, a, b), p) for (opt, a, b, p) in ops]
+  return TestHarness(Radix4DivRTL, IntraCgraPktType, DataType, ConfigType,
+                     num_inports, num_outports, latency,
+                     src_in0, src_in1, src_const, src_opt, sink_out,
+                     sink_interval_delay)
+
+def mk_random_ops(num_ops, opts, seed = 0):
+  rng = random.Random(seed)
+  ops = []
+  for _ in range(num_ops):
+    a = rng.getrandbits(rng.choice([4, 16, data_bitwidth]))
+    b = rng.getrandbits(rng.choice([1, 3, 12, data_bitwidth]))
+    ops.append((rng.choice(opts), a, b, rng.getrandbits(1)))
+  return ops
+
+#-------------------------------------------------------------------------
+# Test cases
+#-------------------------------------------------------------------------
+
+def test_div_rem():
+  directed = [(OPT_DIV, 100, 7, 1), (OPT_REM, 100, 7, 1),
+              (OPT_DIV, all_ones, 1, 1), (OPT_REM, all_ones, 3, 0),
+              (OPT_DIV, 5, 9, 1), (OPT_DIV, 42, 0, 1), (OPT_REM, 42, 0, 1)]
+  ops = directed + mk_random_ops(24, [OPT_DIV, OPT_REM])
+  # More stages than the radix-4 steps are padded with leading zeros.
+  for latency in [1, 3, 16, 20]:
+    th = mk_th(latency, ops)
+    run_sim(th)
+
+def test_div_const():
+  ops = [(OPT_DIV_CONST, 81, 9, 1), (OPT_DIV, 81, 4, 1),
+         (OPT_DIV_CONST, 1000, 3, 1)] + \
+        mk_random_ops(16, [OPT_DIV, OPT_REM, OPT_DIV_CONST], seed = 1)
+  th = mk_th(4, ops)
+  run_sim(th)
+
+def test_backpressure():
+  # A slow consumer stalls the pipeline without losing results.
+  th = mk_th(4, mk_random_ops(12, [OPT_DIV, OPT_REM], seed = 2),
+             sink_interval_delay = 2)
+  run_sim(th)
+
+def test_throughput():
+  # One operation is issued per cycle, so the independent operations take
+  # `num_ops + latency` cycles regardless of the number of stages.
+  num_ops = 32
+  ops = mk_random_ops(num_ops, [OPT_DIV, OPT_REM], seed = 3)
+  rows = []
+  for latency in [1, 2, 4, 8, 16]:
+    th = mk_th(latency, ops)
+    start = time.time()
+    ncycles = run_sim(th)
+    rows.append((latency, ncycles, time.time() - start))
+    assert ncycles <= num_ops + latency + 3
+  print()
+  print("Radix4DivRTL: throughput versus stages")
+  print(f"{'stages':>6} {'cycles':>6} {'ops/cycle':>9} {'sim time (s)':>12}")
+  for (latency, ncycles, elapsed) in rows:
+    print(f"{latency:>6} {ncycles:>6} {num_ops / ncycles:>9.3f} {elapsed:>12.3f}")
+
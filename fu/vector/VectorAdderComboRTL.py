@@ -6,7 +6,12 @@ Multiple parallelly combined adders to enable vectorization.
 The result is same for both multi-FU and combo. The vectorized
 addition is still useful for a[0:3]++ (i.e., vec_add_inc) and
 a[0:3]+b (i.e., vec_add_const) at different vectorization
-granularities.
+granularities. The lanes are sized by the bitwidth of the DataType,
+i.e., data_bitwidth / num_lanes, e.g., 16 lanes of int8 on 128-bit data.
+The lane-wise unsigned compares (OPT_VEC_LT/GT/EQ) give a mask of 1 or 0
+per lane, which OPT_VEC_SEL takes as in0 to pick each lane from in1 (if
+non-zero) or in2, the same operand order as SelRTL. OPT_VEC_MIN/MAX pick
+the lane-wise minimum/maximum.
 
 Author : Cheng Tan
   Date : March 28, 2022
@@ -27,7 +32,6 @@ class VectorAdderComboRTL(Component):
                 num_lanes = 4, data_bitwidth = 64):
 
     # Constants
-    assert(data_bitwidth % num_lanes == 0)
     num_entries   = 2
     s.DataType = CtrlPktType.get_field_type(kAttrPayload).get_field_type(kAttrData)
     s.DataAddrType = CtrlPktType.get_field_type(kAttrPayload).get_field_type(kAttrDataAddr)
@@ -35,7 +39,10 @@ class VectorAdderComboRTL(Component):
     s.CtrlAddrType = CtrlPktType.get_field_type(kAttrPayload).get_field_type(kAttrCtrlAddr)
     s.CgraPayloadType = CtrlPktType.get_field_type(kAttrPayload)
     s.const_zero = s.DataType()
+    # The lanes follow the actual bitwidth of the DataType rather than
+    # the `data_bitwidth` argument.
     data_bitwidth = s.DataType.get_field_type(kAttrPayload).nbits
+    assert(data_bitwidth % num_lanes == 0)
     sub_bw = data_bitwidth // num_lanes
     CountType = mk_bits(clog2(num_entries + 1))
     s.ctrl_addr_inport = InPort(s.CtrlAddrType)
@@ -70,6 +77,23 @@ class VectorAdderComboRTL(Component):
       # Connection: aggregate into combo out
       s.Fu[i].send_out[0].msg[0:sub_bw] //= s.send_out[0].msg.payload[i*sub_bw:(i+1)*sub_bw]
 
+    # The third operand, i.e., in2 of OPT_VEC_SEL, which never becomes
+    # valid without a third inport. It is forwarded through a combinational
+    # block, as the third inport is left unconnected by the other users.
+    LaneType = mk_bits(sub_bw + 1)
+    s.sel_in_predicate = Wire(b1)
+    if (num_inports > 2) & (len(s.CtrlType().fu_in) > 2):
+      @update
+      def update_sel_in():
+        s.recv_in[2].rdy @= s.Fu[0].recv_in[2].rdy
+        s.sel_in_predicate @= s.recv_in[2].msg.predicate
+        for i in range(num_lanes):
+          s.Fu[i].recv_in[2].val @= s.recv_in[2].val
+          s.Fu[i].recv_in[2].msg @= zext(s.recv_in[2].msg.payload[i*sub_bw:i*sub_bw+sub_bw], LaneType)
+          s.Fu[i].recv_opt.msg.fu_in[2] @= 3
+    else:
+      s.sel_in_predicate //= 0
+
     # Redundant interfaces for MemUnit
     s.to_mem_raddr = SendIfcRTL(s.DataAddrType)
     s.from_mem_rdata = RecvIfcRTL(s.DataType)
@@ -148,6 +172,31 @@ class VectorAdderComboRTL(Component):
           s.Fu[i].combine_adder @= (s.recv_opt.msg.operation == OPT_VEC_SUB_CONST_COMBINED)
         s.send_out[0].msg.predicate @= s.recv_in[0].msg.predicate
 
+      elif (s.recv_opt.msg.operation == OPT_VEC_LT) | \
+           (s.recv_opt.msg.operation == OPT_VEC_GT) | \
+           (s.recv_opt.msg.operation == OPT_VEC_EQ):
+        for i in range(num_lanes):
+          if s.recv_opt.msg.operation == OPT_VEC_LT:
+            s.Fu[i].recv_opt.msg.operation @= OPT_LT
+          elif s.recv_opt.msg.operation == OPT_VEC_GT:
+            s.Fu[i].recv_opt.msg.operation @= OPT_GT
+          else:
+            s.Fu[i].recv_opt.msg.operation @= OPT_EQ
+        s.send_out[0].msg.predicate @= s.recv_in[0].msg.predicate & s.recv_in[1].msg.predicate
+
+      elif (s.recv_opt.msg.operation == OPT_VEC_MIN) | \
+           (s.recv_opt.msg.operation == OPT_VEC_MAX):
+        for i in range(num_lanes):
+          s.Fu[i].recv_opt.msg.operation @= s.recv_opt.msg.operation
+        s.send_out[0].msg.predicate @= s.recv_in[0].msg.predicate & s.recv_in[1].msg.predicate
+
+      elif s.recv_opt.msg.operation == OPT_VEC_SEL:
+        for i in range(num_lanes):
+          s.Fu[i].recv_opt.msg.operation @= OPT_SEL
+        s.send_out[0].msg.predicate @= s.recv_in[0].msg.predicate & \
+                                       s.recv_in[1].msg.predicate & \
+                                       s.sel_in_predicate
+
       else:
         for j in range(num_outports):
           s.send_out[j].val @= b1(0)
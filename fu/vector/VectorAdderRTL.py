@@ -6,6 +6,9 @@ Vectorized adder to support SIMD addition in different granularities.
 This basic adder is different from the scalar one:
     1. Need to handle the carry in/out value.
     2. Can directly perform on bits rather than CGRADataType.
+Each lane also compares (OPT_LT/GT/EQ, giving 1 or 0), picks the
+minimum/maximum (OPT_VEC_MIN/MAX) and selects (OPT_SEL, in1 if in0 is
+non-zero, in2 otherwise) its unsigned operands.
 
 Author : Cheng Tan
   Date : March 27, 2022
@@ -47,14 +50,27 @@ class VectorAdderRTL(Component):
     s.carry_in_temp = Wire(DataType)
     s.in0 = Wire(FuInType)
     s.in1 = Wire(FuInType)
+    s.in2 = Wire(FuInType)
     idx_nbits = clog2(num_inports)
     s.in0_idx = Wire(idx_nbits)
     s.in1_idx = Wire(idx_nbits)
+    s.in2_idx = Wire(idx_nbits)
     s.recv_all_val = Wire(1)
 
     # Connections.
     s.in0_idx //= s.in0[0:idx_nbits]
     s.in1_idx //= s.in1[0:idx_nbits]
+    s.in2_idx //= s.in2[0:idx_nbits]
+
+    # The third operand (of OPT_SEL) is only picked if the ctrl has one.
+    if (num_inports > 2) & (len(CtrlType().fu_in) > 2):
+      @update
+      def update_in2():
+        s.in2 @= 0
+        if s.recv_opt.val & (s.recv_opt.msg.fu_in[2] != FuInType(0)):
+          s.in2 @= s.recv_opt.msg.fu_in[2] - FuInType(1)
+    else:
+      s.in2 //= 0
 
     @update
     def comb_logic():
@@ -120,6 +136,52 @@ class VectorAdderRTL(Component):
           s.recv_const.rdy @= s.recv_all_val & s.send_out[0].rdy
           s.recv_opt.rdy @= s.recv_all_val & s.send_out[0].rdy
 
+        elif (s.recv_opt.msg.operation == OPT_LT) | \
+             (s.recv_opt.msg.operation == OPT_GT) | \
+             (s.recv_opt.msg.operation == OPT_EQ):
+          s.send_out[0].msg @= s.const_zero
+          if (s.recv_opt.msg.operation == OPT_LT) & \
+             (s.recv_in[s.in0_idx].msg < s.recv_in[s.in1_idx].msg):
+            s.send_out[0].msg @= s.const_one
+          elif (s.recv_opt.msg.operation == OPT_GT) & \
+               (s.recv_in[s.in0_idx].msg > s.recv_in[s.in1_idx].msg):
+            s.send_out[0].msg @= s.const_one
+          elif (s.recv_opt.msg.operation == OPT_EQ) & \
+               (s.recv_in[s.in0_idx].msg == s.recv_in[s.in1_idx].msg):
+            s.send_out[0].msg @= s.const_one
+          s.recv_all_val @= s.recv_in[s.in0_idx].val & s.recv_in[s.in1_idx].val
+          s.send_out[0].val @= s.recv_all_val
+          s.recv_in[s.in0_idx].rdy @= s.recv_all_val & s.send_out[0].rdy
+          s.recv_in[s.in1_idx].rdy @= s.recv_all_val & s.send_out[0].rdy
+          s.recv_opt.rdy @= s.recv_all_val & s.send_out[0].rdy
+
+        elif (s.recv_opt.msg.operation == OPT_VEC_MIN) | \
+             (s.recv_opt.msg.operation == OPT_VEC_MAX):
+          if (s.recv_in[s.in0_idx].msg < s.recv_in[s.in1_idx].msg) == \
+             (s.recv_opt.msg.operation == OPT_VEC_MIN):
+            s.send_out[0].msg @= s.recv_in[s.in0_idx].msg
+          else:
+            s.send_out[0].msg @= s.recv_in[s.in1_idx].msg
+          s.recv_all_val @= s.recv_in[s.in0_idx].val & s.recv_in[s.in1_idx].val
+          s.send_out[0].val @= s.recv_all_val
+          s.recv_in[s.in0_idx].rdy @= s.recv_all_val & s.send_out[0].rdy
+          s.recv_in[s.in1_idx].rdy @= s.recv_all_val & s.send_out[0].rdy
+          s.recv_opt.rdy @= s.recv_all_val & s.send_out[0].rdy
+
+        elif s.recv_opt.msg.operation == OPT_SEL:
+          if s.recv_in[s.in0_idx].msg != s.const_zero:
+            s.send_out[0].msg @= s.recv_in[s.in1_idx].msg
+          else:
+            s.send_out[0].msg @= s.recv_in[s.in2_idx].msg
+          s.recv_all_val @= s.recv_in[s.in0_idx].val & \
+                            s.recv_in[s.in1_idx].val & \
+                            s.recv_in[s.in2_idx].val
+          s.send_out[0].val @= s.recv_all_val
+          s.recv_in[s.in0_idx].rdy @= s.recv_all_val & s.send_out[0].rdy
+          s.recv_in[s.in1_idx].rdy @= s.recv_all_val & s.send_out[0].rdy
+          s.recv_in[s.in2_idx].rdy @= s.recv_all_val & s.send_out[0].rdy
+          s.recv_opt.rdy @= s.recv_all_val & s.send_out[0].rdy
+
         elif s.recv_opt.msg.operation == OPT_PAS:
           s.send_out[0].msg @= s.recv_in[s.in0_idx].msg
           s.recv_all_val @= s.recv_in[s.in0_idx].val
@@ -2,7 +2,11 @@
 ==========================================================================
 VectorAllReduceRTL.py
 ==========================================================================
-AllReduce functional unit.
+AllReduce functional unit. The lanes of the vector are reduced by the
+adder/multiplier/comparator trees of SumUnit/ReduceMulUnit/
+ReduceMinMaxUnit, so any number of lanes dividing the data bitwidth is
+supported, e.g., 2, 4, 8 or 16 lanes of up to 256-bit data. The minimum
+and the maximum (OPT_VEC_REDUCE_MIN/MAX) are unsigned.
 
 Author : Cheng Tan
   Date : April 23, 2022
@@ -10,6 +14,7 @@ Author : Cheng Tan
 
 from pymtl3 import *
 from ..basic.SumUnit import SumUnit
+from ..basic.ReduceMinMaxUnit import ReduceMinMaxUnit
 from ..basic.ReduceMulUnit import ReduceMulUnit
 from ...lib.basic.val_rdy.ifcs import ValRdyRecvIfcRTL as RecvIfcRTL
 from ...lib.basic.val_rdy.ifcs import ValRdySendIfcRTL as SendIfcRTL
@@ -26,8 +31,7 @@ class VectorAllReduceRTL(Component):
                 data_bitwidth = 64):
 
     # Constants.
-    # currently only support 4 due to the shift logic.
-    assert(num_lanes % 4 == 0)
+    assert(num_lanes >= 1)
     num_entries = 4
     s.DataType = CtrlPktType.get_field_type(kAttrPayload).get_field_type(kAttrData)
     s.DataAddrType = CtrlPktType.get_field_type(kAttrPayload).get_field_type(kAttrDataAddr)
@@ -82,6 +86,10 @@ class VectorAllReduceRTL(Component):
              (s.recv_opt.msg.operation == OPT_VEC_REDUCE_MUL_GLOBAL) | \
              (s.recv_opt.msg.operation == OPT_VEC_REDUCE_MUL_BASE_GLOBAL) else 0)
 
+    s.reduce_min_max = ReduceMinMaxUnit(TempDataType, num_lanes)
+    for i in range(num_lanes):
+      s.reduce_min_max.in_[i] //= s.temp_result[i]
+    s.reduce_min_max.is_max //= lambda: s.recv_opt.msg.operation == OPT_VEC_REDUCE_MAX
 
     for i in range( num_lanes ):
       # Calculate the constant bounds for each specific connection
@@ -89,7 +97,8 @@ class VectorAllReduceRTL(Component):
       high = (i + 1) * sub_bw
       # s.connect() works with slice objects directly during elaboration.
       s.temp_result[i][0:sub_bw] //= s.recv_in[0].msg.payload[low:high]
-      s.temp_result[i][sub_bw:data_bitwidth] //= 0
+      if sub_bw < data_bitwidth:
+        s.temp_result[i][sub_bw:data_bitwidth] //= 0
 
     @update
     def update_result():
@@ -104,6 +113,9 @@ class VectorAllReduceRTL(Component):
         s.send_out[0].msg.payload[0:data_bitwidth] @= s.reduce_mul.out
       elif s.recv_opt.msg.operation == OPT_VEC_REDUCE_MUL_BASE:
         s.send_out[0].msg.payload[0:data_bitwidth] @= s.reduce_mul.out * s.recv_in[1].msg.payload
+      elif (s.recv_opt.msg.operation == OPT_VEC_REDUCE_MIN) | \
+           (s.recv_opt.msg.operation == OPT_VEC_REDUCE_MAX):
+        s.send_out[0].msg.payload[0:data_bitwidth] @= s.reduce_min_max.out
       elif s.recv_opt.msg.operation == OPT_VEC_REDUCE_ADD_GLOBAL:
         s.send_out[0].msg.payload[0:data_bitwidth] @= s.recv_from_ctrl_mem.msg.data.payload[0:data_bitwidth]
       elif s.recv_opt.msg.operation == OPT_VEC_REDUCE_MUL_GLOBAL:
@@ -125,6 +137,8 @@ class VectorAllReduceRTL(Component):
 
       s.recv_in[0].rdy @= (((s.recv_opt.msg.operation == OPT_VEC_REDUCE_ADD) | \
                             (s.recv_opt.msg.operation == OPT_VEC_REDUCE_MUL) | \
+                            (s.recv_opt.msg.operation == OPT_VEC_REDUCE_MIN) | \
+                            (s.recv_opt.msg.operation == OPT_VEC_REDUCE_MAX) | \
                             (s.recv_opt.msg.operation == OPT_VEC_REDUCE_ADD_BASE) | \
                             (s.recv_opt.msg.operation == OPT_VEC_REDUCE_MUL_BASE)) & \
                            s.send_out[0].rdy) | \
@@ -143,7 +157,9 @@ class VectorAllReduceRTL(Component):
       s.send_out[0].val @= (s.recv_in[0].val & \
                             s.recv_opt.val & \
                             ((s.recv_opt.msg.operation == OPT_VEC_REDUCE_ADD) | \
-                             (s.recv_opt.msg.operation == OPT_VEC_REDUCE_MUL))) | \
+                             (s.recv_opt.msg.operation == OPT_VEC_REDUCE_MUL) | \
+                             (s.recv_opt.msg.operation == OPT_VEC_REDUCE_MIN) | \
+                             (s.recv_opt.msg.operation == OPT_VEC_REDUCE_MAX))) | \
                            (s.recv_in[0].val & \
                             s.recv_in[1].val & \
                             s.recv_opt.val & \
@@ -195,7 +211,9 @@ class VectorAllReduceRTL(Component):
     def update_predicate():
       s.send_out[0].msg.predicate @= 0
       if ((s.recv_opt.msg.operation == OPT_VEC_REDUCE_ADD) | \
-          (s.recv_opt.msg.operation == OPT_VEC_REDUCE_MUL)):
+          (s.recv_opt.msg.operation == OPT_VEC_REDUCE_MUL) | \
+          (s.recv_opt.msg.operation == OPT_VEC_REDUCE_MIN) | \
+          (s.recv_opt.msg.operation == OPT_VEC_REDUCE_MAX)):
         s.send_out[0].msg.predicate @= s.recv_in[0].msg.predicate
       elif ((s.recv_opt.msg.operation == OPT_VEC_REDUCE_ADD_BASE) | \
             (s.recv_opt.msg.operation == OPT_VEC_REDUCE_MUL_BASE)):
@@ -4,7 +4,10 @@ VectorMulCombRTL.py
 ==========================================================================
 Multiple parallelly combined multipliers to enable vectorization.
 The result is same for both multi-FU and combo.
-The vectorized Mul works at different vectorization granularities.
+The vectorized Mul works at different vectorization granularities, i.e.,
+any number of lanes (at least 2) dividing the data bitwidth, e.g., 2, 4,
+8 or 16 lanes of up to 256-bit data. The lane results are aggregated by
+the adder tree of a SumUnit.
 
 Author : Cheng Tan
   Date : April 17, 2022
@@ -26,8 +29,8 @@ class VectorMulComboRTL(Component):
                 num_lanes = 4):
 
     # Constants
-    # currently only support 4 due to the shift logic
-    assert(num_lanes % 4 == 0)
+    # A lane produces a double-width result, so at least 2 lanes.
+    assert(num_lanes >= 2)
     num_entries   = 2
     s.DataType = CtrlPktType.get_field_type(kAttrPayload).get_field_type(kAttrData)
     s.DataAddrType = CtrlPktType.get_field_type(kAttrPayload).get_field_type(kAttrDataAddr)
@@ -46,9 +49,13 @@ class VectorMulComboRTL(Component):
     # 4, which will be times by 2 to make it 8-bit to compensate
     # the longer output in the subFU.
     sub_bw = data_bitwidth // num_lanes
-    sub_bw_2 = 2 * data_bitwidth // num_lanes
-    sub_bw_3 = 3 * data_bitwidth // num_lanes
-    sub_bw_4 = 4 * data_bitwidth // num_lanes
+
+    # The combined multiplication splits the low part of the operands
+    # into `num_digits` sub-words, whose num_digits^2 partial products
+    # are computed by as many lanes, e.g., 2 digits with 4 or 8 lanes.
+    num_digits = 1
+    while (num_digits + 1) * (num_digits + 1) <= num_lanes:
+      num_digits += 1
 
     # Interface
     s.recv_in = [RecvIfcRTL(s.DataType) for _ in range(num_inports)]
@@ -60,10 +67,19 @@ class VectorMulComboRTL(Component):
     TempDataType = mk_bits(data_bitwidth)
     FuDataType = mk_bits(sub_bw)
     s.temp_result = [Wire(TempDataType) for _ in range(num_lanes)]
+    s.lane_in0 = [Wire(FuDataType) for _ in range(num_lanes)]
+    s.lane_in1 = [Wire(FuDataType) for _ in range(num_lanes)]
 
     # Components
     s.Fu = [VectorMulRTL(sub_bw, CtrlPktType, 4, 2)
             for _ in range(num_lanes)]
+    s.result_sum = SumUnit(TempDataType, num_lanes)
+
+    # Connections
+    for i in range(num_lanes):
+      s.lane_in0[i] //= s.recv_in[0].msg.payload[i*sub_bw:(i+1)*sub_bw]
+      s.lane_in1[i] //= s.recv_in[1].msg.payload[i*sub_bw:(i+1)*sub_bw]
+      s.result_sum.in_[i] //= s.temp_result[i]
 
     # Redundant interface, only used by PhiRTL.
     s.clear = InPort(b1)
@@ -96,45 +112,26 @@ class VectorMulComboRTL(Component):
         s.Fu[i].recv_in[1].msg @= 0
 
       if s.recv_opt.msg.operation == OPT_VEC_MUL:
-        # Connection: split into vectorized FUs
-        s.Fu[0].recv_in[0].msg[0:sub_bw] @= s.recv_in[0].msg.payload[0:sub_bw]
-        s.Fu[0].recv_in[1].msg[0:sub_bw] @= s.recv_in[1].msg.payload[0:sub_bw]
-        s.Fu[1].recv_in[0].msg[0:sub_bw] @= s.recv_in[0].msg.payload[sub_bw:sub_bw_2]
-        s.Fu[1].recv_in[1].msg[0:sub_bw] @= s.recv_in[1].msg.payload[sub_bw:sub_bw_2]
-        s.Fu[2].recv_in[0].msg[0:sub_bw] @= s.recv_in[0].msg.payload[sub_bw_2:sub_bw_3]
-        s.Fu[2].recv_in[1].msg[0:sub_bw] @= s.recv_in[1].msg.payload[sub_bw_2:sub_bw_3]
-        s.Fu[3].recv_in[0].msg[0:sub_bw] @= s.recv_in[0].msg.payload[sub_bw_3:sub_bw_4]
-        s.Fu[3].recv_in[1].msg[0:sub_bw] @= s.recv_in[1].msg.payload[sub_bw_3:sub_bw_4]
-
+        # Connection: split into vectorized FUs, the result of each lane
+        # being placed at the position of its operands.
         for i in range(num_lanes):
-          s.temp_result[i] @= TempDataType(0)
-          s.temp_result[i][0:sub_bw_2] @= s.Fu[i].send_out[0].msg[0:sub_bw_2]
+          s.Fu[i].recv_in[0].msg[0:sub_bw] @= s.lane_in0[i]
+          s.Fu[i].recv_in[1].msg[0:sub_bw] @= s.lane_in1[i]
+          s.temp_result[i] @= zext(s.Fu[i].send_out[0].msg, TempDataType) << (sub_bw * i)
 
-        s.send_out[0].msg.payload[0:data_bitwidth] @= \
-          (s.temp_result[3] << (sub_bw * 3)) + \
-          (s.temp_result[2] << (sub_bw * 2)) + \
-          (s.temp_result[1] << sub_bw) + \
-          s.temp_result[0]
+        s.send_out[0].msg.payload[0:data_bitwidth] @= s.result_sum.out
 
       elif s.recv_opt.msg.operation == OPT_VEC_MUL_COMBINED: # with highest precision
-        s.Fu[0].recv_in[0].msg[0:sub_bw] @= s.recv_in[0].msg.payload[0:sub_bw]
-        s.Fu[0].recv_in[1].msg[0:sub_bw] @= s.recv_in[1].msg.payload[0:sub_bw]
-        s.Fu[1].recv_in[0].msg[0:sub_bw] @= s.recv_in[0].msg.payload[0:sub_bw]
-        s.Fu[1].recv_in[1].msg[0:sub_bw] @= s.recv_in[1].msg.payload[sub_bw:sub_bw_2]
-        s.Fu[2].recv_in[0].msg[0:sub_bw] @= s.recv_in[0].msg.payload[sub_bw:sub_bw_2]
-        s.Fu[2].recv_in[1].msg[0:sub_bw] @= s.recv_in[1].msg.payload[0:sub_bw]
-        s.Fu[3].recv_in[0].msg[0:sub_bw] @= s.recv_in[0].msg.payload[sub_bw:sub_bw_2]
-        s.Fu[3].recv_in[1].msg[0:sub_bw] @= s.recv_in[1].msg.payload[sub_bw:sub_bw_2]
-
-        for i in range(num_lanes):
-          s.temp_result[i] @= TempDataType(0)
-          s.temp_result[i][0:sub_bw_2] @= s.Fu[i].send_out[0].msg[0:sub_bw_2]
-
-        s.send_out[0].msg.payload[0:data_bitwidth] @= \
-            s.temp_result[0] + \
-            (s.temp_result[1] << sub_bw) + \
-            (s.temp_result[2] << sub_bw) + \
-            (s.temp_result[3] << (sub_bw * 2))
+        # Lane i * num_digits + j multiplies the i-th sub-word of the first
+        # operand with the j-th sub-word of the second one.
+        for i in range(num_digits):
+          for j in range(num_digits):
+            s.Fu[i * num_digits + j].recv_in[0].msg[0:sub_bw] @= s.lane_in0[i]
+            s.Fu[i * num_digits + j].recv_in[1].msg[0:sub_bw] @= s.lane_in1[j]
+            s.temp_result[i * num_digits + j] @= \
+                zext(s.Fu[i * num_digits + j].send_out[0].msg, TempDataType) << (sub_bw * (i + j))
+
+        s.send_out[0].msg.payload[0:data_bitwidth] @= s.result_sum.out
 
       else:
         for j in range(num_outports):
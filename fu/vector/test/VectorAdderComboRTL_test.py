@@ -24,21 +24,23 @@ class TestHarness( Component ):
   def construct(s, FunctionUnit, IntraCgraPktType, DataType,
                 CtrlType, num_inports, num_outports, data_mem_size,
                 src0_msgs, src1_msgs, src_const_msgs, ctrl_msgs,
-                sink_msgs0):
+                sink_msgs0, num_lanes = 4, src2_msgs = []):
 
     s.src_in0   = TestSrcRTL (DataType, src0_msgs     )
     s.src_in1   = TestSrcRTL (DataType, src1_msgs     )
+    s.src_in2   = TestSrcRTL (DataType, src2_msgs     )
     s.src_const = TestSrcRTL (DataType, src_const_msgs)
     s.src_opt   = TestSrcRTL (CtrlType, ctrl_msgs     )
     s.sink_out0 = TestSinkRTL(DataType, sink_msgs0    )
 
     s.dut = FunctionUnit(IntraCgraPktType, num_inports,
-                         num_outports, num_lanes = 4)
+                         num_outports, num_lanes = num_lanes)
 
     # s.dut.initial_carry_in //= 0
 
     connect(s.src_in0.send,    s.dut.recv_in[0])
     connect(s.src_in1.send,    s.dut.recv_in[1])
+    connect(s.src_in2.send,    s.dut.recv_in[2])
     connect(s.src_const.send,  s.dut.recv_const)
     connect(s.src_opt.send,    s.dut.recv_opt  )
     connect(s.dut.send_out[0], s.sink_out0.recv)
@@ -104,3 +106,88 @@ def test_vector_adder_combo():
                    src_in0, src_in1, src_const, src_opt,
                    sink_out0)
   run_sim(th)
+
+def test_vector_adder_combo_16_lanes():
+  # 16 lanes of int8 on 128-bit data.
+  FU            = VectorAdderComboRTL
+  data_bw       = 128
+  num_lanes     = 16
+  sub_bw        = data_bw // num_lanes
+  DataType      = mk_data(data_bw, 1)
+  num_inports   = 4
+  num_outports  = 1
+  CtrlType      = mk_ctrl(num_inports)
+  data_mem_size = 8
+  ctrl_mem_size = 8
+  DataAddrType  = mk_bits(clog2(data_mem_size))
+  CtrlAddrType  = mk_bits(clog2(ctrl_mem_size))
+  CgraPayloadType = mk_cgra_payload(DataType, DataAddrType, CtrlType, CtrlAddrType)
+  IntraCgraPktType = mk_intra_cgra_pkt(1, 1, 1, CgraPayloadType)
+  FuInType      = mk_bits(clog2(num_inports + 1))
+  pickRegister  = [FuInType(x + 1) for x in range(num_inports)]
+
+  a = [(17 * i + 3) % 256 for i in range(num_lanes)]
+  b = [(251 - 29 * i) % 256 for i in range(num_lanes)]
+  pack = lambda lanes: sum(v << (sub_bw * i) for i, v in enumerate(lanes))
+  src_in0   = [DataType(pack(a), 1)]
+  src_in1   = [DataType(pack(b), 1)]
+  src_const = []
+  # Each lane wraps around on its own.
+  sink_out0 = [DataType(pack([(x + y) % 256 for x, y in zip(a, b)]), 1)]
+  src_opt   = [CtrlType(OPT_VEC_ADD, pickRegister)]
+
+  th = TestHarness(FU, IntraCgraPktType, DataType, CtrlType,
+                   num_inports, num_outports, data_mem_size,
+                   src_in0, src_in1, src_const, src_opt,
+                   sink_out0, num_lanes = num_lanes)
+  run_sim(th)
+
+def test_vector_compare_min_max_sel():
+  FU            = VectorAdderComboRTL
+  data_bw       = 32
+  num_lanes     = 4
+  sub_bw        = data_bw // num_lanes
+  DataType      = mk_data(data_bw, 1)
+  num_inports   = 4
+  num_outports  = 1
+  CtrlType      = mk_ctrl(num_inports)
+  data_mem_size = 8
+  ctrl_mem_size = 8
+  DataAddrType  = mk_bits(clog2(data_mem_size))
+  CtrlAddrType  = mk_bits(clog2(ctrl_mem_size))
+  CgraPayloadType = mk_cgra_payload(DataType, DataAddrType, CtrlType, CtrlAddrType)
+  IntraCgraPktType = mk_intra_cgra_pkt(1, 1, 1, CgraPayloadType)
+  FuInType      = mk_bits(clog2(num_inports + 1))
+  pickRegister  = [FuInType(x + 1) for x in range(num_inports)]
+
+  a = [0x10, 0x80, 0x33, 0xff]
+  b = [0x20, 0x7f, 0x33, 0x00]
+  pack = lambda lanes: sum(v << (sub_bw * i) for i, v in enumerate(lanes))
+  lt = [int(x < y) for x, y in zip(a, b)]
+  gt = [int(x > y) for x, y in zip(a, b)]
+  eq = [int(x == y) for x, y in zip(a, b)]
+  # Filters the lanes of `a` that are less than `b`, the others being 0.
+  src_in0   = [DataType(pack(a), 1), DataType(pack(a), 1), DataType(pack(a), 1),
+               DataType(pack(a), 1), DataType(pack(a), 1), DataType(pack(lt), 1)]
+  src_in1   = [DataType(pack(b), 1), DataType(pack(b), 1), DataType(pack(b), 0),
+               DataType(pack(b), 1), DataType(pack(b), 1), DataType(pack(a), 1)]
+  src_in2   = [DataType(0, 1)]
+  src_const = []
+  sink_out0 = [DataType(pack(lt), 1),
+               DataType(pack(gt), 1),
+               DataType(pack(eq), 0),
+               DataType(pack([min(x, y) for x, y in zip(a, b)]), 1),
+               DataType(pack([max(x, y) for x, y in zip(a, b)]), 1),
+               DataType(pack([x if m else 0 for x, m in zip(a, lt)]), 1)]
+  src_opt   = [CtrlType(OPT_VEC_LT,  pickRegister),
+               CtrlType(OPT_VEC_GT,  pickRegister),
+               CtrlType(OPT_VEC_EQ,  pickRegister),
+               CtrlType(OPT_VEC_MIN, pickRegister),
+               CtrlType(OPT_VEC_MAX, pickRegister),
+               CtrlType(OPT_VEC_SEL, pickRegister)]
+
+  th = TestHarness(FU, IntraCgraPktType, DataType, CtrlType,
+                   num_inports, num_outports, data_mem_size,
+                   src_in0, src_in1, src_const, src_opt,
+                   sink_out0, num_lanes = num_lanes, src2_msgs = src_in2)
+  run_sim(th)
@@ -23,7 +23,7 @@ class TestHarness(Component):
 
   def construct(s, FunctionUnit, IntraCgraPktType, DataType, CtrlType,
                 num_inports, num_outports, data_mem_size,
-                src0_msgs, src1_msgs, ctrl_msgs, sink_msgs0):
+                src0_msgs, src1_msgs, ctrl_msgs, sink_msgs0, num_lanes = 4):
 
     s.src_in0       = TestSrcRTL (DataType, src0_msgs )
     s.src_in1       = TestSrcRTL (DataType, src1_msgs )
@@ -31,7 +31,8 @@ class TestHarness(Component):
     s.sink_out0     = TestSinkRTL(DataType, sink_msgs0)
 
     s.dut = FunctionUnit(IntraCgraPktType,
-                         num_inports, num_outports)
+                         num_inports, num_outports,
+                         num_lanes = num_lanes)
 
     connect(s.src_in0.send,    s.dut.recv_in[0])
     connect(s.src_in1.send,    s.dut.recv_in[1])
@@ -95,3 +96,75 @@ def test_vector_all_reduce():
                    data_mem_size,
                    src_in0, src_in1, src_opt, sink_out)
   run_sim(th)
+
+def test_vector_all_reduce_lanes():
+  FU            = VectorAllReduceRTL
+  num_inports   = 2
+  num_outports  = 1
+  CtrlType      = mk_ctrl(num_inports, num_outports)
+  data_mem_size = 8
+  ctrl_mem_size = 8
+  DataAddrType  = mk_bits(clog2(data_mem_size))
+  CtrlAddrType  = mk_bits(clog2(ctrl_mem_size))
+  FuInType      = mk_bits(clog2(num_inports + 1))
+  pickRegister  = [FuInType(x + 1) for x in range(num_inports)]
+
+  for data_width, num_lanes in [(16, 2), (64, 8), (128, 16), (256, 16)]:
+    sub_bw = data_width // num_lanes
+    DataType = mk_data(data_width, 1)
+    CgraPayloadType = mk_cgra_payload(DataType, DataAddrType, CtrlType, CtrlAddrType)
+    IntraCgraPktType = mk_intra_cgra_pkt(1, 1, 1, CgraPayloadType)
+
+    lanes = [(3 * i + 1) % (1 << sub_bw) for i in range(num_lanes)]
+    vector = sum(v << (sub_bw * i) for i, v in enumerate(lanes))
+    product = 1
+    for v in lanes:
+      product = product * v % (1 << data_width)
+
+    src_in0  = [DataType(vector, 1), DataType(vector, 1)]
+    src_in1  = [DataType(0, 1), DataType(0, 1)]
+    sink_out = [DataType(sum(lanes), 1), DataType(product, 1)]
+    src_opt  = [CtrlType(OPT_VEC_REDUCE_ADD, pickRegister),
+                CtrlType(OPT_VEC_REDUCE_MUL, pickRegister)]
+
+    th = TestHarness(FU, IntraCgraPktType, DataType, CtrlType,
+                     num_inports, num_outports,
+                     data_mem_size,
+                     src_in0, src_in1, src_opt, sink_out,
+                     num_lanes = num_lanes)
+    run_sim(th)
+
+def test_vector_reduce_min_max():
+  FU            = VectorAllReduceRTL
+  num_inports   = 2
+  num_outports  = 1
+  CtrlType      = mk_ctrl(num_inports, num_outports)
+  data_mem_size = 8
+  ctrl_mem_size = 8
+  DataAddrType  = mk_bits(clog2(data_mem_size))
+  CtrlAddrType  = mk_bits(clog2(ctrl_mem_size))
+  FuInType      = mk_bits(clog2(num_inports + 1))
+  pickRegister  = [FuInType(x + 1) for x in range(num_inports)]
+
+  # 3 and 6 lanes do not fill the comparator trees.
+  for data_width, num_lanes in [(16, 4), (24, 3), (48, 6), (128, 16)]:
+    sub_bw = data_width // num_lanes
+    DataType = mk_data(data_width, 1)
+    CgraPayloadType = mk_cgra_payload(DataType, DataAddrType, CtrlType, CtrlAddrType)
+    IntraCgraPktType = mk_intra_cgra_pkt(1, 1, 1, CgraPayloadType)
+
+    lanes = [(37 * i + 11) % (1 << sub_bw) for i in range(num_lanes)]
+    vector = sum(v << (sub_bw * i) for i, v in enumerate(lanes))
+
+    src_in0  = [DataType(vector, 1), DataType(vector, 0)]
+    src_in1  = [DataType(0, 1), DataType(0, 1)]
+    sink_out = [DataType(min(lanes), 1), DataType(max(lanes), 0)]
+    src_opt  = [CtrlType(OPT_VEC_REDUCE_MIN, pickRegister),
+                CtrlType(OPT_VEC_REDUCE_MAX, pickRegister)]
+
+    th = TestHarness(FU, IntraCgraPktType, DataType, CtrlType,
+                     num_inports, num_outports,
+                     data_mem_size,
+                     src_in0, src_in1, src_opt, sink_out,
+                     num_lanes = num_lanes)
+    run_sim(th)
@@ -23,7 +23,7 @@ class TestHarness(Component):
 
   def construct(s, FunctionUnit, IntraCgraPktType, DataType, CtrlType,
                 num_inports, num_outports, data_mem_size, src0_msgs,
-                src1_msgs, ctrl_msgs, sink_msgs0):
+                src1_msgs, ctrl_msgs, sink_msgs0, num_lanes = 4):
 
     s.src_in0   = TestSrcRTL (DataType, src0_msgs )
     s.src_in1   = TestSrcRTL (DataType, src1_msgs )
@@ -32,7 +32,7 @@ class TestHarness(Component):
 
     s.dut = FunctionUnit(IntraCgraPktType,
                          num_inports, num_outports,
-                         0, 4)
+                         0, num_lanes)
 
     connect(s.src_in0.send,    s.dut.recv_in[0])
     connect(s.src_in1.send,    s.dut.recv_in[1])
@@ -95,3 +95,57 @@ def test_vector_mul_combo():
                    num_inports, num_outports, data_mem_size,
                    src_in0, src_in1, src_opt, sink_out)
   run_sim(th)
+
+def vector_mul_ref(a, b, sub_bw, bw, combined = False):
+  # Reference of the lane-wise and the combined multiplications.
+  num_lanes = bw // sub_bw
+  lane = lambda x, i: (x >> (sub_bw * i)) & ((1 << sub_bw) - 1)
+  result = 0
+  if combined:
+    num_digits = 1
+    while (num_digits + 1) ** 2 <= num_lanes:
+      num_digits += 1
+    for i in range(num_digits):
+      for j in range(num_digits):
+        result += (lane(a, i) * lane(b, j)) << (sub_bw * (i + j))
+  else:
+    for i in range(num_lanes):
+      result += (lane(a, i) * lane(b, i)) << (sub_bw * i)
+  return result % (1 << bw)
+
+def test_vector_mul_combo_lanes():
+  FU            = VectorMulComboRTL
+  num_inports   = 4
+  num_outports  = 1
+  CtrlType      = mk_ctrl(num_inports)
+  data_mem_size = 8
+  ctrl_mem_size = 8
+  DataAddrType  = mk_bits(clog2(data_mem_size))
+  CtrlAddrType  = mk_bits(clog2(ctrl_mem_size))
+  FuInType      = mk_bits(clog2(num_inports + 1))
+  pickRegister  = [FuInType(x + 1) for x in range(num_inports)]
+
+  for bw, num_lanes in [(64, 2), (128, 8), (256, 16)]:
+    sub_bw = bw // num_lanes
+    DataType = mk_data(bw, 1)
+    CgraPayloadType = mk_cgra_payload(DataType, DataAddrType, CtrlType, CtrlAddrType)
+    IntraCgraPktType = mk_intra_cgra_pkt(1, 1, 1, CgraPayloadType)
+
+    # Each lane holds a value of half of its width, so that the lane-wise
+    # products do not overlap.
+    half = (1 << (sub_bw // 2)) - 1
+    a = sum(((7 * i + 5) & half) << (sub_bw * i) for i in range(num_lanes))
+    b = sum(((13 * i + 2) & half) << (sub_bw * i) for i in range(num_lanes))
+
+    src_in0  = [DataType(a, 1), DataType(a, 1)]
+    src_in1  = [DataType(b, 1), DataType(b, 1)]
+    sink_out = [DataType(vector_mul_ref(a, b, sub_bw, bw), 1),
+                DataType(vector_mul_ref(a, b, sub_bw, bw, combined = True), 1)]
+    src_opt  = [CtrlType(OPT_VEC_MUL,          pickRegister),
+                CtrlType(OPT_VEC_MUL_COMBINED, pickRegister)]
+
+    th = TestHarness(FU, IntraCgraPktType, DataType, CtrlType,
+                     num_inports, num_outports, data_mem_size,
+                     src_in0, src_in1, src_opt, sink_out,
+                     num_lanes = num_lanes)
+    run_sim(th)
@@ -14,7 +14,7 @@ from pymtl3 import *
 
 # Total number of commands that are supported/recognized by controller.
 # Needs to be updated once more commands are added/supported.
-NUM_CMDS = 44
+NUM_CMDS = 54
 
 CMD_LAUNCH                           = 0
 CMD_PAUSE                            = 1
@@ -69,6 +69,48 @@ CMD_LC_ALL_COMPLETE                  = 42  # LC -> Controller: all outer loops c
 # GEP FU Configuration Commands.
 CMD_CONFIG_GEP_STRIDE                = 43  # Controller -> GEP FU: Configures stride for 2D GEP
 
+# Packed Configuration Commands. The `data_addr` field carries the number
+# of packed entries.
+CMD_CONFIG_PACKED                    = 44  # Writes `ctrl` into [ctrl_addr, ctrl_addr + data_addr)
+CMD_CONFIG_PROLOGUE_FU_PACKED        = 45  # Writes prologue counts packed in `data` into [ctrl_addr, ctrl_addr + data_addr)
+
+# Writes `ctrl` into the ctrl store at the address carried by `data`, from
+# which the schedule is streamed into the control memory.
+CMD_CONFIG_CTRL_STORE                = 46
+
+# Writes the routing fields of `ctrl` into the routing dictionary entry
+# carried by `data`. With the routing dictionary, the `data` of CMD_CONFIG
+# and CMD_CONFIG_PACKED carries the dictionary entry of their routing.
+CMD_CONFIG_ROUTING_DICT              = 47
+
+# Context switching commands, which burst the register cluster, the const
+# queue cursor, the ctrl address/step count and the recorded progress of a
+# tile into (or back from) the context slot carried by `data`.
+CMD_SAVE_CONTEXT                     = 48
+CMD_RESTORE_CONTEXT                  = 49
+
+# Streams the config bitstream preloaded into the SPM from the address
+# carried by `data_addr` into the tiles (see BitstreamLoaderRTL).
+CMD_LOAD_BITSTREAM                   = 50
+
+# Makes the ctrl entries [ctrl_addr, ctrl_addr + data_addr) issue the
+# default NOP (i.e., NAH without any routing) until they are written by
+# CMD_CONFIG/CMD_CONFIG_PACKED, so that the all-NAH entries need not be
+# sent (see `elide_config_pkts`).
+CMD_CONFIG_DEFAULT_NOP               = 51
+
+# Writes `ctrl` into [ctrl_addr, ctrl_addr + data_addr) same as
+# CMD_CONFIG_PACKED, except that the operation of the i-th entry is the
+# i-th slice of `data`, i.e., packs the distinct entries only differing in
+# their operations.
+CMD_CONFIG_PACKED_OPS                = 52
+
+# Sent by a tile towards the CPU in place of applying a configuration
+# packet its ctrl memory does not support in its current mode, e.g.,
+# CMD_CONFIG while streaming from the ctrl store. The `data` carries the
+# rejected cmd, along with its `ctrl_addr`.
+CMD_CONFIG_REJECTED                  = 53
+
 CMD_SYMBOL_DICT = {
   CMD_LAUNCH:                           "(LAUNCH_KERNEL)",
   CMD_PAUSE:                            "(PAUSE_EXECUTION)",
@@ -114,5 +156,15 @@ CMD_SYMBOL_DICT = {
   CMD_LC_CHILD_RESET:                   "(LC_CHILD_RESET)",
   CMD_LC_ALL_COMPLETE:                  "(LC_ALL_COMPLETE)",
   CMD_CONFIG_GEP_STRIDE:                "(CONFIG_GEP_STRIDE)",
+  CMD_CONFIG_PACKED:                    "(PRELOADING_PACKED_KERNEL_CONFIG)",
+  CMD_CONFIG_PROLOGUE_FU_PACKED:        "(PRELOADING_PACKED_PROLOGUE_FU)",
+  CMD_CONFIG_CTRL_STORE:                "(PRELOADING_CTRL_STORE)",
+  CMD_CONFIG_ROUTING_DICT:              "(PRELOADING_ROUTING_DICT)",
+  CMD_SAVE_CONTEXT:                     "(SAVE_CONTEXT)",
+  CMD_RESTORE_CONTEXT:                  "(RESTORE_CONTEXT)",
+  CMD_LOAD_BITSTREAM:                   "(LOAD_BITSTREAM)",
+  CMD_CONFIG_DEFAULT_NOP:               "(PRELOADING_DEFAULT_NOP)",
+  CMD_CONFIG_PACKED_OPS:                "(PRELOADING_PACKED_OPS_KERNEL_CONFIG)",
+  CMD_CONFIG_REJECTED:                  "(CONFIG_REJECTED)",
 }
 
@@ -71,6 +71,8 @@ def mk_ctrl(num_fu_inports = 4,
             num_tile_inports = 5,
             num_tile_outports = 5,
             num_registers_per_reg_bank = 16,
+            dual_issue = False,
+            fu_bypass = False,
             prefix = "CGRAConfig"):
 
   operation_nbits = clog2(NUM_OPTS)
@@ -83,7 +85,10 @@ def mk_ctrl(num_fu_inports = 4,
   num_routing_outports = num_tile_outports + num_fu_inports
   RoutingOutportsType = mk_bits(clog2(num_routing_outports + 1))
   FuInType = mk_bits(clog2(num_fu_inports + 1))
-  FuOutType = mk_bits(clog2(num_fu_outports + 1))
+  # With dual issue, the fu crossbar also receives the outports of the
+  # second issue slot, i.e., `num_fu_outports` more inports.
+  num_fu_xbar_inports = num_fu_outports * 2 if dual_issue else num_fu_outports
+  FuOutType = mk_bits(clog2(num_fu_xbar_inports + 1))
   vector_factor_power_nbits = 3
   VectorFactorPowerType = mk_bits(vector_factor_power_nbits)
   # 3 inports of register file bank.
@@ -95,6 +100,10 @@ def mk_ctrl(num_fu_inports = 4,
   new_name = f"{prefix}_{operation_nbits}_{num_fu_inports}_" \
              f"{num_fu_outports}_{num_tile_inports}_" \
              f"{num_tile_outports}_{vector_factor_power_nbits}_{tile_in_type_nbits}"
+  if dual_issue:
+    new_name += "_dual_issue"
+  if fu_bypass:
+    new_name += "_fu_bypass"
 
   def str_func(s):
     out_str = '(fu_in)'
@@ -145,6 +154,20 @@ def mk_ctrl(num_fu_inports = 4,
         out_str += '-'
       out_str += str(int(s.read_reg_idx[i]))
 
+    if dual_issue:
+      out_str += f'|(second_opt){s.second_operation}|(second_fu_in)'
+      for i in range(num_fu_inports):
+        if i != 0:
+          out_str += '-'
+        out_str += str(int(s.second_fu_in[i]))
+
+    if fu_bypass:
+      out_str += '|(fu_in_bypass)'
+      for i in range(num_fu_inports):
+        if i != 0:
+          out_str += '-'
+        out_str += str(int(s.fu_in_bypass[i]))
+
     return f"(opt){s.operation}|{out_str}"
 
   field_dict = {}
@@ -175,10 +198,57 @@ def mk_ctrl(num_fu_inports = 4,
   field_dict[kAttrReadRegTowards] = [RegFromType for _ in range(num_fu_inports)]
   field_dict[kAttrReadRegIdx] = [RegIdxType for _ in range(num_fu_inports)]
 
+  # The second operation issued in the same cycle on a disjoint FU (see
+  # DualIssueFlexibleFuRTL), together with its own operand selection.
+  # OPT_START (i.e., 0) or OPT_NAH indicates no second operation.
+  if dual_issue:
+    field_dict[kAttrSecondOperation] = OperationType
+    field_dict[kAttrSecondFuIn] = [FuInType for _ in range(num_fu_inports)]
+
+  # The fu_in_bypass indicates, for each FU inport, the FU outport (i.e.,
+  # 1 for outport 0) whose latest result is fed back into the inport
+  # instead of the data from the register cluster (see TileRTL). 0
+  # indicates no bypass.
+  if fu_bypass:
+    field_dict[kAttrFuInBypass] = [FuOutType for _ in range(num_fu_inports)]
+
   return mk_bitstruct( new_name, field_dict,
     namespace = { '__str__': str_func }
   )
 
+#=========================================================================
+# Compressed config message
+#=========================================================================
+# A tile usually repeats a handful of distinct routings across its ctrl
+# signals, so the routing fields can be kept in a per-tile dictionary
+# (see CtrlMemDynamicRTL), and each ctrl signal only keeps the index of
+# its dictionary entry instead.
+
+kCtrlRoutingFields = [kAttrRoutingXbarOutport, kAttrFuXbarOutport]
+
+def mk_ctrl_routing(CtrlType, prefix="CGRAConfigRouting"):
+
+  field_dict = {field: CtrlType.__bitstruct_fields__[field]
+                for field in kCtrlRoutingFields}
+
+  new_name = f"{prefix}_{CtrlType.__name__}"
+
+  return mk_bitstruct( new_name, field_dict )
+
+def mk_compressed_ctrl(CtrlType, routing_dict_size,
+                       prefix="CGRACompressedConfig"):
+
+  RoutingIdxType = mk_bits(clog2(max(2, routing_dict_size)))
+
+  field_dict = {field: FieldType
+                for field, FieldType in CtrlType.__bitstruct_fields__.items()
+                if field not in kCtrlRoutingFields}
+  field_dict[kAttrRoutingIdx] = RoutingIdxType
+
+  new_name = f"{prefix}_{RoutingIdxType.nbits}_{CtrlType.__name__}"
+
+  return mk_bitstruct( new_name, field_dict )
+
 #=========================================================================
 # Cmd message
 #=========================================================================
@@ -73,6 +73,8 @@ OPT_FADD_CONST                   = OpCodeType( 39 )
 OPT_FINC                         = OpCodeType( 40 )
 OPT_FMUL                         = OpCodeType( 41 )
 OPT_FMUL_CONST                   = OpCodeType( 42 )
+OPT_FMUL_FADD                    = OpCodeType( 66 )
+OPT_FMUL_CONST_FADD              = OpCodeType( 67 )
 
 OPT_VEC_INC                      = OpCodeType( 50 )
 OPT_VEC_ADD                      = OpCodeType( 51 )
@@ -94,6 +96,14 @@ OPT_VEC_REDUCE_ADD_GLOBAL        = OpCodeType( 76 )
 OPT_VEC_REDUCE_MUL_GLOBAL        = OpCodeType( 77 )
 OPT_VEC_REDUCE_ADD_BASE_GLOBAL   = OpCodeType( 78 )
 OPT_VEC_REDUCE_MUL_BASE_GLOBAL   = OpCodeType( 79 )
+OPT_VEC_LT                       = OpCodeType( 92 )
+OPT_VEC_GT                       = OpCodeType( 93 )
+OPT_VEC_EQ                       = OpCodeType( 94 )
+OPT_VEC_MIN                      = OpCodeType( 95 )
+OPT_VEC_MAX                      = OpCodeType( 96 )
+OPT_VEC_SEL                      = OpCodeType( 97 )
+OPT_VEC_REDUCE_MIN               = OpCodeType( 98 )
+OPT_VEC_REDUCE_MAX               = OpCodeType( 99 )
 
 OPT_LT                           = OpCodeType( 60 )
 OPT_GTE                          = OpCodeType( 61 )
@@ -116,6 +126,11 @@ OPT_GEP_CONST                    = OpCodeType( 89 )
 OPT_GEP_2D                       = OpCodeType( 90 )
 OPT_GEP_2D_CONST                 = OpCodeType( 91 )
 
+# Indexed (base + index) memory accesses, i.e., gather and scatter.
+OPT_LD_IDX                       = OpCodeType( 100 )
+OPT_STR_IDX                      = OpCodeType( 101 )
+OPT_STR_IDX_CONST                = OpCodeType( 102 )
+
 OPT_SYMBOL_DICT = {
   OPT_START                      : "(start)",
   OPT_NAH                        : "(NAH)",
@@ -129,6 +144,7 @@ OPT_SYMBOL_DICT = {
   OPT_LRS                        : "(>>)",
   OPT_MUL                        : "(*)",
   OPT_DIV                        : "(/)",
+  OPT_DIV_CONST                  : "(/')",
   OPT_REM                        : "(%)",
   OPT_OR                         : "(|)",
   OPT_XOR                        : "(^)",
@@ -168,6 +184,8 @@ OPT_SYMBOL_DICT = {
   OPT_FSUB                       : "(f-)",
   OPT_FMUL                       : "(f*)",
   OPT_FMUL_CONST                 : "(f*')",
+  OPT_FMUL_FADD                  : "(f* f+)",
+  OPT_FMUL_CONST_FADD            : "(f*' f+)",
   OPT_ADD_CONST_LD               : "(+'ld)",
   OPT_INC_NE_CONST_NOT_GRT       : "(inc,ne',!=,grt)",
 
@@ -191,6 +209,14 @@ OPT_SYMBOL_DICT = {
   OPT_VEC_REDUCE_MUL_GLOBAL      : "(vreduce*global)",
   OPT_VEC_REDUCE_ADD_BASE_GLOBAL : "(vreduce+base_global)",
   OPT_VEC_REDUCE_MUL_BASE_GLOBAL : "(vreduce*base_global)",
+  OPT_VEC_LT                     : "(v?<)",
+  OPT_VEC_GT                     : "(v?>)",
+  OPT_VEC_EQ                     : "(v?=)",
+  OPT_VEC_MIN                    : "(vmin)",
+  OPT_VEC_MAX                    : "(vmax)",
+  OPT_VEC_SEL                    : "(vsel)",
+  OPT_VEC_REDUCE_MIN             : "(vreducemin)",
+  OPT_VEC_REDUCE_MAX             : "(vreducemax)",
 
   OPT_LT                         : "(?<)",
   OPT_GTE                        : "(?>=)",
@@ -213,4 +239,8 @@ OPT_SYMBOL_DICT = {
   OPT_GEP_CONST                  : "(gep')",
   OPT_GEP_2D                     : "(gep2d)",
   OPT_GEP_2D_CONST               : "(gep2d')",
+
+  OPT_LD_IDX                     : "(ld[])",
+  OPT_STR_IDX                    : "(st[])",
+  OPT_STR_IDX_CONST              : "(st'[])",
 }
@@ -0,0 +1,124 @@
+"""
+==========================================================================
+bitstream_helper.py
+==========================================================================
+Serializes the configuration packets of a mapped kernel into a dense
+binary bitstream, which is preloaded into the SPM and streamed into the
+tiles by BitstreamLoaderRTL upon CMD_LOAD_BITSTREAM, instead of being
+sent packet by packet from the CPU.
+
+The bitstream is a sequence of bits packed LSB first into words of the
+data payload width, each word being stored into one SPM entry:
+  - BITSTREAM_COUNT_NBITS bits of the number of sections, then
+  - per section, i.e., per destination tile, the route of its packets
+    (all the packet fields except the payload) followed by
+    BITSTREAM_COUNT_NBITS bits of the number of records, then
+  - per record, i.e., per packet, the cmd, a mask telling which ones of
+    `data`, `data_addr`, `ctrl` and `ctrl_addr` are non-zero, and only
+    those non-zero fields.
+The packets are grouped into the sections of their tiles in the order of
+their first appearance, the order among the packets of a tile being kept.
+
+  Date : Oct 19, 2026
+"""
+
+from pymtl3 import *
+from ..cmd_type import *
+from .common import *
+from .config_helper import _NON_TILE_CMDS, _route_key
+from .data_struct_attr import *
+
+# The payload fields a record carries only when they are non-zero, in
+# the order they appear in the record.
+BITSTREAM_RECORD_FIELDS = [kAttrData, kAttrDataAddr, kAttrCtrl, kAttrCtrlAddr]
+
+
+def bitstream_word_nbits(IntraCgraPktType):
+  CgraPayloadType = IntraCgraPktType.get_field_type(kAttrPayload)
+  DataType = CgraPayloadType.get_field_type(kAttrData)
+  return DataType.get_field_type(kAttrPayload).nbits
+
+
+def _route_nbits(IntraCgraPktType):
+  return IntraCgraPktType.nbits - \
+         IntraCgraPktType.get_field_type(kAttrPayload).nbits
+
+
+def pkts_to_bitstream(pkts, IntraCgraPktType):
+  '''
+  Returns the bitstream of `pkts` as a list of words.
+  '''
+  CgraPayloadType = IntraCgraPktType.get_field_type(kAttrPayload)
+  payload_nbits = CgraPayloadType.nbits
+  cmd_nbits = CgraPayloadType.get_field_type(kAttrCmd).nbits
+
+  sections = {}
+  for pkt in pkts:
+    assert int(pkt.payload.cmd) not in _NON_TILE_CMDS, \
+        f"{pkt} is not meant for the tiles."
+    route = int(_route_key(pkt)) >> payload_nbits
+    sections.setdefault(route, []).append(pkt)
+  assert len(sections) < (1 << BITSTREAM_COUNT_NBITS)
+
+  bits = 0
+  nbits = 0
+  def append(value, value_nbits):
+    nonlocal bits, nbits
+    bits |= (int(value) & ((1 << value_nbits) - 1)) << nbits
+    nbits += value_nbits
+
+  append(len(sections), BITSTREAM_COUNT_NBITS)
+  for route, section_pkts in sections.items():
+    assert len(section_pkts) < (1 << BITSTREAM_COUNT_NBITS)
+    append(route, _route_nbits(IntraCgraPktType))
+    append(len(section_pkts), BITSTREAM_COUNT_NBITS)
+    for pkt in section_pkts:
+      fields = [getattr(pkt.payload, field).to_bits()
+                for field in BITSTREAM_RECORD_FIELDS]
+      append(pkt.payload.cmd, cmd_nbits)
+      append(sum(1 << i for i, field in enumerate(fields) if field != 0),
+             len(BITSTREAM_RECORD_FIELDS))
+      for field in fields:
+        if field != 0:
+          append(field, field.nbits)
+
+  word_nbits = bitstream_word_nbits(IntraCgraPktType)
+  return [(bits >> (i * word_nbits)) & ((1 << word_nbits) - 1)
+          for i in range((nbits + word_nbits - 1) // word_nbits)]
+
+
+def bitstream_to_pkts(words, IntraCgraPktType):
+  '''
+  Decodes the packets out of a bitstream, the same way as
+  BitstreamLoaderRTL does.
+  '''
+  CgraPayloadType = IntraCgraPktType.get_field_type(kAttrPayload)
+  payload_nbits = CgraPayloadType.nbits
+  cmd_nbits = CgraPayloadType.get_field_type(kAttrCmd).nbits
+  FieldTypes = [CgraPayloadType.get_field_type(field)
+                for field in BITSTREAM_RECORD_FIELDS]
+  word_nbits = bitstream_word_nbits(IntraCgraPktType)
+
+  bits = 0
+  for i, word in enumerate(words):
+    bits |= int(word) << (i * word_nbits)
+  def take(value_nbits):
+    nonlocal bits
+    value = bits & ((1 << value_nbits) - 1)
+    bits >>= value_nbits
+    return value
+
+  pkts = []
+  for _ in range(take(BITSTREAM_COUNT_NBITS)):
+    route = take(_route_nbits(IntraCgraPktType))
+    for _ in range(take(BITSTREAM_COUNT_NBITS)):
+      payload = take(cmd_nbits)
+      mask = take(len(BITSTREAM_RECORD_FIELDS))
+      for i, FieldType in enumerate(FieldTypes):
+        value = take(FieldType.nbits) if mask & (1 << i) else 0
+        payload = (payload << FieldType.nbits) | value
+      PktBitsType = mk_bits(IntraCgraPktType.nbits)
+      pkts.append(IntraCgraPktType.from_bits(
+          PktBitsType((route << payload_nbits) | payload)))
+  return pkts
+
@@ -1,4 +1,4 @@
-from ..common import PORT_INDEX_DIRECTION_COUNTS
+from ..common import PORT_INDEX_DIRECTION_COUNTS, DEFAULT_TILE_INPUT_FIFO_DEPTH
 
 
 
@@ -10,7 +10,8 @@ class Tile:
     It is used during the parameterization phase to configure the RTL generation.
     """
 
-    def __init__(self, dimX, dimY, num_registers, fu_types):
+    def __init__(self, dimX, dimY, num_registers, fu_types,
+                 input_fifo_depths = None, output_skid_depth = 0):
         self.disabled = False
         self.dimX = dimX  # Column index (X coordinate) in the CGRA mesh
         self.dimY = dimY  # Row index (Y coordinate) in the CGRA mesh
@@ -19,6 +20,15 @@ class Tile:
         self.fu_types = fu_types
         self.isDefaultFus_ = True  # Flag indicating if the tile uses the default set of FUs
 
+        # input_fifo_depths: Number of entries of the input FIFO of each port, indexed by the port index.
+        if input_fifo_depths is None:
+            input_fifo_depths = [DEFAULT_TILE_INPUT_FIFO_DEPTH] * PORT_INDEX_DIRECTION_COUNTS
+        assert len(input_fifo_depths) == PORT_INDEX_DIRECTION_COUNTS
+        self.input_fifo_depths = list(input_fifo_depths)
+
+        # output_skid_depth: Number of entries of the skid buffer of each output port, 0 for none.
+        self.output_skid_depth = output_skid_depth
+
         # toMem: Indicates if this tile has a dedicated link TO the data memory (for Store operations).
         self.toMem = False
 
@@ -81,6 +91,14 @@ class Tile:
                 index += 1
         return index
 
+    def getInputFifoDepths(self):
+        """Returns the number of entries of the input FIFO of each port."""
+        return self.input_fifo_depths
+
+    def getOutputSkidDepth(self):
+        """Returns the number of entries of the output skid buffers."""
+        return self.output_skid_depth
+
     def isDefaultFus(self):
         return self.isDefaultFus_
 
@@ -17,6 +17,14 @@ PORT_INDEX_SOUTHEAST = 6
 PORT_INDEX_SOUTHWEST = 7
 PORT_INDEX_DIRECTION_COUNTS = 8
 
+# Direction names following the order of the port index, as used by the
+# arch YAML to set per-direction parameters.
+PORT_DIRECTION_NAMES = ["north", "south", "west", "east",
+                        "northwest", "northeast", "southeast", "southwest"]
+
+# Default number of entries of the tile input FIFOs.
+DEFAULT_TILE_INPUT_FIFO_DEPTH = 2
+
 # Constants for routing directions.
 PORT_NAH = 0
 PORT_NORTH     = PORT_INDEX_NORTH + 1
@@ -46,6 +54,9 @@ MAX_CTRL_COUNT = 1024
 # Constant for prologue max count.
 PROLOGUE_MAX_COUNT = 7
 
+# Width of the section and record counts of a config bitstream.
+BITSTREAM_COUNT_NBITS = 16
+
 # Constant for number of inports on the controller xbar towards NoC.
 # Crossbar with 6 inports (load and store requests towards remote
 # memory, load response from local memory, ctrl&data packet from cpu,
@@ -54,6 +65,24 @@ PROLOGUE_MAX_COUNT = 7
 # out per cycle).
 CONTROLLER_CROSSBAR_INPORTS = 6
 
+# Traffic classes on the inter-CGRA NoC, each of which is assigned its own
+# virtual channel. A higher VC has a higher arbitration priority, so the
+# responses always drain ahead of the requests they are waiting for.
+INTER_CGRA_VC_LOAD_REQUEST  = 0
+INTER_CGRA_VC_STORE_REQUEST = 1
+INTER_CGRA_VC_CTRL          = 2
+INTER_CGRA_VC_LOAD_RESPONSE = 3
+INTER_CGRA_NUM_VCS          = 4
+
+# Topologies of the inter-CGRA NoC that can be selected in the multi-CGRA
+# arch YAML.
+MULTI_CGRA_TOPOLOGY_MESH  = "mesh"
+MULTI_CGRA_TOPOLOGY_RING  = "ring"
+MULTI_CGRA_TOPOLOGY_TORUS = "torus"
+MULTI_CGRA_TOPOLOGIES = [MULTI_CGRA_TOPOLOGY_MESH,
+                         MULTI_CGRA_TOPOLOGY_RING,
+                         MULTI_CGRA_TOPOLOGY_TORUS]
+
 GLOBAL_REDUCE_MAX_COUNT = 4
 
 # Cgra Topology
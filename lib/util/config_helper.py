@@ -0,0 +1,588 @@
+"""
+==========================================================================
+config_helper.py
+==========================================================================
+Helper functions to shrink the configuration packet stream sent to the
+tiles, by packing multiple ctrl memory entries into a single packet, by
+moving the routing of the ctrl signals into per-tile dictionaries, or by
+eliding the packets that configure nothing useful.
+
+"""
+
+import copy
+
+from pymtl3 import *
+from ..cmd_type import *
+from ..opt_type import *
+from .common import *
+from .data_struct_attr import *
+
+# The cmds that are not meant for the tiles, even though they carry the
+# id of a tile (e.g., the tile reading the preloaded data).
+_NON_TILE_CMDS = [CMD_LOAD_REQUEST, CMD_STORE_REQUEST, CMD_LOAD_BITSTREAM]
+
+# The fields of the payload locating the register written by each cmd
+# that merely overwrites a configuration register, i.e., for which
+# re-sending the value already written is redundant.
+_REGISTER_FIELDS_OF_CMD = {
+  CMD_CONFIG:                           [kAttrCtrlAddr],
+  CMD_CONFIG_PROLOGUE_FU:               [kAttrCtrlAddr],
+  CMD_CONFIG_PROLOGUE_FU_CROSSBAR:      [kAttrCtrlAddr, kAttrCtrl],
+  CMD_CONFIG_PROLOGUE_ROUTING_CROSSBAR: [kAttrCtrlAddr, kAttrCtrl],
+  CMD_CONFIG_ROUTING_DICT:              [kAttrData],
+  CMD_CONFIG_TOTAL_CTRL_COUNT:          [],
+  CMD_CONFIG_COUNT_PER_ITER:            [],
+  CMD_CONFIG_CTRL_LOWER_BOUND:          [],
+  CMD_CONFIG_STREAMING_LD_START_ADDR:   [],
+  CMD_CONFIG_STREAMING_LD_STRIDE:       [],
+  CMD_CONFIG_STREAMING_LD_END_ADDR:     [],
+}
+
+# The cmds whose packets are dropped towards the tiles whose ctrl signals
+# all do nothing, as no entry of such tiles reads a const nor counts down
+# a prologue. The rest (e.g., CMD_CONFIG, the ctrl counts and CMD_LAUNCH)
+# is kept for the tiles to run through their ctrl signals and send
+# CMD_COMPLETE, on which the controller counts.
+_UNUSED_TILE_CMDS = [CMD_CONST, CMD_CONFIG_PROLOGUE_FU,
+                     CMD_CONFIG_PROLOGUE_FU_PACKED,
+                     CMD_CONFIG_PROLOGUE_FU_CROSSBAR,
+                     CMD_CONFIG_PROLOGUE_ROUTING_CROSSBAR]
+
+# The fields of a ctrl signal that must be all zero for an entry issuing
+# NAH to do nothing at all, i.e., to be replaceable by the default NOP.
+_ACTIVE_CTRL_FIELDS = [kAttrRoutingXbarOutport, kAttrFuXbarOutport,
+                       kAttrWriteRegFrom, kAttrReadRegTowards, kAttrIsLastCtrl]
+
+
+def _same_route(pkt_a, pkt_b):
+  # Two packets share the same route when all the fields except the
+  # payload are identical.
+  pkt_b_with_a_payload = copy.deepcopy(pkt_b)
+  pkt_b_with_a_payload.payload = pkt_a.payload
+  return pkt_a == pkt_b_with_a_payload
+
+
+def _route_key(pkt):
+  # The fields except the payload, i.e., the destination tile, as a
+  # hashable key.
+  route = copy.deepcopy(pkt)
+  route.payload = type(pkt.payload)()
+  return route.to_bits()
+
+
+def _same_ctrl_except_operation(ctrl_a, ctrl_b):
+  ctrl_b_with_a_operation = copy.deepcopy(ctrl_b)
+  ctrl_b_with_a_operation.operation = ctrl_a.operation
+  return ctrl_a == ctrl_b_with_a_operation
+
+
+def _config_run_length(pkts, i, max_entries, same_entry):
+  # The number of adjacent CMD_CONFIG packets from `pkts[i]` towards the
+  # same tile writing consecutive ctrl addresses, each of which satisfies
+  # `same_entry` along with the first one.
+  pkt = pkts[i]
+  num_entries = 1
+  while i + num_entries < len(pkts) and num_entries < max_entries:
+    next_pkt = pkts[i + num_entries]
+    if next_pkt.payload.cmd != CMD_CONFIG or \
+       not _same_route(pkt, next_pkt) or \
+       not same_entry(pkt.payload, next_pkt.payload) or \
+       int(next_pkt.payload.ctrl_addr) != int(pkt.payload.ctrl_addr) + num_entries:
+      break
+    num_entries += 1
+  return num_entries
+
+
+def _pack_ctrl_pkts(pkts, CgraPayloadType, max_entries, max_ops_per_pkt):
+  # Merges runs of CMD_CONFIG packets carrying the same ctrl signal into
+  # consecutive ctrl addresses into one CMD_CONFIG_PACKED packet, and runs
+  # of the ones only differing in their operations into one
+  # CMD_CONFIG_PACKED_OPS packet, whichever covers more entries. The
+  # latter is skipped for the tiles having a routing dictionary, whose
+  # entry is carried by the `data` instead (see `compress_config_pkts`).
+  DataType = CgraPayloadType.get_field_type(kAttrData)
+  CtrlType = CgraPayloadType.get_field_type(kAttrCtrl)
+  operation_nbits = CtrlType.get_field_type(kAttrOperation).nbits
+  compressed_routes = set(_route_key(pkt) for pkt in pkts
+                          if pkt.payload.cmd == CMD_CONFIG_ROUTING_DICT)
+  packed_pkts = []
+  i = 0
+  while i < len(pkts):
+    pkt = pkts[i]
+    if pkt.payload.cmd != CMD_CONFIG:
+      packed_pkts.append(pkt)
+      i += 1
+      continue
+    num_entries = _config_run_length(
+        pkts, i, max_entries,
+        lambda payload_a, payload_b: payload_a.data == payload_b.data and \
+            payload_a.ctrl == payload_b.ctrl)
+    num_op_entries = 1
+    if _route_key(pkt) not in compressed_routes:
+      num_op_entries = _config_run_length(
+          pkts, i, min(max_entries, max_ops_per_pkt),
+          lambda payload_a, payload_b: payload_a.data == payload_b.data and \
+              _same_ctrl_except_operation(payload_a.ctrl, payload_b.ctrl))
+    if num_op_entries > num_entries:
+      packed_ops = 0
+      for k in range(num_op_entries):
+        packed_ops |= int(pkts[i + k].payload.ctrl.operation) << (k * operation_nbits)
+      packed_pkt = copy.deepcopy(pkt)
+      packed_pkt.payload = CgraPayloadType(CMD_CONFIG_PACKED_OPS,
+                                           data = DataType(packed_ops, 1),
+                                           data_addr = num_op_entries,
+                                           ctrl = pkt.payload.ctrl,
+                                           ctrl_addr = pkt.payload.ctrl_addr)
+      packed_pkts.append(packed_pkt)
+      i += num_op_entries
+    elif num_entries == 1:
+      packed_pkts.append(pkt)
+      i += 1
+    else:
+      packed_pkt = copy.deepcopy(pkt)
+      packed_pkt.payload = CgraPayloadType(CMD_CONFIG_PACKED,
+                                           data = pkt.payload.data,
+                                           data_addr = num_entries,
+                                           ctrl = pkt.payload.ctrl,
+                                           ctrl_addr = pkt.payload.ctrl_addr)
+      packed_pkts.append(packed_pkt)
+      i += num_entries
+  return packed_pkts
+
+
+def _prologue_windows(pkts):
+  # Yields the (start, end) of each window of adjacent prologue packets
+  # targeting the same tile, and of each other packet on its own.
+  prologue_cmds = [CMD_CONFIG_PROLOGUE_FU,
+                   CMD_CONFIG_PROLOGUE_FU_CROSSBAR,
+                   CMD_CONFIG_PROLOGUE_ROUTING_CROSSBAR]
+  i = 0
+  while i < len(pkts):
+    window_end = i + 1
+    if pkts[i].payload.cmd in prologue_cmds:
+      while window_end < len(pkts) and \
+            pkts[window_end].payload.cmd in prologue_cmds and \
+            _same_route(pkts[i], pkts[window_end]):
+        window_end += 1
+    yield i, window_end
+    i = window_end
+
+
+def _pack_prologue_routing_crossbar_pkts(pkts, CgraPayloadType):
+  # Merges the CMD_CONFIG_PROLOGUE_ROUTING_CROSSBAR packets of each window
+  # of adjacent prologue packets targeting the same tile, which set the
+  # same prologue count at the same ctrl address, into one packet carrying
+  # all their routing crossbar inports in its `routing_xbar_outport` slots.
+  CtrlType = CgraPayloadType.get_field_type(kAttrCtrl)
+  TileInTypes = CtrlType.__bitstruct_fields__[kAttrRoutingXbarOutport]
+  num_slots = len(TileInTypes)
+  packed_pkts = []
+  for start, end in _prologue_windows(pkts):
+    window = pkts[start:end]
+    routing_pkts = [pkt for pkt in window
+                    if pkt.payload.cmd == CMD_CONFIG_PROLOGUE_ROUTING_CROSSBAR]
+
+    # The later packet wins for a repeated inport of a ctrl address, same
+    # as what the ctrl memory does upon receiving them one by one.
+    counts = {}
+    for pkt in routing_pkts:
+      for inport in pkt.payload.ctrl.routing_xbar_outport:
+        if int(inport) != 0:
+          counts[(int(pkt.payload.ctrl_addr), int(inport))] = pkt.payload.data
+    groups = {}
+    for (addr, inport), data in counts.items():
+      groups.setdefault((addr, data.to_bits()), []).append((inport, data))
+    merged_pkts = []
+    for (addr, _), inports in groups.items():
+      for j in range(0, len(inports), num_slots):
+        slots = [inport for inport, _ in inports[j:j + num_slots]]
+        merged_pkt = copy.deepcopy(routing_pkts[0])
+        merged_pkt.payload = CgraPayloadType(CMD_CONFIG_PROLOGUE_ROUTING_CROSSBAR,
+                                             data = inports[j][1],
+                                             ctrl_addr = addr)
+        merged_pkt.payload.ctrl.routing_xbar_outport = \
+            [TileInType(slots[k] if k < len(slots) else 0)
+             for k, TileInType in enumerate(TileInTypes)]
+        merged_pkts.append(merged_pkt)
+
+    # Keeps the packets untouched if packing could not save anything.
+    if len(merged_pkts) >= len(routing_pkts):
+      packed_pkts.extend(window)
+      continue
+    packed_pkts.extend([pkt for pkt in window
+                        if pkt.payload.cmd != CMD_CONFIG_PROLOGUE_ROUTING_CROSSBAR])
+    packed_pkts.extend(merged_pkts)
+  return packed_pkts
+
+
+def _pack_prologue_fu_pkts(pkts, CgraPayloadType, max_entries,
+                           max_counts_per_pkt):
+  # Merges the CMD_CONFIG_PROLOGUE_FU packets of each window of adjacent
+  # prologue packets targeting the same tile into the fewest
+  # CMD_CONFIG_PROLOGUE_FU_PACKED packets, each of which covers a run of
+  # consecutive ctrl addresses.
+  DataType = CgraPayloadType.get_field_type(kAttrData)
+  prologue_count_nbits = clog2(PROLOGUE_MAX_COUNT + 1)
+  packed_pkts = []
+  for start, end in _prologue_windows(pkts):
+    window = pkts[start:end]
+
+    # The later packet wins for a repeated ctrl address, same as what the
+    # ctrl memory does upon receiving them one by one.
+    counts = {}
+    for pkt in window:
+      if pkt.payload.cmd == CMD_CONFIG_PROLOGUE_FU:
+        counts[int(pkt.payload.ctrl_addr)] = int(pkt.payload.data.payload)
+
+    # Keeps the packets untouched if packing could not save anything.
+    if len(counts) < 2 or \
+       any(count > PROLOGUE_MAX_COUNT for count in counts.values()):
+      packed_pkts.extend(window)
+      continue
+
+    packed_pkts.extend([pkt for pkt in window
+                        if pkt.payload.cmd != CMD_CONFIG_PROLOGUE_FU])
+    addrs = sorted(counts)
+    j = 0
+    while j < len(addrs):
+      start_addr = addrs[j]
+      num_entries = 1
+      while j + num_entries < len(addrs) and \
+            num_entries < min(max_entries, max_counts_per_pkt) and \
+            addrs[j + num_entries] == start_addr + num_entries:
+        num_entries += 1
+      packed_count = 0
+      for k in range(num_entries):
+        packed_count |= counts[start_addr + k] << (k * prologue_count_nbits)
+      packed_pkt = copy.deepcopy(window[0])
+      packed_pkt.payload = CgraPayloadType(CMD_CONFIG_PROLOGUE_FU_PACKED,
+                                           data = DataType(packed_count, 1),
+                                           data_addr = num_entries,
+                                           ctrl_addr = start_addr)
+      packed_pkts.append(packed_pkt)
+      j += num_entries
+  return packed_pkts
+
+
+def pack_config_pkts(pkts, IntraCgraPktType, pack_operations = True):
+  '''
+  Packs the configuration packets towards the tiles:
+  - adjacent CMD_CONFIG packets writing the same ctrl signal into
+    consecutive ctrl addresses become one CMD_CONFIG_PACKED,
+  - with `pack_operations`, adjacent CMD_CONFIG packets writing distinct
+    ctrl signals that only differ in their operations into consecutive
+    ctrl addresses become one CMD_CONFIG_PACKED_OPS, holding the
+    operations in its data payload,
+  - CMD_CONFIG_PROLOGUE_ROUTING_CROSSBAR packets of the same tile setting
+    the same count at the same ctrl address become one, holding all their
+    routing crossbar inports in its `routing_xbar_outport` slots, and
+  - CMD_CONFIG_PROLOGUE_FU packets of the same tile become
+    CMD_CONFIG_PROLOGUE_FU_PACKED ones, each holding the prologue counts
+    of consecutive ctrl addresses in its data payload.
+  The number of packed entries is carried in `data_addr`, so it is
+  bounded by the width of that field. As CMD_CONFIG_PACKED_OPS carries
+  the operations in its `data`, the operations are not packed for the
+  tiles having a routing dictionary, i.e., `compress_config_pkts` must be
+  applied before.
+  '''
+  CgraPayloadType = IntraCgraPktType.get_field_type(kAttrPayload)
+  DataType = CgraPayloadType.get_field_type(kAttrData)
+  DataAddrType = CgraPayloadType.get_field_type(kAttrDataAddr)
+  CtrlType = CgraPayloadType.get_field_type(kAttrCtrl)
+  max_entries = (1 << DataAddrType.nbits) - 1
+  max_counts_per_pkt = DataType.get_field_type(kAttrPayload).nbits // \
+                       clog2(PROLOGUE_MAX_COUNT + 1)
+  max_ops_per_pkt = DataType.get_field_type(kAttrPayload).nbits // \
+                    CtrlType.get_field_type(kAttrOperation).nbits \
+                    if pack_operations else 1
+
+  packed_pkts = _pack_ctrl_pkts(pkts, CgraPayloadType, max_entries,
+                                max_ops_per_pkt)
+  packed_pkts = _pack_prologue_routing_crossbar_pkts(packed_pkts,
+                                                     CgraPayloadType)
+  return _pack_prologue_fu_pkts(packed_pkts, CgraPayloadType, max_entries,
+                                max_counts_per_pkt)
+
+
+def compress_config_pkts(pkts, IntraCgraPktType, routing_dict_size):
+  '''
+  Compresses the configuration packets towards the tiles having a routing
+  dictionary of `routing_dict_size` entries (see CtrlMemDynamicRTL):
+  - the first CMD_CONFIG/CMD_CONFIG_PACKED packet of each distinct routing
+    of a tile is preceded by a CMD_CONFIG_ROUTING_DICT one writing that
+    routing into the next dictionary entry of the tile, and
+  - the `data` of the CMD_CONFIG/CMD_CONFIG_PACKED packets carries the
+    dictionary entry of their routing instead, their routing fields being
+    cleared.
+  Asserts that no tile needs more than `routing_dict_size` entries.
+  '''
+  CgraPayloadType = IntraCgraPktType.get_field_type(kAttrPayload)
+  DataType = CgraPayloadType.get_field_type(kAttrData)
+  CtrlType = CgraPayloadType.get_field_type(kAttrCtrl)
+  TileInTypes = CtrlType.__bitstruct_fields__[kAttrRoutingXbarOutport]
+  FuOutTypes = CtrlType.__bitstruct_fields__[kAttrFuXbarOutport]
+
+  routing_dicts = {}
+  compressed_pkts = []
+  for pkt in pkts:
+    assert pkt.payload.cmd != CMD_CONFIG_PACKED_OPS, \
+        f"The operations packed in the data of {pkt} leave no room for " \
+        f"the routing dictionary entry."
+    if pkt.payload.cmd != CMD_CONFIG and pkt.payload.cmd != CMD_CONFIG_PACKED:
+      compressed_pkts.append(pkt)
+      continue
+    routing_dict = routing_dicts.setdefault(_route_key(pkt), {})
+    routing = (tuple(int(port) for port in pkt.payload.ctrl.routing_xbar_outport),
+               tuple(int(port) for port in pkt.payload.ctrl.fu_xbar_outport))
+    if routing not in routing_dict:
+      assert len(routing_dict) < routing_dict_size, \
+          f"More than {routing_dict_size} distinct routings towards {pkt}."
+      routing_dict[routing] = len(routing_dict)
+      dict_pkt = copy.deepcopy(pkt)
+      dict_pkt.payload = CgraPayloadType(CMD_CONFIG_ROUTING_DICT,
+                                         data = DataType(routing_dict[routing], 1),
+                                         ctrl = pkt.payload.ctrl)
+      compressed_pkts.append(dict_pkt)
+    compressed_pkt = copy.deepcopy(pkt)
+    compressed_pkt.payload.data = DataType(routing_dict[routing], 1)
+    compressed_pkt.payload.ctrl.routing_xbar_outport = \
+        [TileInType(0) for TileInType in TileInTypes]
+    compressed_pkt.payload.ctrl.fu_xbar_outport = \
+        [FuOutType(0) for FuOutType in FuOutTypes]
+    compressed_pkts.append(compressed_pkt)
+  return compressed_pkts
+
+
+def check_prologue_slots(pkts, num_prologue_slots):
+  '''
+  Returns the number of prologue slots (see CrossbarRTL) needed by the
+  most demanding crossbar of the tiles the packets configure, i.e., its
+  number of (ctrl address, inport) pairs with a non-zero prologue count.
+  Asserts that it is no more than `num_prologue_slots`, unless the
+  latter is None (i.e., the crossbars keep the full table): the
+  overflowing pairs would never be counted, so the tile would wait for
+  their prologue forever.
+  '''
+  prologue_counts = {}
+  tile_pkts = {}
+  for pkt in pkts:
+    if pkt.payload.cmd == CMD_CONFIG_PROLOGUE_ROUTING_CROSSBAR:
+      crossbar = "routing_crossbar"
+      # The slots carry the inports plus 1, 0 being unused.
+      inports = [int(inport) - 1 for inport in pkt.payload.ctrl.routing_xbar_outport
+                 if int(inport) != 0]
+    elif pkt.payload.cmd == CMD_CONFIG_PROLOGUE_FU_CROSSBAR:
+      crossbar = "fu_crossbar"
+      inports = [int(pkt.payload.ctrl.fu_xbar_outport[0])]
+    else:
+      continue
+    key = (_route_key(pkt), crossbar)
+    tile_pkts.setdefault(key, pkt)
+    crossbar_counts = prologue_counts.setdefault(key, {})
+    for inport in inports:
+      crossbar_counts[(int(pkt.payload.ctrl_addr), inport)] = int(pkt.payload.data.payload)
+
+  num_slots = 0
+  for (route, crossbar), crossbar_counts in prologue_counts.items():
+    num_crossbar_slots = sum(1 for count in crossbar_counts.values() if count > 0)
+    assert num_prologue_slots is None or num_crossbar_slots <= num_prologue_slots, \
+        f"The {crossbar} of the tile configured by {tile_pkts[(route, crossbar)]} needs " \
+        f"{num_crossbar_slots} prologue slots, more than {num_prologue_slots}."
+    num_slots = max(num_slots, num_crossbar_slots)
+  return num_slots
+
+
+def _is_tile_pkt(pkt):
+  return int(pkt.payload.cmd) not in _NON_TILE_CMDS
+
+
+def _is_default_nop(ctrl):
+  # Whether the ctrl signal does nothing, same as the default NOP of the
+  # ctrl memory.
+  if ctrl.operation != OPT_NAH:
+    return False
+  if kAttrSecondOperation in type(ctrl).__bitstruct_fields__ and \
+     ctrl.second_operation != OPT_NAH:
+    return False
+  for field in _ACTIVE_CTRL_FIELDS:
+    value = getattr(ctrl, field)
+    values = value if isinstance(value, list) else [value]
+    if any(int(v) != 0 for v in values):
+      return False
+  return True
+
+
+def _dedupe_pkts(pkts):
+  # Drops the packets rewriting the value a configuration register of
+  # their tile already holds. Any other cmd towards a tile (e.g.,
+  # CMD_LAUNCH swapping the banks) forgets what its registers hold.
+  deduped_pkts = []
+  registers = {}
+  for pkt in pkts:
+    route = _route_key(pkt)
+    cmd = int(pkt.payload.cmd)
+    if cmd not in _REGISTER_FIELDS_OF_CMD:
+      registers.pop(route, None)
+      deduped_pkts.append(pkt)
+      continue
+    register = (cmd,) + tuple(getattr(pkt.payload, field).to_bits()
+                              for field in _REGISTER_FIELDS_OF_CMD[cmd])
+    tile_registers = registers.setdefault(route, {})
+    if tile_registers.get(register) == pkt.payload.to_bits():
+      continue
+    tile_registers[register] = pkt.payload.to_bits()
+    deduped_pkts.append(pkt)
+  return deduped_pkts
+
+
+def _unused_tile_routes(pkts):
+  # The tiles none of whose ctrl signals do anything.
+  used = set()
+  routes = []
+  for pkt in pkts:
+    if not _is_tile_pkt(pkt):
+      continue
+    route = _route_key(pkt)
+    if route not in routes:
+      routes.append(route)
+    if pkt.payload.cmd == CMD_CONFIG_CTRL_STORE or \
+       pkt.payload.cmd == CMD_CONFIG_PACKED_OPS or \
+       ((pkt.payload.cmd == CMD_CONFIG or pkt.payload.cmd == CMD_CONFIG_PACKED) and \
+        not _is_default_nop(pkt.payload.ctrl)):
+      used.add(route)
+  return [route for route in routes if route not in used]
+
+
+def _elide_nop_ctrl_pkts(pkts, CgraPayloadType, max_entries):
+  # Replaces the CMD_CONFIG packets writing the default NOP with the
+  # fewest CMD_CONFIG_DEFAULT_NOP packets, per tile and per kernel, i.e.,
+  # per window of packets towards a tile up to its CMD_LAUNCH. A range
+  # may span the entries written with other ctrl signals later within
+  # the window, but never the ones left untouched.
+  windows = []
+  open_windows = {}
+  for i, pkt in enumerate(pkts):
+    route = _route_key(pkt)
+    if pkt.payload.cmd == CMD_LAUNCH:
+      open_windows.pop(route, None)
+    elif pkt.payload.cmd == CMD_CONFIG:
+      if route not in open_windows:
+        open_windows[route] = []
+        windows.append(open_windows[route])
+      open_windows[route].append(i)
+
+  elided = set()
+  inserted = {}
+  for window in windows:
+    nop_indices = {}
+    written_addrs = set()
+    for i in window:
+      addr = int(pkts[i].payload.ctrl_addr)
+      if _is_default_nop(pkts[i].payload.ctrl):
+        nop_indices.setdefault(addr, []).append(i)
+      else:
+        written_addrs.add(addr)
+    # The later packet wins for a repeated ctrl address, so the addresses
+    # also written with other ctrl signals are kept as is.
+    nop_addrs = sorted(addr for addr in nop_indices
+                       if addr not in written_addrs)
+    if not nop_addrs:
+      continue
+    ranges = [[nop_addrs[0], nop_addrs[0] + 1]]
+    for addr in nop_addrs[1:]:
+      start, end = ranges[-1]
+      if addr + 1 - start <= max_entries and \
+         all(gap in written_addrs for gap in range(end, addr)):
+        ranges[-1][1] = addr + 1
+      else:
+        ranges.append([addr, addr + 1])
+    window_elided = [i for addr in nop_addrs for i in nop_indices[addr]]
+    # Keeps the packets untouched if eliding could not save anything.
+    if len(ranges) >= len(window_elided):
+      continue
+    elided.update(window_elided)
+    for start, end in ranges:
+      nop_pkt = copy.deepcopy(pkts[window[0]])
+      nop_pkt.payload = CgraPayloadType(CMD_CONFIG_DEFAULT_NOP,
+                                        data_addr = end - start,
+                                        ctrl_addr = start)
+      inserted.setdefault(window[0], []).append(nop_pkt)
+
+  elided_pkts = []
+  for i, pkt in enumerate(pkts):
+    elided_pkts.extend(inserted.get(i, []))
+    if i not in elided:
+      elided_pkts.append(pkt)
+  return elided_pkts
+
+
+def elide_config_pkts(pkts, IntraCgraPktType, skip_unused_tiles = True):
+  '''
+  Elides the configuration packets of a kernel that configure nothing
+  useful, in this order:
+  - the packets rewriting the value a configuration register of their
+    tile already holds are dropped,
+  - with `skip_unused_tiles`, the const and prologue packets towards
+    the tiles whose ctrl signals all do nothing (i.e., NAH without any
+    routing) are dropped, such tiles still being launched to send
+    CMD_COMPLETE, and
+  - the CMD_CONFIG packets writing such all-NAH ctrl signals are
+    replaced by CMD_CONFIG_DEFAULT_NOP packets, each covering a range of
+    ctrl addresses (see CtrlMemDynamicRTL).
+  Meant to be applied before `pack_config_pkts` and
+  `compress_config_pkts`. Returns the elided packets, along with a dict
+  of the packet counts before and after, of the number of packets
+  dropped by each step, and of the (cgra id, tile id) of the skipped
+  tiles.
+  '''
+  CgraPayloadType = IntraCgraPktType.get_field_type(kAttrPayload)
+  DataAddrType = CgraPayloadType.get_field_type(kAttrDataAddr)
+  max_entries = (1 << DataAddrType.nbits) - 1
+
+  deduped_pkts = _dedupe_pkts(pkts)
+
+  used_pkts = deduped_pkts
+  unused_tiles = []
+  if skip_unused_tiles:
+    unused_routes = _unused_tile_routes(deduped_pkts)
+    used_pkts = [pkt for pkt in deduped_pkts
+                 if not _is_tile_pkt(pkt) or \
+                    _route_key(pkt) not in unused_routes or \
+                    int(pkt.payload.cmd) not in _UNUSED_TILE_CMDS]
+    for route in unused_routes:
+      pkt = next(pkt for pkt in deduped_pkts if _route_key(pkt) == route)
+      unused_tiles.append((int(pkt.dst_cgra_id), int(pkt.dst)))
+
+  elided_pkts = _elide_nop_ctrl_pkts(used_pkts, CgraPayloadType, max_entries)
+
+  report = {
+    "num_pkts": len(pkts),
+    "num_elided_pkts": len(elided_pkts),
+    "duplicates": len(pkts) - len(deduped_pkts),
+    "unused_tile_pkts": len(deduped_pkts) - len(used_pkts),
+    "nop_ctrl_pkts": len(used_pkts) - len(elided_pkts),
+    "unused_tiles": unused_tiles,
+  }
+  return elided_pkts, report
+
+
+def format_config_elision_reports(reports):
+  """
+  Renders one row per kernel, labelled by the keys the caller added to
+  the report besides the counted ones, e.g., the kernel name.
+  """
+  counted = ("num_pkts", "num_elided_pkts", "duplicates", "unused_tile_pkts",
+             "nop_ctrl_pkts", "unused_tiles")
+  labels = [" ".join(f"{key}={value}" for key, value in report.items()
+                     if key not in counted)
+            for report in reports]
+  width = max([len("kernel")] + [len(label) for label in labels])
+  lines = [f"{'kernel':<{width}} {'pkts':>6} {'elided':>6} {'dup':>6} "
+           f"{'unused':>6} {'nop':>6} {'saved':>6}"]
+  for label, report in zip(labels, reports):
+    saved = 1 - report["num_elided_pkts"] / max(1, report["num_pkts"])
+    lines.append(f"{label:<{width}} {report['num_pkts']:>6} "
+                 f"{report['num_elided_pkts']:>6} {report['duplicates']:>6} "
+                 f"{report['unused_tile_pkts']:>6} {report['nop_ctrl_pkts']:>6} "
+                 f"{saved:>6.1%}")
+  return "\n".join(lines)
@@ -4,8 +4,12 @@ kAttrBypass = 'bypass'
 kAttrDelay = 'delay'
 kAttrOperation = 'operation'
 kAttrFuIn = 'fu_in'
+kAttrSecondOperation = 'second_operation'
+kAttrSecondFuIn = 'second_fu_in'
+kAttrFuInBypass = 'fu_in_bypass'
 kAttrRoutingXbarOutport = 'routing_xbar_outport'
 kAttrFuXbarOutport = 'fu_xbar_outport'
+kAttrRoutingIdx = 'routing_idx'
 kAttrVectorFactorPower = 'vector_factor_power'
 kAttrIsLastCtrl = 'is_last_ctrl'
 kAttrReadRegTowards = 'read_reg_towards'
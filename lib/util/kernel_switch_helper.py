@@ -0,0 +1,243 @@
+"""
+==========================================================================
+kernel_switch_helper.py
+==========================================================================
+Simulation-side measurement of the kernel-switch latency, i.e., the
+cycles from kernel A's last CMD_COMPLETE to the first useful op (i.e.,
+neither NAH nor START) of kernel B being issued by the ctrl memory of
+any tile. KernelSwitchMonitor samples once per cycle the port through
+which the packets are injected (e.g., `recv_from_cpu_pkt` of a CGRA), the
+port carrying CMD_COMPLETE back (e.g., `send_to_cpu_pkt`), and for each
+tile the packets it accepts from the ctrl ring and the ctrl signal its
+ctrl memory issues.
+
+The packets of kernel B are grouped into phases by their cmd (see
+`kernel_switch_phase()`). Each phase spans from the injection of its
+first packet to the delivery of its last packet to a tile. As the phases
+overlap on the ring, the switch latency is broken down along the
+critical path, i.e., each phase is accounted for the cycles by which it
+extends the latest delivery of the earlier-finished phases, and the
+`issue` phase covers the remaining cycles from the delivery of the last
+packet to the first useful op. The breakdown thus sums up to the total.
+A packet injected before the last CMD_COMPLETE but delivered after it
+(e.g., still travelling on the ring) belongs to kernel A, and is thus
+left out of the phases. A DUT that cannot be relaunched (e.g., with a
+single-bank ctrl memory) can be reset in between by `reset_dut()`, the
+reset cycles forming the `reset` phase.
+
+Usage:
+  monitor = KernelSwitchMonitor(th.dut.recv_from_cpu_pkt,
+                                th.dut.send_to_cpu_pkt,
+                                th.dut.tile, num_completes)
+  while not th.done():
+    monitor.sample()
+    th.sim_tick()
+  report = monitor.report()
+  print(format_kernel_switch_reports([report]))
+  write_kernel_switch_json(path, [report])
+
+  Date : Oct 19, 2026
+"""
+
+import json
+
+from ..cmd_type import *
+from ..opt_type import *
+
+# Phases of a kernel switch, in the order the packets are usually sent.
+KERNEL_SWITCH_PHASES = ["reset", "teardown", "config", "const",
+                        "prologue", "launch", "other"]
+
+# The phase from the delivery of the last packet to the first useful op.
+KERNEL_SWITCH_ISSUE = "issue"
+
+_PHASE_OF_CMD = {
+  CMD_TERMINATE:                        "teardown",
+  CMD_PAUSE:                            "teardown",
+  CMD_CONFIG:                           "config",
+  CMD_CONFIG_PACKED:                    "config",
+  CMD_CONFIG_PACKED_OPS:                "config",
+  CMD_CONFIG_CTRL_STORE:                "config",
+  CMD_CONFIG_ROUTING_DICT:              "config",
+  CMD_CONFIG_TOTAL_CTRL_COUNT:          "config",
+  CMD_CONFIG_COUNT_PER_ITER:            "config",
+  CMD_CONFIG_CTRL_LOWER_BOUND:          "config",
+  CMD_CONFIG_STREAMING_LD_START_ADDR:   "config",
+  CMD_CONFIG_STREAMING_LD_STRIDE:       "config",
+  CMD_CONFIG_STREAMING_LD_END_ADDR:     "config",
+  CMD_CONFIG_GEP_STRIDE:                "config",
+  CMD_CONST:                            "const",
+  CMD_CONFIG_PROLOGUE_FU:               "prologue",
+  CMD_CONFIG_PROLOGUE_FU_PACKED:        "prologue",
+  CMD_CONFIG_PROLOGUE_FU_CROSSBAR:      "prologue",
+  CMD_CONFIG_PROLOGUE_ROUTING_CROSSBAR: "prologue",
+  CMD_LAUNCH:                           "launch",
+  CMD_RESUME:                           "launch",
+  CMD_RESTORE_CONTEXT:                  "launch",
+}
+
+def kernel_switch_phase(cmd):
+  return _PHASE_OF_CMD.get(int(cmd), "other")
+
+
+class KernelSwitchMonitor:
+
+  def __init__(self, inject_port, complete_port, tiles, num_completes):
+    """
+    `tiles` expose the val/rdy `recv_from_controller_pkt` and the
+    `ctrl_mem.send_ctrl`. Kernel A is regarded as completed once
+    `num_completes` CMD_COMPLETE went through `complete_port`, after
+    which the injected packets are accounted for kernel B.
+    """
+    self.inject_port = inject_port
+    self.complete_port = complete_port
+    self.tiles = tiles
+    self.num_completes = num_completes
+    self.num_cycles = 0
+    self.complete_cycle = None
+    self.completes = 0
+    # (cycle, cmd) of the injected packets of kernel B.
+    self.injected = []
+    # (cycle, tile, cmd) of the delivered packets of kernel B.
+    self.delivered = []
+    # Number of the packets of kernel A injected but not delivered yet,
+    # per cmd.
+    self.in_flight = {}
+    # Cycles during which the reset is held after kernel A completed.
+    self.reset_cycles = []
+    self.launched = [False for _ in tiles]
+    self.first_op_cycle = [None for _ in tiles]
+
+  def sample(self, resetting = False):
+    """
+    Records the current cycle, to be called once per cycle before
+    `sim_tick()`, i.e., once the combinational signals have settled.
+    """
+    cycle = self.num_cycles
+    switching = self.complete_cycle is not None
+    if resetting:
+      # The reset drops the packets of kernel A still in flight.
+      self.in_flight = {}
+      if switching:
+        self.reset_cycles.append(cycle)
+    elif not switching:
+      if self.inject_port.val & self.inject_port.rdy:
+        cmd = int(self.inject_port.msg.payload.cmd)
+        self.in_flight[cmd] = self.in_flight.get(cmd, 0) + 1
+      for tile in self.tiles:
+        recv = tile.recv_from_controller_pkt
+        if recv.val & recv.rdy:
+          cmd = int(recv.msg.payload.cmd)
+          self.in_flight[cmd] = max(0, self.in_flight.get(cmd, 0) - 1)
+    else:
+      if self.inject_port.val & self.inject_port.rdy:
+        self.injected.append((cycle, int(self.inject_port.msg.payload.cmd)))
+      for i, tile in enumerate(self.tiles):
+        recv = tile.recv_from_controller_pkt
+        if recv.val & recv.rdy:
+          cmd = int(recv.msg.payload.cmd)
+          if self.in_flight.get(cmd, 0) > 0:
+            self.in_flight[cmd] -= 1
+          else:
+            self.delivered.append((cycle, i, cmd))
+            if kernel_switch_phase(cmd) == "launch":
+              self.launched[i] = True
+        # Only the ops of the launched kernel B count.
+        send_ctrl = tile.ctrl_mem.send_ctrl
+        if self.launched[i] and self.first_op_cycle[i] is None and \
+           send_ctrl.val and \
+           int(send_ctrl.msg.operation) not in (OPT_NAH, OPT_START):
+          self.first_op_cycle[i] = cycle
+
+    if self.complete_port.val & self.complete_port.rdy & \
+       (self.complete_port.msg.payload.cmd == CMD_COMPLETE):
+      self.completes += 1
+      if self.completes == self.num_completes and not switching:
+        self.complete_cycle = cycle
+    self.num_cycles += 1
+
+  def report(self):
+    """
+    Returns a dict of the switch latency, of the span and the packet count
+    of each phase, and of the breakdown of the latency along the critical
+    path, all the cycles being relative to the last CMD_COMPLETE.
+    """
+    first_ops = [c for c in self.first_op_cycle if c is not None]
+    assert self.complete_cycle is not None, "kernel A never completed"
+    assert first_ops, "kernel B never issued a useful op"
+    start = self.complete_cycle
+    first_op = min(first_ops)
+
+    phases = {}
+    for cycle, cmd in self.injected:
+      phase = phases.setdefault(kernel_switch_phase(cmd), {
+          "pkts": 0, "first_inject": cycle - start, "last_deliver": 0})
+      phase["pkts"] += 1
+    for cycle, _, cmd in self.delivered:
+      # Packets not injected through `inject_port`, e.g., generated by the
+      # controller, have no phase of their own.
+      phase = phases.get(kernel_switch_phase(cmd))
+      if phase is not None:
+        phase["last_deliver"] = max(phase["last_deliver"], cycle - start)
+    if self.reset_cycles:
+      phases["reset"] = {"pkts": 0,
+                         "first_inject": self.reset_cycles[0] - start,
+                         "last_deliver": self.reset_cycles[-1] - start}
+    for phase in phases.values():
+      phase["cycles"] = phase["last_deliver"] - phase["first_inject"] + 1
+
+    breakdown = {}
+    latest = 0
+    for name in sorted(phases, key = lambda name: (phases[name]["last_deliver"],
+                                                   KERNEL_SWITCH_PHASES.index(name))):
+      last_deliver = phases[name]["last_deliver"]
+      breakdown[name] = max(0, last_deliver - latest)
+      latest = max(latest, last_deliver)
+    breakdown[KERNEL_SWITCH_ISSUE] = first_op - start - latest
+
+    return {
+      "total_cycles": first_op - start,
+      "num_pkts": len(self.injected),
+      "phases": {name: phases[name] for name in KERNEL_SWITCH_PHASES
+                 if name in phases},
+      "breakdown": {name: breakdown[name]
+                    for name in KERNEL_SWITCH_PHASES + [KERNEL_SWITCH_ISSUE]
+                    if name in breakdown},
+    }
+
+def reset_dut(th, monitor, num_cycles = 2):
+  """
+  Holds the reset of the harness `th` for `num_cycles` cycles, as
+  `sim_reset()` does, while `monitor` keeps sampling.
+  """
+  th.reset @= 1
+  th.sim_eval_combinational()
+  for _ in range(num_cycles):
+    monitor.sample(resetting = True)
+    th.sim_tick()
+  th.reset @= 0
+  th.sim_eval_combinational()
+
+def format_kernel_switch_reports(reports):
+  """
+  Renders one row per report, labelled by the keys the caller added to
+  the report besides the measured ones, e.g., the DUT and the sizes.
+  """
+  measured = ("total_cycles", "num_pkts", "phases", "breakdown")
+  columns = KERNEL_SWITCH_PHASES + [KERNEL_SWITCH_ISSUE]
+  labels = [" ".join(f"{key}={value}" for key, value in report.items()
+                     if key not in measured)
+            for report in reports]
+  width = max([len("config")] + [len(label) for label in labels])
+  lines = [f"{'config':<{width}} {'pkts':>5} {'total':>6} " +
+           " ".join(f"{name:>8}" for name in columns)]
+  for label, report in zip(labels, reports):
+    lines.append(f"{label:<{width}} {report['num_pkts']:>5} "
+                 f"{report['total_cycles']:>6} " +
+                 " ".join(f"{report['breakdown'].get(name, 0):>8}"
+                          for name in columns))
+  return "\n".join(lines)
+
+def write_kernel_switch_json(path, reports):
+  with open(path, "w") as json_file:
+    json.dump(reports, json_file, indent = 2)
@@ -0,0 +1,201 @@
+"""
+==========================================================================
+noc_traffic_helper.py
+==========================================================================
+Simulation-side instrumentation of the inter-CGRA NoC. NocTrafficMonitor
+samples the ports of all the routers of a network once per cycle, i.e.,
+the output ports, each of which drives a link towards a neighbour or the
+ejection towards the terminal, and the injection input ports. Each port
+is recorded as holding a flit that is transferred, a flit that is
+stalled by the downstream, or nothing, together with the cmd of the
+flit. The log is kept in flat arrays indexed by (cycle, router, port),
+from which the per-port utilization, the stall counts broken down by
+cmd, a heat map of the routers and the top-N hot ports are derived.
+These help choosing the data placement (`controller2addr_map`) and the
+topology of a multi-CGRA.
+
+Usage:
+  monitor = NocTrafficMonitor(th.dut.mesh, ncols, nrows)
+  while not th.done():
+    monitor.sample()
+    th.sim_tick()
+  print(monitor.report())
+
+  Date : Oct 19, 2026
+"""
+
+from array import array
+
+from ..cmd_type import *
+
+# States of a router port within a cycle.
+NOC_PORT_IDLE     = 0
+NOC_PORT_TRANSFER = 1
+NOC_PORT_STALL    = 2
+
+# Port names following the NORTH/SOUTH/WEST/EAST/SELF order of the mesh
+# and torus directions.
+MESH_PORT_NAMES = ["NORTH", "SOUTH", "WEST", "EAST", "SELF"]
+
+# Recorded as the cmd of an idle port.
+_NO_CMD = NUM_CMDS
+
+# Characters of the heat map, from the coldest to the hottest.
+_HEAT_CHARS = " .:-=+*#%@"
+
+
+class NocTrafficMonitor:
+
+  def __init__(self, network, ncols, nrows, num_vcs = 1,
+               port_names = MESH_PORT_NAMES):
+    """
+    `network` is any NoC whose `routers` expose val/rdy `recv` and `send`
+    ports, which are flattened as `port * num_vcs + vc` for the VC routers.
+    """
+    self.routers = network.routers
+    self.ncols = ncols
+    self.nrows = nrows
+    self.num_vcs = num_vcs
+    self.port_names = port_names
+    self.num_routers = len(self.routers)
+    self.num_outports = len(self.routers[0].send)
+    assert self.num_routers == ncols * nrows
+    assert self.num_outports == len(port_names) * num_vcs
+    # The output ports are followed by the injection ports, as the
+    # stalls of a router only raising valid towards a ready downstream
+    # show up at the injection.
+    self_port = port_names.index("SELF")
+    self.ports = [list(router.send) +
+                  [router.recv[self_port * num_vcs + vc] for vc in range(num_vcs)]
+                  for router in self.routers]
+    self.num_ports = self.num_outports + num_vcs
+    self.num_cycles = 0
+    self.states = array('B')
+    self.cmds = array('B')
+
+  def sample(self):
+    """
+    Records the current cycle, to be called once per cycle before
+    `sim_tick()`, i.e., once the combinational signals have settled.
+    """
+    for ports in self.ports:
+      for port in ports:
+        if port.val:
+          self.states.append(NOC_PORT_TRANSFER if port.rdy else NOC_PORT_STALL)
+          self.cmds.append(int(port.msg.payload.cmd))
+        else:
+          self.states.append(NOC_PORT_IDLE)
+          self.cmds.append(_NO_CMD)
+    self.num_cycles += 1
+
+  def state(self, cycle, router, port):
+    return self.states[(cycle * self.num_routers + router) * self.num_ports + port]
+
+  def cmd(self, cycle, router, port):
+    return self.cmds[(cycle * self.num_routers + router) * self.num_ports + port]
+
+  def port_name(self, port):
+    if port >= self.num_outports:
+      name = "INJECT"
+    else:
+      name = self.port_names[port // self.num_vcs]
+    if self.num_vcs > 1:
+      name += f".vc{port % self.num_vcs}"
+    return name
+
+  def link_stats(self):
+    """
+    Returns one dict per (router, port) with the number of cycles the
+    port is occupied, transferring or stalled, and the transfers and the
+    stalls per cmd.
+    """
+    stats = []
+    for router in range(self.num_routers):
+      for port in range(self.num_ports):
+        stats.append({
+            "router": router,
+            "x": router % self.ncols,
+            "y": router // self.ncols,
+            "port": port,
+            "name": self.port_name(port),
+            "transfers": 0,
+            "stalls": 0,
+            "transfers_per_cmd": {},
+            "stalls_per_cmd": {},
+        })
+    for i in range(len(self.states)):
+      state = self.states[i]
+      if state == NOC_PORT_IDLE:
+        continue
+      entry = stats[i % (self.num_routers * self.num_ports)]
+      cmd = self.cmds[i]
+      if state == NOC_PORT_TRANSFER:
+        entry["transfers"] += 1
+        entry["transfers_per_cmd"][cmd] = entry["transfers_per_cmd"].get(cmd, 0) + 1
+      else:
+        entry["stalls"] += 1
+        entry["stalls_per_cmd"][cmd] = entry["stalls_per_cmd"].get(cmd, 0) + 1
+    for entry in stats:
+      entry["occupancy"] = entry["transfers"] + entry["stalls"]
+      entry["utilization"] = entry["occupancy"] / max(self.num_cycles, 1)
+    return stats
+
+  def hot_links(self, top_n = 5):
+    """
+    Returns the stats of the `top_n` most occupied ports, including the
+    injection and the ejection ones, the stalls breaking the ties.
+    """
+    ports = [entry for entry in self.link_stats() if entry["occupancy"] > 0]
+    ports.sort(key = lambda entry: (-entry["occupancy"], -entry["stalls"],
+                                    entry["router"], entry["port"]))
+    return ports[:top_n]
+
+  def router_utilization(self):
+    """
+    Returns the average utilization of the links driven by each router, a
+    link being occupied in a cycle if any of its VCs holds a flit.
+    """
+    link_dirs = [d for d, name in enumerate(self.port_names) if name != "SELF"]
+    busy = [0 for _ in range(self.num_routers)]
+    for cycle in range(self.num_cycles):
+      for router in range(self.num_routers):
+        for d in link_dirs:
+          if any(self.state(cycle, router, d * self.num_vcs + vc) != NOC_PORT_IDLE
+                 for vc in range(self.num_vcs)):
+            busy[router] += 1
+    return [count / (len(link_dirs) * max(self.num_cycles, 1))
+            for count in busy]
+
+  def heat_map(self):
+    """
+    Renders the router utilization with the north on top, each router
+    being shown by its utilization and a shade character.
+    """
+    utilization = self.router_utilization()
+    lines = []
+    for y in range(self.nrows - 1, -1, -1):
+      cells = []
+      for x in range(self.ncols):
+        value = utilization[y * self.ncols + x]
+        shade = _HEAT_CHARS[min(int(value * len(_HEAT_CHARS)),
+                                len(_HEAT_CHARS) - 1)]
+        cells.append(f"{shade}{value:.2f}{shade}")
+      lines.append(f"y={y:<2} " + " ".join(cells))
+    return "\n".join(lines)
+
+  def report(self, top_n = 5):
+    lines = [f"NoC traffic over {self.num_cycles} cycles",
+             "Router link utilization:",
+             self.heat_map(),
+             f"Top {top_n} hot ports:"]
+    for entry in self.hot_links(top_n):
+      stalls = ", ".join(f"{CMD_SYMBOL_DICT.get(cmd, cmd)}:{count}"
+                         for cmd, count in sorted(entry["stalls_per_cmd"].items()))
+      transfers = ", ".join(f"{CMD_SYMBOL_DICT.get(cmd, cmd)}:{count}"
+                            for cmd, count in sorted(entry["transfers_per_cmd"].items()))
+      lines.append(f"  ({entry['x']},{entry['y']}).{entry['name']}: "
+                   f"utilization {entry['utilization']:.2f}, "
+                   f"transfers {entry['transfers']} [{transfers}], "
+                   f"stalls {entry['stalls']} [{stalls}]")
+    return "\n".join(lines)
+
@@ -0,0 +1,231 @@
+"""
+==========================================================================
+schedule_helper.py
+==========================================================================
+Derives the prologue counts of a mapped kernel from its modulo schedule,
+i.e., the YAML-formatted IR generated by the compiler (see
+validation/script_generator.py), in which each instruction of a tile is
+placed at an absolute `timestep` and issued from the ctrl address
+`timestep % ii`.
+
+An instruction at `timestep` belongs to the stage `timestep // ii`, so
+that its ctrl address is reached `stage` times before the first
+iteration actually gets there, during which:
+  - the FU must be skipped (CMD_CONFIG_PROLOGUE_FU),
+  - the FU crossbar must not wait for the FU result
+    (CMD_CONFIG_PROLOGUE_FU_CROSSBAR), and
+  - the routing crossbar must not wait for the operands received from
+    the neighbouring tiles (CMD_CONFIG_PROLOGUE_ROUTING_CROSSBAR), nor
+    for the `distance` more times an operand carried from `distance`
+    iterations before takes to arrive the first time.
+The distance of an operand follows from the timestep of the neighbouring
+instruction sending it, i.e., it is 0 if sent at an earlier timestep, and
+the number of iterations it has to be carried across otherwise.
+
+The schedule is regarded as stall-free when every operand received from
+a port is sent exactly once per iteration, only the PHIs receive carried
+operands, no two instructions of a tile share a ctrl address, the input
+FIFOs never hold more operands than their depth, and the counts fit into
+the prologue counters.
+
+  Date : Oct 19, 2026
+"""
+
+from .common import *
+
+# The offset (column, row) towards the tile each port is connected to,
+# and the port of that tile it is connected to.
+_PORT_OFFSETS = {
+  "NORTH":     ( 0,  1),
+  "SOUTH":     ( 0, -1),
+  "WEST":      (-1,  0),
+  "EAST":      ( 1,  0),
+  "NORTHWEST": (-1,  1),
+  "NORTHEAST": ( 1,  1),
+  "SOUTHEAST": ( 1, -1),
+  "SOUTHWEST": (-1, -1),
+}
+
+_OPPOSITE_PORTS = {
+  "NORTH":     "SOUTH",
+  "SOUTH":     "NORTH",
+  "WEST":      "EAST",
+  "EAST":      "WEST",
+  "NORTHWEST": "SOUTHEAST",
+  "NORTHEAST": "SOUTHWEST",
+  "SOUTHEAST": "NORTHWEST",
+  "SOUTHWEST": "NORTHEAST",
+}
+
+_PORT_INDICES = {
+  "NORTH":     PORT_INDEX_NORTH,
+  "SOUTH":     PORT_INDEX_SOUTH,
+  "WEST":      PORT_INDEX_WEST,
+  "EAST":      PORT_INDEX_EAST,
+  "NORTHWEST": PORT_INDEX_NORTHWEST,
+  "NORTHEAST": PORT_INDEX_NORTHEAST,
+  "SOUTHEAST": PORT_INDEX_SOUTHEAST,
+  "SOUTHWEST": PORT_INDEX_SOUTHWEST,
+}
+
+# The ops expecting an operand carried from a previous iteration.
+_PHI_OPCODES = ["PHI", "PHI_CONST"]
+
+# The FU outport the result of an op is sent out from.
+SCHEDULE_FU_OUTPORT = 0
+
+
+def _port_of(operand):
+  name = operand['operand'].upper()
+  return name if name in _PORT_OFFSETS else None
+
+
+def _is_routing_move(operation):
+  # A move between ports is done by the routing crossbar alone.
+  src_operands = operation.get('src_operands') or []
+  return operation['opcode'] in ["MOV", "DATA_MOV"] and \
+         len(src_operands) == 1 and _port_of(src_operands[0]) is not None
+
+
+def schedule_instructions(yaml_struct):
+  '''
+  Returns the instructions of each tile of a mapped kernel, keyed by the
+  (column, row) of the tile.
+  '''
+  return {(core['column'], core['row']): core['entries'][0]['instructions']
+          for core in yaml_struct['array_config']['cores']}
+
+
+def _fifo_occupancy(pairs, ii):
+  # The most operands an input FIFO holds at once in the steady state,
+  # each operand entering it the cycle after being sent, and leaving it
+  # the cycle it is received.
+  occupancy = 0
+  horizon = max(recv_time for _, recv_time in pairs) + ii
+  for time in range(horizon, horizon + ii):
+    occupancy = max(occupancy, sum(
+        (time - send_time - 1) // ii - (time - recv_time - 1) // ii
+        for send_time, recv_time in pairs))
+  return occupancy
+
+
+def analyze_modulo_schedule(yaml_struct, ii,
+                            fifo_depth = DEFAULT_TILE_INPUT_FIFO_DEPTH):
+  '''
+  Returns `(prologue_counts, issues)`, where `prologue_counts` maps the
+  (column, row) of each tile to a dict of its non-zero prologue counts:
+    - 'fu': {ctrl_addr: count},
+    - 'routing_crossbar': {(ctrl_addr, port index): count},
+    - 'fu_crossbar': {(ctrl_addr, FU outport): count},
+  and `issues` lists why the schedule would stall, if it would.
+  '''
+  if ii <= 0:
+    raise ValueError(f"Invalid II {ii} of the modulo schedule")
+
+  tiles = schedule_instructions(yaml_struct)
+  issues = []
+  prologue_counts = {}
+  # (column, row, port) of each link -> [timestep] of its sends and
+  # [(timestep, is_phi, ctrl_addr)] of its receives.
+  sends = {}
+  recvs = {}
+
+  for (x, y), instructions in tiles.items():
+    counts = {'fu': {}, 'routing_crossbar': {}, 'fu_crossbar': {}}
+    prologue_counts[(x, y)] = counts
+    addrs = {}
+    for instruction in instructions:
+      timestep = instruction['timestep']
+      ctrl_addr = timestep % ii
+      stage = timestep // ii
+      if ctrl_addr in addrs:
+        issues.append(f"tile ({x}, {y}): timesteps {addrs[ctrl_addr]} and "
+                      f"{timestep} share ctrl_addr {ctrl_addr}")
+      addrs[ctrl_addr] = timestep
+      if stage > 0:
+        counts['fu'][ctrl_addr] = stage
+
+      for operation in instruction['operations']:
+        is_phi = operation['opcode'] in _PHI_OPCODES
+        for src_operand in operation.get('src_operands') or []:
+          port = _port_of(src_operand)
+          if port is not None:
+            recvs.setdefault((x, y, port), []).append(
+                (timestep, is_phi, ctrl_addr))
+        dst_operands = operation.get('dst_operands') or []
+        for dst_operand in dst_operands:
+          port = _port_of(dst_operand)
+          if port is not None:
+            dx, dy = _PORT_OFFSETS[port]
+            sends.setdefault((x + dx, y + dy, _OPPOSITE_PORTS[port]),
+                             []).append(timestep)
+        if stage > 0 and dst_operands and not _is_routing_move(operation):
+          counts['fu_crossbar'][(ctrl_addr, SCHEDULE_FU_OUTPORT)] = stage
+
+  for link in sorted(set(sends) | set(recvs)):
+    x, y, port = link
+    link_sends = sends.get(link, [])
+    link_recvs = recvs.get(link, [])
+    if (x, y) not in tiles:
+      issues.append(f"tile ({x}, {y}): operands sent towards a missing tile "
+                    f"through {port}")
+      continue
+
+    # Each receive takes the operand sent the latest before it, modulo II.
+    matched = {}
+    pairs = []
+    for recv_time, is_phi, ctrl_addr in link_recvs:
+      if not link_sends:
+        issues.append(f"tile ({x}, {y}): no operand is sent to timestep "
+                      f"{recv_time} through {port}")
+        continue
+      send_time = min(link_sends,
+                      key = lambda send_time: (recv_time - send_time - 1) % ii)
+      matched[send_time] = matched.get(send_time, 0) + 1
+      distance = 0 if recv_time > send_time else \
+                 (send_time - recv_time) // ii + 1
+      if distance > 0 and not is_phi:
+        issues.append(f"tile ({x}, {y}): timestep {recv_time} receives an "
+                      f"operand carried from {distance} iteration(s) before "
+                      f"through {port}, but is not a PHI")
+      # A PHI skips the first arrival of its carried operand anyway.
+      if is_phi:
+        distance = max(distance, 1)
+      pairs.append((send_time, recv_time + distance * ii))
+      count = recv_time // ii + distance
+      key = (ctrl_addr, _PORT_INDICES[port])
+      routing_counts = prologue_counts[(x, y)]['routing_crossbar']
+      if count > 0:
+        routing_counts[key] = max(routing_counts.get(key, 0), count)
+
+    for send_time in link_sends:
+      if matched.get(send_time, 0) != 1:
+        issues.append(f"tile ({x}, {y}): the operand sent at timestep "
+                      f"{send_time} through {port} is received "
+                      f"{matched.get(send_time, 0)} time(s) per iteration")
+    if pairs and _fifo_occupancy(pairs, ii) > fifo_depth:
+      issues.append(f"tile ({x}, {y}): the {port} input FIFO holds up to "
+                    f"{_fifo_occupancy(pairs, ii)} operands, more than its "
+                    f"depth {fifo_depth}")
+
+  for (x, y), counts in prologue_counts.items():
+    for kind, kind_counts in counts.items():
+      for key, count in kind_counts.items():
+        if count > PROLOGUE_MAX_COUNT:
+          issues.append(f"tile ({x}, {y}): the {kind} prologue count {count} "
+                        f"at {key} exceeds {PROLOGUE_MAX_COUNT}")
+
+  return prologue_counts, issues
+
+
+def derive_prologue_counts(yaml_struct, ii,
+                           fifo_depth = DEFAULT_TILE_INPUT_FIFO_DEPTH):
+  '''
+  Returns the prologue counts of a mapped kernel, making sure that the
+  kernel runs at its II without any stall.
+  '''
+  prologue_counts, issues = analyze_modulo_schedule(yaml_struct, ii, fifo_depth)
+  if issues:
+    raise ValueError("The modulo schedule is not stall-free:\n  " +
+                     "\n  ".join(issues))
+  return prologue_counts
@@ -0,0 +1,97 @@
+"""
+==========================================================================
+topology_helper.py
+==========================================================================
+Helper functions to evaluate the inter-CGRA NoC topologies analytically,
+i.e., the hop count and the remote-load latency between each pair of
+CGRAs, so that the topologies can be compared before being simulated.
+
+The CGRAs are indexed in the same way as the multi-CGRA RTL, i.e., the
+CGRA `id` is located at (x, y) = (id % columns, id // columns).
+
+  Date : Oct 19, 2026
+"""
+
+from .common import *
+
+
+def _ring_distance(src, dst, num_nodes):
+  # The ring routers are bidirectional and take the shorter direction.
+  dist = abs(src - dst)
+  return min(dist, num_nodes - dist)
+
+def hop_count(topology, src, dst, columns, rows):
+  """
+  Returns the number of links traversed by a packet from CGRA `src` to
+  CGRA `dst` with the dimension-ordered routing of the given topology.
+  """
+  assert topology in MULTI_CGRA_TOPOLOGIES, \
+      f"Unsupported multi-CGRA topology: {topology}"
+  if topology == MULTI_CGRA_TOPOLOGY_RING:
+    return _ring_distance(src, dst, columns * rows)
+  src_x, src_y = src % columns, src // columns
+  dst_x, dst_y = dst % columns, dst // columns
+  if topology == MULTI_CGRA_TOPOLOGY_TORUS:
+    return _ring_distance(src_x, dst_x, columns) + \
+           _ring_distance(src_y, dst_y, rows)
+  return abs(src_x - dst_x) + abs(src_y - dst_y)
+
+def average_hop_count(topology, columns, rows):
+  """
+  Returns the average hop count over all the pairs of distinct CGRAs.
+  """
+  num_cgras = columns * rows
+  if num_cgras < 2:
+    return 0.0
+  total = sum(hop_count(topology, src, dst, columns, rows)
+              for src in range(num_cgras)
+              for dst in range(num_cgras) if src != dst)
+  return total / (num_cgras * (num_cgras - 1))
+
+def remote_load_latency(topology, src, dst, columns, rows,
+                        router_latency = 1, channel_latency = 1,
+                        mem_latency = 1):
+  """
+  Returns the zero-load latency of a load issued by CGRA `src` towards the
+  memory of CGRA `dst`: both the request and the response go through
+  `hops + 1` routers and `hops` channels.
+  """
+  hops = hop_count(topology, src, dst, columns, rows)
+  one_way = (hops + 1) * router_latency + hops * channel_latency
+  return 2 * one_way + mem_latency
+
+def average_remote_load_latency(topology, columns, rows,
+                                router_latency = 1, channel_latency = 1,
+                                mem_latency = 1):
+  """
+  Returns the average zero-load remote-load latency over all the pairs of
+  distinct CGRAs.
+  """
+  num_cgras = columns * rows
+  if num_cgras < 2:
+    return 0.0
+  total = sum(remote_load_latency(topology, src, dst, columns, rows,
+                                  router_latency, channel_latency,
+                                  mem_latency)
+              for src in range(num_cgras)
+              for dst in range(num_cgras) if src != dst)
+  return total / (num_cgras * (num_cgras - 1))
+
+def compare_topologies(columns, rows, topologies = MULTI_CGRA_TOPOLOGIES,
+                       router_latency = 1, channel_latency = 1,
+                       mem_latency = 1):
+  """
+  Returns {topology: {"avg_hops": ..., "avg_remote_load_latency": ...}}
+  for a `columns` x `rows` multi-CGRA.
+  """
+  report = {}
+  for topology in topologies:
+    report[topology] = {
+        "avg_hops": average_hop_count(topology, columns, rows),
+        "avg_remote_load_latency":
+            average_remote_load_latency(topology, columns, rows,
+                                        router_latency, channel_latency,
+                                        mem_latency),
+    }
+  return report
+
@@ -5,6 +5,14 @@ ConstQueueDynamicRTL.py
 Constant Queue with regs used for simulation.
 If queue is full, will stop receiving new data.
 
+With `double_buffer`, the constants are written into a shadow bank while
+the active bank is being read, and the `swap` inport (driven by the ctrl
+memory upon CMD_LAUNCH) makes the shadow bank active in a single cycle,
+emptying the new shadow bank for the next kernel.
+
+With `has_context_port`, the read cursor is exposed to be saved upon the
+context switch, and is overwritten by `restore_rd_cur` when restored.
+
 Author : Yuqi Sun
   Date : Jan 11, 2025
 """
@@ -17,7 +25,8 @@ from ...lib.opt_type import *
 
 
 class ConstQueueDynamicRTL(Component):
-  def construct(s, DataType, const_mem_size):
+  def construct(s, DataType, const_mem_size, double_buffer = False,
+                has_context_port = False):
     # Constant
     # addr type: number of bits to represent the address
     # 2^addr_size = const_mem_size
@@ -31,9 +40,20 @@ class ConstQueueDynamicRTL(Component):
     # otherwise, number will be back to 000 when 111 + 1 (given const_mem_size = 8)
     WrCurType = mk_bits(clog2(const_mem_size + 1))
 
+    # The banks are stacked in the register file, i.e., the entries of
+    # bank b are located from b * const_mem_size.
+    num_banks = 2 if double_buffer else 1
+    RegAddrType = mk_bits(max(1, clog2(const_mem_size * num_banks)))
+
     # write cursor and read cursor
     s.wr_cur = Wire(WrCurType)
     s.rd_cur = Wire(AddrType)
+    # Number of constants the read cursor wraps around, i.e., the write
+    # cursor itself unless there is a shadow bank being written.
+    s.rd_end = Wire(WrCurType)
+    s.read_bank_base = Wire(RegAddrType)
+    s.write_bank_base = Wire(RegAddrType)
+    s.swapping = Wire(b1)
 
     # Interface
     s.send_const = SendIfcRTL(DataType)
@@ -42,38 +62,88 @@ class ConstQueueDynamicRTL(Component):
     s.ctrl_proceed = InPort(b1)
     s.clear = InPort(b1)
 
+    if has_context_port:
+      s.rd_cur_outport = OutPort(AddrType)
+      s.restore = InPort(b1)
+      s.restore_rd_cur = InPort(AddrType)
+      s.rd_cur_outport //= s.rd_cur
+    else:
+      s.restore = Wire(b1)
+      s.restore_rd_cur = Wire(AddrType)
+      s.restore //= 0
+      s.restore_rd_cur //= 0
+
     # Component
     # 1 rd_port: number of read port is 0.
     # 1 wr_port: number of write port is 0.
     #                         Type,     nregs,          rd_ports, wr_ports
-    s.reg_file = RegisterFile(DataType, const_mem_size, 1,        1)
+    s.reg_file = RegisterFile(DataType, const_mem_size * num_banks, 1, 1)
 
     # Connections
     s.send_const.msg //= s.reg_file.rdata[0]
-    s.reg_file.raddr[0] //= s.rd_cur
+
+    if double_buffer:
+      s.swap = InPort(b1)
+      s.active_bank = Wire(b1)
+      s.swapping //= s.swap
+
+      @update
+      def update_bank_base():
+        if s.active_bank:
+          s.read_bank_base @= RegAddrType(const_mem_size)
+          s.write_bank_base @= RegAddrType(0)
+        else:
+          s.read_bank_base @= RegAddrType(0)
+          s.write_bank_base @= RegAddrType(const_mem_size)
+
+      @update_ff
+      def update_active_bank():
+        if s.reset:
+          s.active_bank <<= 0
+          s.rd_end <<= 0
+        elif s.swapping:
+          s.active_bank <<= ~s.active_bank
+          s.rd_end <<= s.wr_cur
+        elif s.clear:
+          s.rd_end <<= 0
+
+    else:
+      s.read_bank_base //= 0
+      s.write_bank_base //= 0
+      s.swapping //= 0
+      s.rd_end //= s.wr_cur
+
+    @update
+    def update_raddr():
+      s.reg_file.raddr[0] @= s.read_bank_base + zext(s.rd_cur, RegAddrType)
 
 
     @update
     def load_const():
       # Initializes signals.
-      s.reg_file.waddr[0] @= AddrType()
+      s.reg_file.waddr[0] @= RegAddrType()
       s.reg_file.wdata[0] @= DataType()
       s.reg_file.wen[0] @= 0
 
-      not_full = s.wr_cur < const_mem_size
+      # Holds the incoming constant during the swap, as the bank it would
+      # be written into becomes active.
+      not_full = (s.wr_cur < const_mem_size) & ~s.swapping
       s.recv_const.rdy @= not_full
 
       if s.recv_const.val & not_full:
-        s.reg_file.waddr[0] @= trunc(s.wr_cur, AddrType)
+        s.reg_file.waddr[0] @= s.write_bank_base + zext(trunc(s.wr_cur, AddrType), RegAddrType)
         s.reg_file.wdata[0] @= s.recv_const.msg
         s.reg_file.wen[0] @= 1
 
 
     @update_ff
     def update_wr_cur():
-      not_full = (s.wr_cur < const_mem_size)
+      not_full = (s.wr_cur < const_mem_size) & ~s.swapping
       if s.reset | s.clear:
         s.wr_cur <<= 0
+      # The shadow bank is emptied once swapped.
+      elif s.swapping:
+        s.wr_cur <<= 0
       # Checks if there's a valid const (from producer) to be written.
       else:
         if s.recv_const.val & not_full:
@@ -83,7 +153,7 @@ class ConstQueueDynamicRTL(Component):
     @update
     def update_send_val():
       # Checks if read cursor is in front of write cursor.
-      if (zext(s.rd_cur, WrCurType) < s.wr_cur):
+      if (zext(s.rd_cur, WrCurType) < s.rd_end):
         s.send_const.val @= 1
       else:
         s.send_const.val @= 0
@@ -91,13 +161,15 @@ class ConstQueueDynamicRTL(Component):
 
     @update_ff
     def update_rd_cur():
-      if s.reset | s.clear:
+      if s.reset | s.clear | s.swapping:
         s.rd_cur <<= 0
+      elif s.restore:
+        s.rd_cur <<= s.restore_rd_cur
       else:
         # Checks whether the "reader" successfully read the data at rd_cur,
         # and proceed rd_cur accordingly.
         if s.send_const.rdy & s.ctrl_proceed:
-          if zext((s.rd_cur), WrCurType) < (s.wr_cur - 1):
+          if zext((s.rd_cur), WrCurType) < (s.rd_end - 1):
             s.rd_cur <<= s.rd_cur + 1
           else:
             s.rd_cur <<= 0
@@ -85,3 +85,38 @@ def test_const_loop():
   read_data = [DataType(9, 1), DataType(9, 1), DataType(9, 1), DataType(9, 1)]
   th = TestHarness(MemUnit, DataType, const_mem_size, src_const, read_data)
   run_sim(th)
+
+def test_double_buffer():
+  DataType = mk_data(4, 1)
+  const_mem_size = 4
+
+  dut = ConstQueueDynamicRTL(DataType, const_mem_size, double_buffer = True)
+  dut.elaborate()
+  dut.apply(DefaultPassGroup())
+  dut.sim_reset()
+
+  # Writes a constant (if any), swaps the banks, or reads the constant,
+  # and returns the constant that was being read in that cycle.
+  def step(const = None, swap = 0, read = 0):
+    dut.recv_const.val @= int(const is not None)
+    dut.recv_const.msg @= DataType(const or 0, 1)
+    dut.swap @= swap
+    dut.clear @= 0
+    dut.send_const.rdy @= read
+    dut.ctrl_proceed @= read
+    dut.sim_eval_combinational()
+    sent = int(dut.send_const.msg.payload) if dut.send_const.val else None
+    dut.sim_tick()
+    return sent
+
+  # The constants of the first kernel are written into the shadow bank.
+  assert step(9) is None
+  assert step(8) is None
+  assert step(swap = 1) is None
+  assert [step(read = 1) for _ in range(3)] == [9, 8, 9]
+
+  # The constants of the next kernel do not disturb the running one.
+  assert step(3, read = 1) == 8
+  assert step(read = 1) == 9
+  assert step(swap = 1) == 8
+  assert [step(read = 1) for _ in range(2)] == [3, 3]
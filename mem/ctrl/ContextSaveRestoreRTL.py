@@ -0,0 +1,195 @@
+"""
+==========================================================================
+ContextSaveRestoreRTL.py
+==========================================================================
+Saves/restores the context of a tile, i.e., all the registers of the
+register cluster, the read cursor of the constant queue, the ctrl address
+and step count of the control memory, the progress recorded by
+ContextSwitchRTL, the `num_prologue_counters` prologue counters of the
+FU and the crossbars, and the contents of the `num_fifos` FIFOs of the
+tile, into/from one of the `num_context_slots` slots of a context
+scratchpad local to the tile.
+
+Upon CMD_SAVE_CONTEXT (CMD_RESTORE_CONTEXT), the registers at the same
+index of all the register banks are bursted into (out of) the slot carried
+by the `data` of the command, one index per cycle, so that the burst takes
+`num_registers_per_reg_bank` cycles regardless of the number of banks. The
+remaining state is saved along with the first index and restored along
+with the last one. The tile stops issuing ctrl signals while `busy`.
+
+The FIFOs are drained into the slot during the save burst, one entry per
+cycle, as the save preempts the kernel (the FIFOs being then flushed by
+CMD_TERMINATE), and refilled in order during the restore burst. Hence a
+FIFO cannot be deeper than `num_registers_per_reg_bank`, and the tile
+holds the data from the other tiles while `busy`.
+
+  Date : Oct 19, 2026
+"""
+
+from pymtl3 import *
+from pymtl3.stdlib.primitive import RegisterFile
+
+from ...lib.basic.val_rdy.ifcs import ValRdyRecvIfcRTL as RecvIfcRTL
+from ...lib.basic.val_rdy.ifcs import ValRdySendIfcRTL as SendIfcRTL
+from ...lib.cmd_type import *
+from ...lib.util.common import *
+
+class ContextSaveRestoreRTL(Component):
+
+  def construct(s, DataType, ctrl_mem_size, const_mem_size, num_reg_banks,
+                num_registers_per_reg_bank, num_context_slots,
+                num_prologue_counters = 0, num_fifos = 0):
+
+    # Constants.
+    CmdType = mk_bits(clog2(NUM_CMDS))
+    CtrlAddrType = mk_bits(clog2(ctrl_mem_size))
+    TimeType = mk_bits(clog2(MAX_CTRL_COUNT + 1))
+    ConstAddrType = mk_bits(max(1, clog2(const_mem_size)))
+    RegIdxType = mk_bits(clog2(num_registers_per_reg_bank))
+    SlotType = mk_bits(max(1, clog2(num_context_slots)))
+    num_context_entries = num_context_slots * num_registers_per_reg_bank
+    ContextAddrType = mk_bits(max(1, clog2(num_context_entries)))
+    last_reg_idx = num_registers_per_reg_bank - 1
+    PrologueCountType = mk_bits(clog2(PROLOGUE_MAX_COUNT + 1))
+    FifoCountType = mk_bits(clog2(num_registers_per_reg_bank + 1))
+
+    # Interface
+    # Receives CMD_SAVE_CONTEXT/CMD_RESTORE_CONTEXT along with the `data`
+    # carrying the context slot.
+    s.recv_cmd = RecvIfcRTL(CmdType)
+    s.recv_slot = InPort(DataType)
+    s.busy = OutPort(b1)
+
+    # Reads/writes the registers of all the banks at `to_reg_addr`.
+    s.to_reg_addr = OutPort(RegIdxType)
+    s.from_reg_rdata = [InPort(DataType) for _ in range(num_reg_banks)]
+    s.to_reg_wdata = [OutPort(DataType) for _ in range(num_reg_banks)]
+    s.to_reg_wen = OutPort(b1)
+
+    # The remaining state, which is overwritten upon `restore`.
+    s.ctrl_addr_in = InPort(CtrlAddrType)
+    s.times_in = InPort(TimeType)
+    s.const_rd_cur_in = InPort(ConstAddrType)
+    s.progress_in = InPort(DataType)
+    s.restore = OutPort(b1)
+    s.restore_ctrl_addr = OutPort(CtrlAddrType)
+    s.restore_times = OutPort(TimeType)
+    s.restore_const_rd_cur = OutPort(ConstAddrType)
+    s.restore_progress = OutPort(DataType)
+    s.prologue_counter_in = [InPort(PrologueCountType) for _ in range(num_prologue_counters)]
+    s.restore_prologue_counter = [OutPort(PrologueCountType) for _ in range(num_prologue_counters)]
+
+    # Drains (refills) the FIFOs while saving (restoring).
+    s.recv_from_fifo = [RecvIfcRTL(DataType) for _ in range(num_fifos)]
+    s.send_to_fifo = [SendIfcRTL(DataType) for _ in range(num_fifos)]
+
+    # Components.
+    # The registers of the i-th bank are saved into the i-th scratchpad,
+    # each slot taking `num_registers_per_reg_bank` consecutive entries.
+    s.context_mem = [RegisterFile(DataType, num_context_entries, 1, 1)
+                     for _ in range(num_reg_banks)]
+    s.saved_ctrl_addr = [Wire(CtrlAddrType) for _ in range(num_context_slots)]
+    s.saved_times = [Wire(TimeType) for _ in range(num_context_slots)]
+    s.saved_const_rd_cur = [Wire(ConstAddrType) for _ in range(num_context_slots)]
+    s.saved_progress = [Wire(DataType) for _ in range(num_context_slots)]
+    s.saved_prologue_counter = [[Wire(PrologueCountType) for _ in range(num_prologue_counters)]
+                                for _ in range(num_context_slots)]
+    # The entries of the i-th FIFO are saved into the i-th FIFO
+    # scratchpad, at the same addresses as the registers.
+    s.fifo_mem = [RegisterFile(DataType, num_context_entries, 1, 1)
+                  for _ in range(num_fifos)]
+    s.saved_fifo_count = [[Wire(FifoCountType) for _ in range(num_fifos)]
+                          for _ in range(num_context_slots)]
+
+    s.saving = Wire(b1)
+    s.restoring = Wire(b1)
+    s.slot = Wire(SlotType)
+    s.reg_idx = Wire(RegIdxType)
+    s.context_addr = Wire(ContextAddrType)
+
+    # Connections.
+    s.to_reg_addr //= s.reg_idx
+    s.to_reg_wen //= s.restoring
+    for i in range(num_reg_banks):
+      s.context_mem[i].raddr[0] //= s.context_addr
+      s.context_mem[i].waddr[0] //= s.context_addr
+      s.context_mem[i].wdata[0] //= s.from_reg_rdata[i]
+      s.context_mem[i].wen[0] //= s.saving
+      s.to_reg_wdata[i] //= s.context_mem[i].rdata[0]
+    for i in range(num_fifos):
+      s.fifo_mem[i].raddr[0] //= s.context_addr
+      s.fifo_mem[i].waddr[0] //= s.context_addr
+      s.fifo_mem[i].wdata[0] //= s.recv_from_fifo[i].msg
+      s.send_to_fifo[i].msg //= s.fifo_mem[i].rdata[0]
+
+    @update
+    def update_busy():
+      s.busy @= s.saving | s.restoring
+      s.recv_cmd.rdy @= ~(s.saving | s.restoring)
+
+    @update
+    def update_context_addr():
+      s.context_addr @= zext(s.slot, ContextAddrType) * \
+                        ContextAddrType(num_registers_per_reg_bank) + \
+                        zext(s.reg_idx, ContextAddrType)
+
+    @update
+    def update_restore():
+      s.restore @= s.restoring & (s.reg_idx == RegIdxType(last_reg_idx))
+      s.restore_ctrl_addr @= s.saved_ctrl_addr[s.slot]
+      s.restore_times @= s.saved_times[s.slot]
+      s.restore_const_rd_cur @= s.saved_const_rd_cur[s.slot]
+      s.restore_progress @= s.saved_progress[s.slot]
+      for i in range(num_prologue_counters):
+        s.restore_prologue_counter[i] @= s.saved_prologue_counter[s.slot][i]
+
+    @update
+    def update_fifo():
+      for i in range(num_fifos):
+        s.recv_from_fifo[i].rdy @= s.saving
+        s.fifo_mem[i].wen[0] @= s.saving & s.recv_from_fifo[i].val
+        s.send_to_fifo[i].val @= s.restoring & \
+            (zext(s.reg_idx, FifoCountType) < s.saved_fifo_count[s.slot][i])
+
+    @update_ff
+    def update_burst():
+      if s.reset:
+        s.saving <<= 0
+        s.restoring <<= 0
+        s.slot <<= 0
+        s.reg_idx <<= 0
+      elif s.recv_cmd.val & s.recv_cmd.rdy:
+        s.saving <<= (s.recv_cmd.msg == CMD_SAVE_CONTEXT)
+        s.restoring <<= (s.recv_cmd.msg == CMD_RESTORE_CONTEXT)
+        s.slot <<= trunc(s.recv_slot.payload, SlotType)
+        s.reg_idx <<= 0
+      elif s.saving | s.restoring:
+        if s.reg_idx == RegIdxType(last_reg_idx):
+          s.saving <<= 0
+          s.restoring <<= 0
+        else:
+          s.reg_idx <<= s.reg_idx + RegIdxType(1)
+
+    @update_ff
+    def save_remaining_state():
+      if s.saving & (s.reg_idx == RegIdxType(0)):
+        s.saved_ctrl_addr[s.slot] <<= s.ctrl_addr_in
+        s.saved_times[s.slot] <<= s.times_in
+        s.saved_const_rd_cur[s.slot] <<= s.const_rd_cur_in
+        s.saved_progress[s.slot] <<= s.progress_in
+        for i in range(num_prologue_counters):
+          s.saved_prologue_counter[s.slot][i] <<= s.prologue_counter_in[i]
+
+    # Counts the entries drained out of each FIFO, which arrive in
+    # consecutive cycles from the first index on.
+    @update_ff
+    def save_fifo_count():
+      if s.saving:
+        for i in range(num_fifos):
+          if s.reg_idx == RegIdxType(0):
+            s.saved_fifo_count[s.slot][i] <<= zext(s.recv_from_fifo[i].val, FifoCountType)
+          elif s.recv_from_fifo[i].val:
+            s.saved_fifo_count[s.slot][i] <<= s.saved_fifo_count[s.slot][i] + FifoCountType(1)
+
+  def line_trace(s):
+    return f'saving: {s.saving} | restoring: {s.restoring} | slot: {s.slot} | reg_idx: {s.reg_idx}'
@@ -3,6 +3,8 @@
 ContextSwitchRTL.py
 ==========================================================================
 Records/resumes progress (itertion / accumulation) for functional unit (FU).
+The recorded progress is exposed via `progress_outport` to be saved upon
+the context switch, and is overwritten by `restore_progress` when restored.
 
 Author : Yufei Yang
   Date : Aug 11, 2025
@@ -43,6 +45,10 @@ class ContextSwitchRTL(Component):
     s.ctrl_mem_rd_addr = InPort(CtrlAddrType)
     # When s.overwrite_fu_outport.val is high, FU's outport should be replaced with s.overwrite_fu_outport.msg.
     s.overwrite_fu_outport = SendIfcRTL(DataType)
+    # Saves/restores the progress upon the context switch.
+    s.progress_outport = OutPort(DataType)
+    s.restore = InPort(b1)
+    s.restore_progress = InPort(DataType)
    
     # Component
     s.progress_reg = Wire(DataType)
@@ -58,6 +64,8 @@ class ContextSwitchRTL(Component):
     s.recv_cmd_queue = NormalQueueRTL(CmdType)
     s.recv_phi_addr_queue = NormalQueueRTL(CtrlAddrType)
 
+    s.progress_outport //= s.progress_reg
+
     @update
     def update_queue():
       s.recv_cmd_queue.recv.val @= s.recv_cmd_vld
@@ -106,7 +114,9 @@ class ContextSwitchRTL(Component):
         s.status_reg <<= s.status_reg
 
       # Updates the progress register.
-      if (s.progress_reg_is_null & s.is_pausing & s.is_executing_phi) | \
+      if s.restore:
+        s.progress_reg <<= s.restore_progress
+      elif (s.progress_reg_is_null & s.is_pausing & s.is_executing_phi) | \
            (s.is_preserving & s.is_executing_phi) & \
            (s.progress_in.predicate & s.progress_in_val):
         # Records the progress.
@@ -5,6 +5,67 @@ CtrlMemDynamicRTL.py
 Control memory with dynamic reconfigurability (e.g., receiving control
 signals, halt/terminate signals) for each CGRA tile.
 
+With `double_buffer`, the control memory, the FU prologue counts, the
+crossbar prologue counts, and the ctrl count/bound registers have a
+second (shadow) bank. All the configuration packets are written into
+the shadow bank, even while the kernel of the active bank is running, and
+CMD_LAUNCH swaps the two banks in a single cycle once the running kernel
+has completed (or was never launched). The `swap_bank` outport notifies
+the constant queue of the tile to swap its banks as well.
+
+With a non-zero `ctrl_store_size`, the schedule is instead streamed from
+a ctrl store (e.g., a DataMemRTL holding CtrlType), which is written by
+CMD_CONFIG_CTRL_STORE packets at the address carried by their data. The
+CMD_CONFIG_CTRL_LOWER_BOUND and CMD_CONFIG_COUNT_PER_ITER then locate the
+iterated entries in the ctrl store, and the control memory acts as a
+ring buffer that prefetches the upcoming entries while the earlier ones
+execute, so that a schedule can be longer than `ctrl_mem_size`. The
+prologues (of the FU and of both crossbars) are not supported by the
+streaming, as the entries do not stay at fixed ctrl addresses, i.e., the
+crossbars would count the prologue of a ring slot rather than of a ctrl
+signal. Nor are the writes of the ctrl memory (CMD_CONFIG and its packed
+forms, CMD_CONFIG_DEFAULT_NOP), as the schedule only lives in the ctrl
+store. Instead of being applied, each of these packets is answered with
+CMD_CONFIG_REJECTED towards the controller.
+
+The ctrl store holds the whole schedule of the tile, while the ctrl
+memory shrinks to the prefetch depth. This pays off as the state kept
+per ctrl address (the prologue counters of both crossbars, the FU
+prologue counts, the default NOPs and the first executions of the PHIs)
+is made of flops scaling with `ctrl_mem_size`, whereas the ctrl store
+only holds the ctrl signals in a single-ported memory. It is not backed
+by the shared SPM, which the tile only reaches through the port of its
+memory FU, so that the fetches would contend with the loads and stores
+of the kernel and stall on the round trip through the memory controller.
+
+With a non-zero `routing_dict_size`, the routing fields of the ctrl
+signals (i.e., `routing_xbar_outport` and `fu_xbar_outport`) are kept in
+a routing dictionary of that many entries, written by
+CMD_CONFIG_ROUTING_DICT, and the control memory only holds the index of
+the dictionary entry of each ctrl signal (see `mk_compressed_ctrl`),
+which is carried by the `data` of CMD_CONFIG/CMD_CONFIG_PACKED. The ctrl
+signal is decoded back into CtrlType when read. With `double_buffer`, the
+dictionary is shared by both banks.
+
+CMD_CONFIG_DEFAULT_NOP marks a range of ctrl entries (of the shadow bank
+with `double_buffer`) as default NOPs, which issue NAH without any
+routing until they are written by CMD_CONFIG/CMD_CONFIG_PACKED, so that
+the all-NAH entries of a schedule need not be sent at all (see
+`elide_config_pkts`).
+
+CMD_CONFIG_PACKED_OPS writes the distinct entries only differing in their
+operations, one entry per cycle same as CMD_CONFIG_PACKED, taking the
+operation of each entry from its slice of the `data`. Hence it cannot be
+used along with the routing dictionary, whose index is carried by the
+`data` as well. A single CMD_CONFIG_PROLOGUE_ROUTING_CROSSBAR sets the
+same prologue count for all the routing crossbar inports carried by its
+`routing_xbar_outport` slots (see `pack_config_pkts`).
+
+With `has_context_port`, the step count is exposed (along with the ctrl
+address and the FU prologue counts of the active bank) to be saved upon
+the context switch, and `restore` overwrites all of them, so that the
+resumed kernel proceeds from the saved step.
+
 Author : Cheng Tan
   Date : Dec 20, 2024
 """
@@ -16,6 +77,7 @@ from ...lib.basic.val_rdy.ifcs import ValRdyRecvIfcRTL as RecvIfcRTL
 from ...lib.basic.val_rdy.ifcs import ValRdySendIfcRTL as SendIfcRTL
 from ...lib.basic.val_rdy.queues import NormalQueueRTL
 from ...lib.cmd_type import *
+from ...lib.messages import *
 from ...lib.opt_type import *
 from ...lib.util.common import *
 from ...lib.util.data_struct_attr import *
@@ -26,10 +88,14 @@ class CtrlMemDynamicRTL(Component):
                 ctrl_mem_size, num_fu_inports, num_fu_outports,
                 num_tile_inports, num_tile_outports, num_cgras,
                 num_tiles, ctrl_count_per_iter = 4,
-                total_ctrl_steps = 4):
+                total_ctrl_steps = 4, double_buffer = False,
+                ctrl_store_size = 0, routing_dict_size = 0,
+                has_context_port = False):
 
     CgraPayloadType = IntraCgraPktType.get_field_type(kAttrPayload)
     CtrlType = CgraPayloadType.get_field_type(kAttrCtrl)
+    DataType = CgraPayloadType.get_field_type(kAttrData)
+    DataAddrType = CgraPayloadType.get_field_type(kAttrDataAddr)
     # The total_ctrl_steps indicates the number of steps the ctrl
     # signals should proceed. For example, if the number of ctrl
     # signals is 4 and they need to repeat 5 times, then the total
@@ -46,6 +112,42 @@ class CtrlMemDynamicRTL(Component):
     TileInPortType = mk_bits(clog2(num_routing_xbar_inports))
     FuOutPortType = mk_bits(clog2(num_fu_outports))
     num_routing_outports = num_tile_outports + num_fu_inports
+    # The banks are stacked in the register file, i.e., the entries of
+    # bank b are located from b * ctrl_mem_size.
+    num_banks = 2 if double_buffer else 1
+    RegAddrType = mk_bits(clog2(ctrl_mem_size * num_banks))
+    streaming = ctrl_store_size > 0
+    assert not (streaming and double_buffer), \
+        "The ctrl streaming is not supported along with the double buffer."
+    StoreAddrType = mk_bits(clog2(max(2, ctrl_store_size)))
+    StoreUpperType = mk_bits(clog2(max(2, ctrl_store_size) + 1))
+    FetchCountType = mk_bits(clog2(ctrl_mem_size + 1))
+    compressed = routing_dict_size > 0
+    assert not (streaming and compressed), \
+        "The ctrl streaming is not supported along with the routing dictionary."
+    CompressedCtrlType = mk_compressed_ctrl(CtrlType, routing_dict_size)
+    RoutingIdxType = CompressedCtrlType.get_field_type(kAttrRoutingIdx)
+    # A single-entry dictionary still takes one bit of index.
+    num_routing_dict_entries = max(2, routing_dict_size)
+    # The ctrl signals of dual-issue tiles carry a second operation.
+    dual_issue = kAttrSecondOperation in CtrlType.__bitstruct_fields__
+    # The ctrl signals of the tiles having the FU operand bypass select the
+    # bypassed FU outport of each FU inport.
+    fu_bypass = kAttrFuInBypass in CtrlType.__bitstruct_fields__
+    # The packed commands carry their entry count in `data_addr`, which is
+    # compared against the per-packet write offset.
+    PackedCountType = mk_bits(max(CtrlAddrType.nbits, DataAddrType.nbits) + 1)
+    # Number of prologue counts that fit into the data payload of a single
+    # CMD_CONFIG_PROLOGUE_FU_PACKED packet.
+    prologue_count_nbits = PrologueCountType.nbits
+    num_packed_prologue_counts = \
+        min(DataType.get_field_type(kAttrPayload).nbits // prologue_count_nbits,
+            ctrl_mem_size)
+    # The i-th entry of a CMD_CONFIG_PACKED_OPS packet takes its operation
+    # from the i-th slice of the data payload.
+    OperationType = CtrlType.get_field_type(kAttrOperation)
+    DataPayloadType = DataType.get_field_type(kAttrPayload)
+    CmdType = CgraPayloadType.get_field_type(kAttrCmd)
 
     # Interfaces.
     # Stores ctrl signals into the control memory/registers.
@@ -62,20 +164,96 @@ class CtrlMemDynamicRTL(Component):
     s.cgra_id = InPort(mk_bits(max(1, clog2(num_cgras))))
     s.tile_id = InPort(mk_bits(clog2(num_tiles + 1)))
     s.ctrl_addr_outport = OutPort(CtrlAddrType)
+    # Pulses when CMD_LAUNCH swaps the active and the shadow banks.
+    s.swap_bank = OutPort(b1)
+
+    if has_context_port:
+      s.times_outport = OutPort(TimeType)
+      s.restore = InPort(b1)
+      s.restore_ctrl_addr = InPort(CtrlAddrType)
+      s.restore_times = InPort(TimeType)
+      s.prologue_count_fu_ctx_outport = [OutPort(PrologueCountType) for _ in range(ctrl_mem_size)]
+      s.restore_prologue_count_fu = [InPort(PrologueCountType) for _ in range(ctrl_mem_size)]
+
+    if streaming:
+      # Fetches the ctrl signals from, and writes them into, the ctrl store.
+      s.to_ctrl_store_raddr = SendIfcRTL(StoreAddrType)
+      s.from_ctrl_store_rdata = RecvIfcRTL(CtrlType)
+      s.to_ctrl_store_waddr = SendIfcRTL(StoreAddrType)
+      s.to_ctrl_store_wdata = SendIfcRTL(CtrlType)
 
     # Components.
-    s.reg_file = RegisterFile(CtrlType, ctrl_mem_size, 1, 1)
+    if compressed:
+      s.reg_file = RegisterFile(CompressedCtrlType, ctrl_mem_size * num_banks, 1, 1)
+      s.routing_dict = RegisterFile(mk_ctrl_routing(CtrlType), num_routing_dict_entries, 1, 1)
+    else:
+      s.reg_file = RegisterFile(CtrlType, ctrl_mem_size * num_banks, 1, 1)
     s.recv_pkt_from_controller_queue = NormalQueueRTL(IntraCgraPktType)
     s.recv_from_element_queue = NormalQueueRTL(CgraPayloadType)
     s.times = Wire(TimeType)
     s.start_iterate_ctrl = Wire(b1)
     s.sent_complete = Wire(b1)
+    # The ctrl address within the active bank, and the one written by the
+    # configuration packet within the shadow bank (or the only bank).
+    s.ctrl_addr = Wire(CtrlAddrType)
+    s.config_addr = Wire(CtrlAddrType)
+    s.read_bank_base = Wire(RegAddrType)
+    s.write_bank_base = Wire(RegAddrType)
+    s.read_addr = Wire(RegAddrType)
+    s.write_addr = Wire(RegAddrType)
+    # CMD_LAUNCH is only accepted when it is not going to swap the bank
+    # of a running kernel.
+    s.launch_rdy = Wire(b1)
+    # The ctrl count/bound configurations of the shadow bank, which are
+    # copied into the active ones when swapped.
+    s.shadow_ctrl_count_per_iter_val = Wire(PCType)
+    s.shadow_ctrl_count_lower_bound = Wire(CtrlAddrType)
+    s.shadow_total_ctrl_steps_val = Wire(TimeType)
+    # Whether the ctrl count/bound configurations apply immediately, i.e.,
+    # without any shadow bank.
+    s.single_bank = Wire(b1)
+    # The ctrl signal written by CMD_CONFIG/CMD_CONFIG_PACKED.
+    s.config_wdata = Wire(CtrlType)
+    s.config_wen = Wire(b1)
+    # The (decoded) ctrl signal stored at the read address, and the one
+    # actually issued, i.e., the default NOP in place of the stored one.
+    s.stored_ctrl = Wire(CtrlType)
+    s.ctrl_rdata = Wire(CtrlType)
+    # Whether each entry is a default NOP, and whether the one at the read
+    # address is.
+    s.default_nop = [Wire(b1) for _ in range(ctrl_mem_size * num_banks)]
+    s.read_default_nop = Wire(b1)
+    # The kernel restarts from `restart_ctrl_addr` upon the bank swap or,
+    # for the streaming, upon CMD_LAUNCH.
+    s.restart = Wire(b1)
+    s.restart_ctrl_addr = Wire(CtrlAddrType)
+    # The ctrl address wraps around within [wrap_lower_bound,
+    # wrap_upper_bound), i.e., the iterated entries, or the whole ring
+    # buffer for the streaming.
+    s.wrap_lower_bound = Wire(CtrlAddrType)
+    s.wrap_upper_bound = Wire(UpperBoundType)
+    # Whether the ctrl signal at the ctrl address is available, i.e., has
+    # been fetched for the streaming.
+    s.ctrl_fetched = Wire(b1)
+    # Whether CMD_CONFIG_CTRL_STORE can be dequeued.
+    s.ctrl_store_wrdy = Wire(b1)
     s.ctrl_count_per_iter_val = Wire(PCType)
     s.ctrl_count_lower_bound = Wire(CtrlAddrType)
     s.ctrl_count_upper_bound = Wire(UpperBoundType)
     s.total_ctrl_steps_val = Wire(TimeType)
-
-    s.prologue_count_reg_fu = [Wire(PrologueCountType) for _ in range(ctrl_mem_size)]
+    # Offset of the next entry to be unpacked from a CMD_CONFIG_PACKED(_OPS)
+    # packet, which is written one entry per cycle.
+    s.packed_entry_offset = Wire(CtrlAddrType)
+    s.packed_entry_last = Wire(b1)
+    s.packed_entry = Wire(b1)
+    # The configuration packet not supported by the streaming, and the one
+    # pending to be reported by CMD_CONFIG_REJECTED.
+    s.reject_config = Wire(b1)
+    s.rejected_val = Wire(b1)
+    s.rejected_cmd = Wire(CmdType)
+    s.rejected_ctrl_addr = Wire(CtrlAddrType)
+
+    s.prologue_count_reg_fu = [Wire(PrologueCountType) for _ in range(ctrl_mem_size * num_banks)]
     s.prologue_count_outport_fu = OutPort(PrologueCountType)
     s.prologue_count_outport_fu_crossbar = \
         [[OutPort(PrologueCountType) for _ in range(num_fu_outports)] for _ in range(ctrl_mem_size)]
@@ -83,51 +261,331 @@ class CtrlMemDynamicRTL(Component):
         [[OutPort(PrologueCountType) for _ in range(num_routing_xbar_inports)] for _ in range(ctrl_mem_size)]
 
     s.prologue_count_reg_fu_crossbar = \
-        [[Wire(PrologueCountType) for _ in range(num_fu_outports)] for _ in range(ctrl_mem_size)]
+        [[Wire(PrologueCountType) for _ in range(num_fu_outports)] for _ in range(ctrl_mem_size * num_banks)]
     s.prologue_count_reg_routing_crossbar = \
-        [[Wire(PrologueCountType) for _ in range(num_routing_xbar_inports)] for _ in range(ctrl_mem_size)]
+        [[Wire(PrologueCountType) for _ in range(num_routing_xbar_inports)] for _ in range(ctrl_mem_size * num_banks)]
 
     # Connections.
     s.recv_pkt_from_controller //= s.recv_pkt_from_controller_queue.recv
     s.recv_from_element //= s.recv_from_element_queue.recv
+    s.reg_file.raddr[0] //= s.read_addr
+    s.single_bank //= int(not double_buffer)
+
+    if has_context_port:
+      s.times_outport //= s.times
+
+      @update
+      def update_prologue_count_fu_ctx_outport():
+        for addr in range(ctrl_mem_size):
+          s.prologue_count_fu_ctx_outport[addr] @= \
+              s.prologue_count_reg_fu[s.read_bank_base + RegAddrType(addr)]
+    else:
+      s.restore = Wire(b1)
+      s.restore_ctrl_addr = Wire(CtrlAddrType)
+      s.restore_times = Wire(TimeType)
+      s.restore_prologue_count_fu = [Wire(PrologueCountType) for _ in range(ctrl_mem_size)]
+      s.restore //= 0
+      s.restore_ctrl_addr //= 0
+      s.restore_times //= 0
+      for addr in range(ctrl_mem_size):
+        s.restore_prologue_count_fu[addr] //= 0
+
+    if double_buffer:
+      s.active_bank = Wire(b1)
+
+      @update
+      def update_bank_base():
+        if s.active_bank:
+          s.read_bank_base @= RegAddrType(ctrl_mem_size)
+          s.write_bank_base @= RegAddrType(0)
+        else:
+          s.read_bank_base @= RegAddrType(0)
+          s.write_bank_base @= RegAddrType(ctrl_mem_size)
+
+      @update
+      def update_launch_rdy():
+        s.launch_rdy @= ~s.start_iterate_ctrl | s.sent_complete
+        s.swap_bank @= s.recv_pkt_from_controller_queue.send.val & \
+                       (s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_LAUNCH) & \
+                       s.launch_rdy
+
+      @update_ff
+      def update_active_bank():
+        if s.reset:
+          s.active_bank <<= 0
+        elif s.swap_bank:
+          s.active_bank <<= ~s.active_bank
+
+      @update_ff
+      def update_shadow_ctrl_count():
+        if s.reset:
+          s.shadow_ctrl_count_per_iter_val <<= PCType(ctrl_count_per_iter)
+          s.shadow_ctrl_count_lower_bound <<= CtrlAddrType(0)
+          s.shadow_total_ctrl_steps_val <<= TimeType(total_ctrl_steps)
+        elif s.recv_pkt_from_controller_queue.send.val:
+          if s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_CONFIG_COUNT_PER_ITER:
+            s.shadow_ctrl_count_per_iter_val <<= trunc(s.recv_pkt_from_controller_queue.send.msg.payload.data.payload, PCType)
+          elif s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_CONFIG_CTRL_LOWER_BOUND:
+            s.shadow_ctrl_count_lower_bound <<= trunc(s.recv_pkt_from_controller_queue.send.msg.payload.data.payload, CtrlAddrType)
+          elif s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_CONFIG_TOTAL_CTRL_COUNT:
+            s.shadow_total_ctrl_steps_val <<= trunc(s.recv_pkt_from_controller_queue.send.msg.payload.data.payload, TimeType)
+
+    else:
+      s.read_bank_base //= 0
+      s.write_bank_base //= 0
+      s.launch_rdy //= 1
+      s.swap_bank //= 0
+      s.shadow_ctrl_count_per_iter_val //= 0
+      s.shadow_ctrl_count_lower_bound //= 0
+      s.shadow_total_ctrl_steps_val //= 0
+
+    if streaming:
+      # The ring buffer holds `num_fetched` ctrl signals from the ctrl
+      # address, the next one being written at `fill_addr`, and the next
+      # one being fetched from `fetch_pc` of the ctrl store.
+      s.fill_addr = Wire(CtrlAddrType)
+      s.num_fetched = Wire(FetchCountType)
+      s.fetch_pc = Wire(StoreAddrType)
+      s.fetch_times = Wire(TimeType)
+      s.fetch_fire = Wire(b1)
+      s.consume = Wire(b1)
+      s.stream_lower_bound = Wire(StoreAddrType)
+      s.stream_upper_bound = Wire(StoreUpperType)
+      s.stream_count_per_iter = Wire(StoreUpperType)
+
+      s.restart_ctrl_addr //= 0
+      s.wrap_lower_bound //= 0
+      s.wrap_upper_bound //= UpperBoundType(ctrl_mem_size)
+      s.reg_file.waddr[0] //= s.fill_addr
+      s.reg_file.wdata[0] //= s.from_ctrl_store_rdata.msg
+      s.reg_file.wen[0] //= s.fetch_fire
+
+      @update
+      def update_ctrl_store():
+        s.restart @= s.recv_pkt_from_controller_queue.send.val & \
+                     (s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_LAUNCH)
+        s.consume @= s.send_ctrl.val & s.send_ctrl.rdy
+        s.ctrl_fetched @= s.num_fetched > FetchCountType(0)
+        s.stream_upper_bound @= zext(s.stream_lower_bound, StoreUpperType) + \
+                                s.stream_count_per_iter
+
+        # Prefetches until the ring buffer is full or all the steps are
+        # fetched.
+        s.to_ctrl_store_raddr.val @= s.start_iterate_ctrl & ~s.sent_complete & \
+                                     (s.num_fetched < FetchCountType(ctrl_mem_size)) & \
+                                     ((s.total_ctrl_steps_val == 0) | \
+                                      (s.fetch_times < s.total_ctrl_steps_val))
+        s.to_ctrl_store_raddr.msg @= s.fetch_pc
+        s.from_ctrl_store_rdata.rdy @= s.to_ctrl_store_raddr.val
+        s.fetch_fire @= s.to_ctrl_store_raddr.val & s.to_ctrl_store_raddr.rdy & \
+                        s.from_ctrl_store_rdata.val
+
+        s.to_ctrl_store_waddr.val @= 0
+        s.to_ctrl_store_wdata.val @= 0
+        s.to_ctrl_store_waddr.msg @= \
+            trunc(s.recv_pkt_from_controller_queue.send.msg.payload.data.payload, StoreAddrType)
+        s.to_ctrl_store_wdata.msg @= s.recv_pkt_from_controller_queue.send.msg.payload.ctrl
+        s.ctrl_store_wrdy @= s.to_ctrl_store_waddr.rdy & s.to_ctrl_store_wdata.rdy
+        if s.recv_pkt_from_controller_queue.send.val & \
+           (s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_CONFIG_CTRL_STORE):
+          s.to_ctrl_store_waddr.val @= s.ctrl_store_wrdy
+          s.to_ctrl_store_wdata.val @= s.ctrl_store_wrdy
+
+      @update_ff
+      def update_fetch():
+        if s.reset | s.restart:
+          s.fill_addr <<= 0
+          s.num_fetched <<= 0
+          s.fetch_pc <<= s.stream_lower_bound
+          s.fetch_times <<= 0
+        else:
+          if s.fetch_fire:
+            if zext(s.fill_addr, FetchCountType) == FetchCountType(ctrl_mem_size - 1):
+              s.fill_addr <<= 0
+            else:
+              s.fill_addr <<= s.fill_addr + CtrlAddrType(1)
+            if zext(s.fetch_pc, StoreUpperType) + StoreUpperType(1) >= s.stream_upper_bound:
+              s.fetch_pc <<= s.stream_lower_bound
+            else:
+              s.fetch_pc <<= s.fetch_pc + StoreAddrType(1)
+            s.fetch_times <<= s.fetch_times + TimeType(1)
+          if s.fetch_fire & ~s.consume:
+            s.num_fetched <<= s.num_fetched + FetchCountType(1)
+          elif ~s.fetch_fire & s.consume:
+            s.num_fetched <<= s.num_fetched - FetchCountType(1)
+
+      @update_ff
+      def update_stream_bound():
+        if s.reset:
+          s.stream_lower_bound <<= 0
+          s.stream_count_per_iter <<= StoreUpperType(ctrl_count_per_iter)
+        elif s.recv_pkt_from_controller_queue.send.val:
+          if s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_CONFIG_CTRL_LOWER_BOUND:
+            s.stream_lower_bound <<= trunc(s.recv_pkt_from_controller_queue.send.msg.payload.data.payload, StoreAddrType)
+          elif s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_CONFIG_COUNT_PER_ITER:
+            s.stream_count_per_iter <<= trunc(s.recv_pkt_from_controller_queue.send.msg.payload.data.payload, StoreUpperType)
+
+    else:
+      s.restart //= s.swap_bank
+      s.restart_ctrl_addr //= s.shadow_ctrl_count_lower_bound
+      s.wrap_lower_bound //= s.ctrl_count_lower_bound
+      s.wrap_upper_bound //= s.ctrl_count_upper_bound
+      s.ctrl_fetched //= 1
+      s.ctrl_store_wrdy //= 1
+      s.reg_file.waddr[0] //= s.write_addr
+      s.reg_file.wen[0] //= s.config_wen
+
+    if streaming:
+      @update
+      def update_reject_config():
+        s.reject_config @= s.recv_pkt_from_controller_queue.send.val & \
+            ((s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_CONFIG) | \
+             (s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_CONFIG_PACKED) | \
+             (s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_CONFIG_PACKED_OPS) | \
+             (s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_CONFIG_DEFAULT_NOP) | \
+             (s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_CONFIG_PROLOGUE_FU) | \
+             (s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_CONFIG_PROLOGUE_FU_PACKED) | \
+             (s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_CONFIG_PROLOGUE_FU_CROSSBAR) | \
+             (s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_CONFIG_PROLOGUE_ROUTING_CROSSBAR))
+
+      # Holds the rejected packet until it is reported to the controller.
+      @update_ff
+      def update_rejected():
+        if s.reset:
+          s.rejected_val <<= 0
+          s.rejected_cmd <<= 0
+          s.rejected_ctrl_addr <<= 0
+        elif s.reject_config & ~s.rejected_val:
+          s.rejected_val <<= 1
+          s.rejected_cmd <<= s.recv_pkt_from_controller_queue.send.msg.payload.cmd
+          s.rejected_ctrl_addr <<= s.recv_pkt_from_controller_queue.send.msg.payload.ctrl_addr
+        elif s.send_pkt_to_controller.val & s.send_pkt_to_controller.rdy & \
+             (s.send_pkt_to_controller.msg.payload.cmd == CMD_CONFIG_REJECTED):
+          s.rejected_val <<= 0
+
+    else:
+      s.reject_config //= 0
+      s.rejected_val //= 0
+      s.rejected_cmd //= 0
+      s.rejected_ctrl_addr //= 0
+
+    if compressed:
+      # Both the encoding and the decoding keep the fields other than the
+      # routing ones as is.
+      for field, FieldType in CompressedCtrlType.__bitstruct_fields__.items():
+        if field == kAttrRoutingIdx:
+          continue
+        if isinstance(FieldType, list):
+          for i in range(len(FieldType)):
+            connect(getattr(s.reg_file.wdata[0], field)[i], getattr(s.config_wdata, field)[i])
+            connect(getattr(s.stored_ctrl, field)[i], getattr(s.reg_file.rdata[0], field)[i])
+        else:
+          connect(getattr(s.reg_file.wdata[0], field), getattr(s.config_wdata, field))
+          connect(getattr(s.stored_ctrl, field), getattr(s.reg_file.rdata[0], field))
+      s.routing_dict.raddr[0] //= s.reg_file.rdata[0].routing_idx
+      for i in range(num_routing_outports):
+        s.stored_ctrl.routing_xbar_outport[i] //= s.routing_dict.rdata[0].routing_xbar_outport[i]
+        s.stored_ctrl.fu_xbar_outport[i] //= s.routing_dict.rdata[0].fu_xbar_outport[i]
+
+      @update
+      def update_routing_dict():
+        s.reg_file.wdata[0].routing_idx @= \
+            trunc(s.recv_pkt_from_controller_queue.send.msg.payload.data.payload, RoutingIdxType)
+        s.routing_dict.waddr[0] @= \
+            trunc(s.recv_pkt_from_controller_queue.send.msg.payload.data.payload, RoutingIdxType)
+        s.routing_dict.wen[0] @= s.recv_pkt_from_controller_queue.send.val & \
+                                 (s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_CONFIG_ROUTING_DICT)
+        for i in range(num_routing_outports):
+          s.routing_dict.wdata[0].routing_xbar_outport[i] @= \
+              s.recv_pkt_from_controller_queue.send.msg.payload.ctrl.routing_xbar_outport[i]
+          s.routing_dict.wdata[0].fu_xbar_outport[i] @= \
+              s.recv_pkt_from_controller_queue.send.msg.payload.ctrl.fu_xbar_outport[i]
+
+    else:
+      s.stored_ctrl //= s.reg_file.rdata[0]
+      if not streaming:
+        s.reg_file.wdata[0] //= s.config_wdata
+
+    if streaming:
+      for i in range(ctrl_mem_size * num_banks):
+        s.default_nop[i] //= 0
+    else:
+      @update_ff
+      def update_default_nop():
+        if s.reset:
+          for i in range(ctrl_mem_size * num_banks):
+            s.default_nop[i] <<= 0
+        elif s.recv_pkt_from_controller_queue.send.val & \
+             (s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_CONFIG_DEFAULT_NOP):
+          for i in range(ctrl_mem_size):
+            if (PackedCountType(i) >= zext(s.recv_pkt_from_controller_queue.send.msg.payload.ctrl_addr, PackedCountType)) & \
+               (PackedCountType(i) < zext(s.recv_pkt_from_controller_queue.send.msg.payload.ctrl_addr, PackedCountType) +
+                                     zext(s.recv_pkt_from_controller_queue.send.msg.payload.data_addr, PackedCountType)):
+              s.default_nop[s.write_bank_base + RegAddrType(i)] <<= 1
+        elif s.config_wen:
+          s.default_nop[s.write_addr] <<= 0
+
+    @update
+    def update_ctrl_rdata():
+      s.read_default_nop @= s.default_nop[s.read_addr]
+      if s.read_default_nop:
+        s.ctrl_rdata @= CtrlType()
+        s.ctrl_rdata.operation @= OPT_NAH
+      else:
+        s.ctrl_rdata @= s.stored_ctrl
+
+    @update
+    def update_bank_addr():
+      s.config_addr @= s.recv_pkt_from_controller_queue.send.msg.payload.ctrl_addr + \
+                       s.packed_entry_offset
+      s.read_addr @= s.read_bank_base + zext(s.ctrl_addr, RegAddrType)
+      s.write_addr @= s.write_bank_base + zext(s.config_addr, RegAddrType)
 
     @update
     def update_msg():
       s.recv_pkt_from_controller_queue.send.rdy @= 0
       s.send_to_element.msg @= CgraPayloadType(0, 0, 0, 0, 0)
       s.send_to_element.val @= 0
-      s.reg_file.wen[0] @= 0
-      s.reg_file.waddr[0] @= s.recv_pkt_from_controller_queue.send.msg.payload.ctrl_addr
+      s.config_wen @= 0
       # Initializes the fields of the control signal.
-      s.reg_file.wdata[0].operation @= 0
+      s.config_wdata.operation @= 0
       for i in range(num_fu_inports):
-        s.reg_file.wdata[0].fu_in[i] @= 0
-        s.reg_file.wdata[0].write_reg_from[i] @= s.recv_pkt_from_controller_queue.send.msg.payload.ctrl.write_reg_from[i]
-        s.reg_file.wdata[0].write_reg_idx[i] @= s.recv_pkt_from_controller_queue.send.msg.payload.ctrl.write_reg_idx[i]
-        s.reg_file.wdata[0].read_reg_towards[i] @= s.recv_pkt_from_controller_queue.send.msg.payload.ctrl.read_reg_towards[i]
-        s.reg_file.wdata[0].read_reg_idx[i] @= s.recv_pkt_from_controller_queue.send.msg.payload.ctrl.read_reg_idx[i]
+        s.config_wdata.fu_in[i] @= 0
+        s.config_wdata.write_reg_from[i] @= s.recv_pkt_from_controller_queue.send.msg.payload.ctrl.write_reg_from[i]
+        s.config_wdata.write_reg_idx[i] @= s.recv_pkt_from_controller_queue.send.msg.payload.ctrl.write_reg_idx[i]
+        s.config_wdata.read_reg_towards[i] @= s.recv_pkt_from_controller_queue.send.msg.payload.ctrl.read_reg_towards[i]
+        s.config_wdata.read_reg_idx[i] @= s.recv_pkt_from_controller_queue.send.msg.payload.ctrl.read_reg_idx[i]
       for i in range(num_routing_outports):
-        s.reg_file.wdata[0].routing_xbar_outport[i] @= 0
-        s.reg_file.wdata[0].fu_xbar_outport[i] @= 0
-      s.reg_file.wdata[0].vector_factor_power @= s.recv_pkt_from_controller_queue.send.msg.payload.ctrl.vector_factor_power
-      s.reg_file.wdata[0].is_last_ctrl @= 0
-
-      if s.recv_pkt_from_controller_queue.send.val & (s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_CONFIG):
-        s.reg_file.wen[0] @= 1
-        s.reg_file.waddr[0] @= s.recv_pkt_from_controller_queue.send.msg.payload.ctrl_addr
+        s.config_wdata.routing_xbar_outport[i] @= 0
+        s.config_wdata.fu_xbar_outport[i] @= 0
+      s.config_wdata.vector_factor_power @= s.recv_pkt_from_controller_queue.send.msg.payload.ctrl.vector_factor_power
+      s.config_wdata.is_last_ctrl @= 0
+
+      if s.recv_pkt_from_controller_queue.send.val & \
+         ((s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_CONFIG) | \
+          s.packed_entry):
+        # The `config_addr` offset stays 0 for CMD_CONFIG and advances
+        # across the consecutive addresses of a CMD_CONFIG_PACKED(_OPS).
+        s.config_wen @= 1
         # Fills the fields of the control signal.
-        s.reg_file.wdata[0].operation @= s.recv_pkt_from_controller_queue.send.msg.payload.ctrl.operation
+        if s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_CONFIG_PACKED_OPS:
+          s.config_wdata.operation @= \
+              trunc(s.recv_pkt_from_controller_queue.send.msg.payload.data.payload >> \
+                    (zext(s.packed_entry_offset, DataPayloadType) * DataPayloadType(OperationType.nbits)),
+                    OperationType)
+        else:
+          s.config_wdata.operation @= s.recv_pkt_from_controller_queue.send.msg.payload.ctrl.operation
         for i in range(num_fu_inports):
-          s.reg_file.wdata[0].fu_in[i] @= s.recv_pkt_from_controller_queue.send.msg.payload.ctrl.fu_in[i]
-          s.reg_file.wdata[0].write_reg_from[i] @= s.recv_pkt_from_controller_queue.send.msg.payload.ctrl.write_reg_from[i]
-          s.reg_file.wdata[0].write_reg_idx[i] @= s.recv_pkt_from_controller_queue.send.msg.payload.ctrl.write_reg_idx[i]
-          s.reg_file.wdata[0].read_reg_towards[i] @= s.recv_pkt_from_controller_queue.send.msg.payload.ctrl.read_reg_towards[i]
-          s.reg_file.wdata[0].read_reg_idx[i] @= s.recv_pkt_from_controller_queue.send.msg.payload.ctrl.read_reg_idx[i]
+          s.config_wdata.fu_in[i] @= s.recv_pkt_from_controller_queue.send.msg.payload.ctrl.fu_in[i]
+          s.config_wdata.write_reg_from[i] @= s.recv_pkt_from_controller_queue.send.msg.payload.ctrl.write_reg_from[i]
+          s.config_wdata.write_reg_idx[i] @= s.recv_pkt_from_controller_queue.send.msg.payload.ctrl.write_reg_idx[i]
+          s.config_wdata.read_reg_towards[i] @= s.recv_pkt_from_controller_queue.send.msg.payload.ctrl.read_reg_towards[i]
+          s.config_wdata.read_reg_idx[i] @= s.recv_pkt_from_controller_queue.send.msg.payload.ctrl.read_reg_idx[i]
         for i in range(num_routing_outports):
-          s.reg_file.wdata[0].routing_xbar_outport[i] @= s.recv_pkt_from_controller_queue.send.msg.payload.ctrl.routing_xbar_outport[i]
-          s.reg_file.wdata[0].fu_xbar_outport[i] @= s.recv_pkt_from_controller_queue.send.msg.payload.ctrl.fu_xbar_outport[i]
-        s.reg_file.wdata[0].vector_factor_power @= s.recv_pkt_from_controller_queue.send.msg.payload.ctrl.vector_factor_power
-        s.reg_file.wdata[0].is_last_ctrl @= s.recv_pkt_from_controller_queue.send.msg.payload.ctrl.is_last_ctrl
+          s.config_wdata.routing_xbar_outport[i] @= s.recv_pkt_from_controller_queue.send.msg.payload.ctrl.routing_xbar_outport[i]
+          s.config_wdata.fu_xbar_outport[i] @= s.recv_pkt_from_controller_queue.send.msg.payload.ctrl.fu_xbar_outport[i]
+        s.config_wdata.vector_factor_power @= s.recv_pkt_from_controller_queue.send.msg.payload.ctrl.vector_factor_power
+        s.config_wdata.is_last_ctrl @= s.recv_pkt_from_controller_queue.send.msg.payload.ctrl.is_last_ctrl
       elif s.recv_pkt_from_controller_queue.send.val & \
            ((s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_GLOBAL_REDUCE_ADD_RESPONSE) | \
             (s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_GLOBAL_REDUCE_MUL_RESPONSE) | \
@@ -139,11 +597,13 @@ class CtrlMemDynamicRTL(Component):
         s.send_to_element.msg @= s.recv_pkt_from_controller_queue.send.msg.payload
         s.send_to_element.val @= 1
 
-      if (s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_CONFIG) | \
+      # Only dequeues the rejected packet once the earlier one is reported.
+      if s.reject_config:
+        s.recv_pkt_from_controller_queue.send.rdy @= ~s.rejected_val
+      elif (s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_CONFIG) | \
          (s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_CONFIG_PROLOGUE_FU) | \
          (s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_CONFIG_PROLOGUE_FU_CROSSBAR) | \
          (s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_CONFIG_PROLOGUE_ROUTING_CROSSBAR) | \
-         (s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_LAUNCH) | \
          (s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_TERMINATE) | \
          (s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_PAUSE) | \
          (s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_PRESERVE) | \
@@ -161,22 +621,61 @@ class CtrlMemDynamicRTL(Component):
          (s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_CONFIG_LOOP_UPPER) | \
          (s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_CONFIG_LOOP_STEP) | \
          (s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_UPDATE_COUNTER_SHADOW_VALUE) | \
-         (s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_RESET_LEAF_COUNTER):
+         (s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_RESET_LEAF_COUNTER) | \
+         (s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_CONFIG_PROLOGUE_FU_PACKED) | \
+         (s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_CONFIG_ROUTING_DICT) | \
+         (s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_CONFIG_DEFAULT_NOP):
         s.recv_pkt_from_controller_queue.send.rdy @= 1
+      # Only dequeues the packed packet once its last entry is written.
+      elif s.packed_entry:
+        s.recv_pkt_from_controller_queue.send.rdy @= s.packed_entry_last
+      # Waits for the running kernel to complete before swapping banks.
+      elif s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_LAUNCH:
+        s.recv_pkt_from_controller_queue.send.rdy @= s.launch_rdy
+      # Dropped unless the ctrl store is present.
+      elif s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_CONFIG_CTRL_STORE:
+        s.recv_pkt_from_controller_queue.send.rdy @= s.ctrl_store_wrdy
       # TODO: Extend for the other commands. Maybe another queue to
       # handle complicated actions.
       # else:
 
+    @update
+    def update_packed_entry_last():
+      s.packed_entry @= \
+          ((s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_CONFIG_PACKED) | \
+           (s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_CONFIG_PACKED_OPS)) & \
+          ~s.reject_config
+      s.packed_entry_last @= \
+          (zext(s.packed_entry_offset, PackedCountType) + PackedCountType(1)) >= \
+          zext(s.recv_pkt_from_controller_queue.send.msg.payload.data_addr, PackedCountType)
+
+    @update_ff
+    def update_packed_entry_offset():
+      if s.reset:
+        s.packed_entry_offset <<= 0
+      elif s.recv_pkt_from_controller_queue.send.val & s.packed_entry:
+        if s.packed_entry_last:
+          s.packed_entry_offset <<= 0
+        else:
+          s.packed_entry_offset <<= s.packed_entry_offset + CtrlAddrType(1)
+
     @update
     def update_ctrl_addr_outport():
-      s.ctrl_addr_outport @= s.reg_file.raddr[0]
+      s.ctrl_addr_outport @= s.ctrl_addr
 
     @update
     def update_send_pkt_to_controller():
       s.send_pkt_to_controller.val @= 0
       s.send_pkt_to_controller.msg @= IntraCgraPktType(0, num_tiles, 0, 0, 0, 0, 0, 0, 0, 0, CgraPayloadType(CMD_COMPLETE, 0, 0, 0, 0))
       s.recv_from_element_queue.send.rdy @= 0
-      if s.start_iterate_ctrl == b1(1):
+      if s.rejected_val:
+        s.send_pkt_to_controller.msg @= \
+            IntraCgraPktType(s.tile_id, num_tiles, 0, 0, 0, 0, 0, 0, 0, 0, CgraPayloadType(CMD_CONFIG_REJECTED, 0, 0, 0, 0))
+        s.send_pkt_to_controller.msg.payload.data.payload @= zext(s.rejected_cmd, DataPayloadType)
+        s.send_pkt_to_controller.msg.payload.data.predicate @= 1
+        s.send_pkt_to_controller.msg.payload.ctrl_addr @= s.rejected_ctrl_addr
+        s.send_pkt_to_controller.val @= 1
+      elif s.start_iterate_ctrl == b1(1):
         if s.recv_from_element_queue.send.val & (~s.sent_complete):
           s.send_pkt_to_controller.msg @= \
               IntraCgraPktType(s.tile_id, num_tiles, 0, 0, 0, 0, 0, 0, 0, 0,
@@ -184,7 +683,7 @@ class CtrlMemDynamicRTL(Component):
           s.send_pkt_to_controller.val @= 1
           s.recv_from_element_queue.send.rdy @= s.send_pkt_to_controller.rdy
         elif ((s.total_ctrl_steps_val > 0) & (s.times == s.total_ctrl_steps_val)) | \
-           (s.reg_file.rdata[0].operation == OPT_START):
+           (s.ctrl_rdata.operation == OPT_START):
           # Sends COMPLETE signal to Controller when the last ctrl signal is done.
           if ~s.sent_complete & (s.total_ctrl_steps_val > 0) & (s.times == s.total_ctrl_steps_val) & s.start_iterate_ctrl:
             s.send_pkt_to_controller.msg @= \
@@ -198,10 +697,10 @@ class CtrlMemDynamicRTL(Component):
         if s.sent_complete:
           s.send_ctrl.val @= 0
         elif ((s.total_ctrl_steps_val > 0) & (s.times == s.total_ctrl_steps_val)) | \
-           (s.reg_file.rdata[0].operation == OPT_START):
+           (s.ctrl_rdata.operation == OPT_START):
           s.send_ctrl.val @= b1(0)
         else:
-          s.send_ctrl.val @= 1
+          s.send_ctrl.val @= s.ctrl_fetched
       if s.recv_pkt_from_controller_queue.send.val & \
           (s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_TERMINATE):
         s.send_ctrl.val @= b1(0)
@@ -209,22 +708,61 @@ class CtrlMemDynamicRTL(Component):
     @update
     def update_send_ctrl_msg():
       for i in range(num_fu_inports):
-        s.send_ctrl.msg.fu_in[i]            @= s.reg_file.rdata[0].fu_in[i]
-        s.send_ctrl.msg.write_reg_from[i]   @= s.reg_file.rdata[0].write_reg_from[i]
-        s.send_ctrl.msg.write_reg_idx[i]    @= s.reg_file.rdata[0].write_reg_idx[i]
-        s.send_ctrl.msg.read_reg_towards[i] @= s.reg_file.rdata[0].read_reg_towards[i]
-        s.send_ctrl.msg.read_reg_idx[i]     @= s.reg_file.rdata[0].read_reg_idx[i]
+        s.send_ctrl.msg.fu_in[i]            @= s.ctrl_rdata.fu_in[i]
+        s.send_ctrl.msg.write_reg_from[i]   @= s.ctrl_rdata.write_reg_from[i]
+        s.send_ctrl.msg.write_reg_idx[i]    @= s.ctrl_rdata.write_reg_idx[i]
+        s.send_ctrl.msg.read_reg_towards[i] @= s.ctrl_rdata.read_reg_towards[i]
+        s.send_ctrl.msg.read_reg_idx[i]     @= s.ctrl_rdata.read_reg_idx[i]
       for i in range(num_routing_outports):
-        s.send_ctrl.msg.routing_xbar_outport[i] @= s.reg_file.rdata[0].routing_xbar_outport[i]
-        s.send_ctrl.msg.fu_xbar_outport[i]      @= s.reg_file.rdata[0].fu_xbar_outport[i]
-      s.send_ctrl.msg.vector_factor_power @= s.reg_file.rdata[0].vector_factor_power
-      s.send_ctrl.msg.is_last_ctrl        @= s.reg_file.rdata[0].is_last_ctrl
+        s.send_ctrl.msg.routing_xbar_outport[i] @= s.ctrl_rdata.routing_xbar_outport[i]
+        s.send_ctrl.msg.fu_xbar_outport[i]      @= s.ctrl_rdata.fu_xbar_outport[i]
+      s.send_ctrl.msg.vector_factor_power @= s.ctrl_rdata.vector_factor_power
+      s.send_ctrl.msg.is_last_ctrl        @= s.ctrl_rdata.is_last_ctrl
       # Sets each FU's op code as NAH when prologue execution has not completed.
       # As FU is supposed to do nothing during prologue.
       if s.prologue_count_outport_fu != 0:
         s.send_ctrl.msg.operation @= OPT_NAH
       else:
-        s.send_ctrl.msg.operation @= s.reg_file.rdata[0].operation
+        s.send_ctrl.msg.operation @= s.ctrl_rdata.operation
+
+    # The second operation of the dual-issue ctrl signals follows the
+    # first one, i.e., it is written along with the other fields and
+    # replaced by NAH during the prologue.
+    if dual_issue:
+      @update
+      def update_second_issue_msg():
+        s.config_wdata.second_operation @= 0
+        for i in range(num_fu_inports):
+          s.config_wdata.second_fu_in[i] @= 0
+        if s.recv_pkt_from_controller_queue.send.val & \
+           ((s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_CONFIG) | \
+            s.packed_entry):
+          s.config_wdata.second_operation @= s.recv_pkt_from_controller_queue.send.msg.payload.ctrl.second_operation
+          for i in range(num_fu_inports):
+            s.config_wdata.second_fu_in[i] @= s.recv_pkt_from_controller_queue.send.msg.payload.ctrl.second_fu_in[i]
+
+        for i in range(num_fu_inports):
+          s.send_ctrl.msg.second_fu_in[i] @= s.ctrl_rdata.second_fu_in[i]
+        if s.prologue_count_outport_fu != 0:
+          s.send_ctrl.msg.second_operation @= OPT_NAH
+        else:
+          s.send_ctrl.msg.second_operation @= s.ctrl_rdata.second_operation
+
+    # The bypass selection is written along with the other fields, and
+    # kept during the prologue, as the FU does nothing then anyway.
+    if fu_bypass:
+      @update
+      def update_fu_in_bypass_msg():
+        for i in range(num_fu_inports):
+          s.config_wdata.fu_in_bypass[i] @= 0
+        if s.recv_pkt_from_controller_queue.send.val & \
+           ((s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_CONFIG) | \
+            s.packed_entry):
+          for i in range(num_fu_inports):
+            s.config_wdata.fu_in_bypass[i] @= s.recv_pkt_from_controller_queue.send.msg.payload.ctrl.fu_in_bypass[i]
+
+        for i in range(num_fu_inports):
+          s.send_ctrl.msg.fu_in_bypass[i] @= s.ctrl_rdata.fu_in_bypass[i]
 
     @update_ff
     def update_whether_we_can_iterate_ctrl():
@@ -232,7 +770,7 @@ class CtrlMemDynamicRTL(Component):
         s.start_iterate_ctrl <<= 0
       else:
         if s.recv_pkt_from_controller_queue.send.val:
-          if (s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_LAUNCH) | \
+          if ((s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_LAUNCH) & s.launch_rdy) | \
                   (s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_RESUME):
             s.start_iterate_ctrl <<= 1
     # TODO: issue #191, stop iterate ctrl after 10 cycels during pausing status, 
@@ -249,7 +787,7 @@ class CtrlMemDynamicRTL(Component):
            s.send_pkt_to_controller.rdy & \
            (s.send_pkt_to_controller.msg.payload.cmd == CMD_COMPLETE):
           s.sent_complete <<= 1
-        elif s.recv_pkt_from_controller_queue.send.val & ( (s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_LAUNCH) | \
+        elif s.recv_pkt_from_controller_queue.send.val & ( ((s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_LAUNCH) & s.launch_rdy) | \
                 (s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_RESUME) ):
           s.sent_complete <<= 0
 
@@ -257,19 +795,41 @@ class CtrlMemDynamicRTL(Component):
     def update_raddr_and_fu_prologue():
       if s.reset:
         s.times <<= 0
-        s.reg_file.raddr[0] <<= 0
-        for i in range(ctrl_mem_size):
+        s.ctrl_addr <<= 0
+        for i in range(ctrl_mem_size * num_banks):
           s.prologue_count_reg_fu[i] <<= 0
-      elif s.recv_pkt_from_controller_queue.send.val & (s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_CONFIG_CTRL_LOWER_BOUND):
-        s.reg_file.raddr[0] <<= trunc(s.recv_pkt_from_controller_queue.send.msg.payload.data.payload, CtrlAddrType)
+      # The kernel of the swapped-in bank (or the streamed kernel) starts
+      # from its first step.
+      elif s.restart:
+        s.times <<= TimeType(0)
+        s.ctrl_addr <<= s.restart_ctrl_addr
+      elif s.restore:
+        s.times <<= s.restore_times
+        s.ctrl_addr <<= s.restore_ctrl_addr
+        for addr in range(ctrl_mem_size):
+          s.prologue_count_reg_fu[s.read_bank_base + RegAddrType(addr)] <<= \
+              s.restore_prologue_count_fu[addr]
+      elif s.single_bank & s.recv_pkt_from_controller_queue.send.val & (s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_CONFIG_CTRL_LOWER_BOUND):
+        s.ctrl_addr <<= trunc(s.recv_pkt_from_controller_queue.send.msg.payload.data.payload, CtrlAddrType)
       elif s.recv_pkt_from_controller_queue.send.val & (s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_TERMINATE):
         s.times <<= TimeType(0)
       else:
         if s.recv_pkt_from_controller_queue.send.val & \
            (s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_CONFIG_PROLOGUE_FU):
-          s.prologue_count_reg_fu[s.recv_pkt_from_controller_queue.send.msg.payload.ctrl_addr] <<= \
+          s.prologue_count_reg_fu[s.write_addr] <<= \
               trunc(s.recv_pkt_from_controller_queue.send.msg.payload.data.payload, PrologueCountType)
 
+        # Unpacks the prologue counts of consecutive ctrl addresses, the
+        # i-th count being located at the i-th slice of the data payload.
+        if s.recv_pkt_from_controller_queue.send.val & \
+           (s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_CONFIG_PROLOGUE_FU_PACKED):
+          for i in range(num_packed_prologue_counts):
+            if (PackedCountType(i) < zext(s.recv_pkt_from_controller_queue.send.msg.payload.data_addr, PackedCountType)) & \
+               ((zext(s.recv_pkt_from_controller_queue.send.msg.payload.ctrl_addr, PackedCountType) + PackedCountType(i)) < PackedCountType(ctrl_mem_size)):
+              s.prologue_count_reg_fu[s.write_addr + RegAddrType(i)] <<= \
+                  trunc(s.recv_pkt_from_controller_queue.send.msg.payload.data.payload >> (i * prologue_count_nbits),
+                        PrologueCountType)
+
         if s.start_iterate_ctrl == b1(1):
           if ((s.total_ctrl_steps_val == 0) | \
               (s.times < s.total_ctrl_steps_val)) & \
@@ -278,28 +838,38 @@ class CtrlMemDynamicRTL(Component):
 
           # Reads the next ctrl signal only when the current one is done.
           if s.send_ctrl.rdy & s.send_ctrl.val:
-            if zext(s.reg_file.raddr[0], UpperBoundType) == s.ctrl_count_upper_bound - UpperBoundType(1):
-              s.reg_file.raddr[0] <<= s.ctrl_count_lower_bound
+            if zext(s.ctrl_addr, UpperBoundType) == s.wrap_upper_bound - UpperBoundType(1):
+              s.ctrl_addr <<= s.wrap_lower_bound
             else:
-              s.reg_file.raddr[0] <<= s.reg_file.raddr[0] + CtrlAddrType(1)
-            if s.prologue_count_reg_fu[s.reg_file.raddr[0]] > 0:
-              s.prologue_count_reg_fu[s.reg_file.raddr[0]] <<= s.prologue_count_reg_fu[s.reg_file.raddr[0]] - 1
-
-    @update
-    def update_prologue_outport():
-      s.prologue_count_outport_fu @= s.prologue_count_reg_fu[s.reg_file.raddr[0]]
+              s.ctrl_addr <<= s.ctrl_addr + CtrlAddrType(1)
+            if s.prologue_count_reg_fu[s.read_addr] > 0:
+              s.prologue_count_reg_fu[s.read_addr] <<= s.prologue_count_reg_fu[s.read_addr] - 1
+
+    # There is no prologue while streaming, the prologue counts being
+    # rejected.
+    if streaming:
+      s.prologue_count_outport_fu //= 0
       for addr in range(ctrl_mem_size):
         for i in range(num_routing_xbar_inports):
-          s.prologue_count_outport_routing_crossbar[addr][i] @= \
-              s.prologue_count_reg_routing_crossbar[addr][i]
+          s.prologue_count_outport_routing_crossbar[addr][i] //= 0
         for i in range(num_fu_outports):
-          s.prologue_count_outport_fu_crossbar[addr][i] @= \
-              s.prologue_count_reg_fu_crossbar[addr][i]
+          s.prologue_count_outport_fu_crossbar[addr][i] //= 0
+    else:
+      @update
+      def update_prologue_outport():
+        s.prologue_count_outport_fu @= s.prologue_count_reg_fu[s.read_addr]
+        for addr in range(ctrl_mem_size):
+          for i in range(num_routing_xbar_inports):
+            s.prologue_count_outport_routing_crossbar[addr][i] @= \
+                s.prologue_count_reg_routing_crossbar[s.read_bank_base + RegAddrType(addr)][i]
+          for i in range(num_fu_outports):
+            s.prologue_count_outport_fu_crossbar[addr][i] @= \
+                s.prologue_count_reg_fu_crossbar[s.read_bank_base + RegAddrType(addr)][i]
 
     @update_ff
     def update_prologue_reg():
       if s.reset:
-        for addr in range(ctrl_mem_size):
+        for addr in range(ctrl_mem_size * num_banks):
           for i in range(num_routing_xbar_inports):
             s.prologue_count_reg_routing_crossbar[addr][i] <<= 0
           for i in range(num_fu_outports):
@@ -307,38 +877,52 @@ class CtrlMemDynamicRTL(Component):
       else:
         if s.recv_pkt_from_controller_queue.send.val & \
            (s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_CONFIG_PROLOGUE_ROUTING_CROSSBAR):
-          temp_routing_crossbar_in = s.recv_pkt_from_controller_queue.send.msg.payload.ctrl.routing_xbar_outport[0]
-          # Subtract 1 to convert from TileInType(1-8) to array index (0-7), consistent with normal crossbar routing
-          if temp_routing_crossbar_in > 0:
-            s.prologue_count_reg_routing_crossbar[s.recv_pkt_from_controller_queue.send.msg.payload.ctrl_addr][trunc(temp_routing_crossbar_in - 1, TileInPortType)] <<= trunc(s.recv_pkt_from_controller_queue.send.msg.payload.data.payload, PrologueCountType)
+          # Each non-zero slot carries a routing crossbar inport sharing the
+          # same prologue count.
+          for j in range(num_routing_outports):
+            temp_routing_crossbar_in = s.recv_pkt_from_controller_queue.send.msg.payload.ctrl.routing_xbar_outport[j]
+            # Subtract 1 to convert from TileInType(1-8) to array index (0-7), consistent with normal crossbar routing
+            if temp_routing_crossbar_in > 0:
+              s.prologue_count_reg_routing_crossbar[s.write_addr][trunc(temp_routing_crossbar_in - 1, TileInPortType)] <<= trunc(s.recv_pkt_from_controller_queue.send.msg.payload.data.payload, PrologueCountType)
         elif s.recv_pkt_from_controller_queue.send.val & \
            (s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_CONFIG_PROLOGUE_FU_CROSSBAR):
           temp_fu_crossbar_in = s.recv_pkt_from_controller_queue.send.msg.payload.ctrl.fu_xbar_outport[0]
-          s.prologue_count_reg_fu_crossbar[s.recv_pkt_from_controller_queue.send.msg.payload.ctrl_addr][trunc(temp_fu_crossbar_in, FuOutPortType)] <<= trunc(s.recv_pkt_from_controller_queue.send.msg.payload.data.payload, PrologueCountType)
+          s.prologue_count_reg_fu_crossbar[s.write_addr][trunc(temp_fu_crossbar_in, FuOutPortType)] <<= trunc(s.recv_pkt_from_controller_queue.send.msg.payload.data.payload, PrologueCountType)
 
     @update_ff
     def update_ctrl_count_per_iter():
       if s.reset:
         s.ctrl_count_per_iter_val <<= PCType(ctrl_count_per_iter)
-      elif s.recv_pkt_from_controller_queue.send.val & (s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_CONFIG_COUNT_PER_ITER):
+      elif s.swap_bank:
+        s.ctrl_count_per_iter_val <<= s.shadow_ctrl_count_per_iter_val
+      elif s.single_bank & s.recv_pkt_from_controller_queue.send.val & (s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_CONFIG_COUNT_PER_ITER):
         s.ctrl_count_per_iter_val <<= trunc(s.recv_pkt_from_controller_queue.send.msg.payload.data.payload, PCType)
 
     @update_ff
     def update_lower_bound():
       if s.reset:
         s.ctrl_count_lower_bound <<= CtrlAddrType(0)
-      elif s.recv_pkt_from_controller_queue.send.val & (s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_CONFIG_CTRL_LOWER_BOUND):
+      elif s.swap_bank:
+        s.ctrl_count_lower_bound <<= s.shadow_ctrl_count_lower_bound
+      elif s.single_bank & s.recv_pkt_from_controller_queue.send.val & (s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_CONFIG_CTRL_LOWER_BOUND):
         s.ctrl_count_lower_bound <<= trunc(s.recv_pkt_from_controller_queue.send.msg.payload.data.payload, CtrlAddrType)
 
-    @update
-    def update_upper_bound():
-      s.ctrl_count_upper_bound @= zext(s.ctrl_count_lower_bound, UpperBoundType) + zext(s.ctrl_count_per_iter_val, UpperBoundType)
+    # The iterated entries are bounded within the ctrl store instead for
+    # the streaming.
+    if streaming:
+      s.ctrl_count_upper_bound //= 0
+    else:
+      @update
+      def update_upper_bound():
+        s.ctrl_count_upper_bound @= zext(s.ctrl_count_lower_bound, UpperBoundType) + zext(s.ctrl_count_per_iter_val, UpperBoundType)
 
     @update_ff
     def update_total_ctrl_steps():
       if s.reset:
         s.total_ctrl_steps_val <<= TimeType(total_ctrl_steps)
-      elif s.recv_pkt_from_controller_queue.send.val & (s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_CONFIG_TOTAL_CTRL_COUNT):
+      elif s.swap_bank:
+        s.total_ctrl_steps_val <<= s.shadow_total_ctrl_steps_val
+      elif s.single_bank & s.recv_pkt_from_controller_queue.send.val & (s.recv_pkt_from_controller_queue.send.msg.payload.cmd == CMD_CONFIG_TOTAL_CTRL_COUNT):
         s.total_ctrl_steps_val <<= trunc(s.recv_pkt_from_controller_queue.send.msg.payload.data.payload, TimeType)
 
   def line_trace(s):
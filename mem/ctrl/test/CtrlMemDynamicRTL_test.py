@@ -15,6 +15,8 @@ from ....lib.basic.val_rdy.SourceRTL import SourceRTL as TestSrcRTL
 from ....lib.cmd_type import *
 from ....lib.messages import *
 from ....lib.opt_type import *
+from ....lib.util.config_helper import compress_config_pkts, elide_config_pkts, pack_config_pkts
+from ....mem.data.DataMemRTL import DataMemRTL
 
 #-------------------------------------------------------------------------
 # Test harness
@@ -26,7 +28,8 @@ class TestHarness(Component):
                 num_tile_inports, num_tile_outports, src0_msgs,
                 src1_msgs, ctrl_pkts, sink_msgs, num_tiles,
                 complete_signal_sink_out, ctrl_count_per_iter,
-                total_ctrl_steps_val, FuType):
+                total_ctrl_steps_val, FuType, double_buffer = False,
+                ctrl_store_size = 0, routing_dict_size = 0):
 
     CgraPayloadType = CtrlPktType.get_field_type(kAttrPayload)
     CtrlSignalType = CgraPayloadType.get_field_type(kAttrCtrl)
@@ -41,7 +44,14 @@ class TestHarness(Component):
     s.ctrl_mem = MemUnit(CtrlPktType,
                          ctrl_mem_size, num_fu_inports, num_fu_outports,
                          num_tile_inports, num_tile_outports, 1, num_tiles,
-                         ctrl_count_per_iter, total_ctrl_steps_val)
+                         ctrl_count_per_iter, total_ctrl_steps_val,
+                         double_buffer, ctrl_store_size, routing_dict_size)
+    if ctrl_store_size > 0:
+      s.ctrl_store = DataMemRTL(CtrlSignalType, ctrl_store_size)
+      s.ctrl_mem.to_ctrl_store_raddr //= s.ctrl_store.recv_raddr[0]
+      s.ctrl_mem.from_ctrl_store_rdata //= s.ctrl_store.send_rdata[0]
+      s.ctrl_mem.to_ctrl_store_waddr //= s.ctrl_store.recv_waddr[0]
+      s.ctrl_mem.to_ctrl_store_wdata //= s.ctrl_store.recv_wdata[0]
 
     # Connections.
     s.fu.send_to_ctrl_mem //= s.ctrl_mem.recv_from_element
@@ -156,6 +166,419 @@ def test_ctrl():
                    AdderRTL)
   run_sim(th)
 
+def test_packed_config():
+  MemUnit = CtrlMemDynamicRTL
+  data_nbits = 16
+  DataType = mk_data(data_nbits, 1)
+  ctrl_mem_size = 16
+  num_fu_inports = 2
+  num_fu_outports = 2
+  num_tile_inports = 4
+  num_tile_outports = 4
+  num_tiles = 4
+
+  data_mem_size_global = 16
+  addr_nbits = clog2(data_mem_size_global)
+  DataAddrType = mk_bits(addr_nbits)
+  num_registers_per_reg_bank = 16
+  num_cgra_columns = 1
+  num_cgra_rows = 1
+
+  ctrl_count_per_iter = 4
+  total_ctrl_steps_val = 4
+
+  CtrlAddrType = mk_bits(clog2(ctrl_mem_size))
+
+  CtrlType = mk_ctrl(num_fu_inports,
+                     num_fu_outports,
+                     num_tile_inports,
+                     num_tile_outports,
+                     num_registers_per_reg_bank)
+
+  CgraPayloadType = mk_cgra_payload(DataType,
+                                    DataAddrType,
+                                    CtrlType,
+                                    CtrlAddrType)
+
+  IntraCgraPktType = mk_intra_cgra_pkt(num_cgra_columns,
+                                       num_cgra_rows,
+                                       num_tiles,
+                                       CgraPayloadType)
+
+  FuInType = mk_bits(clog2(num_fu_inports + 1))
+  pick_register = [FuInType(x + 1) for x in range(num_fu_inports)]
+  src_data0 = [DataType(1, 1), DataType(5, 1), DataType(7, 1), DataType(6, 1)]
+  src_data1 = [DataType(6, 1), DataType(1, 1), DataType(2, 1), DataType(3, 1)]
+                                 # src dst src/dst x/y       opq vc ctrl_action ctrl_addr ctrl_operation ctrl_predicate ctrl_fu_in...
+  src_ctrl_pkt = [IntraCgraPktType(0,  1,  0, 0, 0, 0, 0, 0, 0,  0, CgraPayloadType(CMD_CONFIG, ctrl = CtrlType(OPT_ADD, pick_register), ctrl_addr = 0)),
+                  IntraCgraPktType(0,  1,  0, 0, 0, 0, 0, 0, 0,  0, CgraPayloadType(CMD_CONFIG, ctrl = CtrlType(OPT_SUB, pick_register), ctrl_addr = 1)),
+                  IntraCgraPktType(0,  1,  0, 0, 0, 0, 0, 0, 0,  0, CgraPayloadType(CMD_CONFIG, ctrl = CtrlType(OPT_SUB, pick_register), ctrl_addr = 2)),
+                  IntraCgraPktType(0,  1,  0, 0, 0, 0, 0, 0, 0,  0, CgraPayloadType(CMD_CONFIG, ctrl = CtrlType(OPT_ADD, pick_register), ctrl_addr = 3)),
+                  # Prologue counts of the ctrl signals that are not launched,
+                  # so that they are still observable once the kernel completes.
+                  IntraCgraPktType(0,  1,  0, 0, 0, 0, 0, 0, 0,  0, CgraPayloadType(CMD_CONFIG_PROLOGUE_FU, data = DataType(1, 1), ctrl_addr = 8)),
+                  IntraCgraPktType(0,  1,  0, 0, 0, 0, 0, 0, 0,  0, CgraPayloadType(CMD_CONFIG_PROLOGUE_FU, data = DataType(2, 1), ctrl_addr = 9)),
+                  IntraCgraPktType(0,  1,  0, 0, 0, 0, 0, 0, 0,  0, CgraPayloadType(CMD_CONFIG_PROLOGUE_FU, data = DataType(3, 1), ctrl_addr = 10)),
+                  IntraCgraPktType(0,  1,  0, 0, 0, 0, 0, 0, 0,  0, CgraPayloadType(CMD_LAUNCH, ctrl = CtrlType(OPT_NAH, pick_register), ctrl_addr = 0))]
+
+  # The two OPT_SUB ctrl signals are merged into a single CMD_CONFIG_PACKED,
+  # and the three prologue counts into a single CMD_CONFIG_PROLOGUE_FU_PACKED.
+  packed_ctrl_pkt = pack_config_pkts(src_ctrl_pkt, IntraCgraPktType,
+                                     pack_operations = False)
+  assert len(packed_ctrl_pkt) == 5
+  assert packed_ctrl_pkt[1].payload.cmd == CMD_CONFIG_PACKED
+  assert packed_ctrl_pkt[1].payload.data_addr == 2
+  assert packed_ctrl_pkt[3].payload.cmd == CMD_CONFIG_PROLOGUE_FU_PACKED
+  assert packed_ctrl_pkt[3].payload.data_addr == 3
+
+  sink_out = [DataType(7, 1), DataType(4, 1), DataType(5, 1), DataType(9, 1)]
+  complete_signal_sink_out = [
+      IntraCgraPktType(0,  num_tiles,  0, 0, 0, 0, 0, 0, 0,  0, CgraPayloadType(CMD_COMPLETE))]
+
+  th = TestHarness(MemUnit,
+                   IntraCgraPktType,
+                   ctrl_mem_size,
+                   data_mem_size_global,
+                   num_fu_inports,
+                   num_fu_outports,
+                   num_tile_inports,
+                   num_tile_outports,
+                   src_data0,
+                   src_data1,
+                   packed_ctrl_pkt,
+                   sink_out,
+                   num_tiles,
+                   complete_signal_sink_out,
+                   ctrl_count_per_iter,
+                   total_ctrl_steps_val,
+                   AdderRTL)
+  run_sim(th)
+
+  assert th.ctrl_mem.prologue_count_reg_fu[8] == 1
+  assert th.ctrl_mem.prologue_count_reg_fu[9] == 2
+  assert th.ctrl_mem.prologue_count_reg_fu[10] == 3
+
+def test_packed_operations():
+  MemUnit = CtrlMemDynamicRTL
+  data_nbits = 16
+  DataType = mk_data(data_nbits, 1)
+  ctrl_mem_size = 16
+  num_fu_inports = 2
+  num_fu_outports = 2
+  num_tile_inports = 4
+  num_tile_outports = 4
+  num_tiles = 4
+
+  data_mem_size_global = 16
+  addr_nbits = clog2(data_mem_size_global)
+  DataAddrType = mk_bits(addr_nbits)
+  num_registers_per_reg_bank = 16
+  num_cgra_columns = 1
+  num_cgra_rows = 1
+
+  ctrl_count_per_iter = 4
+  total_ctrl_steps_val = 4
+
+  CtrlAddrType = mk_bits(clog2(ctrl_mem_size))
+
+  CtrlType = mk_ctrl(num_fu_inports,
+                     num_fu_outports,
+                     num_tile_inports,
+                     num_tile_outports,
+                     num_registers_per_reg_bank)
+
+  CgraPayloadType = mk_cgra_payload(DataType,
+                                    DataAddrType,
+                                    CtrlType,
+                                    CtrlAddrType)
+
+  IntraCgraPktType = mk_intra_cgra_pkt(num_cgra_columns,
+                                       num_cgra_rows,
+                                       num_tiles,
+                                       CgraPayloadType)
+
+  TileInType = mk_bits(clog2(num_tile_inports + num_fu_inports + 1))
+  FuInType = mk_bits(clog2(num_fu_inports + 1))
+  pick_register = [FuInType(x + 1) for x in range(num_fu_inports)]
+  src_data0 = [DataType(1, 1), DataType(5, 1), DataType(7, 1), DataType(6, 1)]
+  src_data1 = [DataType(6, 1), DataType(1, 1), DataType(2, 1), DataType(3, 1)]
+                                 # src dst src/dst x/y       opq vc ctrl_action ctrl_addr ctrl_operation ctrl_predicate ctrl_fu_in...
+  src_ctrl_pkt = [IntraCgraPktType(0,  1,  0, 0, 0, 0, 0, 0, 0,  0, CgraPayloadType(CMD_CONFIG, ctrl = CtrlType(OPT_ADD, pick_register), ctrl_addr = 0)),
+                  IntraCgraPktType(0,  1,  0, 0, 0, 0, 0, 0, 0,  0, CgraPayloadType(CMD_CONFIG, ctrl = CtrlType(OPT_SUB, pick_register), ctrl_addr = 1)),
+                  IntraCgraPktType(0,  1,  0, 0, 0, 0, 0, 0, 0,  0, CgraPayloadType(CMD_CONFIG, ctrl = CtrlType(OPT_SUB, pick_register), ctrl_addr = 2)),
+                  IntraCgraPktType(0,  1,  0, 0, 0, 0, 0, 0, 0,  0, CgraPayloadType(CMD_CONFIG, ctrl = CtrlType(OPT_ADD, pick_register), ctrl_addr = 3)),
+                  # Routing prologue counts of the ctrl signals that are not
+                  # launched, the first two sharing the same count.
+                  IntraCgraPktType(0,  1,  0, 0, 0, 0, 0, 0, 0,  0, CgraPayloadType(CMD_CONFIG_PROLOGUE_ROUTING_CROSSBAR, data = DataType(2, 1), ctrl_addr = 8,
+                                                                                    ctrl = CtrlType(routing_xbar_outport = [TileInType(1)] + [TileInType(0)] * 5))),
+                  IntraCgraPktType(0,  1,  0, 0, 0, 0, 0, 0, 0,  0, CgraPayloadType(CMD_CONFIG_PROLOGUE_ROUTING_CROSSBAR, data = DataType(2, 1), ctrl_addr = 8,
+                                                                                    ctrl = CtrlType(routing_xbar_outport = [TileInType(3)] + [TileInType(0)] * 5))),
+                  IntraCgraPktType(0,  1,  0, 0, 0, 0, 0, 0, 0,  0, CgraPayloadType(CMD_CONFIG_PROLOGUE_ROUTING_CROSSBAR, data = DataType(1, 1), ctrl_addr = 8,
+                                                                                    ctrl = CtrlType(routing_xbar_outport = [TileInType(4)] + [TileInType(0)] * 5))),
+                  IntraCgraPktType(0,  1,  0, 0, 0, 0, 0, 0, 0,  0, CgraPayloadType(CMD_LAUNCH, ctrl = CtrlType(OPT_NAH, pick_register), ctrl_addr = 0))]
+
+  # The distinct ctrl signals only differing in their operations are merged
+  # into CMD_CONFIG_PACKED_OPS, each carrying two 7-bit operations in its
+  # 16-bit data, and the routing prologue counts into two packets.
+  packed_ctrl_pkt = pack_config_pkts(src_ctrl_pkt, IntraCgraPktType)
+  assert len(packed_ctrl_pkt) == 5
+  assert packed_ctrl_pkt[0].payload.cmd == CMD_CONFIG_PACKED_OPS
+  assert packed_ctrl_pkt[0].payload.data_addr == 2
+  assert packed_ctrl_pkt[1].payload.cmd == CMD_CONFIG_PACKED_OPS
+  assert packed_ctrl_pkt[1].payload.ctrl_addr == 2
+  assert packed_ctrl_pkt[2].payload.ctrl.routing_xbar_outport[1] == 3
+  assert packed_ctrl_pkt[3].payload.ctrl.routing_xbar_outport[0] == 4
+
+  sink_out = [DataType(7, 1), DataType(4, 1), DataType(5, 1), DataType(9, 1)]
+  complete_signal_sink_out = [
+      IntraCgraPktType(0,  num_tiles,  0, 0, 0, 0, 0, 0, 0,  0, CgraPayloadType(CMD_COMPLETE))]
+
+  th = TestHarness(MemUnit,
+                   IntraCgraPktType,
+                   ctrl_mem_size,
+                   data_mem_size_global,
+                   num_fu_inports,
+                   num_fu_outports,
+                   num_tile_inports,
+                   num_tile_outports,
+                   src_data0,
+                   src_data1,
+                   packed_ctrl_pkt,
+                   sink_out,
+                   num_tiles,
+                   complete_signal_sink_out,
+                   ctrl_count_per_iter,
+                   total_ctrl_steps_val,
+                   AdderRTL)
+  run_sim(th)
+
+  assert th.ctrl_mem.prologue_count_reg_routing_crossbar[8][0] == 2
+  assert th.ctrl_mem.prologue_count_reg_routing_crossbar[8][2] == 2
+  assert th.ctrl_mem.prologue_count_reg_routing_crossbar[8][3] == 1
+
+def test_elided_config():
+  MemUnit = CtrlMemDynamicRTL
+  data_nbits = 16
+  DataType = mk_data(data_nbits, 1)
+  ctrl_mem_size = 16
+  num_fu_inports = 2
+  num_fu_outports = 2
+  num_tile_inports = 4
+  num_tile_outports = 4
+  num_tiles = 4
+
+  data_mem_size_global = 16
+  addr_nbits = clog2(data_mem_size_global)
+  DataAddrType = mk_bits(addr_nbits)
+  num_registers_per_reg_bank = 16
+  num_cgra_columns = 1
+  num_cgra_rows = 1
+
+  ctrl_count_per_iter = 4
+  total_ctrl_steps_val = 8
+
+  CtrlAddrType = mk_bits(clog2(ctrl_mem_size))
+
+  CtrlType = mk_ctrl(num_fu_inports,
+                     num_fu_outports,
+                     num_tile_inports,
+                     num_tile_outports,
+                     num_registers_per_reg_bank)
+
+  CgraPayloadType = mk_cgra_payload(DataType,
+                                    DataAddrType,
+                                    CtrlType,
+                                    CtrlAddrType)
+
+  IntraCgraPktType = mk_intra_cgra_pkt(num_cgra_columns,
+                                       num_cgra_rows,
+                                       num_tiles,
+                                       CgraPayloadType)
+
+  FuInType = mk_bits(clog2(num_fu_inports + 1))
+  pick_register = [FuInType(x + 1) for x in range(num_fu_inports)]
+  src_data0 = [DataType(1, 1)]
+  src_data1 = [DataType(6, 1)]
+                                 # src dst src/dst x/y       opq vc ctrl_action ctrl_addr ctrl_operation ctrl_predicate ctrl_fu_in...
+  src_ctrl_pkt = [IntraCgraPktType(0,  1,  0, 0, 0, 0, 0, 0, 0,  0, CgraPayloadType(CMD_CONFIG, ctrl = CtrlType(OPT_ADD, pick_register), ctrl_addr = 0)),
+                  IntraCgraPktType(0,  1,  0, 0, 0, 0, 0, 0, 0,  0, CgraPayloadType(CMD_CONFIG, ctrl = CtrlType(OPT_NAH, pick_register), ctrl_addr = 1)),
+                  IntraCgraPktType(0,  1,  0, 0, 0, 0, 0, 0, 0,  0, CgraPayloadType(CMD_CONFIG, ctrl = CtrlType(OPT_ADD, pick_register), ctrl_addr = 0)),
+                  IntraCgraPktType(0,  1,  0, 0, 0, 0, 0, 0, 0,  0, CgraPayloadType(CMD_CONFIG, ctrl = CtrlType(OPT_NAH, pick_register), ctrl_addr = 2)),
+                  IntraCgraPktType(0,  1,  0, 0, 0, 0, 0, 0, 0,  0, CgraPayloadType(CMD_CONFIG, ctrl = CtrlType(OPT_SUB, pick_register), ctrl_addr = 3)),
+                  # Tile 2 does nothing throughout the kernel.
+                  IntraCgraPktType(0,  2,  0, 0, 0, 0, 0, 0, 0,  0, CgraPayloadType(CMD_CONST, data = DataType(3, 1))),
+                  IntraCgraPktType(0,  2,  0, 0, 0, 0, 0, 0, 0,  0, CgraPayloadType(CMD_CONFIG, ctrl = CtrlType(OPT_NAH, pick_register), ctrl_addr = 0)),
+                  IntraCgraPktType(0,  2,  0, 0, 0, 0, 0, 0, 0,  0, CgraPayloadType(CMD_CONFIG, ctrl = CtrlType(OPT_NAH, pick_register), ctrl_addr = 1)),
+                  IntraCgraPktType(0,  2,  0, 0, 0, 0, 0, 0, 0,  0, CgraPayloadType(CMD_LAUNCH, ctrl = CtrlType(OPT_NAH, pick_register), ctrl_addr = 0)),
+                  IntraCgraPktType(0,  1,  0, 0, 0, 0, 0, 0, 0,  0, CgraPayloadType(CMD_LAUNCH, ctrl = CtrlType(OPT_NAH, pick_register), ctrl_addr = 0))]
+
+  # The repeated ctrl signal and the const towards tile 2 are dropped,
+  # and the two NAH ctrl signals of each tile are left to a single
+  # default NOP range, without which the unwritten entries would halt the
+  # kernel. Tile 2 is still launched, so that it sends CMD_COMPLETE.
+  elided_ctrl_pkt, report = elide_config_pkts(src_ctrl_pkt, IntraCgraPktType)
+  assert len(elided_ctrl_pkt) == 6
+  assert elided_ctrl_pkt[0].payload.cmd == CMD_CONFIG_DEFAULT_NOP
+  assert elided_ctrl_pkt[0].payload.ctrl_addr == 1
+  assert elided_ctrl_pkt[0].payload.data_addr == 2
+  unused_tile_pkt = [pkt for pkt in elided_ctrl_pkt if pkt.dst == 2]
+  assert [pkt.payload.cmd for pkt in unused_tile_pkt] == \
+         [CMD_CONFIG_DEFAULT_NOP, CMD_LAUNCH]
+  assert unused_tile_pkt[0].payload.ctrl_addr == 0
+  assert unused_tile_pkt[0].payload.data_addr == 2
+  assert report["num_pkts"] == 10
+  assert report["num_elided_pkts"] == 6
+  assert report["duplicates"] == 1
+  assert report["unused_tile_pkts"] == 1
+  assert report["nop_ctrl_pkts"] == 2
+  assert report["unused_tiles"] == [(0, 2)]
+  # Only the packets towards tile 1 are sent to the standalone ctrl memory.
+  elided_ctrl_pkt = [pkt for pkt in elided_ctrl_pkt if pkt.dst == 1]
+  assert len(elided_ctrl_pkt) == 4
+
+  sink_out = [DataType(7, 1)]
+  complete_signal_sink_out = []
+
+  th = TestHarness(MemUnit,
+                   IntraCgraPktType,
+                   ctrl_mem_size,
+                   data_mem_size_global,
+                   num_fu_inports,
+                   num_fu_outports,
+                   num_tile_inports,
+                   num_tile_outports,
+                   src_data0,
+                   src_data1,
+                   elided_ctrl_pkt,
+                   sink_out,
+                   num_tiles,
+                   complete_signal_sink_out,
+                   ctrl_count_per_iter,
+                   total_ctrl_steps_val,
+                   AdderRTL)
+  th.elaborate()
+  th.apply(DefaultPassGroup())
+  th.sim_reset()
+  for _ in range(20):
+    th.sim_tick()
+    print(th.line_trace())
+
+  # The kernel proceeds past the OPT_ADD and issues the default NOP out of
+  # the elided entry (which the standalone FU never accepts), instead of
+  # halting upon the unwritten entry as upon OPT_START.
+  assert th.sink_out.done()
+  assert th.ctrl_mem.ctrl_addr == 1
+  assert th.ctrl_mem.send_ctrl.val
+  assert th.ctrl_mem.send_ctrl.msg.operation == OPT_NAH
+  assert th.ctrl_mem.send_ctrl.msg.fu_in[0] == 0
+
+def test_compressed_ctrl():
+  MemUnit = CtrlMemDynamicRTL
+  data_nbits = 16
+  DataType = mk_data(data_nbits, 1)
+  ctrl_mem_size = 16
+  num_fu_inports = 2
+  num_fu_outports = 2
+  num_tile_inports = 4
+  num_tile_outports = 4
+  num_tiles = 4
+  routing_dict_size = 2
+
+  data_mem_size_global = 16
+  addr_nbits = clog2(data_mem_size_global)
+  DataAddrType = mk_bits(addr_nbits)
+  num_registers_per_reg_bank = 16
+  num_cgra_columns = 1
+  num_cgra_rows = 1
+
+  ctrl_count_per_iter = 4
+  total_ctrl_steps_val = 4
+
+  CtrlAddrType = mk_bits(clog2(ctrl_mem_size))
+
+  CtrlType = mk_ctrl(num_fu_inports,
+                     num_fu_outports,
+                     num_tile_inports,
+                     num_tile_outports,
+                     num_registers_per_reg_bank)
+
+  CgraPayloadType = mk_cgra_payload(DataType,
+                                    DataAddrType,
+                                    CtrlType,
+                                    CtrlAddrType)
+
+  IntraCgraPktType = mk_intra_cgra_pkt(num_cgra_columns,
+                                       num_cgra_rows,
+                                       num_tiles,
+                                       CgraPayloadType)
+
+  num_routing_outports = num_tile_outports + num_fu_inports
+  TileInType = mk_bits(clog2(num_tile_inports + num_fu_inports + 1))
+  FuOutType = mk_bits(clog2(num_fu_outports + 1))
+  FuInType = mk_bits(clog2(num_fu_inports + 1))
+  pick_register = [FuInType(x + 1) for x in range(num_fu_inports)]
+  # Two distinct routings are shared by the four ctrl signals.
+  routing_a = ([TileInType(1), TileInType(0), TileInType(3), TileInType(0), TileInType(0), TileInType(2)],
+               [FuOutType(0), FuOutType(1), FuOutType(0), FuOutType(0), FuOutType(2), FuOutType(0)])
+  routing_b = ([TileInType(0), TileInType(4), TileInType(0), TileInType(0), TileInType(1), TileInType(0)],
+               [FuOutType(1), FuOutType(0), FuOutType(0), FuOutType(2), FuOutType(0), FuOutType(0)])
+  ctrls = [CtrlType(OPT_ADD, pick_register, *routing_a),
+           CtrlType(OPT_SUB, pick_register, *routing_b),
+           CtrlType(OPT_SUB, pick_register, *routing_b),
+           CtrlType(OPT_ADD, pick_register, *routing_a)]
+  src_data0 = [DataType(1, 1), DataType(5, 1), DataType(7, 1), DataType(6, 1)]
+  src_data1 = [DataType(6, 1), DataType(1, 1), DataType(2, 1), DataType(3, 1)]
+                                 # src dst src/dst x/y       opq vc ctrl_action ctrl_addr ctrl_operation ctrl_predicate ctrl_fu_in...
+  src_ctrl_pkt = [IntraCgraPktType(0,  1,  0, 0, 0, 0, 0, 0, 0,  0, CgraPayloadType(CMD_CONFIG, ctrl = ctrl, ctrl_addr = addr))
+                  for addr, ctrl in enumerate(ctrls)] + \
+                 [IntraCgraPktType(0,  1,  0, 0, 0, 0, 0, 0, 0,  0, CgraPayloadType(CMD_LAUNCH, ctrl = CtrlType(OPT_NAH, pick_register), ctrl_addr = 0))]
+
+  # Each routing is written into the dictionary once, and the two OPT_SUB
+  # ctrl signals sharing both the operation and the routing entry can
+  # still be packed.
+  compressed_ctrl_pkt = compress_config_pkts(src_ctrl_pkt, IntraCgraPktType,
+                                             routing_dict_size)
+  assert len(compressed_ctrl_pkt) == 7
+  assert compressed_ctrl_pkt[0].payload.cmd == CMD_CONFIG_ROUTING_DICT
+  assert compressed_ctrl_pkt[2].payload.cmd == CMD_CONFIG_ROUTING_DICT
+  assert compressed_ctrl_pkt[3].payload.data.payload == 1
+  packed_ctrl_pkt = pack_config_pkts(compressed_ctrl_pkt, IntraCgraPktType)
+  assert len(packed_ctrl_pkt) == 6
+  assert packed_ctrl_pkt[3].payload.cmd == CMD_CONFIG_PACKED
+
+  sink_out = [DataType(7, 1), DataType(4, 1), DataType(5, 1), DataType(9, 1)]
+  complete_signal_sink_out = [
+      IntraCgraPktType(0,  num_tiles,  0, 0, 0, 0, 0, 0, 0,  0, CgraPayloadType(CMD_COMPLETE))]
+
+  th = TestHarness(MemUnit,
+                   IntraCgraPktType,
+                   ctrl_mem_size,
+                   data_mem_size_global,
+                   num_fu_inports,
+                   num_fu_outports,
+                   num_tile_inports,
+                   num_tile_outports,
+                   src_data0,
+                   src_data1,
+                   packed_ctrl_pkt,
+                   sink_out,
+                   num_tiles,
+                   complete_signal_sink_out,
+                   ctrl_count_per_iter,
+                   total_ctrl_steps_val,
+                   AdderRTL,
+                   routing_dict_size = routing_dict_size)
+  run_sim(th)
+
+  # The ctrl memory entries are narrower than the ctrl signals, and are
+  # decoded back into the original routings.
+  assert th.ctrl_mem.reg_file.regs[0].nbits < CtrlType.nbits
+  for addr, ctrl in enumerate(ctrls):
+    routing = th.ctrl_mem.routing_dict.regs[th.ctrl_mem.reg_file.regs[addr].routing_idx]
+    for i in range(num_routing_outports):
+      assert routing.routing_xbar_outport[i] == ctrl.routing_xbar_outport[i]
+      assert routing.fu_xbar_outport[i] == ctrl.fu_xbar_outport[i]
+
 def test_ctrl_bound():
   MemUnit = CtrlMemDynamicRTL
   data_nbits = 16
@@ -332,3 +755,175 @@ def test_return():
                    total_ctrl_steps_val,
                    RetRTL)
   run_sim(th)
+
+def test_double_buffer():
+  MemUnit = CtrlMemDynamicRTL
+  data_nbits = 16
+  DataType = mk_data(data_nbits, 1)
+  ctrl_mem_size = 4
+  num_fu_inports = 2
+  num_fu_outports = 2
+  num_tile_inports = 4
+  num_tile_outports = 4
+  num_tiles = 4
+
+  data_mem_size_global = 16
+  addr_nbits = clog2(data_mem_size_global)
+  DataAddrType = mk_bits(addr_nbits)
+  num_registers_per_reg_bank = 16
+  num_cgra_columns = 1
+  num_cgra_rows = 1
+
+  ctrl_count_per_iter = 2
+  total_ctrl_steps_val = 4
+
+  CtrlAddrType = mk_bits(clog2(ctrl_mem_size))
+
+  CtrlType = mk_ctrl(num_fu_inports,
+                     num_fu_outports,
+                     num_tile_inports,
+                     num_tile_outports,
+                     num_registers_per_reg_bank)
+
+  CgraPayloadType = mk_cgra_payload(DataType,
+                                    DataAddrType,
+                                    CtrlType,
+                                    CtrlAddrType)
+
+  IntraCgraPktType = mk_intra_cgra_pkt(num_cgra_columns,
+                                       num_cgra_rows,
+                                       num_tiles,
+                                       CgraPayloadType)
+
+  FuInType = mk_bits(clog2(num_fu_inports + 1))
+  pick_register = [FuInType(x + 1) for x in range(num_fu_inports)]
+  src_data0 = [DataType(1, 1), DataType(5, 1), DataType(7, 1), DataType(6, 1),
+               DataType(4, 1), DataType(9, 1)]
+  src_data1 = [DataType(6, 1), DataType(1, 1), DataType(2, 1), DataType(3, 1),
+               DataType(1, 1), DataType(2, 1)]
+                                 # src dst src/dst x/y       opq vc ctrl_action ctrl_addr ctrl_operation ctrl_predicate ctrl_fu_in...
+  src_ctrl_pkt = [IntraCgraPktType(0,  1,  0, 0, 0, 0, 0, 0, 0,  0, CgraPayloadType(CMD_CONFIG, ctrl = CtrlType(OPT_ADD, pick_register), ctrl_addr = 0)),
+                  IntraCgraPktType(0,  1,  0, 0, 0, 0, 0, 0, 0,  0, CgraPayloadType(CMD_CONFIG, ctrl = CtrlType(OPT_SUB, pick_register), ctrl_addr = 1)),
+                  IntraCgraPktType(0,  1,  0, 0, 0, 0, 0, 0, 0,  0, CgraPayloadType(CMD_CONFIG_COUNT_PER_ITER, data = DataType(ctrl_count_per_iter, 1))),
+                  IntraCgraPktType(0,  1,  0, 0, 0, 0, 0, 0, 0,  0, CgraPayloadType(CMD_CONFIG_TOTAL_CTRL_COUNT, data = DataType(total_ctrl_steps_val, 1))),
+                  IntraCgraPktType(0,  1,  0, 0, 0, 0, 0, 0, 0,  0, CgraPayloadType(CMD_LAUNCH, ctrl = CtrlType(OPT_NAH, pick_register), ctrl_addr = 0)),
+                  # The next kernel is written into the shadow bank at the same
+                  # ctrl addresses while the first one is running, and only
+                  # swapped in once the first one completes.
+                  IntraCgraPktType(0,  1,  0, 0, 0, 0, 0, 0, 0,  0, CgraPayloadType(CMD_CONFIG, ctrl = CtrlType(OPT_SUB, pick_register), ctrl_addr = 0)),
+                  IntraCgraPktType(0,  1,  0, 0, 0, 0, 0, 0, 0,  0, CgraPayloadType(CMD_CONFIG, ctrl = CtrlType(OPT_ADD, pick_register), ctrl_addr = 1)),
+                  IntraCgraPktType(0,  1,  0, 0, 0, 0, 0, 0, 0,  0, CgraPayloadType(CMD_CONFIG_TOTAL_CTRL_COUNT, data = DataType(2, 1))),
+                  IntraCgraPktType(0,  1,  0, 0, 0, 0, 0, 0, 0,  0, CgraPayloadType(CMD_LAUNCH, ctrl = CtrlType(OPT_NAH, pick_register), ctrl_addr = 0))]
+
+  # The first kernel iterates ADD/SUB twice, then the second one SUB/ADD once.
+  sink_out = [DataType(7, 1), DataType(4, 1), DataType(9, 1), DataType(3, 1),
+              DataType(3, 1), DataType(11, 1)]
+  complete_signal_sink_out = [
+      IntraCgraPktType(0,  num_tiles,  0, 0, 0, 0, 0, 0, 0,  0, CgraPayloadType(CMD_COMPLETE)),
+      IntraCgraPktType(0,  num_tiles,  0, 0, 0, 0, 0, 0, 0,  0, CgraPayloadType(CMD_COMPLETE))]
+
+  th = TestHarness(MemUnit,
+                   IntraCgraPktType,
+                   ctrl_mem_size,
+                   data_mem_size_global,
+                   num_fu_inports,
+                   num_fu_outports,
+                   num_tile_inports,
+                   num_tile_outports,
+                   src_data0,
+                   src_data1,
+                   src_ctrl_pkt,
+                   sink_out,
+                   num_tiles,
+                   complete_signal_sink_out,
+                   ctrl_count_per_iter,
+                   total_ctrl_steps_val,
+                   AdderRTL,
+                   double_buffer = True)
+  run_sim(th, max_cycles = 30)
+
+  # Both kernels have been swapped in.
+  assert th.ctrl_mem.active_bank == 0
+
+def test_ctrl_streaming():
+  MemUnit = CtrlMemDynamicRTL
+  data_nbits = 16
+  DataType = mk_data(data_nbits, 1)
+  # The schedule of 5 ctrl signals is longer than the control memory.
+  ctrl_mem_size = 2
+  ctrl_store_size = 8
+  num_fu_inports = 2
+  num_fu_outports = 2
+  num_tile_inports = 4
+  num_tile_outports = 4
+  num_tiles = 4
+
+  data_mem_size_global = 16
+  addr_nbits = clog2(data_mem_size_global)
+  DataAddrType = mk_bits(addr_nbits)
+  num_registers_per_reg_bank = 16
+  num_cgra_columns = 1
+  num_cgra_rows = 1
+
+  ctrl_count_per_iter = 5
+  total_ctrl_steps_val = 7
+
+  CtrlAddrType = mk_bits(clog2(ctrl_mem_size))
+
+  CtrlType = mk_ctrl(num_fu_inports,
+                     num_fu_outports,
+                     num_tile_inports,
+                     num_tile_outports,
+                     num_registers_per_reg_bank)
+
+  CgraPayloadType = mk_cgra_payload(DataType,
+                                    DataAddrType,
+                                    CtrlType,
+                                    CtrlAddrType)
+
+  IntraCgraPktType = mk_intra_cgra_pkt(num_cgra_columns,
+                                       num_cgra_rows,
+                                       num_tiles,
+                                       CgraPayloadType)
+
+  FuInType = mk_bits(clog2(num_fu_inports + 1))
+  pick_register = [FuInType(x + 1) for x in range(num_fu_inports)]
+  src_data0 = [DataType(1, 1), DataType(5, 1), DataType(7, 1), DataType(6, 1),
+               DataType(4, 1), DataType(9, 1), DataType(8, 1)]
+  src_data1 = [DataType(6, 1), DataType(1, 1), DataType(2, 1), DataType(3, 1),
+               DataType(4, 1), DataType(2, 1), DataType(5, 1)]
+  # The schedule is located at [1, 6) of the ctrl store.
+  schedule = [OPT_ADD, OPT_SUB, OPT_SUB, OPT_ADD, OPT_ADD]
+                                 # src dst src/dst x/y       opq vc ctrl_action ctrl_addr ctrl_operation ctrl_predicate ctrl_fu_in...
+  src_ctrl_pkt = [IntraCgraPktType(0,  1,  0, 0, 0, 0, 0, 0, 0,  0, CgraPayloadType(CMD_CONFIG_CTRL_STORE, data = DataType(i + 1, 1), ctrl = CtrlType(opt, pick_register)))
+                  for i, opt in enumerate(schedule)] + \
+                 [IntraCgraPktType(0,  1,  0, 0, 0, 0, 0, 0, 0,  0, CgraPayloadType(CMD_CONFIG_COUNT_PER_ITER, data = DataType(ctrl_count_per_iter, 1))),
+                  IntraCgraPktType(0,  1,  0, 0, 0, 0, 0, 0, 0,  0, CgraPayloadType(CMD_CONFIG_CTRL_LOWER_BOUND, data = DataType(1, 1))),
+                  IntraCgraPktType(0,  1,  0, 0, 0, 0, 0, 0, 0,  0, CgraPayloadType(CMD_CONFIG_TOTAL_CTRL_COUNT, data = DataType(total_ctrl_steps_val, 1))),
+                  IntraCgraPktType(0,  1,  0, 0, 0, 0, 0, 0, 0,  0, CgraPayloadType(CMD_LAUNCH, ctrl = CtrlType(OPT_NAH, pick_register), ctrl_addr = 0))]
+
+  # The 7 steps go through the 5 ctrl signals, then wrap around to the first two.
+  sink_out = [DataType(7, 1), DataType(4, 1), DataType(5, 1), DataType(9, 1),
+              DataType(8, 1), DataType(11, 1), DataType(3, 1)]
+  complete_signal_sink_out = [
+      IntraCgraPktType(0,  num_tiles,  0, 0, 0, 0, 0, 0, 0,  0, CgraPayloadType(CMD_COMPLETE))]
+
+  th = TestHarness(MemUnit,
+                   IntraCgraPktType,
+                   ctrl_mem_size,
+                   data_mem_size_global,
+                   num_fu_inports,
+                   num_fu_outports,
+                   num_tile_inports,
+                   num_tile_outports,
+                   src_data0,
+                   src_data1,
+                   src_ctrl_pkt,
+                   sink_out,
+                   num_tiles,
+                   complete_signal_sink_out,
+                   ctrl_count_per_iter,
+                   total_ctrl_steps_val,
+                   AdderRTL,
+                   ctrl_store_size = ctrl_store_size)
+  run_sim(th, max_cycles = 30)
@@ -8,6 +8,10 @@ multiple registers that can be indexed/picked for read/write. Each has
 one write port (from routing crossbar, fu crossbar, or const) and one read
 port (towards FU).
 
+With `has_context_port`, an additional read port exposes the registers
+to be saved upon the context switch, and the restored registers take over
+the write port.
+
 Author : Cheng Tan
   Date : Feb 6, 2025
 """
@@ -28,7 +32,8 @@ from ...lib.util.common import (
 
 class RegisterBankRTL(Component):
 
-  def construct(s, DataType, CtrlType, reg_bank_id, num_registers = 4):
+  def construct(s, DataType, CtrlType, reg_bank_id, num_registers = 4,
+                has_context_port = False):
 
     # Constant
     AddrType = mk_bits(clog2(num_registers))
@@ -41,11 +46,23 @@ class RegisterBankRTL(Component):
     # the design and handshake.
     s.inport_wdata = [InPort(DataType) for _ in range(3)]
     s.inport_valid = [InPort(mk_bits(1)) for _ in range(3)]
+    # Saves/restores the register at `context_addr` upon the context switch.
+    s.context_addr = InPort(AddrType)
+    s.context_rdata = OutPort(DataType)
+    s.context_wdata = InPort(DataType)
+    s.context_wen = InPort(b1)
 
     # Component
-    s.reg_file = RegisterFile(DataType, num_registers, rd_ports = 1,
+    s.reg_file = RegisterFile(DataType, num_registers,
+                              rd_ports = 2 if has_context_port else 1,
                               wr_ports = 1)
 
+    if has_context_port:
+      s.reg_file.raddr[1] //= s.context_addr
+      s.context_rdata //= s.reg_file.rdata[1]
+    else:
+      s.context_rdata //= DataType()
+
     @update
     def access_registers():
       # Initializes signals.
@@ -68,6 +85,12 @@ class RegisterBankRTL(Component):
           s.reg_file.wdata[0] @= s.inport_wdata[write_reg_from - 1]
           s.reg_file.wen[0] @= 1
 
+      # The restored register takes over the write port.
+      if s.context_wen:
+        s.reg_file.waddr[0] @= s.context_addr
+        s.reg_file.wdata[0] @= s.context_wdata
+        s.reg_file.wen[0] @= 1
+
     @update
     def update_send_val():
       s.send_data.val @= 0
@@ -4,6 +4,9 @@ RegisterClusterRTL.py
 ==========================================================================
 Register cluster contains multiple register banks.
 
+With `has_context_port`, the registers at `context_addr` of all the banks
+are read/written at once upon the context switch.
+
 Author : Cheng Tan
   Date : Feb 7, 2025
 """
@@ -32,7 +35,7 @@ kReadTowardsBoth        = READ_TOWARDS_BOTH
 class RegisterClusterRTL(Component):
 
   def construct(s, DataType, CtrlType, num_reg_banks,
-                num_registers_per_reg_bank = 4):
+                num_registers_per_reg_bank = 4, has_context_port = False):
 
     # Interface
     s.inport_opt = InPort(CtrlType)
@@ -44,9 +47,27 @@ class RegisterClusterRTL(Component):
     s.send_data_to_routing_crossbar = [SendIfcRTL(DataType) for _ in range(num_reg_banks)]
 
     # Component
-    s.reg_bank = [RegisterBankRTL(DataType, CtrlType, i, num_registers_per_reg_bank)
+    s.reg_bank = [RegisterBankRTL(DataType, CtrlType, i, num_registers_per_reg_bank,
+                                  has_context_port)
                   for i in range(num_reg_banks)]
 
+    if has_context_port:
+      # Saves/restores the registers of all the banks at `context_addr`.
+      s.context_addr = InPort(mk_bits(clog2(num_registers_per_reg_bank)))
+      s.context_rdata = [OutPort(DataType) for _ in range(num_reg_banks)]
+      s.context_wdata = [InPort(DataType) for _ in range(num_reg_banks)]
+      s.context_wen = InPort(b1)
+      for i in range(num_reg_banks):
+        s.reg_bank[i].context_addr //= s.context_addr
+        s.reg_bank[i].context_rdata //= s.context_rdata[i]
+        s.reg_bank[i].context_wdata //= s.context_wdata[i]
+        s.reg_bank[i].context_wen //= s.context_wen
+    else:
+      for i in range(num_reg_banks):
+        s.reg_bank[i].context_addr //= 0
+        s.reg_bank[i].context_wdata //= DataType()
+        s.reg_bank[i].context_wen //= 0
+
     # Connections.
     for i in range(num_reg_banks):
       s.reg_bank[i].inport_opt //= s.inport_opt
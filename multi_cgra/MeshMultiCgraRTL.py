@@ -2,7 +2,10 @@
 ==========================================================================
 MeshMultiCgraRTL.py
 ==========================================================================
-Mesh connecting multiple CGRAs, each CGRA contains one controller.
+Mesh connecting multiple CGRAs, each CGRA contains one controller. The
+inter-CGRA NoC can also be a ring or a torus (see `topology`), while the
+data links between the boundary tiles of the adjacent CGRAs always form
+a mesh.
 
 Author : Cheng Tan
   Date : Jan 8, 2025
@@ -14,8 +17,13 @@ from ..lib.basic.val_rdy.ifcs import ValRdyRecvIfcRTL as RecvIfcRTL
 from ..lib.basic.val_rdy.ifcs import ValRdySendIfcRTL as SendIfcRTL
 from ..lib.opt_type import *
 from ..noc.PyOCN.pymtl3_net.meshnet.MeshNetworkRTL import MeshNetworkRTL
-from ..noc.PyOCN.pymtl3_net.ocnlib.ifcs.positions import mk_mesh_pos
+from ..noc.BoundaryLinkRTL import BoundaryLinkRTL
+from ..noc.VcMeshNetworkRTL import VcMeshNetworkRTL
+from ..noc.PyOCN.pymtl3_net.ocnlib.ifcs.positions import mk_mesh_pos, mk_ring_pos
+from ..noc.PyOCN.pymtl3_net.ringnet.RingNetworkRTL import RingNetworkRTL
+from ..noc.PyOCN.pymtl3_net.torusnet.TorusNetworkRTL import TorusNetworkRTL
 from ..lib.messages import *
+from ..lib.util.common import *
 from ..lib.util.data_struct_attr import *
 
 class MeshMultiCgraRTL(Component):
@@ -29,7 +37,18 @@ class MeshMultiCgraRTL(Component):
                 mem_access_is_combinational,
                 FunctionUnit, FuList, per_cgra_topology,
                 controller2addr_map,
-                support_task_switching = False):
+                support_task_switching = False,
+                has_traffic_class_vcs = False,
+                boundary_link_latency = 0,
+                boundary_link_credits = None,
+                topology = MULTI_CGRA_TOPOLOGY_MESH):
+
+    assert topology in MULTI_CGRA_TOPOLOGIES, \
+        f"Unsupported multi-CGRA topology: {topology}"
+    # The traffic class VCs are only provided by the mesh routers.
+    assert not has_traffic_class_vcs or \
+           topology == MULTI_CGRA_TOPOLOGY_MESH, \
+        "Traffic class VCs require the mesh topology."
 
     # Derives all types from CgraPayloadType.
     CgraDataType = CgraPayloadType.get_field_type(kAttrData)
@@ -77,7 +96,8 @@ class MeshMultiCgraRTL(Component):
                                          num_ctrl, total_steps,
                                          mem_access_is_combinational,
                                          FunctionUnit, FuList, per_cgra_topology,
-                                         controller2addr_map, idTo2d_map)
+                                         controller2addr_map, idTo2d_map,
+                                         has_traffic_class_vcs = has_traffic_class_vcs)
                 for cgra_id in range(s.num_cgras)]
     else:
       s.cgra = [CgraRTL(CgraPayloadType, cgra_rows, cgra_columns,
@@ -89,16 +109,37 @@ class MeshMultiCgraRTL(Component):
                         mem_access_is_combinational,
                         FunctionUnit, FuList, per_cgra_topology,
                         controller2addr_map, idTo2d_map,
-                        has_ctrl_ring = True)
+                        has_ctrl_ring = True,
+                        has_traffic_class_vcs = has_traffic_class_vcs)
                 for cgra_id in range(s.num_cgras)]
 
-    # Latency is 1.
-    s.mesh = MeshNetworkRTL(NocPktType, MeshPos, cgra_columns, cgra_rows, 1)
+    # Inter-CGRA NoC, whose latency is 1.
+    s.topology = topology
+    if topology == MULTI_CGRA_TOPOLOGY_TORUS:
+      # Wraparound links of PyOCN torus are only correct for the square
+      # tori, and the two VCs are used as the datelines.
+      assert cgra_rows == cgra_columns and cgra_rows >= 2, \
+          "Torus topology requires a square array of at least 2x2 CGRAs."
+      s.torus = TorusNetworkRTL(NocPktType, MeshPos, cgra_columns, cgra_rows, 1)
+      noc = s.torus
+    elif topology == MULTI_CGRA_TOPOLOGY_RING:
+      RingPos = mk_ring_pos(s.num_cgras)
+      s.ring = RingNetworkRTL(NocPktType, RingPos, s.num_cgras, 1)
+      noc = s.ring
+    elif has_traffic_class_vcs:
+      # Load requests, load responses, stores and ctrl packets travel in
+      # separate VCs, the responses being prioritized by the routers.
+      s.mesh = VcMeshNetworkRTL(NocPktType, MeshPos, cgra_columns, cgra_rows,
+                                INTER_CGRA_NUM_VCS)
+      noc = s.mesh
+    else:
+      s.mesh = MeshNetworkRTL(NocPktType, MeshPos, cgra_columns, cgra_rows, 1)
+      noc = s.mesh
 
     # Connections
     for i in range(s.num_cgras):
-      s.mesh.send[i] //= s.cgra[i].recv_from_inter_cgra_noc
-      s.mesh.recv[i] //= s.cgra[i].send_to_inter_cgra_noc
+      noc.send[i] //= s.cgra[i].recv_from_inter_cgra_noc
+      noc.recv[i] //= s.cgra[i].send_to_inter_cgra_noc
 
     # Connects controller id.
     for cgra_id in range(s.num_cgras):
@@ -117,15 +158,20 @@ class MeshMultiCgraRTL(Component):
       s.cgra[i].recv_from_cpu_pkt.msg //= CtrlPktType()
       s.cgra[i].send_to_cpu_pkt.rdy //= 0
 
-    # Connects the tiles on the boundary of each two adjacent CGRAs.
+    # Connects the tiles on the boundary of each two adjacent CGRAs. Each
+    # (sender, receiver) pair is either connected directly or through a
+    # pipelined credit-based link, see below.
+    boundary_pairs = []
     for cgra_row in range(cgra_rows):
       for cgra_col in range(cgra_columns):
         if cgra_row != 0:
           for tile_col in range(tile_columns):
-            s.cgra[cgra_row * cgra_columns + cgra_col].send_data_on_boundary_south[tile_col] //= \
-                s.cgra[(cgra_row - 1) * cgra_columns + cgra_col].recv_data_on_boundary_north[tile_col]
-            s.cgra[cgra_row * cgra_columns + cgra_col].recv_data_on_boundary_south[tile_col] //= \
-                s.cgra[(cgra_row - 1) * cgra_columns + cgra_col].send_data_on_boundary_north[tile_col]
+            boundary_pairs.append(
+                (s.cgra[cgra_row * cgra_columns + cgra_col].send_data_on_boundary_south[tile_col],
+                 s.cgra[(cgra_row - 1) * cgra_columns + cgra_col].recv_data_on_boundary_north[tile_col]))
+            boundary_pairs.append(
+                (s.cgra[(cgra_row - 1) * cgra_columns + cgra_col].send_data_on_boundary_north[tile_col],
+                 s.cgra[cgra_row * cgra_columns + cgra_col].recv_data_on_boundary_south[tile_col]))
         else:
           for tile_col in range(tile_columns):
             s.cgra[cgra_row * cgra_columns + cgra_col].send_data_on_boundary_south[tile_col].rdy //= 0
@@ -140,10 +186,12 @@ class MeshMultiCgraRTL(Component):
 
         if cgra_col != 0:
           for tile_row in range(tile_rows):
-            s.cgra[cgra_row * cgra_columns + cgra_col].send_data_on_boundary_west[tile_row] //= \
-                s.cgra[cgra_row * cgra_columns + cgra_col - 1].recv_data_on_boundary_east[tile_row]
-            s.cgra[cgra_row * cgra_columns + cgra_col].recv_data_on_boundary_west[tile_row] //= \
-                s.cgra[cgra_row * cgra_columns + cgra_col - 1].send_data_on_boundary_east[tile_row]
+            boundary_pairs.append(
+                (s.cgra[cgra_row * cgra_columns + cgra_col].send_data_on_boundary_west[tile_row],
+                 s.cgra[cgra_row * cgra_columns + cgra_col - 1].recv_data_on_boundary_east[tile_row]))
+            boundary_pairs.append(
+                (s.cgra[cgra_row * cgra_columns + cgra_col - 1].send_data_on_boundary_east[tile_row],
+                 s.cgra[cgra_row * cgra_columns + cgra_col].recv_data_on_boundary_west[tile_row]))
         else:
           for tile_row in range(tile_rows):
             s.cgra[cgra_row * cgra_columns + cgra_col].send_data_on_boundary_west[tile_row].rdy //= 0
@@ -156,9 +204,25 @@ class MeshMultiCgraRTL(Component):
             s.cgra[cgra_row * cgra_columns + cgra_col].recv_data_on_boundary_east[tile_row].val //= 0
             s.cgra[cgra_row * cgra_columns + cgra_col].recv_data_on_boundary_east[tile_row].msg //= CgraDataType()
 
+    # The boundary links let the spatially partitioned kernels stream
+    # operands across CGRAs at one word per cycle without going through
+    # the controllers. Long wires are cut by pipeline registers and rely
+    # on credits instead of a combinational ready.
+    if boundary_link_latency > 0:
+      s.boundary_links = [BoundaryLinkRTL(CgraDataType,
+                                          boundary_link_latency,
+                                          boundary_link_credits)
+                          for _ in range(len(boundary_pairs))]
+      for i, (sender, receiver) in enumerate(boundary_pairs):
+        sender //= s.boundary_links[i].recv
+        s.boundary_links[i].send //= receiver
+    else:
+      for sender, receiver in boundary_pairs:
+        sender //= receiver
+
   def line_trace(s):
     res = "||\n".join([(("\n\n[cgra_"+str(i)+": ") + x.line_trace())
                        for (i,x) in enumerate(s.cgra)])
-    res += " ## mesh: " + s.mesh.line_trace()
+    res += f" ## {s.topology}: " + getattr(s, s.topology).line_trace()
     return res
 
@@ -4,9 +4,14 @@ from ..lib.basic.val_rdy.ifcs import ValRdyRecvIfcRTL as RecvIfcRTL
 from ..lib.basic.val_rdy.ifcs import ValRdySendIfcRTL as SendIfcRTL
 from ..lib.messages import *
 from ..lib.opt_type import *
+from ..lib.util.common import *
 from ..lib.util.data_struct_attr import *
+from ..noc.BoundaryLinkRTL import BoundaryLinkRTL
 from ..noc.PyOCN.pymtl3_net.meshnet.MeshNetworkRTL import MeshNetworkRTL
-from ..noc.PyOCN.pymtl3_net.ocnlib.ifcs.positions import mk_mesh_pos
+from ..noc.PyOCN.pymtl3_net.ocnlib.ifcs.positions import mk_mesh_pos, mk_ring_pos
+from ..noc.PyOCN.pymtl3_net.ringnet.RingNetworkRTL import RingNetworkRTL
+from ..noc.PyOCN.pymtl3_net.torusnet.TorusNetworkRTL import TorusNetworkRTL
+from ..noc.VcMeshNetworkRTL import VcMeshNetworkRTL
 
 class MeshMultiCgraTemplateRTL(Component):
 
@@ -20,7 +25,18 @@ class MeshMultiCgraTemplateRTL(Component):
                 controller2addr_map, id2ctrlMemSize_map, id2cgraSize_map, 
                 id2validTiles, id2validLinks, id2dataSPM,
                 mem_access_is_combinational,
-                is_multi_cgra = True):
+                is_multi_cgra = True,
+                topology = MULTI_CGRA_TOPOLOGY_MESH,
+                boundary_link_latency = 0,
+                boundary_link_credits = None,
+                has_traffic_class_vcs = False):
+
+        assert topology in MULTI_CGRA_TOPOLOGIES, \
+            f"Unsupported multi-CGRA topology: {topology}"
+        # The traffic class VCs are only provided by the mesh routers.
+        assert not has_traffic_class_vcs or \
+               topology == MULTI_CGRA_TOPOLOGY_MESH, \
+            "Traffic class VCs require the mesh topology."
 
         # Derives all types from CgraPayloadType.
         CgraDataType = CgraPayloadType.get_field_type(kAttrData)
@@ -71,15 +87,36 @@ class MeshMultiCgraTemplateRTL(Component):
                                   FunctionUnit, FuList,
                                   id2validTiles[cgra_id], id2validLinks[cgra_id], id2dataSPM[cgra_id],
                                   controller2addr_map, idTo2d_map,
-                                  is_multi_cgra, cgra_id)
+                                  is_multi_cgra, cgra_id,
+                                  has_traffic_class_vcs)
                   for cgra_id in range(s.num_cgras)]
-        # Latency is 1.
-        s.mesh = MeshNetworkRTL(NocPktType, MeshPos, cgra_columns, cgra_rows, 1)
+        # Inter-CGRA NoC, whose latency is 1.
+        s.topology = topology
+        if topology == MULTI_CGRA_TOPOLOGY_TORUS:
+          # Wraparound links of PyOCN torus are only correct for the square
+          # tori, and the two VCs are used as the datelines.
+          assert cgra_rows == cgra_columns and cgra_rows >= 2, \
+              "Torus topology requires a square array of at least 2x2 CGRAs."
+          s.torus = TorusNetworkRTL(NocPktType, MeshPos, cgra_columns, cgra_rows, 1)
+          noc = s.torus
+        elif topology == MULTI_CGRA_TOPOLOGY_RING:
+          RingPos = mk_ring_pos(s.num_cgras)
+          s.ring = RingNetworkRTL(NocPktType, RingPos, s.num_cgras, 1)
+          noc = s.ring
+        elif has_traffic_class_vcs:
+          # Load requests, load responses, stores and ctrl packets travel in
+          # separate VCs, the responses being prioritized by the routers.
+          s.mesh = VcMeshNetworkRTL(NocPktType, MeshPos, cgra_columns, cgra_rows,
+                                    INTER_CGRA_NUM_VCS)
+          noc = s.mesh
+        else:
+          s.mesh = MeshNetworkRTL(NocPktType, MeshPos, cgra_columns, cgra_rows, 1)
+          noc = s.mesh
 
         # Connections
         for i in range(s.num_cgras):
-          s.mesh.send[i] //= s.cgra[i].recv_from_inter_cgra_noc
-          s.mesh.recv[i] //= s.cgra[i].send_to_inter_cgra_noc
+          noc.send[i] //= s.cgra[i].recv_from_inter_cgra_noc
+          noc.recv[i] //= s.cgra[i].send_to_inter_cgra_noc
 
         # Connects controller id.
         for cgra_id in range(s.num_cgras):
@@ -103,6 +140,9 @@ class MeshMultiCgraTemplateRTL(Component):
         #              (cgra_col=0)   -- (cgra_col=1)
         # (cgra_row=1) CGRA 2 [idx=2] -- CGRA 3 [idx=3]
         # (cgra_row=0) CGRA 0 [idx=0] -- CGRA 1 [idx=1]
+        # Each (sender, receiver) pair is either connected directly or
+        # through a pipelined credit-based link, see below.
+        boundary_pairs = []
         for cgra_row in range(cgra_rows):
           for cgra_col in range(cgra_columns):
             idx = cgra_row * cgra_columns + cgra_col
@@ -113,10 +153,12 @@ class MeshMultiCgraTemplateRTL(Component):
             if cgra_row > 0:
               neighbor_idx = (cgra_row - 1) * cgra_columns + cgra_col
               for tile_col in range(per_cgra_columns):
-                s.cgra[idx].send_data_on_boundary_south[tile_col] //= \
-                    s.cgra[neighbor_idx].recv_data_on_boundary_north[tile_col]
-                s.cgra[idx].recv_data_on_boundary_south[tile_col] //= \
-                    s.cgra[neighbor_idx].send_data_on_boundary_north[tile_col]
+                boundary_pairs.append(
+                    (s.cgra[idx].send_data_on_boundary_south[tile_col],
+                     s.cgra[neighbor_idx].recv_data_on_boundary_north[tile_col]))
+                boundary_pairs.append(
+                    (s.cgra[neighbor_idx].send_data_on_boundary_north[tile_col],
+                     s.cgra[idx].recv_data_on_boundary_south[tile_col]))
             else:
               # Bottom edge: connects south boundary to 0
               for tile_col in range(per_cgra_columns):
@@ -135,10 +177,12 @@ class MeshMultiCgraTemplateRTL(Component):
             if cgra_col > 0:
               neighbor_idx = cgra_row * cgra_columns + cgra_col - 1
               for tile_row in range(per_cgra_rows):
-                s.cgra[idx].send_data_on_boundary_west[tile_row] //= \
-                    s.cgra[neighbor_idx].recv_data_on_boundary_east[tile_row]
-                s.cgra[idx].recv_data_on_boundary_west[tile_row] //= \
-                    s.cgra[neighbor_idx].send_data_on_boundary_east[tile_row]
+                boundary_pairs.append(
+                    (s.cgra[idx].send_data_on_boundary_west[tile_row],
+                     s.cgra[neighbor_idx].recv_data_on_boundary_east[tile_row]))
+                boundary_pairs.append(
+                    (s.cgra[neighbor_idx].send_data_on_boundary_east[tile_row],
+                     s.cgra[idx].recv_data_on_boundary_west[tile_row]))
             else:
               # Left edge: connects west boundary to 0
               for tile_row in range(per_cgra_rows):
@@ -153,8 +197,24 @@ class MeshMultiCgraTemplateRTL(Component):
                 s.cgra[idx].recv_data_on_boundary_east[tile_row].msg //= CgraDataType()
                 s.cgra[idx].send_data_on_boundary_east[tile_row].rdy //= 0
 
+        # The boundary links let the spatially partitioned kernels stream
+        # operands across CGRAs at one word per cycle without going
+        # through the controllers. Long wires are cut by pipeline
+        # registers and rely on credits instead of a combinational ready.
+        if boundary_link_latency > 0:
+          s.boundary_links = [BoundaryLinkRTL(CgraDataType,
+                                              boundary_link_latency,
+                                              boundary_link_credits)
+                              for _ in range(len(boundary_pairs))]
+          for i, (sender, receiver) in enumerate(boundary_pairs):
+            sender //= s.boundary_links[i].recv
+            s.boundary_links[i].send //= receiver
+        else:
+          for sender, receiver in boundary_pairs:
+            sender //= receiver
+
     def line_trace(s):
       res = "||\n".join([(("\n\n[cgra_"+str(i)+": ") + x.line_trace())
                       for (i,x) in enumerate(s.cgra)])
-      res += " ## mesh: " + s.mesh.line_trace()
+      res += f" ## {s.topology}: " + getattr(s, s.topology).line_trace()
       return res
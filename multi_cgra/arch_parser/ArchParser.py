@@ -4,6 +4,7 @@ from ...lib.util.cgra.DataSPM import DataSPM
 from ...lib.util.cgra.Tile import Tile
 from .ParamCGRA import ParamCGRA
 from ...lib.util.cgra.cgra_helper import *
+from ...lib.util.common import *
 import copy
 
 
@@ -14,10 +15,36 @@ class ArchParser:
 
         self.cgra_rows = self.yaml_data['multi_cgra_defaults']['rows']
         self.cgra_columns = self.yaml_data['multi_cgra_defaults']['columns']
+        self.topology = self.yaml_data['multi_cgra_defaults'].get('topology', MULTI_CGRA_TOPOLOGY_MESH)
+        assert self.topology in MULTI_CGRA_TOPOLOGIES, \
+            f"topology must be one of {MULTI_CGRA_TOPOLOGIES}, got {self.topology}."
+        # Pipeline depth of the data links between the boundary tiles of adjacent CGRAs.
+        self.boundary_link_latency = self.yaml_data['multi_cgra_defaults'].get('boundary_link_latency', 0)
         self.per_cgra_rows = self.yaml_data['cgra_defaults']['rows']
         self.per_cgra_columns = self.yaml_data['cgra_defaults']['columns']
         self.num_registers = self.yaml_data['tile_defaults']['num_registers']
         self.fu_types = self.yaml_data['tile_defaults']['fu_types']
+        self.input_fifo_depths = self.parse_input_fifo_depths(
+            self.yaml_data['tile_defaults'].get('input_fifo_depth', DEFAULT_TILE_INPUT_FIFO_DEPTH))
+        self.output_skid_depth = self.yaml_data['tile_defaults'].get('output_skid_depth', 0)
+        assert self.output_skid_depth >= 0, "output_skid_depth must be non-negative."
+
+    def parse_input_fifo_depths(self, depth):
+        """
+        Parse the input FIFO depth of the tiles, either one depth for all the
+        directions or a map from the direction names to the depths, the
+        directions not listed keeping the default depth.
+        """
+        if isinstance(depth, int):
+            depths = [depth] * PORT_INDEX_DIRECTION_COUNTS
+        else:
+            for direction in depth:
+                assert direction in PORT_DIRECTION_NAMES, \
+                    f"input_fifo_depth direction must be one of {PORT_DIRECTION_NAMES}, got {direction}."
+            depths = [depth.get(direction, DEFAULT_TILE_INPUT_FIFO_DEPTH)
+                      for direction in PORT_DIRECTION_NAMES]
+        assert all(d >= 1 for d in depths), "input_fifo_depth must be at least 1."
+        return depths
 
     def parse_dataSPM(self):
         data_mem_num_rd_tiles = self.per_cgra_rows + self.per_cgra_columns - 1 
@@ -41,7 +68,8 @@ class ArchParser:
                   +------------------------>
                   0                        x (column) increases to the right: 0 at the left, up to `per_cgra_columns-1` at the right
                 """
-                tiles[r].append(Tile(c, r, self.num_registers, self.fu_types))
+                tiles[r].append(Tile(c, r, self.num_registers, self.fu_types,
+                                     self.input_fifo_depths, self.output_skid_depth))
         return tiles
 
     def parse_cgras(self):
@@ -110,7 +138,8 @@ class ArchParser:
 
     def parse_multi_cgra_param(self):
         cgras = self.parse_cgras()
-        return MultiCgraParam(self.cgra_rows, self.cgra_columns, cgras)
+        return MultiCgraParam(self.cgra_rows, self.cgra_columns, cgras, self.topology,
+                              self.boundary_link_latency)
 
     def get_simplest_cgra_param(self) -> ParamCGRA:
         """Returns the simplest(has the least number of functional units) CGRA parameter."""
@@ -1,19 +1,27 @@
 from ...lib.util.cgra.cgra_helper import get_links, configure_boundary_ports
 from ...lib.util.cgra.Tile import Tile
 from ...lib.util.cgra.DataSPM import DataSPM
+from ...lib.util.common import *
 from .ParamCGRA import ParamCGRA
 import copy
 
 
 class MultiCgraParam:
-    def __init__(self, rows, cols, cgras):
+    def __init__(self, rows, cols, cgras, topology=MULTI_CGRA_TOPOLOGY_MESH,
+                 boundary_link_latency=0):
         self.rows = rows
         self.cols = cols
         self.cgras = cgras
+        # Topology of the inter-CGRA NoC.
+        self.topology = topology
+        # Pipeline depth of the inter-CGRA boundary data links, 0 means
+        # the boundary tiles are directly connected.
+        self.boundary_link_latency = boundary_link_latency
 
     @classmethod
     def from_params(
-        cls, num_cgra_rows, num_cgra_cols, per_cgra_rows, per_cgra_cols
+        cls, num_cgra_rows, num_cgra_cols, per_cgra_rows, per_cgra_cols,
+        topology=MULTI_CGRA_TOPOLOGY_MESH
     ):
         """
         The constructor for customizing the MultiCgraParam.
@@ -84,10 +92,12 @@ class MultiCgraParam:
                     )
                 )
 
-        return cls(num_cgra_rows, num_cgra_cols, cgras)
+        return cls(num_cgra_rows, num_cgra_cols, cgras, topology)
 
     def __repr__(self):
         return (
             f"\nSize of MultiCGRAs: {self.rows}x{self.cols}\n"
-            + f"Size of CGRA(Tiles): {self.cgras[0][0].rows}x{self.cgras[0][0].columns}"
+            + f"Size of CGRA(Tiles): {self.cgras[0][0].rows}x{self.cgras[0][0].columns}\n"
+            + f"Topology of MultiCGRAs: {self.topology}\n"
+            + f"Latency of boundary links: {self.boundary_link_latency}"
         )
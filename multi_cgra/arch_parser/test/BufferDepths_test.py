@@ -0,0 +1,22 @@
+"""
+    Collects the test cases of the buffer depths of the tiles.
+"""
+import os
+from ..ArchParser import ArchParser
+from ....cgra.test import CgraTemplateRTL_test
+from ....lib.util.common import *
+
+arch_file_path = os.path.join(os.path.dirname(__file__), "arch_buffer_depths.yaml")
+
+def test_parse_buffer_depths():
+    tiles = ArchParser(arch_file_path).parse_cgras()[0][0].getValidTiles()
+    for tile in tiles:
+        depths = tile.getInputFifoDepths()
+        assert depths[PORT_INDEX_NORTH] == 4
+        assert depths[PORT_INDEX_SOUTH] == DEFAULT_TILE_INPUT_FIFO_DEPTH
+        assert depths[PORT_INDEX_WEST] == 4
+        assert depths[PORT_INDEX_EAST] == 3
+        assert tile.getOutputSkidDepth() == 2
+
+def test_cgra_buffer_depths(cmdline_opts):
+    CgraTemplateRTL_test.test_cgra_universal(cmdline_opts, arch_file_path)
@@ -55,7 +55,7 @@ class TestHarness(Component):
                 ctrl_steps_total,
                 mem_access_is_combinational,
                 controller2addr_map, expected_sink_out_pkt,
-                cmp_func):
+                cmp_func, topology = MULTI_CGRA_TOPOLOGY_MESH):
 
     CgraPayloadType = IntraCgraPktType.get_field_type(kAttrPayload)
     s.num_terminals = cgra_rows * cgra_columns
@@ -72,7 +72,8 @@ class TestHarness(Component):
                 num_registers_per_reg_bank,
                 ctrl_steps_per_iter, ctrl_steps_total,
                 mem_access_is_combinational,
-                FunctionUnit, FuList, "Mesh", controller2addr_map)
+                FunctionUnit, FuList, "Mesh", controller2addr_map,
+                topology = topology)
 
     # Connections
     s.expected_sink_out.recv //= s.dut.send_to_cpu_pkt
@@ -141,7 +142,8 @@ def initialize_test_harness(cmdline_opts,
                             num_banks_per_cgra = 2,
                             data_mem_size_per_bank = 16,
                             mem_access_is_combinational = True,
-                            test_name = "test_homo"):
+                            test_name = "test_homo",
+                            topology = MULTI_CGRA_TOPOLOGY_MESH):
   num_tile_inports = 4
   num_tile_outports = 4
   num_fu_inports = 4
@@ -4161,10 +4163,11 @@ def initialize_test_harness(cmdline_opts,
                    data_mem_size_per_bank, num_banks_per_cgra,
                    num_registers_per_reg_bank, src_ctrl_pkt, src_query_pkt,
                    ctrl_steps_per_iter, ctrl_steps_total, mem_access_is_combinational,
-                   controller2addr_map, expected_sink_out_pkt, cmp_func)
+                   controller2addr_map, expected_sink_out_pkt, cmp_func,
+                   topology)
   return th
 
-def test_sim_homo_2x2_2x2(cmdline_opts):
+def test_sim_homo_2x2_2x2(cmdline_opts, topology = MULTI_CGRA_TOPOLOGY_MESH):
   th = initialize_test_harness(cmdline_opts,
                                num_cgra_rows = 2,
                                num_cgra_columns = 2,
@@ -4172,7 +4175,8 @@ def test_sim_homo_2x2_2x2(cmdline_opts):
                                num_y_tiles_per_cgra = 2,
                                num_banks_per_cgra = 2,
                                data_mem_size_per_bank = 16,
-                               mem_access_is_combinational = False)
+                               mem_access_is_combinational = False,
+                               topology = topology)
   th.elaborate()
   th.dut.set_metadata(VerilogVerilatorImportPass.vl_Wno_list,
                       ['UNSIGNED', 'UNOPTFLAT', 'WIDTH', 'WIDTHCONCAT',
@@ -4180,6 +4184,12 @@ def test_sim_homo_2x2_2x2(cmdline_opts):
   th = config_model_with_cmdline_opts(th, cmdline_opts, duts = ['dut'])
   run_sim(th)
 
+def test_sim_homo_2x2_2x2_torus(cmdline_opts):
+  test_sim_homo_2x2_2x2(cmdline_opts, MULTI_CGRA_TOPOLOGY_TORUS)
+
+def test_sim_homo_2x2_2x2_ring(cmdline_opts):
+  test_sim_homo_2x2_2x2(cmdline_opts, MULTI_CGRA_TOPOLOGY_RING)
+
 def _enable_translate_recursively(m):
   m.set_metadata(VerilogTranslationPass.enable, True)
   for child in m.get_child_components(repr):
@@ -60,7 +60,9 @@ class TestHarness(Component):
                 id2validTiles, id2validLinks, id2dataSPM,
                 mem_access_is_combinational,
                 controller2addr_map, expected_sink_out_pkt,
-                cmp_func):
+                cmp_func, topology = MULTI_CGRA_TOPOLOGY_MESH,
+                boundary_link_latency = 0,
+                has_traffic_class_vcs = False):
 
     CgraPayloadType = IntraCgraPktType.get_field_type(kAttrPayload)
     s.num_terminals = cgra_rows * cgra_columns
@@ -81,7 +83,10 @@ class TestHarness(Component):
                 controller2addr_map, id2ctrlMemSize_map, id2cgraSize_map, 
                 id2validTiles, id2validLinks, id2dataSPM,
                 mem_access_is_combinational,
-                is_multi_cgra = True)
+                is_multi_cgra = True,
+                topology = topology,
+                boundary_link_latency = boundary_link_latency,
+                has_traffic_class_vcs = has_traffic_class_vcs)
 
     # Connections
     s.expected_sink_out.recv //= s.dut.send_to_cpu_pkt
@@ -150,7 +155,8 @@ def run_sim(test_harness, max_cycles = 200):
   test_harness.sim_tick()
 
 
-def test_mesh_multi_cgra_universal(cmdline_opts, arch_yaml_path = "arch.yaml"):
+def test_mesh_multi_cgra_universal(cmdline_opts, arch_yaml_path = "arch.yaml",
+                                   has_traffic_class_vcs = False):
   arch_file = os.path.join(os.path.dirname(__file__), arch_yaml_path)
   print(f"Use the architecture file: {arch_file}")
   arch_parser = ArchParser(arch_file)
@@ -366,7 +372,10 @@ def test_mesh_multi_cgra_universal(cmdline_opts, arch_yaml_path = "arch.yaml"):
                    id2ctrlMemSize_map, id2cgraSize_map, 
                    id2validTiles, id2validLinks, id2dataSPM,
                    mem_access_is_combinational,
-                   controller2addr_map, expected_sink_out_pkt, cmp_func)
+                   controller2addr_map, expected_sink_out_pkt, cmp_func,
+                   topology = multiCgraParam.topology,
+                   boundary_link_latency = multiCgraParam.boundary_link_latency,
+                   has_traffic_class_vcs = has_traffic_class_vcs)
 
   th.elaborate()
   th.dut.set_metadata(VerilogVerilatorImportPass.vl_Wno_list,
@@ -375,6 +384,18 @@ def test_mesh_multi_cgra_universal(cmdline_opts, arch_yaml_path = "arch.yaml"):
   th = config_model_with_cmdline_opts(th, cmdline_opts, duts = ['dut'])
   run_sim(th)
 
+def test_torus_multi_cgra_universal(cmdline_opts):
+  test_mesh_multi_cgra_universal(cmdline_opts, "arch_torus.yaml")
+
+def test_ring_multi_cgra_universal(cmdline_opts):
+  test_mesh_multi_cgra_universal(cmdline_opts, "arch_ring.yaml")
+
+def test_pipelined_boundary_links_multi_cgra_universal(cmdline_opts):
+  test_mesh_multi_cgra_universal(cmdline_opts, "arch_boundary_links.yaml")
+
+def test_traffic_class_vcs_multi_cgra_universal(cmdline_opts):
+  test_mesh_multi_cgra_universal(cmdline_opts, has_traffic_class_vcs = True)
+
 def test_simplified_multi_cgra(cmdline_opts, arch_yaml_path = "arch_override.yaml"):
   arch_file = os.path.join(os.path.dirname(__file__), arch_yaml_path)
   print(f"Use the architecture file: {arch_file}")
@@ -0,0 +1,230 @@
+"""
+=========================================================================
+TorusNetworkRTL_test.py
+=========================================================================
+Test for TorusNetworkRTL with CGRA message, and the benchmark comparing
+the hop count and the remote-load latency of the torus and the ring
+against the mesh.
+
+  Date : Oct 19, 2026
+"""
+
+from pymtl3 import *
+from ...lib.basic.val_rdy.SourceRTL import SourceRTL as TestSrcRTL
+from ...lib.basic.val_rdy.SinkRTL import SinkRTL as TestSinkRTL
+from ...lib.cmd_type import *
+from ...lib.messages import *
+from ...lib.util.common import *
+from ...lib.util.topology_helper import *
+from ...noc.PyOCN.pymtl3_net.meshnet.MeshNetworkRTL import MeshNetworkRTL
+from ...noc.PyOCN.pymtl3_net.ocnlib.ifcs.positions import mk_mesh_pos, mk_ring_pos
+from ...noc.PyOCN.pymtl3_net.ocnlib.test.stream_sinks import NetSinkRTL as TestNetSinkRTL
+from ...noc.PyOCN.pymtl3_net.ringnet.RingNetworkRTL import RingNetworkRTL
+from ...noc.PyOCN.pymtl3_net.torusnet.TorusNetworkRTL import TorusNetworkRTL
+
+#-------------------------------------------------------------------------
+# TestHarness
+#-------------------------------------------------------------------------
+
+class TestHarness(Component):
+
+  def construct(s, MsgType, ncols, nrows, src_msgs, sink_msgs):
+
+    s.num_terminals = ncols * nrows
+    MeshPos = mk_mesh_pos(ncols, nrows)
+    # The dateline VC of a packet is updated along the path.
+    cmp_fn = lambda a, b : a.payload.data == b.payload.data
+
+    s.srcs = [TestSrcRTL(MsgType, src_msgs[i])
+              for i in range(s.num_terminals)]
+    s.dut = TorusNetworkRTL(MsgType, MeshPos, ncols, nrows, 1)
+    s.sinks = [TestNetSinkRTL(MsgType, sink_msgs[i], cmp_fn = cmp_fn)
+               for i in range(s.num_terminals)]
+
+    # Connections
+    for i in range(s.num_terminals):
+      s.srcs[i].send //= s.dut.recv[i]
+      s.dut.send[i] //= s.sinks[i].recv
+
+  def done(s):
+    return all([src.done() for src in s.srcs]) and \
+           all([sink.done() for sink in s.sinks])
+
+  def line_trace(s):
+    return s.dut.line_trace()
+
+#-------------------------------------------------------------------------
+# RemoteLoadHarness
+#-------------------------------------------------------------------------
+# CGRA `requester` issues a load request towards CGRA `responder`, which
+# immediately turns it into a load response back to the requester. The
+# inter-CGRA NoC is the one MeshMultiCgraTemplateRTL builds for `topology`.
+
+class RemoteLoadHarness(Component):
+
+  def construct(s, MsgType, topology, ncols, nrows, requester,
+                responder, request, response):
+
+    s.num_terminals = ncols * nrows
+    cmp_fn = lambda a, b : a.payload.data == b.payload.data
+    SrcXType = MsgType.get_field_type(kAttrSrcX)
+    SrcYType = MsgType.get_field_type(kAttrSrcY)
+    CgraIdType = MsgType.get_field_type(kAttrSrc)
+
+    s.src = TestSrcRTL(MsgType, [request])
+    s.sink = TestSinkRTL(MsgType, [response], cmp_fn = cmp_fn)
+    if topology == MULTI_CGRA_TOPOLOGY_TORUS:
+      s.dut = TorusNetworkRTL(MsgType, mk_mesh_pos(ncols, nrows), ncols, nrows, 1)
+    elif topology == MULTI_CGRA_TOPOLOGY_RING:
+      s.dut = RingNetworkRTL(MsgType, mk_ring_pos(s.num_terminals),
+                             s.num_terminals, 1)
+    else:
+      s.dut = MeshNetworkRTL(MsgType, mk_mesh_pos(ncols, nrows), ncols, nrows, 1)
+
+    # Connections
+    s.src.send //= s.dut.recv[requester]
+    s.dut.send[requester] //= s.sink.recv
+    for i in range(s.num_terminals):
+      if i != requester and i != responder:
+        s.dut.recv[i].val //= 0
+        s.dut.recv[i].msg //= MsgType()
+        s.dut.send[i].rdy //= 0
+
+    @update
+    def update_responder():
+      s.dut.recv[responder].val @= s.dut.send[responder].val
+      s.dut.recv[responder].msg @= s.dut.send[responder].msg
+      s.dut.recv[responder].msg.src @= s.dut.send[responder].msg.dst
+      s.dut.recv[responder].msg.dst @= s.dut.send[responder].msg.src
+      s.dut.recv[responder].msg.src_x @= s.dut.send[responder].msg.dst_x
+      s.dut.recv[responder].msg.src_y @= s.dut.send[responder].msg.dst_y
+      s.dut.recv[responder].msg.dst_x @= s.dut.send[responder].msg.src_x
+      s.dut.recv[responder].msg.dst_y @= s.dut.send[responder].msg.src_y
+      s.dut.recv[responder].msg.payload.cmd @= CMD_LOAD_RESPONSE
+
+    @update
+    def update_responder_rdy():
+      s.dut.send[responder].rdy @= s.dut.recv[responder].rdy
+
+  def done(s):
+    return s.src.done() and s.sink.done()
+
+  def line_trace(s):
+    return s.dut.line_trace()
+
+#-------------------------------------------------------------------------
+# run_sim
+#-------------------------------------------------------------------------
+
+def run_sim(test_harness, max_cycles = 100):
+
+  # Create a simulator
+  test_harness.elaborate()
+  test_harness.apply(DefaultPassGroup())
+  test_harness.sim_reset()
+
+  # Run simulation
+  ncycles = 0
+  print()
+  print("{}:{}".format(ncycles, test_harness.line_trace()))
+  while not test_harness.done() and ncycles < max_cycles:
+    test_harness.sim_tick()
+    ncycles += 1
+    print("{}:{}".format(ncycles, test_harness.line_trace()))
+
+  # Check timeout
+  assert ncycles < max_cycles
+
+  test_harness.sim_tick()
+  test_harness.sim_tick()
+  test_harness.sim_tick()
+  return ncycles
+
+#-------------------------------------------------------------------------
+# Test cases
+#-------------------------------------------------------------------------
+
+ncols = 4
+nrows = 4
+num_terminals = ncols * nrows
+num_tiles = 4
+num_rd_tiles = 3
+
+DataType = mk_data(32, 1)
+CtrlType = mk_ctrl()
+CgraPayloadType = mk_cgra_payload(DataType,
+                                  mk_bits(8),
+                                  CtrlType,
+                                  mk_bits(4))
+InterCgraPktType = mk_inter_cgra_pkt(ncols,
+                                     nrows,
+                                     num_tiles,
+                                     num_rd_tiles,
+                                     CgraPayloadType)
+
+def mk_pkt(src, dst, cmd, data):
+  src_x, src_y = src % ncols, src // ncols
+  dst_x, dst_y = dst % ncols, dst // ncols
+                        # src  dst  src_x  src_y  dst_x  dst_y  src_tile dst_tile remote_src_port opq vc
+  return InterCgraPktType(src, dst, src_x, src_y, dst_x, dst_y, 0,       0,       0,              0,  0,
+                          CgraPayloadType(cmd, data = DataType(data, 1)))
+
+def test_wraparound():
+  # Each corner CGRA sends a packet to the other three corners, which
+  # are all one hop away through the wraparound links.
+  corners = [0, ncols - 1, num_terminals - ncols, num_terminals - 1]
+  src_msgs = [[] for _ in range(num_terminals)]
+  sink_msgs = [[] for _ in range(num_terminals)]
+  data = 1
+  for src in corners:
+    for dst in corners:
+      if src != dst:
+        pkt = mk_pkt(src, dst, CMD_STORE_REQUEST, data)
+        src_msgs[src].append(pkt)
+        sink_msgs[dst].append(pkt)
+        data += 1
+  th = TestHarness(InterCgraPktType, ncols, nrows, src_msgs, sink_msgs)
+  run_sim(th)
+
+def test_average_hop_count():
+  report = compare_topologies(ncols, nrows)
+  print(report)
+  assert hop_count(MULTI_CGRA_TOPOLOGY_MESH, 0, num_terminals - 1, ncols, nrows) == 6
+  assert hop_count(MULTI_CGRA_TOPOLOGY_TORUS, 0, num_terminals - 1, ncols, nrows) == 2
+  assert report[MULTI_CGRA_TOPOLOGY_MESH]["avg_hops"] == 8 / 3
+  assert report[MULTI_CGRA_TOPOLOGY_TORUS]["avg_hops"] == 32 / 15
+  assert report[MULTI_CGRA_TOPOLOGY_TORUS]["avg_remote_load_latency"] < \
+         report[MULTI_CGRA_TOPOLOGY_MESH]["avg_remote_load_latency"]
+
+def test_remote_load_latency():
+  # The far corner is 6 hops away in the mesh but only 2 in the torus,
+  # and 1 in the ring, where it is next to CGRA 0.
+  requester = 0
+  responder = num_terminals - 1
+  request = mk_pkt(requester, responder, CMD_LOAD_REQUEST, 0xface)
+  response = mk_pkt(responder, requester, CMD_LOAD_RESPONSE, 0xface)
+  cycles = {}
+  for topology in MULTI_CGRA_TOPOLOGIES:
+    th = RemoteLoadHarness(InterCgraPktType, topology, ncols, nrows,
+                           requester, responder, request, response)
+    cycles[topology] = run_sim(th)
+  print(cycles)
+  assert cycles[MULTI_CGRA_TOPOLOGY_TORUS] < cycles[MULTI_CGRA_TOPOLOGY_MESH]
+  assert cycles[MULTI_CGRA_TOPOLOGY_RING] < cycles[MULTI_CGRA_TOPOLOGY_TORUS]
+
+def test_ring_remote_load_latency():
+  # CGRA 8 is the farthest one from CGRA 0 in a ring of 16 CGRAs, i.e., 8
+  # hops away either way, whereas it is only 2 hops away in the mesh.
+  requester = 0
+  responder = num_terminals // 2
+  request = mk_pkt(requester, responder, CMD_LOAD_REQUEST, 0xbeef)
+  response = mk_pkt(responder, requester, CMD_LOAD_RESPONSE, 0xbeef)
+  cycles = {}
+  for topology in [MULTI_CGRA_TOPOLOGY_MESH, MULTI_CGRA_TOPOLOGY_RING]:
+    th = RemoteLoadHarness(InterCgraPktType, topology, ncols, nrows,
+                           requester, responder, request, response)
+    cycles[topology] = run_sim(th)
+  print(cycles)
+  assert hop_count(MULTI_CGRA_TOPOLOGY_RING, requester, responder, ncols, nrows) == 8
+  assert cycles[MULTI_CGRA_TOPOLOGY_MESH] < cycles[MULTI_CGRA_TOPOLOGY_RING]
+
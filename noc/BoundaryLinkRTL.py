@@ -0,0 +1,89 @@
+"""
+=========================================================================
+BoundaryLinkRTL.py
+=========================================================================
+Data link between the boundary tiles of two adjacent CGRAs. The long
+wire is cut by `latency` pipeline registers, and the flow control is
+credit-based: the receiver side has a `num_credits`-entry queue, whose
+free entries are tracked by a credit counter at the sender side. So the
+ready signal of the sender never depends on the far end combinationally.
+One word per cycle is sustained as long as `num_credits` covers the
+credit round trip, i.e., 2 * latency + 2 by default. Latency 0 is a
+plain wire, i.e., the same as connecting the two tiles directly.
+
+  Date : Oct 19, 2026
+"""
+
+from pymtl3 import *
+from ..lib.basic.val_rdy.ifcs import ValRdyRecvIfcRTL as RecvIfcRTL
+from ..lib.basic.val_rdy.ifcs import ValRdySendIfcRTL as SendIfcRTL
+from ..lib.basic.val_rdy.queues import NormalQueueRTL
+
+class BoundaryLinkRTL(Component):
+
+  def construct(s, DataType, latency = 1, num_credits = None):
+
+    # Constants.
+    if num_credits is None:
+      num_credits = 2 * latency + 2
+    s.latency = latency
+    s.num_credits = num_credits
+
+    # Interfaces.
+    s.recv = RecvIfcRTL(DataType)
+    s.send = SendIfcRTL(DataType)
+
+    if latency == 0:
+      s.recv //= s.send
+
+    else:
+      assert num_credits > 0
+      CreditType = mk_bits(clog2(num_credits + 1))
+
+      # Components.
+      s.data_val = [Wire(b1) for _ in range(latency)]
+      s.data_msg = [Wire(DataType) for _ in range(latency)]
+      s.credit_return = [Wire(b1) for _ in range(latency)]
+      s.credits = Wire(CreditType)
+      # Never overflows as the sender only sends with credits.
+      s.queue = NormalQueueRTL(DataType, num_credits)
+
+      # Connections.
+      s.queue.recv.val //= s.data_val[latency - 1]
+      s.queue.recv.msg //= s.data_msg[latency - 1]
+      s.queue.send //= s.send
+
+      @update
+      def update_recv_rdy():
+        s.recv.rdy @= s.credits > CreditType(0)
+
+      @update_ff
+      def update_pipeline():
+        if s.reset:
+          for i in range(latency):
+            s.data_val[i] <<= 0
+            s.data_msg[i] <<= DataType()
+            s.credit_return[i] <<= 0
+        else:
+          s.data_val[0] <<= s.recv.val & s.recv.rdy
+          s.data_msg[0] <<= s.recv.msg
+          s.credit_return[0] <<= s.send.val & s.send.rdy
+          for i in range(1, latency):
+            s.data_val[i] <<= s.data_val[i - 1]
+            s.data_msg[i] <<= s.data_msg[i - 1]
+            s.credit_return[i] <<= s.credit_return[i - 1]
+
+      @update_ff
+      def update_credits():
+        if s.reset:
+          s.credits <<= CreditType(num_credits)
+        elif (s.recv.val & s.recv.rdy) & ~s.credit_return[latency - 1]:
+          s.credits <<= s.credits - CreditType(1)
+        elif ~(s.recv.val & s.recv.rdy) & s.credit_return[latency - 1]:
+          s.credits <<= s.credits + CreditType(1)
+
+  def line_trace(s):
+    if s.latency == 0:
+      return f"{s.recv}(0){s.send}"
+    return f"{s.recv}({s.credits}){s.send}"
+
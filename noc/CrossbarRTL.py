@@ -26,7 +26,9 @@ class CrossbarRTL(Component):
                 num_cgras = 4,
                 num_tiles = 4,
                 ctrl_mem_size = 6,
-                outport_towards_local_base_id = 4):
+                outport_towards_local_base_id = 4,
+                num_prologue_slots = None,
+                has_context_port = False):
 
     PredicateType = DataType.get_field_type(kAttrPredicate)
     InType = mk_bits(clog2(num_inports + 1))
@@ -34,6 +36,21 @@ class CrossbarRTL(Component):
     NumInportType = mk_bits(clog2(num_index))
     PrologueCountType = mk_bits(clog2(PROLOGUE_MAX_COUNT + 1))
     CtrlAddrType = mk_bits(clog2(ctrl_mem_size))
+    # The prologue counters are either kept for every (ctrl address,
+    # inport) pair, or only for the pairs having a non-zero prologue count,
+    # in a table of `num_prologue_slots` entries searched by the current
+    # ctrl address. The latter requires `num_prologue_slots` to be no less
+    # than the number of such pairs.
+    has_prologue_table = num_prologue_slots is not None
+    # The table can be checked against the configuration packets with
+    # `check_prologue_slots` (see lib/util/config_helper.py).
+    assert not has_prologue_table or num_prologue_slots >= 1, \
+        f"num_prologue_slots must be at least 1, got {num_prologue_slots}."
+    # With `has_context_port`, the prologue counters are exposed to be
+    # saved upon the context switch, and `restore` overwrites them, so that
+    # a kernel preempted during its prologue resumes it where it left off.
+    assert not (has_prologue_table and has_context_port), \
+        "The prologue table cannot be saved upon the context switch."
 
     # Interface
     s.recv_opt = RecvIfcRTL(CtrlType)
@@ -91,8 +108,6 @@ class CrossbarRTL(Component):
     # whether the prologue steps have already been satisfied.
     s.during_prologue_allowing_vector = Wire(num_outports)
     s.recv_valid_or_during_prologue_allowing_vector = Wire(num_outports)
-    s.prologue_counter = [[Wire(PrologueCountType) for _ in range(num_inports)] for _ in range(ctrl_mem_size)]
-    s.prologue_counter_next = [[Wire(PrologueCountType) for _ in range(num_inports)] for _ in range(ctrl_mem_size)]
     s.prologue_count_inport = [[InPort(PrologueCountType) for _ in range(num_inports)] for _ in range(ctrl_mem_size)]
     # Wiki of "Workaround for sv2v Flattening Multi-dimensional Arrays into One-dimensional Vectors"
     # https://github.com/tancheng/VectorCGRA/wiki/Workaround-for-sv2v-Flattening-Multi%E2%80%90dimensional-Arrays-into-One%E2%80%90dimensional-Vectors
@@ -102,6 +117,46 @@ class CrossbarRTL(Component):
       for i in range(num_inports):
         s.prologue_count_inport[addr][i] //= s.prologue_count_wire[addr][i]
 
+    # Prologue counter of each inport at the current ctrl address, and
+    # whether it increases upon the current ctrl signal.
+    s.prologue_counter_cur = [Wire(PrologueCountType) for _ in range(num_inports)]
+    s.prologue_count_cur = [Wire(PrologueCountType) for _ in range(num_inports)]
+    s.prologue_counter_inc = [Wire(b1) for _ in range(num_inports)]
+
+    if has_prologue_table:
+      SlotType = mk_bits(max(clog2(num_prologue_slots), 1))
+      s.prologue_slot_valid = [Wire(b1) for _ in range(num_prologue_slots)]
+      s.prologue_slot_addr = [Wire(CtrlAddrType) for _ in range(num_prologue_slots)]
+      s.prologue_slot_inport = [Wire(NumInportType) for _ in range(num_prologue_slots)]
+      s.prologue_slot_counter = [Wire(PrologueCountType) for _ in range(num_prologue_slots)]
+      s.prologue_slot_valid_next = [Wire(b1) for _ in range(num_prologue_slots)]
+      s.prologue_slot_addr_next = [Wire(CtrlAddrType) for _ in range(num_prologue_slots)]
+      s.prologue_slot_inport_next = [Wire(NumInportType) for _ in range(num_prologue_slots)]
+      s.prologue_slot_counter_next = [Wire(PrologueCountType) for _ in range(num_prologue_slots)]
+      # Slot matching each inport at the current ctrl address.
+      s.prologue_slot_hit = [Wire(b1) for _ in range(num_inports)]
+      s.prologue_slot_idx = [Wire(SlotType) for _ in range(num_inports)]
+      s.prologue_slot_taken = Wire(num_prologue_slots)
+      s.prologue_slot_allocated = Wire(b1)
+    else:
+      s.prologue_counter = [[Wire(PrologueCountType) for _ in range(num_inports)] for _ in range(ctrl_mem_size)]
+      s.prologue_counter_next = [[Wire(PrologueCountType) for _ in range(num_inports)] for _ in range(ctrl_mem_size)]
+
+    if has_context_port:
+      s.prologue_counter_outport = [[OutPort(PrologueCountType) for _ in range(num_inports)] for _ in range(ctrl_mem_size)]
+      s.restore = InPort(b1)
+      s.restore_prologue_counter = [[InPort(PrologueCountType) for _ in range(num_inports)] for _ in range(ctrl_mem_size)]
+      for addr in range(ctrl_mem_size):
+        for i in range(num_inports):
+          s.prologue_counter_outport[addr][i] //= s.prologue_counter[addr][i]
+    elif not has_prologue_table:
+      s.restore = Wire(b1)
+      s.restore_prologue_counter = [[Wire(PrologueCountType) for _ in range(num_inports)] for _ in range(ctrl_mem_size)]
+      s.restore //= 0
+      for addr in range(ctrl_mem_size):
+        for i in range(num_inports):
+          s.restore_prologue_counter[addr][i] //= 0
+
     # Routing logic
     @update
     def update_signal():
@@ -146,32 +201,120 @@ class CrossbarRTL(Component):
         s.recv_opt.rdy @= s.all_send_accepted & \
                           reduce_and(s.recv_valid_or_during_prologue_allowing_vector)
 
+    @update
+    def update_prologue_count_cur():
+      for i in range(num_inports):
+        s.prologue_count_cur[i] @= s.prologue_count_wire[s.ctrl_addr_inport][i]
+
+    @update
+    def update_prologue_counter_inc():
+      for i in range(num_inports):
+        s.prologue_counter_inc[i] @= 0
+        for j in range(num_outports):
+          if s.recv_opt.rdy & \
+             (s.in_dir[j] > 0) & \
+             (s.in_dir_local[j] == i) & \
+             (s.prologue_counter_cur[i] < s.prologue_count_cur[i]):
+            s.prologue_counter_inc[i] @= 1
+
     @update_ff
-    def update_prologue_counter():
+    def update_send_accepted():
       if s.reset | s.clear:
-        for addr in range(ctrl_mem_size):
-          for i in range(num_inports):
-            s.prologue_counter[addr][i] <<= 0
         s.send_accepted <<= 0
       else:
-        for addr in range(ctrl_mem_size):
-          for i in range(num_inports):
-            s.prologue_counter[addr][i] <<= s.prologue_counter_next[addr][i]
         s.send_accepted <<= s.send_accepted_next
 
-    @update
-    def update_prologue_counter_next():
-      # Nested-loop to update the prologue counter, to avoid dynamic indexing to
-      # work-around Yosys issue: https://github.com/tancheng/VectorCGRA/issues/148
-      for addr in range(ctrl_mem_size):
+    if has_prologue_table:
+
+      @update
+      def update_prologue_slot_lookup():
+        for i in range(num_inports):
+          s.prologue_slot_hit[i] @= 0
+          s.prologue_slot_idx[i] @= 0
+          s.prologue_counter_cur[i] @= 0
+          for k in range(num_prologue_slots):
+            if s.prologue_slot_valid[k] & \
+               (s.prologue_slot_addr[k] == s.ctrl_addr_inport) & \
+               (s.prologue_slot_inport[k] == NumInportType(i)):
+              s.prologue_slot_hit[i] @= 1
+              s.prologue_slot_idx[i] @= SlotType(k)
+              s.prologue_counter_cur[i] @= s.prologue_slot_counter[k]
+
+      @update
+      def update_prologue_slot_next():
+        for k in range(num_prologue_slots):
+          s.prologue_slot_valid_next[k] @= s.prologue_slot_valid[k]
+          s.prologue_slot_addr_next[k] @= s.prologue_slot_addr[k]
+          s.prologue_slot_inport_next[k] @= s.prologue_slot_inport[k]
+          s.prologue_slot_counter_next[k] @= s.prologue_slot_counter[k]
+        s.prologue_slot_taken @= 0
+        for k in range(num_prologue_slots):
+          s.prologue_slot_taken[k] @= s.prologue_slot_valid[k]
+        # Nested-loop to avoid dynamic indexing to work-around Yosys issue:
+        # https://github.com/tancheng/VectorCGRA/issues/148
         for i in range(num_inports):
-          s.prologue_counter_next[addr][i] @= s.prologue_counter[addr][i]
-          for j in range(num_outports):
-            if s.recv_opt.rdy & \
-              (s.in_dir[j] > 0) & \
-              (s.in_dir_local[j] == i) & \
-              (addr == s.ctrl_addr_inport) & \
-              (s.prologue_counter[addr][i] < s.prologue_count_wire[addr][i]):
+          s.prologue_slot_allocated @= 0
+          if s.prologue_counter_inc[i]:
+            if s.prologue_slot_hit[i]:
+              for k in range(num_prologue_slots):
+                if s.prologue_slot_idx[i] == SlotType(k):
+                  s.prologue_slot_counter_next[k] @= s.prologue_slot_counter[k] + 1
+            else:
+              # The first increment allocates a free slot, if any.
+              for k in range(num_prologue_slots):
+                if ~s.prologue_slot_taken[k] & ~s.prologue_slot_allocated:
+                  s.prologue_slot_allocated @= 1
+                  s.prologue_slot_taken[k] @= 1
+                  s.prologue_slot_valid_next[k] @= 1
+                  s.prologue_slot_addr_next[k] @= s.ctrl_addr_inport
+                  s.prologue_slot_inport_next[k] @= NumInportType(i)
+                  s.prologue_slot_counter_next[k] @= 1
+
+      @update_ff
+      def update_prologue_slot():
+        if s.reset | s.clear:
+          for k in range(num_prologue_slots):
+            s.prologue_slot_valid[k] <<= 0
+            s.prologue_slot_addr[k] <<= 0
+            s.prologue_slot_inport[k] <<= 0
+            s.prologue_slot_counter[k] <<= 0
+        else:
+          for k in range(num_prologue_slots):
+            s.prologue_slot_valid[k] <<= s.prologue_slot_valid_next[k]
+            s.prologue_slot_addr[k] <<= s.prologue_slot_addr_next[k]
+            s.prologue_slot_inport[k] <<= s.prologue_slot_inport_next[k]
+            s.prologue_slot_counter[k] <<= s.prologue_slot_counter_next[k]
+
+    else:
+
+      @update
+      def update_prologue_counter_cur():
+        for i in range(num_inports):
+          s.prologue_counter_cur[i] @= s.prologue_counter[s.ctrl_addr_inport][i]
+
+      @update_ff
+      def update_prologue_counter():
+        if s.reset | s.clear:
+          for addr in range(ctrl_mem_size):
+            for i in range(num_inports):
+              s.prologue_counter[addr][i] <<= 0
+        elif s.restore:
+          for addr in range(ctrl_mem_size):
+            for i in range(num_inports):
+              s.prologue_counter[addr][i] <<= s.restore_prologue_counter[addr][i]
+        else:
+          for addr in range(ctrl_mem_size):
+            for i in range(num_inports):
+              s.prologue_counter[addr][i] <<= s.prologue_counter_next[addr][i]
+
+      @update
+      def update_prologue_counter_next():
+        # Nested-loop to update the prologue counter, to avoid dynamic indexing to
+        # work-around Yosys issue: https://github.com/tancheng/VectorCGRA/issues/148
+        for addr in range(ctrl_mem_size):
+          for i in range(num_inports):
+            s.prologue_counter_next[addr][i] @= s.prologue_counter[addr][i]
+            if s.prologue_counter_inc[i] & (addr == s.ctrl_addr_inport):
               s.prologue_counter_next[addr][i] @= s.prologue_counter[addr][i] + 1
 
     @update
@@ -204,8 +347,8 @@ class CrossbarRTL(Component):
         if s.in_dir[i] > 0:
           # Records whether the prologue steps have already been satisfied.
           s.during_prologue_allowing_vector[i] @= \
-            (s.prologue_counter[s.ctrl_addr_inport][s.in_dir_local[i]] < \
-             s.prologue_count_wire[s.ctrl_addr_inport][s.in_dir_local[i]])
+            (s.prologue_counter_cur[s.in_dir_local[i]] < \
+             s.prologue_count_cur[s.in_dir_local[i]])
         else:
           s.during_prologue_allowing_vector[i] @= 0
 
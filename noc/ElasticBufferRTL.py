@@ -0,0 +1,54 @@
+"""
+=========================================================================
+ElasticBufferRTL.py
+=========================================================================
+Elastic buffer with val/rdy interfaces and a configurable number of
+entries, used as the input FIFOs and the output skid buffers of the
+tiles. A deeper buffer absorbs the skew between the producers of a tile
+instead of stalling them, at the cost of one register per entry. Zero
+entry is a plain wire, and the two-entry buffer is equivalent to the
+`ChannelRTL(latency = 1)` the tiles used to have. The buffer can also be
+flushed through the `clear` port, like the `ChannelWithClearRTL`.
+
+  Date : Oct 19, 2026
+"""
+
+from pymtl3 import *
+from ..lib.basic.val_rdy.ifcs import ValRdyRecvIfcRTL as RecvIfcRTL
+from ..lib.basic.val_rdy.ifcs import ValRdySendIfcRTL as SendIfcRTL
+from ..lib.basic.val_rdy.queues import NormalQueueRTL, NormalQueueWithClearRTL
+
+class ElasticBufferRTL(Component):
+
+  def construct(s, DataType, num_entries = 2, has_clear = False):
+
+    # Constants.
+    assert num_entries >= 0
+    s.num_entries = num_entries
+
+    # Interfaces.
+    s.recv = RecvIfcRTL(DataType)
+    s.send = SendIfcRTL(DataType)
+    if has_clear:
+      s.clear = InPort(b1)
+
+    if num_entries == 0:
+      s.recv //= s.send
+
+    else:
+      # Components.
+      if has_clear:
+        s.queue = NormalQueueWithClearRTL(DataType, num_entries)
+        s.clear //= s.queue.clear
+      else:
+        s.queue = NormalQueueRTL(DataType, num_entries)
+
+      # Connections.
+      s.recv //= s.queue.recv
+      s.queue.send //= s.send
+
+  def line_trace(s):
+    if s.num_entries == 0:
+      return f"{s.recv}(0){s.send}"
+    return f"{s.recv}({s.queue.count}){s.send}"
+
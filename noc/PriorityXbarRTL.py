@@ -0,0 +1,82 @@
+"""
+=========================================================================
+PriorityXbarRTL.py
+=========================================================================
+Crossbar with static priority arbitration. Each inport is buffered by a
+queue, and each outport always grants the highest priority inport whose
+head packet targets it (ties are broken by the lower inport index).
+Unlike the round-robin XbarRTL, a low priority stream can never delay a
+high priority one, which is used to prioritize the traffic classes
+towards the inter-CGRA NoC.
+
+  Date : Oct 19, 2026
+"""
+
+from pymtl3 import *
+from ..lib.basic.val_rdy.ifcs import ValRdyRecvIfcRTL as RecvIfcRTL
+from ..lib.basic.val_rdy.ifcs import ValRdySendIfcRTL as SendIfcRTL
+from ..lib.basic.val_rdy.queues import NormalQueueRTL
+
+class PriorityXbarRTL(Component):
+
+  def construct(s, PacketType, num_inports, num_outports,
+                inport_priorities, num_entries = 2):
+
+    assert len(inport_priorities) == num_inports
+
+    # Constants.
+    OutPortType = mk_bits(max(clog2(num_outports), 1))
+    DstType = PacketType.get_field_type('dst')
+    # The queues are sorted from the highest to the lowest priority, so
+    # that the arbitration simply grants the first valid one.
+    ranked_inports = sorted(range(num_inports),
+                            key = lambda i: -inport_priorities[i])
+
+    # Interfaces.
+    s.recv = [RecvIfcRTL(PacketType) for _ in range(num_inports)]
+    s.send = [SendIfcRTL(PacketType) for _ in range(num_outports)]
+
+    # Components.
+    s.queues = [NormalQueueRTL(PacketType, num_entries)
+                for _ in range(num_inports)]
+    s.granted = [Wire(b1) for _ in range(num_outports)]
+    s.queue_granted = [Wire(b1) for _ in range(num_inports)]
+    s.queue_outport = [Wire(OutPortType) for _ in range(num_inports)]
+
+    # Connections.
+    for rank in range(num_inports):
+      s.recv[ranked_inports[rank]] //= s.queues[rank].recv
+
+    @update
+    def update_arbitration():
+      for i in range(num_inports):
+        s.queue_granted[i] @= 0
+        s.queue_outport[i] @= 0
+      for o in range(num_outports):
+        s.granted[o] @= 0
+        s.send[o].val @= 0
+        s.send[o].msg @= PacketType()
+        for i in range(num_inports):
+          if ~s.granted[o] & s.queues[i].send.val & \
+             (s.queues[i].send.msg.dst == DstType(o)):
+            s.granted[o] @= 1
+            s.queue_granted[i] @= 1
+            s.queue_outport[i] @= OutPortType(o)
+            s.send[o].val @= 1
+            s.send[o].msg @= s.queues[i].send.msg
+
+    # The ready signals are derived in a separate block, as the downstream
+    # could decide its readiness based on the granted message.
+    @update
+    def update_queue_rdy():
+      for i in range(num_inports):
+        s.queues[i].send.rdy @= 0
+        for o in range(num_outports):
+          if s.queue_granted[i] & (s.queue_outport[i] == OutPortType(o)):
+            s.queues[i].send.rdy @= s.send[o].rdy
+
+  def line_trace(s):
+    recv_str = "|".join([str(ifc) for ifc in s.recv])
+    send_str = "|".join([str(ifc) for ifc in s.send])
+    return f"{recv_str}(){send_str}"
+
@@ -0,0 +1,136 @@
+"""
+=========================================================================
+VcMeshNetworkRTL.py
+=========================================================================
+Mesh network built with VcMeshRouterRTL. It keeps the single val/rdy
+port per terminal of MeshNetworkRTL: the injected packet enters the VC
+indicated by its `vc_id`, and the ejected packets are buffered per VC,
+the highest VC being delivered to the terminal first. So the packets of
+a higher traffic class (e.g., load responses) are never stuck behind the
+ones of a lower traffic class (e.g., load requests) that the terminal
+cannot accept yet.
+
+  Date : Oct 19, 2026
+"""
+
+from pymtl3 import *
+from .VcMeshRouterRTL import VcMeshRouterRTL
+from ..lib.basic.val_rdy.ifcs import ValRdyRecvIfcRTL as RecvIfcRTL
+from ..lib.basic.val_rdy.ifcs import ValRdySendIfcRTL as SendIfcRTL
+from ..lib.basic.val_rdy.queues import NormalQueueRTL
+from ..lib.util.data_struct_attr import *
+from ..noc.PyOCN.pymtl3_net.meshnet.directions import *
+
+class VcMeshNetworkRTL(Component):
+
+  def construct(s, PacketType, PositionType, ncols = 4, nrows = 4,
+                num_vcs = None, num_entries = 2):
+
+    # Constants.
+    VcIdType = PacketType.get_field_type(kAttrVcId)
+    if num_vcs is None:
+      num_vcs = 1 << VcIdType.nbits
+    assert num_vcs <= (1 << VcIdType.nbits)
+    s.num_routers = ncols * nrows
+    s.num_terminals = s.num_routers
+    s.num_vcs = num_vcs
+
+    # Interfaces.
+    s.recv = [RecvIfcRTL(PacketType) for _ in range(s.num_terminals)]
+    s.send = [SendIfcRTL(PacketType) for _ in range(s.num_terminals)]
+
+    # Components.
+    s.routers = [VcMeshRouterRTL(PacketType, PositionType, num_vcs,
+                                 num_entries)
+                 for _ in range(s.num_routers)]
+    s.ejection_queues = [NormalQueueRTL(PacketType, num_entries)
+                         for _ in range(s.num_terminals * num_vcs)]
+    s.ejection_granted = [Wire(b1) for _ in range(s.num_terminals * num_vcs)]
+    s.injection_val = [Wire(b1) for _ in range(s.num_terminals * num_vcs)]
+
+    # Connections.
+    for y in range(nrows):
+      for x in range(ncols):
+        s.routers[y * ncols + x].pos.pos_x //= x
+        s.routers[y * ncols + x].pos.pos_y //= y
+
+    for i in range(s.num_routers):
+      for v in range(num_vcs):
+        if i // ncols > 0:
+          s.routers[i].send[SOUTH * num_vcs + v] //= \
+              s.routers[i - ncols].recv[NORTH * num_vcs + v]
+        else:
+          s.routers[i].send[SOUTH * num_vcs + v].rdy //= 0
+          s.routers[i].recv[SOUTH * num_vcs + v].val //= 0
+          s.routers[i].recv[SOUTH * num_vcs + v].msg //= PacketType()
+
+        if i // ncols < nrows - 1:
+          s.routers[i].send[NORTH * num_vcs + v] //= \
+              s.routers[i + ncols].recv[SOUTH * num_vcs + v]
+        else:
+          s.routers[i].send[NORTH * num_vcs + v].rdy //= 0
+          s.routers[i].recv[NORTH * num_vcs + v].val //= 0
+          s.routers[i].recv[NORTH * num_vcs + v].msg //= PacketType()
+
+        if i % ncols > 0:
+          s.routers[i].send[WEST * num_vcs + v] //= \
+              s.routers[i - 1].recv[EAST * num_vcs + v]
+        else:
+          s.routers[i].send[WEST * num_vcs + v].rdy //= 0
+          s.routers[i].recv[WEST * num_vcs + v].val //= 0
+          s.routers[i].recv[WEST * num_vcs + v].msg //= PacketType()
+
+        if i % ncols < ncols - 1:
+          s.routers[i].send[EAST * num_vcs + v] //= \
+              s.routers[i + 1].recv[WEST * num_vcs + v]
+        else:
+          s.routers[i].send[EAST * num_vcs + v].rdy //= 0
+          s.routers[i].recv[EAST * num_vcs + v].val //= 0
+          s.routers[i].recv[EAST * num_vcs + v].msg //= PacketType()
+
+        s.routers[i].recv[SELF * num_vcs + v].val //= \
+            s.injection_val[i * num_vcs + v]
+        s.routers[i].recv[SELF * num_vcs + v].msg //= s.recv[i].msg
+        s.routers[i].send[SELF * num_vcs + v] //= \
+            s.ejection_queues[i * num_vcs + v].recv
+
+    @update
+    def update_injection():
+      for t in range(s.num_terminals):
+        s.recv[t].rdy @= 0
+        for v in range(num_vcs):
+          s.injection_val[t * num_vcs + v] @= 0
+          if s.recv[t].msg.vc_id == VcIdType(v):
+            s.injection_val[t * num_vcs + v] @= s.recv[t].val
+            s.recv[t].rdy @= s.routers[t].recv[SELF * num_vcs + v].rdy
+
+    @update
+    def update_ejection():
+      for t in range(s.num_terminals):
+        s.send[t].val @= 0
+        s.send[t].msg @= PacketType()
+        for v in range(num_vcs):
+          s.ejection_granted[t * num_vcs + v] @= 0
+        # The last valid one, i.e., the highest VC, wins.
+        for v in range(num_vcs):
+          if s.ejection_queues[t * num_vcs + v].send.val:
+            for u in range(v):
+              s.ejection_granted[t * num_vcs + u] @= 0
+            s.ejection_granted[t * num_vcs + v] @= 1
+            s.send[t].val @= 1
+            s.send[t].msg @= s.ejection_queues[t * num_vcs + v].send.msg
+
+    # The terminal could decide its readiness based on the delivered
+    # message, so the ready signals are derived in a separate block.
+    @update
+    def update_ejection_rdy():
+      for t in range(s.num_terminals):
+        for v in range(num_vcs):
+          s.ejection_queues[t * num_vcs + v].send.rdy @= \
+              s.ejection_granted[t * num_vcs + v] & s.send[t].rdy
+
+  def line_trace(s):
+    recv_str = "|".join([str(ifc) for ifc in s.recv])
+    send_str = "|".join([str(ifc) for ifc in s.send])
+    return f"{recv_str}(){send_str}"
+
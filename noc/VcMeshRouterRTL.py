@@ -0,0 +1,110 @@
+"""
+=========================================================================
+VcMeshRouterRTL.py
+=========================================================================
+Mesh router with virtual channels (VCs). Each (inport, VC) pair has its
+own input queue, and a packet stays in the VC indicated by its `vc_id`
+field along the whole path, so a VC running out of buffers never blocks
+the packets of the other VCs. Upon switch allocation, each outport
+grants the highest VC that has a packet towards it and a downstream
+buffer available, and the inports of the same VC are served in a
+round-robin manner. Routing is dimension-ordered (Y first), the same as
+DORYMeshRouteUnitRTL, which PyOCN MeshNetworkRTL uses by default, so
+enabling the VCs never changes the path of a packet.
+
+The ports are flattened as `port * num_vcs + vc`, where the port follows
+the NORTH/SOUTH/WEST/EAST/SELF order of the mesh directions.
+
+  Date : Oct 19, 2026
+"""
+
+from pymtl3 import *
+from ..lib.basic.val_rdy.ifcs import ValRdyRecvIfcRTL as RecvIfcRTL
+from ..lib.basic.val_rdy.ifcs import ValRdySendIfcRTL as SendIfcRTL
+from ..lib.basic.val_rdy.queues import NormalQueueRTL
+from ..noc.PyOCN.pymtl3_net.meshnet.directions import *
+
+class VcMeshRouterRTL(Component):
+
+  def construct(s, PacketType, PositionType, num_vcs, num_entries = 2):
+
+    # Constants.
+    num_ports = 5
+    num_channels = num_ports * num_vcs
+    PortType = mk_bits(clog2(num_ports))
+
+    # Interfaces.
+    s.recv = [RecvIfcRTL(PacketType) for _ in range(num_channels)]
+    s.send = [SendIfcRTL(PacketType) for _ in range(num_channels)]
+    s.pos = InPort(PositionType)
+
+    # Components.
+    s.input_queues = [NormalQueueRTL(PacketType, num_entries)
+                      for _ in range(num_channels)]
+    s.out_dir = [Wire(PortType) for _ in range(num_channels)]
+    s.granted = [Wire(b1) for _ in range(num_ports)]
+    s.granted_inport = [Wire(PortType) for _ in range(num_ports)]
+    # The inport having the highest round-robin priority for each outport.
+    s.rr_ptr = [Wire(PortType) for _ in range(num_ports)]
+
+    # Connections.
+    for c in range(num_channels):
+      s.recv[c] //= s.input_queues[c].recv
+
+    @update
+    def update_route():
+      for c in range(num_channels):
+        if (s.pos.pos_x == s.input_queues[c].send.msg.dst_x) & \
+           (s.pos.pos_y == s.input_queues[c].send.msg.dst_y):
+          s.out_dir[c] @= PortType(SELF)
+        elif s.input_queues[c].send.msg.dst_y < s.pos.pos_y:
+          s.out_dir[c] @= PortType(SOUTH)
+        elif s.input_queues[c].send.msg.dst_y > s.pos.pos_y:
+          s.out_dir[c] @= PortType(NORTH)
+        elif s.input_queues[c].send.msg.dst_x < s.pos.pos_x:
+          s.out_dir[c] @= PortType(WEST)
+        else:
+          s.out_dir[c] @= PortType(EAST)
+
+    @update
+    def update_switch_allocation():
+      for c in range(num_channels):
+        s.input_queues[c].send.rdy @= 0
+        s.send[c].val @= 0
+        s.send[c].msg @= PacketType()
+
+      for o in range(num_ports):
+        s.granted[o] @= 0
+        s.granted_inport[o] @= 0
+        # Higher VCs carry the higher traffic classes, so they are
+        # granted first.
+        for v in range(num_vcs - 1, -1, -1):
+          for p in range(num_ports):
+            for k in range(num_ports):
+              if (s.rr_ptr[o] == PortType(p)) & ~s.granted[o] & \
+                 s.input_queues[((p + k) % num_ports) * num_vcs + v].send.val & \
+                 (s.out_dir[((p + k) % num_ports) * num_vcs + v] == PortType(o)) & \
+                 s.send[o * num_vcs + v].rdy:
+                s.granted[o] @= 1
+                s.granted_inport[o] @= PortType((p + k) % num_ports)
+                s.send[o * num_vcs + v].val @= 1
+                s.send[o * num_vcs + v].msg @= \
+                    s.input_queues[((p + k) % num_ports) * num_vcs + v].send.msg
+                s.input_queues[((p + k) % num_ports) * num_vcs + v].send.rdy @= 1
+
+    @update_ff
+    def update_rr_ptr():
+      for o in range(num_ports):
+        if s.reset:
+          s.rr_ptr[o] <<= 0
+        elif s.granted[o]:
+          if s.granted_inport[o] == PortType(num_ports - 1):
+            s.rr_ptr[o] <<= 0
+          else:
+            s.rr_ptr[o] <<= s.granted_inport[o] + PortType(1)
+
+  def line_trace(s):
+    recv_str = "|".join([str(ifc) for ifc in s.recv])
+    send_str = "|".join([str(ifc) for ifc in s.send])
+    return f"{s.pos}:{recv_str}(){send_str}"
+
@@ -9,6 +9,8 @@ Author : Cheng Tan
 
 """
 
+import pytest
+
 from pymtl3 import *
 from ..CrossbarRTL import CrossbarRTL
 from ...lib.basic.val_rdy.SourceRTL import SourceRTL as TestSrcRTL
@@ -144,3 +146,94 @@ def test_multi_cast():
                    num_routing_outports, src_data, src_opt, sink_out)
   run_sim(th)
 
+
+#-------------------------------------------------------------------------
+# Prologue test harness
+#-------------------------------------------------------------------------
+# The ctrl signals alternate between ctrl address 0 and 1, and the data
+# only arrives after the prologue steps, which must hence be skipped by
+# the crossbar without waiting for the data.
+
+class PrologueTestHarness(Component):
+
+  def construct(s, DataType, CtrlType, num_inports, num_outports,
+                src_data, src_routing, sink_out, prologue_counts,
+                num_prologue_slots):
+
+    num_tiles = 1
+    ctrl_mem_size = 4
+    s.num_inports  = num_inports
+    s.num_outports = num_outports
+    InType = mk_bits(clog2(num_inports + 1))
+    CtrlAddrType = mk_bits(clog2(ctrl_mem_size))
+
+    s.src_opt = TestSrcRTL(CtrlType, src_routing)
+    s.src_data = [TestSrcRTL(DataType, src_data[i], initial_delay = 4)
+                  for i in range(num_inports)]
+    s.sink_out = [TestSinkRTL(DataType, sink_out[i])
+                  for i in range(num_outports)]
+
+    s.dut = CrossbarRTL(DataType, CtrlType, num_inports, num_outports,
+                        num_tiles = num_tiles, ctrl_mem_size = ctrl_mem_size,
+                        num_prologue_slots = num_prologue_slots)
+    s.ctrl_addr = Wire(CtrlAddrType)
+
+    for i in range(num_inports):
+      s.src_data[i].send //= s.dut.recv_data[i]
+      for addr in range(ctrl_mem_size):
+        s.dut.prologue_count_inport[addr][i] //= \
+            prologue_counts.get((addr, i), 0)
+    s.src_opt.send //= s.dut.recv_opt
+    s.dut.ctrl_addr_inport //= s.ctrl_addr
+
+    @update
+    def connect_crossbar_outports():
+      for i in range(num_outports):
+        s.dut.crossbar_outport[i] @= trunc(s.src_opt.send.msg.routing_xbar_outport[i], InType)
+
+    @update_ff
+    def update_ctrl_addr():
+      if s.reset:
+        s.ctrl_addr <<= 0
+      elif s.src_opt.send.val & s.src_opt.send.rdy:
+        s.ctrl_addr <<= s.ctrl_addr ^ CtrlAddrType(1)
+
+    for i in range(num_outports):
+      s.dut.send_data[i] //= s.sink_out[i].recv
+
+  def done(s):
+    return s.src_opt.done() and \
+           all(src.done() for src in s.src_data) and \
+           all(sink.done() for sink in s.sink_out)
+
+  def line_trace(s):
+    return s.dut.line_trace()
+
+def _test_prologue(num_prologue_slots):
+  # Ctrl address 0 routes inport 0 to outport 0, and ctrl address 1
+  # routes inport 1 to outport 1, each with one prologue step.
+  route_0 = CtrlType(OPT_ADD, pickRegister,
+                     [TileInType(1), TileInType(0), TileInType(0)],
+                     [FuOutType(0),  FuOutType(0),  FuOutType(0)])
+  route_1 = CtrlType(OPT_ADD, pickRegister,
+                     [TileInType(0), TileInType(2), TileInType(0)],
+                     [FuOutType(0),  FuOutType(0),  FuOutType(0)])
+  src_opt = [route_0, route_1, route_0, route_1]
+  src_data = [[DataType(5, 1)], [DataType(6, 1)], []]
+  sink_out = [[DataType(5, 1)], [DataType(6, 1)], []]
+  prologue_counts = {(0, 0): 1, (1, 1): 1}
+  th = PrologueTestHarness(DataType, CtrlType, num_tile_inports,
+                           num_routing_outports, src_data, src_opt,
+                           sink_out, prologue_counts, num_prologue_slots)
+  run_sim(th)
+
+def test_prologue_full_table():
+  _test_prologue(None)
+
+def test_prologue_slots():
+  # Only the two (ctrl address, inport) pairs with prologue are stored.
+  _test_prologue(2)
+
+def test_prologue_no_slot():
+  with pytest.raises(AssertionError):
+    _test_prologue(0)
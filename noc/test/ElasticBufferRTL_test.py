@@ -0,0 +1,114 @@
+'''
+==========================================================================
+ElasticBufferRTL_test.py
+==========================================================================
+Test for ElasticBufferRTL.
+
+  Date : Oct 19, 2026
+'''
+
+from pymtl3 import *
+from ..ElasticBufferRTL import ElasticBufferRTL
+from ...lib.basic.val_rdy.SinkRTL import SinkRTL as TestSinkRTL
+from ...lib.basic.val_rdy.SourceRTL import SourceRTL as TestSrcRTL
+from ...lib.messages import *
+
+#-------------------------------------------------------------------------
+# TestHarness
+#-------------------------------------------------------------------------
+
+class TestHarness(Component):
+
+  def construct(s, DataType, num_entries, src_msgs, sink_msgs,
+                sink_interval_delay = 0):
+
+    s.src = TestSrcRTL(DataType, src_msgs)
+    s.sink = TestSinkRTL(DataType, sink_msgs,
+                         interval_delay = sink_interval_delay)
+    s.dut = ElasticBufferRTL(DataType, num_entries)
+
+    # Connections
+    s.src.send //= s.dut.recv
+    s.dut.send //= s.sink.recv
+
+  def done(s):
+    return s.src.done() and s.sink.done()
+
+  def line_trace(s):
+    return s.dut.line_trace()
+
+#-------------------------------------------------------------------------
+# run_rtl_sim
+#-------------------------------------------------------------------------
+
+def run_sim(test_harness, max_cycles = 100):
+
+  # Create a simulator
+  test_harness.elaborate()
+  test_harness.apply(DefaultPassGroup())
+  test_harness.sim_reset()
+
+  # Run simulation
+  ncycles = 0
+  print()
+  print("{}:{}".format(ncycles, test_harness.line_trace()))
+  while not test_harness.done() and ncycles < max_cycles:
+    test_harness.sim_tick()
+    ncycles += 1
+    print("{}:{}".format(ncycles, test_harness.line_trace()))
+
+  # Check timeout
+  assert ncycles < max_cycles
+
+  test_harness.sim_tick()
+  test_harness.sim_tick()
+  test_harness.sim_tick()
+  return ncycles
+
+#-------------------------------------------------------------------------
+# Test cases
+#-------------------------------------------------------------------------
+
+DataType = mk_data(32, 1)
+num_words = 16
+msgs = [DataType(i, 1) for i in range(num_words)]
+
+def test_wire():
+  th = TestHarness(DataType, 0, msgs, msgs)
+  assert run_sim(th) <= num_words + 3
+
+def test_full_throughput():
+  # One word per cycle from two entries on.
+  for num_entries in [2, 4, 8]:
+    th = TestHarness(DataType, num_entries, msgs, msgs)
+    assert run_sim(th) <= num_words + 4
+
+def test_single_entry():
+  th = TestHarness(DataType, 1, msgs, msgs)
+  run_sim(th)
+
+def test_backpressure():
+  th = TestHarness(DataType, 4, msgs, msgs, sink_interval_delay = 2)
+  run_sim(th)
+
+
+def test_clear():
+  # The buffered words are dropped on clear.
+  dut = ElasticBufferRTL(DataType, 4, has_clear = True)
+  dut.elaborate()
+  dut.apply(DefaultPassGroup())
+  dut.sim_reset()
+  dut.send.rdy @= 0
+  dut.clear @= 0
+  for i in range(3):
+    dut.recv.val @= 1
+    dut.recv.msg @= DataType(i, 1)
+    dut.sim_tick()
+  dut.recv.val @= 0
+  dut.sim_eval_combinational()
+  assert dut.send.val and dut.send.msg == DataType(0, 1)
+  dut.clear @= 1
+  dut.sim_tick()
+  dut.clear @= 0
+  dut.sim_eval_combinational()
+  assert not dut.send.val
@@ -0,0 +1,261 @@
+'''
+=========================================================================
+VcMeshNetworkRTL_test.py
+=========================================================================
+Test for VcMeshNetworkRTL using Source and Sink.
+
+  Date : Oct 19, 2026
+'''
+
+from pymtl3 import *
+from ..VcMeshNetworkRTL import VcMeshNetworkRTL
+from ..VcMeshRouterRTL import VcMeshRouterRTL
+from ...noc.PyOCN.pymtl3_net.meshnet.DORYMeshRouteUnitRTL import DORYMeshRouteUnitRTL
+from ...noc.PyOCN.pymtl3_net.ocnlib.ifcs.positions import mk_mesh_pos
+from ...lib.basic.val_rdy.SinkRTL import SinkRTL as TestSinkRTL
+from ...lib.basic.val_rdy.SourceRTL import SourceRTL as TestSrcRTL
+from ...lib.cmd_type import *
+from ...lib.messages import *
+from ...lib.util.common import *
+from ...lib.util.noc_traffic_helper import *
+from ...noc.PyOCN.pymtl3_net.meshnet.directions import *
+
+#-------------------------------------------------------------------------
+# TestHarness
+#-------------------------------------------------------------------------
+
+class TestHarness(Component):
+
+  def construct(s, PktType, ncols, nrows, src_msgs, sink_msgs,
+                blocking_vc = 0, num_unblocking_pkts = 0):
+
+    num_terminals = ncols * nrows
+    MeshPos = mk_mesh_pos(ncols, nrows)
+    CountType = mk_bits(max(clog2(num_unblocking_pkts + 1), 1))
+
+    s.srcs = [TestSrcRTL(PktType, src_msgs[i]) for i in range(num_terminals)]
+    s.sinks = [TestSinkRTL(PktType, sink_msgs[i]) for i in range(num_terminals)]
+    s.dut = VcMeshNetworkRTL(PktType, MeshPos, ncols, nrows)
+
+    # Terminal 0 refuses the packets in `blocking_vc` until it has
+    # received `num_unblocking_pkts` packets from the other VCs, which
+    # emulates a memory that cannot accept any request before the
+    # responses it is waiting for are delivered.
+    s.num_received = Wire(CountType)
+    s.accept = Wire(b1)
+
+    # Connections
+    for i in range(num_terminals):
+      s.srcs[i].send //= s.dut.recv[i]
+    for i in range(1, num_terminals):
+      s.dut.send[i] //= s.sinks[i].recv
+
+    @update
+    def update_accept():
+      s.accept @= 1
+      if (s.dut.send[0].msg.vc_id == blocking_vc) & \
+         (s.num_received < CountType(num_unblocking_pkts)):
+        s.accept @= 0
+
+    @update
+    def update_terminal_0():
+      s.sinks[0].recv.msg @= s.dut.send[0].msg
+      s.sinks[0].recv.val @= s.dut.send[0].val & s.accept
+      s.dut.send[0].rdy @= s.sinks[0].recv.rdy & s.accept
+
+    @update_ff
+    def update_num_received():
+      if s.reset:
+        s.num_received <<= 0
+      elif s.dut.send[0].val & s.dut.send[0].rdy & \
+           (s.num_received < CountType(num_unblocking_pkts)):
+        s.num_received <<= s.num_received + CountType(1)
+
+  def done(s):
+    return all([src.done() for src in s.srcs]) and \
+           all([sink.done() for sink in s.sinks])
+
+  def line_trace(s):
+    return s.dut.line_trace()
+
+#-------------------------------------------------------------------------
+# run_rtl_sim
+#-------------------------------------------------------------------------
+
+def run_sim(test_harness, max_cycles = 40):
+
+  # Create a simulator
+  test_harness.elaborate()
+  test_harness.apply(DefaultPassGroup())
+  test_harness.sim_reset()
+
+  # Run simulation
+  ncycles = 0
+  print()
+  print("{}:{}".format(ncycles, test_harness.line_trace()))
+  while not test_harness.done() and ncycles < max_cycles:
+    test_harness.sim_tick()
+    ncycles += 1
+    print("{}:{}".format(ncycles, test_harness.line_trace()))
+
+  # Check timeout
+  assert ncycles < max_cycles
+
+  test_harness.sim_tick()
+  test_harness.sim_tick()
+  test_harness.sim_tick()
+
+#-------------------------------------------------------------------------
+# Test cases
+#-------------------------------------------------------------------------
+
+ncols = 2
+nrows = 2
+num_terminals = ncols * nrows
+num_tiles = 4
+num_rd_tiles = 3
+ctrl_mem_size = 16
+data_mem_size_global = 16
+
+DataType = mk_data(32, 1)
+DataAddrType = mk_bits(clog2(data_mem_size_global))
+CtrlType = mk_ctrl(2, 2, 4, 4, 16)
+CtrlAddrType = mk_bits(clog2(ctrl_mem_size))
+CgraPayloadType = mk_cgra_payload(DataType,
+                                  DataAddrType,
+                                  CtrlType,
+                                  CtrlAddrType)
+InterCgraPktType = mk_inter_cgra_pkt(ncols,
+                                     nrows,
+                                     num_tiles,
+                                     num_rd_tiles,
+                                     CgraPayloadType)
+
+def mk_pkt(src, dst, vc_id, cmd, data):
+  src_x, src_y = src % ncols, src // ncols
+  dst_x, dst_y = dst % ncols, dst // ncols
+                        # src  dst  src_x  src_y  dst_x  dst_y  src_tile dst_tile remote_src_port opq vc
+  return InterCgraPktType(src, dst, src_x, src_y, dst_x, dst_y, 0,       0,       0,              0,  vc_id,
+                          CgraPayloadType(cmd, data = DataType(data, 1)))
+
+def test_simple():
+  src_msgs = [[] for _ in range(num_terminals)]
+  sink_msgs = [[] for _ in range(num_terminals)]
+  src_msgs[0] = [mk_pkt(0, 3, INTER_CGRA_VC_LOAD_REQUEST, CMD_LOAD_REQUEST, 1),
+                 mk_pkt(0, 1, INTER_CGRA_VC_STORE_REQUEST, CMD_STORE_REQUEST, 2),
+                 mk_pkt(0, 3, INTER_CGRA_VC_LOAD_REQUEST, CMD_LOAD_REQUEST, 3)]
+  src_msgs[3] = [mk_pkt(3, 0, INTER_CGRA_VC_LOAD_RESPONSE, CMD_LOAD_RESPONSE, 4),
+                 mk_pkt(3, 2, INTER_CGRA_VC_CTRL, CMD_COMPLETE, 5)]
+  sink_msgs[0] = [src_msgs[3][0]]
+  sink_msgs[1] = [src_msgs[0][1]]
+  sink_msgs[2] = [src_msgs[3][1]]
+  sink_msgs[3] = [src_msgs[0][0], src_msgs[0][2]]
+  th = TestHarness(InterCgraPktType, ncols, nrows, src_msgs, sink_msgs)
+  run_sim(th)
+
+def test_response_bypasses_blocked_requests():
+  # The load requests towards terminal 0 are all stuck until the two load
+  # responses behind them are delivered, which would be a deadlock if
+  # they shared the same buffers.
+  src_msgs = [[] for _ in range(num_terminals)]
+  sink_msgs = [[] for _ in range(num_terminals)]
+  src_msgs[1] = [mk_pkt(1, 0, INTER_CGRA_VC_LOAD_REQUEST, CMD_LOAD_REQUEST, 1),
+                 mk_pkt(1, 0, INTER_CGRA_VC_LOAD_REQUEST, CMD_LOAD_REQUEST, 2),
+                 mk_pkt(1, 0, INTER_CGRA_VC_LOAD_REQUEST, CMD_LOAD_REQUEST, 3),
+                 mk_pkt(1, 0, INTER_CGRA_VC_LOAD_RESPONSE, CMD_LOAD_RESPONSE, 4),
+                 mk_pkt(1, 0, INTER_CGRA_VC_LOAD_RESPONSE, CMD_LOAD_RESPONSE, 5)]
+  sink_msgs[0] = [src_msgs[1][3], src_msgs[1][4],
+                  src_msgs[1][0], src_msgs[1][1], src_msgs[1][2]]
+  th = TestHarness(InterCgraPktType, ncols, nrows, src_msgs, sink_msgs,
+                   blocking_vc = INTER_CGRA_VC_LOAD_REQUEST,
+                   num_unblocking_pkts = 2)
+  run_sim(th)
+
+def test_traffic_monitor():
+  src_msgs = [[] for _ in range(num_terminals)]
+  sink_msgs = [[] for _ in range(num_terminals)]
+  # Terminal 0 blocks the load requests from terminal 1 until the load
+  # response from terminal 2 is delivered, which is sent after a burst of
+  # ctrl packets towards terminal 3. So the buffers towards terminal 0 fill up and terminal 1
+  # stalls at the injection.
+  src_msgs[1] = [mk_pkt(1, 0, INTER_CGRA_VC_LOAD_REQUEST, CMD_LOAD_REQUEST, i)
+                 for i in range(8)]
+  src_msgs[2] = [mk_pkt(2, 3, INTER_CGRA_VC_CTRL, CMD_COMPLETE, 8 + i)
+                 for i in range(6)] + \
+                [mk_pkt(2, 0, INTER_CGRA_VC_LOAD_RESPONSE, CMD_LOAD_RESPONSE, 14)]
+  sink_msgs[0] = [src_msgs[2][6]] + src_msgs[1]
+  sink_msgs[3] = src_msgs[2][:6]
+  th = TestHarness(InterCgraPktType, ncols, nrows, src_msgs, sink_msgs,
+                   blocking_vc = INTER_CGRA_VC_LOAD_REQUEST,
+                   num_unblocking_pkts = 1)
+  th.elaborate()
+  th.apply(DefaultPassGroup())
+  th.sim_reset()
+  monitor = NocTrafficMonitor(th.dut, ncols, nrows, INTER_CGRA_NUM_VCS)
+  ncycles = 0
+  while not th.done() and ncycles < 60:
+    monitor.sample()
+    th.sim_tick()
+    ncycles += 1
+  assert ncycles < 60
+  print(monitor.report())
+
+  assert monitor.num_cycles == ncycles
+  stats = monitor.link_stats()
+  def port_stats(router, port, vc):
+    return stats[router * monitor.num_ports + port * INTER_CGRA_NUM_VCS + vc]
+  def injection_stats(router, vc):
+    return stats[router * monitor.num_ports + monitor.num_outports + vc]
+  assert port_stats(1, WEST, INTER_CGRA_VC_LOAD_REQUEST)["transfers_per_cmd"] == \
+         {CMD_LOAD_REQUEST: 8}
+  assert port_stats(2, EAST, INTER_CGRA_VC_CTRL)["transfers"] == 6
+  assert port_stats(2, SOUTH, INTER_CGRA_VC_LOAD_RESPONSE)["transfers"] == 1
+  assert injection_stats(1, INTER_CGRA_VC_LOAD_REQUEST)["stalls_per_cmd"][CMD_LOAD_REQUEST] > 0
+  hot_links = monitor.hot_links(1)
+  assert (hot_links[0]["router"], hot_links[0]["port"]) == \
+         (1, monitor.num_outports + INTER_CGRA_VC_LOAD_REQUEST)
+  assert "(LOAD_REQUEST)" in monitor.report()
+
+def test_same_route_as_pyocn_mesh():
+  # The VC router must route the same way as the default route unit of
+  # PyOCN MeshNetworkRTL, which is replaced when enabling the VCs.
+  ncols = 3
+  nrows = 3
+  MeshPos = mk_mesh_pos(ncols, nrows)
+  PktType = mk_inter_cgra_pkt(ncols, nrows, num_tiles, num_rd_tiles,
+                              CgraPayloadType)
+
+  router = VcMeshRouterRTL(PktType, MeshPos, 1)
+  router.elaborate()
+  router.apply(DefaultPassGroup())
+  route_unit = DORYMeshRouteUnitRTL(PktType, MeshPos)
+  route_unit.elaborate()
+  route_unit.apply(DefaultPassGroup())
+
+  for pos in range(ncols * nrows):
+    for dst in range(ncols * nrows):
+      pkt = PktType(pos, dst, pos % ncols, pos // ncols, dst % ncols, dst // ncols,
+                    0, 0, 0, 0, 0, CgraPayloadType(CMD_LOAD_REQUEST))
+
+      # Queues the packet at the SELF inport of the VC router.
+      router.sim_reset()
+      router.pos @= MeshPos(pos % ncols, pos // ncols)
+      for c in range(5):
+        router.recv[c].val @= 0
+        router.send[c].rdy @= 0
+      router.recv[SELF].val @= 1
+      router.recv[SELF].msg @= pkt
+      router.sim_tick()
+      router.recv[SELF].val @= 0
+      router.sim_eval_combinational()
+
+      route_unit.sim_reset()
+      route_unit.pos @= MeshPos(pos % ncols, pos // ncols)
+      for o in range(5):
+        route_unit.send[o].rdy @= 0
+      route_unit.recv.val @= 1
+      route_unit.recv.msg @= pkt
+      route_unit.sim_eval_combinational()
+
+      assert router.out_dir[SELF] == route_unit.out_dir, \
+          f"route from {pos} to {dst}"
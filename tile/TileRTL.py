@@ -8,12 +8,35 @@ routing the data to registers (i.e., the channels before FU and the
 channels after the crossbar), and the other one is for passing the to the
 next crossbar.
 
+If the ctrl signals carry the `fu_in_bypass` field (i.e., built with
+`mk_ctrl(fu_bypass = True)`), the latest result of each FU outport is
+also kept in a bypass register, which can be selected as the operand of
+any FU inport by the next operation. A recurrence on a single tile (e.g.,
+an accumulation) then takes one cycle per iteration, instead of going
+through the `fu_crossbar` and the `register_cluster`.
+
+With `double_buffer_ctrl`, the ctrl memory and the constant queue accept
+the configuration of the next kernel while the current one is running,
+and CMD_LAUNCH swaps to it in a single cycle once the current kernel
+completes, i.e., back-to-back kernels do not idle during configuration.
+With `ctrl_store_size`, the schedule is streamed from a dedicated ctrl
+store into the ctrl memory, which then only holds the upcoming ctrl
+signals (CMD_CONFIG_CTRL_STORE writes the ctrl store), and the prologues
+are not supported (see CtrlMemDynamicRTL). With
+`routing_dict_size`, the ctrl memory keeps the routings of the ctrl
+signals in a dictionary of that many entries (CMD_CONFIG_ROUTING_DICT
+writes an entry), so that each of its entries only holds the index of
+its routing (see `compress_config_pkts`). CMD_CONFIG_DEFAULT_NOP makes
+the ctrl memory issue NAH out of the entries that are never written (see
+`elide_config_pkts`).
+
 Detailed in: https://github.com/tancheng/VectorCGRA/issues/13 (Option 2).
 
 Author : Cheng Tan
   Date : Nov 26, 2024
 """
 
+from ..fu.flexible.DualIssueFlexibleFuRTL import DualIssueFlexibleFuRTL
 from ..fu.flexible.FlexibleFuRTL import FlexibleFuRTL
 from ..fu.single.AdderRTL import AdderRTL
 from ..fu.single.GrantRTL import GrantRTL
@@ -27,10 +50,11 @@ from ..lib.cmd_type import *
 from ..lib.util.common import *
 from ..mem.const.ConstQueueDynamicRTL import ConstQueueDynamicRTL
 from ..mem.ctrl.CtrlMemDynamicRTL import CtrlMemDynamicRTL
+from ..mem.data.DataMemRTL import DataMemRTL
 from ..mem.register_cluster.RegisterClusterRTL import RegisterClusterRTL
 from ..noc.CrossbarRTL import CrossbarRTL
+from ..noc.ElasticBufferRTL import ElasticBufferRTL
 from ..noc.LinkOrRTL import LinkOrRTL
-from ..noc.PyOCN.pymtl3_net.channel.ChannelRTL import ChannelRTL
 from ..rf.RegisterRTL import RegisterRTL
 from ..lib.util.data_struct_attr import *
 
@@ -43,7 +67,14 @@ class TileRTL(Component):
                 num_tile_inports, num_tile_outports, num_cgras, num_tiles,
                 num_registers_per_reg_bank = 16,
                 Fu = FlexibleFuRTL,
-                FuList = [PhiRTL, AdderRTL, CompRTL, MulRTL, GrantRTL, MemUnitRTL]):
+                FuList = [PhiRTL, AdderRTL, CompRTL, MulRTL, GrantRTL, MemUnitRTL],
+                num_prologue_slots = None,
+                SecondFuList = None,
+                input_fifo_depths = DEFAULT_TILE_INPUT_FIFO_DEPTH,
+                output_skid_depth = 0,
+                double_buffer_ctrl = False,
+                ctrl_store_size = 0,
+                routing_dict_size = 0):
 
     # Derives types from IntraCgraPktType.
     CgraPayloadType = IntraCgraPktType.get_field_type(kAttrPayload)
@@ -57,9 +88,27 @@ class TileRTL(Component):
     num_routing_xbar_inports = num_tile_inports + num_fu_inports
     num_routing_xbar_outports = num_fu_inports + num_tile_outports
 
-    num_fu_xbar_inports = num_fu_outports
+    # A `SecondFuList` enables the dual issue, whose second issue slot
+    # brings `num_fu_outports` more inports to the `fu_crossbar`.
+    dual_issue = SecondFuList is not None
+    num_fu_xbar_inports = num_fu_outports * 2 if dual_issue else num_fu_outports
     num_fu_xbar_outports = num_fu_inports + num_tile_outports
 
+    # The FU operand bypass is enabled by the ctrl signals having the
+    # `fu_in_bypass` field, which selects an FU outport (starting from 1).
+    fu_bypass = kAttrFuInBypass in CtrlSignalType.__bitstruct_fields__
+    FuOutType = mk_bits(clog2(num_fu_xbar_inports + 1))
+
+    # The depth of the input FIFOs is either shared by all the tile
+    # inports or given per inport, following the order of the port index.
+    # Each inport keeps at least one entry, as a plain wire would chain
+    # the crossbars of the neighbouring tiles into one combinational path.
+    if isinstance(input_fifo_depths, int):
+      input_fifo_depths = [input_fifo_depths] * num_tile_inports
+    assert len(input_fifo_depths) >= num_tile_inports
+    assert all(depth >= 1 for depth in input_fifo_depths[:num_tile_inports]), \
+        f"input_fifo_depths must be at least 1, got {input_fifo_depths}."
+
     CtrlAddrType = mk_bits(clog2(ctrl_mem_size))
     DataAddrType = mk_bits(clog2(data_mem_size))
 
@@ -81,9 +130,17 @@ class TileRTL(Component):
     s.to_mem_wdata = SendIfcRTL(DataType)
 
     # Components.
-    s.element = FlexibleFuRTL(CtrlPktType, num_fu_inports, 
-                              num_fu_outports, num_tiles, FuList)
-    s.const_mem = ConstQueueDynamicRTL(DataType, ctrl_mem_size)
+    if dual_issue:
+      s.element = DualIssueFlexibleFuRTL(CtrlPktType, num_fu_inports,
+                                         num_fu_outports, num_tiles, FuList,
+                                         SecondFuList)
+      ElementFuList = s.element.fu_list
+    else:
+      s.element = FlexibleFuRTL(CtrlPktType, num_fu_inports, 
+                                num_fu_outports, num_tiles, FuList)
+      ElementFuList = FuList
+    s.const_mem = ConstQueueDynamicRTL(DataType, ctrl_mem_size,
+                                       double_buffer_ctrl)
     s.routing_crossbar = CrossbarRTL(DataType,
                                      CtrlSignalType,
                                      num_routing_xbar_inports,
@@ -91,7 +148,8 @@ class TileRTL(Component):
                                      num_cgras,
                                      num_tiles,
                                      ctrl_mem_size,
-                                     num_tile_outports)
+                                     num_tile_outports,
+                                     num_prologue_slots)
     s.fu_crossbar = CrossbarRTL(DataType,
                                 CtrlSignalType,
                                 num_fu_xbar_inports,
@@ -99,31 +157,57 @@ class TileRTL(Component):
                                 num_cgras,
                                 num_tiles,
                                 ctrl_mem_size,
-                                num_tile_outports)
+                                num_tile_outports,
+                                num_prologue_slots)
     s.register_cluster = \
         RegisterClusterRTL(DataType, CtrlSignalType, num_fu_inports,
                            num_registers_per_reg_bank)
     s.ctrl_mem = CtrlMemDynamicRTL(CtrlPktType,
                                    ctrl_mem_size,
                                    num_fu_inports,
-                                   num_fu_outports,
+                                   num_fu_xbar_inports,
                                    num_tile_inports,
                                    num_tile_outports,
                                    num_cgras,
                                    num_tiles,
                                    num_ctrl,
-                                   total_steps)
+                                   total_steps,
+                                   double_buffer_ctrl,
+                                   ctrl_store_size,
+                                   routing_dict_size)
+
+    # The ctrl store the schedule is streamed from, which allows the
+    # schedule to be longer than `ctrl_mem_size`.
+    if ctrl_store_size > 0:
+      s.ctrl_store = DataMemRTL(CtrlSignalType, ctrl_store_size)
 
     # The `tile_in_channel` indicates the outport channels that are
-    # connected to the next tiles.
-    s.tile_in_channel = [ChannelRTL(DataType, latency = 1)
-                         for _ in range(num_tile_inports)]
+    # connected to the next tiles, each of which buffers
+    # `input_fifo_depths[i]` words to absorb the skew among the producers.
+    s.tile_in_channel = [ElasticBufferRTL(DataType, input_fifo_depths[i])
+                         for i in range(num_tile_inports)]
 
     # The `tile_out_or_link` would "or" the outports of the
     # `tile_out_channel` and the FUs.
     s.tile_out_or_link = [LinkOrRTL(DataType)
                           for _ in range(num_tile_outports)]
 
+    # The optional skid buffers behind the `tile_out_or_link`, which
+    # decouple the crossbars from the ready of the next tiles.
+    if output_skid_depth > 0:
+      s.tile_out_skid = [ElasticBufferRTL(DataType, output_skid_depth)
+                         for _ in range(num_tile_outports)]
+
+    # The latest result of each FU outport, fed back into the FU inports
+    # selected by the `fu_in_bypass` of the current ctrl signal. The
+    # registers are always valid and reset to zero, so that the first
+    # iteration of an accumulation starts from zero.
+    if fu_bypass:
+      s.fu_bypass_data = [Wire(DataType) for _ in range(num_fu_xbar_inports)]
+      # Whether the FU outport is routed by the `fu_crossbar`, otherwise
+      # the result is only kept in the bypass register.
+      s.fu_out_routed = Wire(num_fu_xbar_inports)
+
     # Signals indicating whether certain modules already done their jobs.
     s.element_done = Wire(1)
     s.fu_crossbar_done = Wire(1)
@@ -135,6 +219,14 @@ class TileRTL(Component):
     # Propagates tile id.
     s.element.tile_id //= s.tile_id
     s.ctrl_mem.cgra_id //= s.cgra_id
+    # The constant queue swaps its banks along with the ctrl memory.
+    if double_buffer_ctrl:
+      s.const_mem.swap //= s.ctrl_mem.swap_bank
+    if ctrl_store_size > 0:
+      s.ctrl_mem.to_ctrl_store_raddr //= s.ctrl_store.recv_raddr[0]
+      s.ctrl_mem.from_ctrl_store_rdata //= s.ctrl_store.send_rdata[0]
+      s.ctrl_mem.to_ctrl_store_waddr //= s.ctrl_store.recv_waddr[0]
+      s.ctrl_mem.to_ctrl_store_wdata //= s.ctrl_store.recv_wdata[0]
     s.ctrl_mem.tile_id //= s.tile_id
     s.fu_crossbar.cgra_id //= s.cgra_id
     s.fu_crossbar.tile_id //= s.tile_id
@@ -167,8 +259,8 @@ class TileRTL(Component):
         s.fu_crossbar.prologue_count_inport[addr][i] //= \
             s.ctrl_mem.prologue_count_outport_fu_crossbar[addr][i]
 
-    for i in range(len(FuList)):
-      if FuList[i] == MemUnitRTL:
+    for i in range(len(ElementFuList)):
+      if ElementFuList[i] == MemUnitRTL:
         s.to_mem_raddr //= s.element.to_mem_raddr[i]
         s.from_mem_rdata //= s.element.from_mem_rdata[i]
         s.to_mem_waddr //= s.element.to_mem_waddr[i]
@@ -201,8 +293,11 @@ class TileRTL(Component):
           s.ctrl_mem.send_ctrl.msg.fu_xbar_outport[i]
 
     # Connections on the `fu_crossbar`.
-    for i in range(num_fu_outports):
-      s.element.send_out[i] //= s.fu_crossbar.recv_data[i]
+    # With the FU operand bypass, the outports are forwarded by
+    # `update_fu_bypass_out` below instead.
+    if not fu_bypass:
+      for i in range(num_fu_xbar_inports):
+        s.element.send_out[i] //= s.fu_crossbar.recv_data[i]
 
     # The data going out to the other tiles should be from the
     # `routing_crossbar`. Note that there are also data being fed into
@@ -213,7 +308,11 @@ class TileRTL(Component):
     for i in range(num_tile_outports):
       s.fu_crossbar.send_data[i] //= s.tile_out_or_link[i].recv_fu
       s.routing_crossbar.send_data[i] //= s.tile_out_or_link[i].recv_xbar
-      s.tile_out_or_link[i].send //= s.send_data[i]
+      if output_skid_depth > 0:
+        s.tile_out_or_link[i].send //= s.tile_out_skid[i].recv
+        s.tile_out_skid[i].send //= s.send_data[i]
+      else:
+        s.tile_out_or_link[i].send //= s.send_data[i]
 
     # Crossbars outputs are integrated with the "register_cluster".
     # Whether the required operands for FU are from the "routing_crossbar"
@@ -227,16 +326,18 @@ class TileRTL(Component):
       s.register_cluster.recv_data_from_const[i].msg //= DataType()
       s.register_cluster.recv_data_from_const[i].val //= 0
 
-      s.register_cluster.send_data_to_fu[i] //= \
-          s.element.recv_in[i]
+      if not fu_bypass:
+        s.register_cluster.send_data_to_fu[i] //= \
+            s.element.recv_in[i]
       s.register_cluster.inport_opt //= s.ctrl_mem.send_ctrl.msg
 
-    # Clear ports are only useful during context switching.
-    # We connect to 0 to make sure they have drivers.
-    for i in range(len(FuList)):
-      s.element.clear[i] //= 0
-    s.fu_crossbar.clear //= 0
-    s.routing_crossbar.clear //= 0
+    # The prologue progress of the crossbars and the first execution of
+    # the PHIs are kept per ctrl address, which the next kernel reuses, so
+    # they are cleared when the ctrl memory swaps to the next kernel.
+    for i in range(len(ElementFuList)):
+      s.element.clear[i] //= s.ctrl_mem.swap_bank
+    s.fu_crossbar.clear //= s.ctrl_mem.swap_bank
+    s.routing_crossbar.clear //= s.ctrl_mem.swap_bank
 
     @update
     def feed_pkt():
@@ -251,6 +352,12 @@ class TileRTL(Component):
             (s.recv_from_controller_pkt.msg.payload.cmd == CMD_CONFIG_PROLOGUE_FU) | \
             (s.recv_from_controller_pkt.msg.payload.cmd == CMD_CONFIG_PROLOGUE_FU_CROSSBAR) | \
             (s.recv_from_controller_pkt.msg.payload.cmd == CMD_CONFIG_PROLOGUE_ROUTING_CROSSBAR) | \
+            (s.recv_from_controller_pkt.msg.payload.cmd == CMD_CONFIG_PACKED) | \
+            (s.recv_from_controller_pkt.msg.payload.cmd == CMD_CONFIG_PACKED_OPS) | \
+            (s.recv_from_controller_pkt.msg.payload.cmd == CMD_CONFIG_PROLOGUE_FU_PACKED) | \
+            (s.recv_from_controller_pkt.msg.payload.cmd == CMD_CONFIG_CTRL_STORE) | \
+            (s.recv_from_controller_pkt.msg.payload.cmd == CMD_CONFIG_ROUTING_DICT) | \
+            (s.recv_from_controller_pkt.msg.payload.cmd == CMD_CONFIG_DEFAULT_NOP) | \
             (s.recv_from_controller_pkt.msg.payload.cmd == CMD_CONFIG_TOTAL_CTRL_COUNT) | \
             (s.recv_from_controller_pkt.msg.payload.cmd == CMD_CONFIG_COUNT_PER_ITER) | \
             (s.recv_from_controller_pkt.msg.payload.cmd == CMD_GLOBAL_REDUCE_ADD_RESPONSE) | \
@@ -321,6 +428,43 @@ class TileRTL(Component):
       s.routing_crossbar.compute_done @= s.element_done
       s.fu_crossbar.compute_done @= s.element_done
 
+    if fu_bypass:
+
+      @update
+      def update_fu_bypass_out():
+        for i in range(num_fu_xbar_inports):
+          s.fu_crossbar.recv_data[i].msg @= s.element.send_out[i].msg
+          s.fu_crossbar.recv_data[i].val @= s.element.send_out[i].val
+          s.fu_out_routed[i] @= 0
+          for j in range(num_fu_xbar_outports):
+            if s.ctrl_mem.send_ctrl.msg.fu_xbar_outport[j] == FuOutType(i + 1):
+              s.fu_out_routed[i] @= 1
+          # A result not routed anywhere is consumed by the bypass register.
+          s.element.send_out[i].rdy @= s.fu_crossbar.recv_data[i].rdy | \
+                                       ~s.fu_out_routed[i]
+
+      @update
+      def update_fu_bypass_in():
+        for i in range(num_fu_inports):
+          s.element.recv_in[i].msg @= s.register_cluster.send_data_to_fu[i].msg
+          s.element.recv_in[i].val @= s.register_cluster.send_data_to_fu[i].val
+          s.register_cluster.send_data_to_fu[i].rdy @= s.element.recv_in[i].rdy
+          for j in range(num_fu_xbar_inports):
+            if s.ctrl_mem.send_ctrl.msg.fu_in_bypass[i] == FuOutType(j + 1):
+              s.element.recv_in[i].msg @= s.fu_bypass_data[j]
+              s.element.recv_in[i].val @= 1
+              s.register_cluster.send_data_to_fu[i].rdy @= 0
+
+      @update_ff
+      def update_fu_bypass_data():
+        if s.reset:
+          for i in range(num_fu_xbar_inports):
+            s.fu_bypass_data[i] <<= DataType(0, 1, 0, 0)
+        else:
+          for i in range(num_fu_xbar_inports):
+            if s.element.send_out[i].val & s.element.send_out[i].rdy:
+              s.fu_bypass_data[i] <<= s.element.send_out[i].msg
+
   # Line trace
   def line_trace(s):
     recv_str = "|".join(["(" + str(x.msg) + ", val: " + str(x.val) + ", rdy: " + str(x.rdy) + ")" for x in s.recv_data])
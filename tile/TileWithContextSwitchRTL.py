@@ -4,6 +4,14 @@ TileWithContextSwitchRTL.py
 =========================================================================
 Integrates tile with the context switch module and clearable channels
 
+With a non-zero `num_context_slots`, CMD_SAVE_CONTEXT/CMD_RESTORE_CONTEXT
+burst the whole context of the tile into/from a local context scratchpad
+(see ContextSaveRestoreRTL), during which the tile stops issuing ctrl
+signals and accepting packets and data. The context includes the
+prologue counters, so that a kernel preempted during its prologue
+resumes it where it left off, and the contents of the input FIFOs and
+the output skid buffers.
+
 Author : Yufei Yang
   Date : Sep 24, 2025
 """
@@ -22,11 +30,12 @@ from ..lib.cmd_type import *
 from ..lib.util.common import *
 from ..mem.const.ConstQueueDynamicRTL import ConstQueueDynamicRTL
 from ..mem.ctrl.CtrlMemDynamicRTL import CtrlMemDynamicRTL
+from ..mem.ctrl.ContextSaveRestoreRTL import ContextSaveRestoreRTL
 from ..mem.ctrl.ContextSwitchRTL import ContextSwitchRTL
 from ..mem.register_cluster.RegisterClusterRTL import RegisterClusterRTL
 from ..noc.CrossbarRTL import CrossbarRTL
 from ..noc.LinkOrRTL import LinkOrRTL
-from ..noc.ChannelWithClearRTL import ChannelWithClearRTL
+from ..noc.ElasticBufferRTL import ElasticBufferRTL
 from ..rf.RegisterRTL import RegisterRTL
 from ..lib.util.data_struct_attr import *
 
@@ -39,7 +48,10 @@ class TileWithContextSwitchRTL(Component):
                 num_tile_outports, num_cgras, num_tiles,
                 num_registers_per_reg_bank = 16,
                 Fu = FlexibleFuRTL,
-                FuList = [PhiRTL, AdderRTL, CompRTL, MulRTL, GrantRTL, MemUnitRTL]):
+                FuList = [PhiRTL, AdderRTL, CompRTL, MulRTL, GrantRTL, MemUnitRTL],
+                num_context_slots = 0,
+                input_fifo_depths = DEFAULT_TILE_INPUT_FIFO_DEPTH,
+                output_skid_depth = 0):
 
     # Derives types from CgraPayloadType.
     CgraPayloadType = IntraCgraPktType.get_field_type(kAttrPayload)
@@ -55,9 +67,20 @@ class TileWithContextSwitchRTL(Component):
 
     num_fu_xbar_inports = num_fu_outports
     num_fu_xbar_outports = num_fu_inports + num_tile_outports
+    # The depth of the input FIFOs is either shared by all the tile
+    # inports or given per inport, following the order of the port index.
+    # Each inport keeps at least one entry, as a plain wire would chain
+    # the crossbars of the neighbouring tiles into one combinational path.
+    if isinstance(input_fifo_depths, int):
+      input_fifo_depths = [input_fifo_depths] * num_tile_inports
+    assert len(input_fifo_depths) >= num_tile_inports
+    assert all(depth >= 1 for depth in input_fifo_depths[:num_tile_inports]), \
+        f"input_fifo_depths must be at least 1, got {input_fifo_depths}."
 
     CtrlAddrType = mk_bits(clog2(ctrl_mem_size))
     DataAddrType = mk_bits(clog2(data_mem_size))
+    const_mem_size = ctrl_mem_size + 10
+    has_context_port = num_context_slots > 0
 
     # Interfaces.
     s.recv_data = [RecvIfcRTL(DataType)
@@ -81,7 +104,8 @@ class TileWithContextSwitchRTL(Component):
                               num_tiles, FuList)
     # We use many CMD_CONST to simulate runtime commands in TileWithContextSwitchRTL_test,
     # so here we increase the size of const_mem to avoid deadlock.
-    s.const_mem = ConstQueueDynamicRTL(DataType, ctrl_mem_size+10)
+    s.const_mem = ConstQueueDynamicRTL(DataType, const_mem_size,
+                                       has_context_port = has_context_port)
     s.routing_crossbar = CrossbarRTL(DataType,
                                      CtrlSignalType,
                                      num_routing_xbar_inports,
@@ -89,7 +113,8 @@ class TileWithContextSwitchRTL(Component):
                                      num_cgras,
                                      num_tiles,
                                      ctrl_mem_size,
-                                     num_tile_outports)
+                                     num_tile_outports,
+                                     has_context_port = has_context_port)
     s.fu_crossbar = CrossbarRTL(DataType,
                                 CtrlSignalType,
                                 num_fu_xbar_inports,
@@ -97,10 +122,11 @@ class TileWithContextSwitchRTL(Component):
                                 num_cgras,
                                 num_tiles,
                                 ctrl_mem_size,
-                                num_tile_outports)
+                                num_tile_outports,
+                                has_context_port = has_context_port)
     s.register_cluster = \
         RegisterClusterRTL(DataType, CtrlSignalType, num_fu_inports,
-                           num_registers_per_reg_bank)
+                           num_registers_per_reg_bank, has_context_port)
     s.ctrl_mem = CtrlMemDynamicRTL(CtrlPktType,
                                    ctrl_mem_size,
                                    num_fu_inports,
@@ -110,19 +136,30 @@ class TileWithContextSwitchRTL(Component):
                                    num_cgras,
                                    num_tiles,
                                    num_ctrl,
-                                   total_steps)
+                                   total_steps,
+                                   has_context_port = has_context_port)
     s.context_switch = ContextSwitchRTL(data_bitwidth, clog2(ctrl_mem_size))
 
     # The `tile_in_channel` indicates the outport channels that are
-    # connected to the next tiles.
-    s.tile_in_channel = [ChannelWithClearRTL(DataType, latency = 1)
-                         for _ in range(num_tile_inports)]
+    # connected to the next tiles, each of which buffers
+    # `input_fifo_depths[i]` words to absorb the skew among the producers.
+    s.tile_in_channel = [ElasticBufferRTL(DataType, input_fifo_depths[i],
+                                          has_clear = True)
+                         for i in range(num_tile_inports)]
 
     # The `tile_out_or_link` would "or" the outports of the
     # `tile_out_channel` and the FUs.
     s.tile_out_or_link = [LinkOrRTL(DataType)
                           for _ in range(num_tile_outports)]
 
+    # The optional skid buffers behind the `tile_out_or_link`, which
+    # decouple the crossbars from the ready of the next tiles. They are
+    # flushed along with the input FIFOs.
+    if output_skid_depth > 0:
+      s.tile_out_skid = [ElasticBufferRTL(DataType, output_skid_depth,
+                                          has_clear = True)
+                         for _ in range(num_tile_outports)]
+
     # Signals indicating whether certain modules already done their jobs.
     s.element_done = Wire(1)
     s.fu_crossbar_done = Wire(1)
@@ -133,6 +170,17 @@ class TileWithContextSwitchRTL(Component):
     # Clearing the 'prologue_counter' signal in CrossbarRTL to correctly resume the progress.
     s.clear = Wire(1)
 
+    # The packets are held while the context is being saved/restored.
+    s.context_busy = Wire(1)
+    s.recv_pkt_val = Wire(1)
+    s.context_cmd_val = Wire(1)
+    s.context_cmd_rdy = Wire(1)
+    # The ctrl signals and the data are also held once the context is
+    # saved, until CMD_TERMINATE flushes the preempted kernel, so that
+    # neither the saved FIFOs nor the saved progress change meanwhile.
+    s.preempted = Wire(1)
+    s.context_hold = Wire(1)
+
     s.cgra_id = InPort(mk_bits(max(1, clog2(num_cgras))))
     s.tile_id = InPort(mk_bits(clog2(num_tiles + 1)))
 
@@ -169,6 +217,79 @@ class TileWithContextSwitchRTL(Component):
     s.context_switch.phi_addr //= s.recv_from_controller_pkt.msg.payload.ctrl_addr
     s.context_switch.ctrl_mem_rd_addr //= s.ctrl_mem.ctrl_addr_outport
 
+    # Connects the context save/restore module.
+    if has_context_port:
+      # The prologue counters of the routing crossbar, the fu crossbar
+      # and the FU, in that order.
+      prologue_counters = \
+          [(s.routing_crossbar.prologue_counter_outport[addr][i],
+            s.routing_crossbar.restore_prologue_counter[addr][i])
+           for addr in range(ctrl_mem_size) for i in range(num_routing_xbar_inports)] + \
+          [(s.fu_crossbar.prologue_counter_outport[addr][i],
+            s.fu_crossbar.restore_prologue_counter[addr][i])
+           for addr in range(ctrl_mem_size) for i in range(num_fu_xbar_inports)] + \
+          [(s.ctrl_mem.prologue_count_fu_ctx_outport[addr],
+            s.ctrl_mem.restore_prologue_count_fu[addr])
+           for addr in range(ctrl_mem_size)]
+      # The input FIFOs, followed by the output skid buffers.
+      fifos = s.tile_in_channel + \
+              (s.tile_out_skid if output_skid_depth > 0 else [])
+      assert all(fifo.num_entries <= num_registers_per_reg_bank for fifo in fifos), \
+          f"The FIFOs cannot be deeper than num_registers_per_reg_bank " \
+          f"({num_registers_per_reg_bank}) to be saved upon the context switch."
+
+      s.context_save_restore = \
+          ContextSaveRestoreRTL(DataType, ctrl_mem_size, const_mem_size,
+                                num_fu_inports, num_registers_per_reg_bank,
+                                num_context_slots,
+                                num_prologue_counters = len(prologue_counters),
+                                num_fifos = len(fifos))
+      s.context_save_restore.recv_cmd.msg //= s.recv_from_controller_pkt.msg.payload.cmd
+      s.context_save_restore.recv_cmd.val //= s.context_cmd_val
+      s.context_cmd_rdy //= s.context_save_restore.recv_cmd.rdy
+      s.context_save_restore.recv_slot //= s.recv_from_controller_pkt.msg.payload.data
+      s.context_busy //= s.context_save_restore.busy
+
+      s.register_cluster.context_addr //= s.context_save_restore.to_reg_addr
+      s.register_cluster.context_wen //= s.context_save_restore.to_reg_wen
+      for i in range(num_fu_inports):
+        s.context_save_restore.from_reg_rdata[i] //= s.register_cluster.context_rdata[i]
+        s.register_cluster.context_wdata[i] //= s.context_save_restore.to_reg_wdata[i]
+
+      s.context_save_restore.ctrl_addr_in //= s.ctrl_mem.ctrl_addr_outport
+      s.context_save_restore.times_in //= s.ctrl_mem.times_outport
+      s.context_save_restore.const_rd_cur_in //= s.const_mem.rd_cur_outport
+      s.context_save_restore.progress_in //= s.context_switch.progress_outport
+      s.ctrl_mem.restore //= s.context_save_restore.restore
+      s.ctrl_mem.restore_ctrl_addr //= s.context_save_restore.restore_ctrl_addr
+      s.ctrl_mem.restore_times //= s.context_save_restore.restore_times
+      s.const_mem.restore //= s.context_save_restore.restore
+      s.const_mem.restore_rd_cur //= s.context_save_restore.restore_const_rd_cur
+      s.context_switch.restore //= s.context_save_restore.restore
+      s.context_switch.restore_progress //= s.context_save_restore.restore_progress
+      s.routing_crossbar.restore //= s.context_save_restore.restore
+      s.fu_crossbar.restore //= s.context_save_restore.restore
+      for i, (counter, restore_counter) in enumerate(prologue_counters):
+        s.context_save_restore.prologue_counter_in[i] //= counter
+        connect(restore_counter, s.context_save_restore.restore_prologue_counter[i])
+
+      @update_ff
+      def update_preempted():
+        if s.reset:
+          s.preempted <<= 0
+        elif s.context_cmd_val & s.context_cmd_rdy & \
+             (s.recv_from_controller_pkt.msg.payload.cmd == CMD_SAVE_CONTEXT):
+          s.preempted <<= 1
+        elif s.recv_from_controller_pkt.val & s.recv_from_controller_pkt.rdy & \
+             (s.recv_from_controller_pkt.msg.payload.cmd == CMD_TERMINATE):
+          s.preempted <<= 0
+    else:
+      s.context_busy //= 0
+      s.preempted //= 0
+      s.context_cmd_rdy //= 0
+      s.context_switch.restore //= 0
+      s.context_switch.restore_progress //= DataType()
+
     # Prologue port.
     s.element.prologue_count_inport //= s.ctrl_mem.prologue_count_outport_fu
     for addr in range(ctrl_mem_size):
@@ -205,9 +326,38 @@ class TileWithContextSwitchRTL(Component):
     # Connections on the `routing_crossbar`.
     # The data from other tiles should be connected to the
     # `routing_crossbar`.
-    for i in range(num_tile_inports):
-      s.recv_data[i] //= s.tile_in_channel[i].recv
-      s.tile_in_channel[i].send //= s.routing_crossbar.recv_data[i]
+    if not has_context_port:
+      for i in range(num_tile_inports):
+        s.recv_data[i] //= s.tile_in_channel[i].recv
+        s.tile_in_channel[i].send //= s.routing_crossbar.recv_data[i]
+
+    # The input FIFOs are drained into (refilled from) the context slot
+    # while the context is being saved (restored), holding the data from
+    # the other tiles meanwhile.
+    else:
+      s.tile_in_channel_send_val = [Wire(b1) for _ in range(num_tile_inports)]
+      for i in range(num_tile_inports):
+        s.routing_crossbar.recv_data[i].msg //= s.tile_in_channel[i].send.msg
+        s.routing_crossbar.recv_data[i].val //= s.tile_in_channel_send_val[i]
+      for i, fifo in enumerate(fifos):
+        s.context_save_restore.recv_from_fifo[i].msg //= fifo.send.msg
+        s.context_save_restore.recv_from_fifo[i].val //= fifo.send.val
+        s.context_save_restore.send_to_fifo[i].rdy //= fifo.recv.rdy
+
+      @update
+      def update_tile_in_channel():
+        for i in range(num_tile_inports):
+          s.tile_in_channel[i].recv.msg @= s.recv_data[i].msg
+          s.tile_in_channel[i].recv.val @= s.recv_data[i].val & ~s.context_hold
+          s.recv_data[i].rdy @= s.tile_in_channel[i].recv.rdy & ~s.context_hold
+          if s.context_save_restore.send_to_fifo[i].val:
+            s.tile_in_channel[i].recv.msg @= s.context_save_restore.send_to_fifo[i].msg
+            s.tile_in_channel[i].recv.val @= 1
+
+          s.tile_in_channel_send_val[i] @= s.tile_in_channel[i].send.val & ~s.context_hold
+          s.tile_in_channel[i].send.rdy @= \
+              (s.routing_crossbar.recv_data[i].rdy & ~s.context_hold) | \
+              s.context_save_restore.recv_from_fifo[i].rdy
 
     # Register banks are connected to the routing crossbar as additional
     # inports (num_tile_inports .. num_tile_inports+num_fu_inports-1),
@@ -237,7 +387,32 @@ class TileWithContextSwitchRTL(Component):
     for i in range(num_tile_outports):
       s.fu_crossbar.send_data[i] //= s.tile_out_or_link[i].recv_fu
       s.routing_crossbar.send_data[i] //= s.tile_out_or_link[i].recv_xbar
-      s.tile_out_or_link[i].send //= s.send_data[i]
+      if output_skid_depth > 0:
+        if not has_context_port:
+          s.tile_out_or_link[i].send //= s.tile_out_skid[i].recv
+          s.tile_out_skid[i].send //= s.send_data[i]
+        s.tile_out_skid[i].clear //= s.clear
+      else:
+        s.tile_out_or_link[i].send //= s.send_data[i]
+
+    # Same as the input FIFOs, the output skid buffers are drained into
+    # (refilled from) the context slot, following the input FIFOs.
+    if has_context_port and output_skid_depth > 0:
+      @update
+      def update_tile_out_skid():
+        for i in range(num_tile_outports):
+          s.tile_out_skid[i].recv.msg @= s.tile_out_or_link[i].send.msg
+          s.tile_out_skid[i].recv.val @= s.tile_out_or_link[i].send.val & ~s.context_hold
+          s.tile_out_or_link[i].send.rdy @= s.tile_out_skid[i].recv.rdy & ~s.context_hold
+          if s.context_save_restore.send_to_fifo[num_tile_inports + i].val:
+            s.tile_out_skid[i].recv.msg @= s.context_save_restore.send_to_fifo[num_tile_inports + i].msg
+            s.tile_out_skid[i].recv.val @= 1
+
+          s.send_data[i].msg @= s.tile_out_skid[i].send.msg
+          s.send_data[i].val @= s.tile_out_skid[i].send.val & ~s.context_hold
+          s.tile_out_skid[i].send.rdy @= \
+              (s.send_data[i].rdy & ~s.context_hold) | \
+              s.context_save_restore.recv_from_fifo[num_tile_inports + i].rdy
 
     # Crossbars outputs are integrated with the "register_cluster".
     # Whether the required operands for FU are from the "routing_crossbar"
@@ -262,12 +437,18 @@ class TileWithContextSwitchRTL(Component):
         s.ctrl_mem.recv_pkt_from_controller.val @= 0
         s.const_mem.recv_const.val @= 0
         s.recv_from_controller_pkt.rdy @= 0
+        s.context_cmd_val @= 0
+        s.recv_pkt_val @= s.recv_from_controller_pkt.val & ~s.context_busy
 
-        if s.recv_from_controller_pkt.val & \
+        if s.recv_pkt_val & \
            ((s.recv_from_controller_pkt.msg.payload.cmd == CMD_CONFIG) | \
             (s.recv_from_controller_pkt.msg.payload.cmd == CMD_CONFIG_PROLOGUE_FU) | \
             (s.recv_from_controller_pkt.msg.payload.cmd == CMD_CONFIG_PROLOGUE_FU_CROSSBAR) | \
             (s.recv_from_controller_pkt.msg.payload.cmd == CMD_CONFIG_PROLOGUE_ROUTING_CROSSBAR) | \
+            (s.recv_from_controller_pkt.msg.payload.cmd == CMD_CONFIG_PACKED) | \
+            (s.recv_from_controller_pkt.msg.payload.cmd == CMD_CONFIG_PACKED_OPS) | \
+            (s.recv_from_controller_pkt.msg.payload.cmd == CMD_CONFIG_PROLOGUE_FU_PACKED) | \
+            (s.recv_from_controller_pkt.msg.payload.cmd == CMD_CONFIG_DEFAULT_NOP) | \
             (s.recv_from_controller_pkt.msg.payload.cmd == CMD_CONFIG_TOTAL_CTRL_COUNT) | \
             (s.recv_from_controller_pkt.msg.payload.cmd == CMD_CONFIG_COUNT_PER_ITER) | \
             (s.recv_from_controller_pkt.msg.payload.cmd == CMD_CONFIG_CTRL_LOWER_BOUND) | \
@@ -284,12 +465,17 @@ class TileWithContextSwitchRTL(Component):
             s.ctrl_mem.recv_pkt_from_controller.val @= 1
             s.ctrl_mem.recv_pkt_from_controller.msg @= s.recv_from_controller_pkt.msg
             s.recv_from_controller_pkt.rdy @= s.ctrl_mem.recv_pkt_from_controller.rdy
-        elif s.recv_from_controller_pkt.val & (s.recv_from_controller_pkt.msg.payload.cmd == CMD_CONST):
+        elif s.recv_pkt_val & (s.recv_from_controller_pkt.msg.payload.cmd == CMD_CONST):
             s.const_mem.recv_const.val @= 1
             s.const_mem.recv_const.msg @= s.recv_from_controller_pkt.msg.payload.data
             s.recv_from_controller_pkt.rdy @= s.const_mem.recv_const.rdy
+        elif s.recv_pkt_val & \
+             ((s.recv_from_controller_pkt.msg.payload.cmd == CMD_SAVE_CONTEXT) | \
+              (s.recv_from_controller_pkt.msg.payload.cmd == CMD_RESTORE_CONTEXT)):
+            s.context_cmd_val @= 1
+            s.recv_from_controller_pkt.rdy @= s.context_cmd_rdy
 
-        if s.recv_from_controller_pkt.val & (s.recv_from_controller_pkt.msg.payload.cmd == CMD_TERMINATE):
+        if s.recv_pkt_val & (s.recv_from_controller_pkt.msg.payload.cmd == CMD_TERMINATE):
             s.ctrl_mem.recv_pkt_from_controller.val @= 1
             s.ctrl_mem.recv_pkt_from_controller.msg @= s.recv_from_controller_pkt.msg
             s.recv_from_controller_pkt.rdy @= s.ctrl_mem.recv_pkt_from_controller.rdy
@@ -319,18 +505,25 @@ class TileWithContextSwitchRTL(Component):
 
       # FIXME: Do we still need separate element and routing_xbar?
       # FIXME: Do we need to consider reg bank here?
-      s.element.recv_opt.val @= s.ctrl_mem.send_ctrl.val & ~s.element_done
-      s.routing_crossbar.recv_opt.val @= s.ctrl_mem.send_ctrl.val & ~s.routing_crossbar_done
-      s.fu_crossbar.recv_opt.val @= s.ctrl_mem.send_ctrl.val & ~s.fu_crossbar_done
+      # No ctrl signal is issued while the context is being saved/restored,
+      # nor once the kernel is preempted.
+      s.element.recv_opt.val @= s.ctrl_mem.send_ctrl.val & ~s.element_done & ~s.context_hold
+      s.routing_crossbar.recv_opt.val @= s.ctrl_mem.send_ctrl.val & ~s.routing_crossbar_done & ~s.context_hold
+      s.fu_crossbar.recv_opt.val @= s.ctrl_mem.send_ctrl.val & ~s.fu_crossbar_done & ~s.context_hold
 
       # FIXME: yo96, rename ctrl.rdy to ctrl.proceed or sth similar.
       # Allows either the FU-related go out first or routing-xbar go out first. And only
       # allows the ctrl signal proceed till all the sub-modules done their own job (once).
       s.ctrl_mem.send_ctrl.rdy @= (s.element.recv_opt.rdy | s.element_done) & \
                                   (s.routing_crossbar.recv_opt.rdy | s.routing_crossbar_done) & \
-                                  (s.fu_crossbar.recv_opt.rdy | s.fu_crossbar_done)
+                                  (s.fu_crossbar.recv_opt.rdy | s.fu_crossbar_done) & \
+                                  ~s.context_hold
 
     # TODO: https://github.com/tancheng/VectorCGRA/issues/127
+    @update
+    def update_context_hold():
+      s.context_hold @= s.context_busy | s.preempted
+
     @update
     def notify_const_mem():
       s.const_mem.ctrl_proceed @= s.ctrl_mem.send_ctrl.rdy & s.ctrl_mem.send_ctrl.val
@@ -352,12 +545,15 @@ class TileWithContextSwitchRTL(Component):
         s.element_done <<= 0
         s.fu_crossbar_done <<= 0
         s.routing_crossbar_done <<= 0
-      else:
-        if s.element.recv_opt.rdy:
+      # Only the issued ctrl signals are recorded, as the FU during its
+      # prologue is ready even without any, e.g., once a kernel preempted
+      # during its prologue is terminated.
+      elif ~s.context_hold:
+        if s.element.recv_opt.val & s.element.recv_opt.rdy:
           s.element_done <<= 1
-        if s.fu_crossbar.recv_opt.rdy:
+        if s.fu_crossbar.recv_opt.val & s.fu_crossbar.recv_opt.rdy:
           s.fu_crossbar_done <<= 1
-        if s.routing_crossbar.recv_opt.rdy:
+        if s.routing_crossbar.recv_opt.val & s.routing_crossbar.recv_opt.rdy:
           s.routing_crossbar_done <<= 1
 
     @update
@@ -24,7 +24,7 @@ from ..mem.ctrl.CtrlMemDynamicRTL import CtrlMemDynamicRTL
 from ..mem.register_cluster.RegisterClusterRTL import RegisterClusterRTL
 from ..noc.CrossbarRTL import CrossbarRTL
 from ..noc.LinkOrRTL import LinkOrRTL
-from ..noc.PyOCN.pymtl3_net.channel.ChannelRTL import ChannelRTL
+from ..noc.ElasticBufferRTL import ElasticBufferRTL
 from ..rf.RegisterRTL import RegisterRTL
 from ..lib.util.data_struct_attr import *
 
@@ -36,7 +36,9 @@ class TileWithStreamingLoadRTL(Component):
                 num_tile_inports, num_tile_outports, num_cgras, num_tiles,
                 num_registers_per_reg_bank = 16,
                 Fu = FlexibleFuRTL,
-                FuList = [PhiRTL, AdderRTL, CompRTL, MulRTL, GrantRTL, StreamingMemUnitRTL]):
+                FuList = [PhiRTL, AdderRTL, CompRTL, MulRTL, GrantRTL, StreamingMemUnitRTL],
+                input_fifo_depths = DEFAULT_TILE_INPUT_FIFO_DEPTH,
+                output_skid_depth = 0):
 
     # Derives types from IntraCgraPktType.
     CgraPayloadType = IntraCgraPktType.get_field_type(kAttrPayload)
@@ -52,6 +54,15 @@ class TileWithStreamingLoadRTL(Component):
 
     num_fu_xbar_inports = num_fu_outports
     num_fu_xbar_outports = num_fu_inports + num_tile_outports
+    # The depth of the input FIFOs is either shared by all the tile
+    # inports or given per inport, following the order of the port index.
+    # Each inport keeps at least one entry, as a plain wire would chain
+    # the crossbars of the neighbouring tiles into one combinational path.
+    if isinstance(input_fifo_depths, int):
+      input_fifo_depths = [input_fifo_depths] * num_tile_inports
+    assert len(input_fifo_depths) >= num_tile_inports
+    assert all(depth >= 1 for depth in input_fifo_depths[:num_tile_inports]), \
+        f"input_fifo_depths must be at least 1, got {input_fifo_depths}."
 
     CtrlAddrType = mk_bits(clog2(ctrl_mem_size))
     DataAddrType = mk_bits(clog2(data_mem_size))
@@ -108,15 +119,22 @@ class TileWithStreamingLoadRTL(Component):
                                    total_steps)
 
     # The `tile_in_channel` indicates the outport channels that are
-    # connected to the next tiles.
-    s.tile_in_channel = [ChannelRTL(DataType, latency = 1)
-                         for _ in range(num_tile_inports)]
+    # connected to the next tiles, each of which buffers
+    # `input_fifo_depths[i]` words to absorb the skew among the producers.
+    s.tile_in_channel = [ElasticBufferRTL(DataType, input_fifo_depths[i])
+                         for i in range(num_tile_inports)]
 
     # The `tile_out_or_link` would "or" the outports of the
     # `tile_out_channel` and the FUs.
     s.tile_out_or_link = [LinkOrRTL(DataType)
                           for _ in range(num_tile_outports)]
 
+    # The optional skid buffers behind the `tile_out_or_link`, which
+    # decouple the crossbars from the ready of the next tiles.
+    if output_skid_depth > 0:
+      s.tile_out_skid = [ElasticBufferRTL(DataType, output_skid_depth)
+                         for _ in range(num_tile_outports)]
+
     # Signals indicating whether certain modules already done their jobs.
     s.element_done = Wire(1)
     s.fu_crossbar_done = Wire(1)
@@ -200,7 +218,11 @@ class TileWithStreamingLoadRTL(Component):
     for i in range(num_tile_outports):
       s.fu_crossbar.send_data[i] //= s.tile_out_or_link[i].recv_fu
       s.routing_crossbar.send_data[i] //= s.tile_out_or_link[i].recv_xbar
-      s.tile_out_or_link[i].send //= s.send_data[i]
+      if output_skid_depth > 0:
+        s.tile_out_or_link[i].send //= s.tile_out_skid[i].recv
+        s.tile_out_skid[i].send //= s.send_data[i]
+      else:
+        s.tile_out_or_link[i].send //= s.send_data[i]
 
     # Crossbars outputs are integrated with the "register_cluster".
     # Whether the required operands for FU are from the "routing_crossbar"
@@ -238,6 +260,10 @@ class TileWithStreamingLoadRTL(Component):
             (s.recv_from_controller_pkt.msg.payload.cmd == CMD_CONFIG_PROLOGUE_FU) | \
             (s.recv_from_controller_pkt.msg.payload.cmd == CMD_CONFIG_PROLOGUE_FU_CROSSBAR) | \
             (s.recv_from_controller_pkt.msg.payload.cmd == CMD_CONFIG_PROLOGUE_ROUTING_CROSSBAR) | \
+            (s.recv_from_controller_pkt.msg.payload.cmd == CMD_CONFIG_PACKED) | \
+            (s.recv_from_controller_pkt.msg.payload.cmd == CMD_CONFIG_PACKED_OPS) | \
+            (s.recv_from_controller_pkt.msg.payload.cmd == CMD_CONFIG_PROLOGUE_FU_PACKED) | \
+            (s.recv_from_controller_pkt.msg.payload.cmd == CMD_CONFIG_DEFAULT_NOP) | \
             (s.recv_from_controller_pkt.msg.payload.cmd == CMD_CONFIG_TOTAL_CTRL_COUNT) | \
             (s.recv_from_controller_pkt.msg.payload.cmd == CMD_CONFIG_COUNT_PER_ITER) | \
             (s.recv_from_controller_pkt.msg.payload.cmd == CMD_GLOBAL_REDUCE_ADD_RESPONSE) | \
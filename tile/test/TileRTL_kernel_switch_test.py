@@ -0,0 +1,254 @@
+"""
+==========================================================================
+TileRTL_kernel_switch_test.py
+==========================================================================
+Benchmark of the kernel-switch latency (see kernel_switch_helper) on a
+single TileRTL versus the ctrl_mem_size, i.e., the cycles from kernel
+A's CMD_COMPLETE to kernel B's first INC, both kernels filling the ctrl
+memory. The double-buffered ctrl memory is relaunched right away, while
+the single-bank one is reset and reconfigured as a baseline. The table
+is printed, e.g., with `pytest -s`.
+
+  Date : Oct 19, 2026
+"""
+
+from types import SimpleNamespace
+
+from pymtl3.passes.backends.verilog import (VerilogVerilatorImportPass)
+from pymtl3.stdlib.test_utils import (config_model_with_cmdline_opts)
+
+from ..TileRTL import TileRTL
+from ...fu.flexible.FlexibleFuRTL import FlexibleFuRTL
+from ...fu.single.AdderRTL import AdderRTL
+from ...lib.basic.val_rdy.SinkRTL import SinkRTL as TestSinkRTL
+from ...lib.basic.val_rdy.SourceRTL import SourceRTL as TestSrcRTL
+from ...lib.cmd_type import *
+from ...lib.messages import *
+from ...lib.opt_type import *
+from ...lib.util.common import *
+from ...lib.util.kernel_switch_helper import *
+
+#-------------------------------------------------------------------------
+# Test harness
+#-------------------------------------------------------------------------
+
+class KernelSwitchTestHarness(Component):
+
+  def construct(s, DUT, FunctionUnit, FuList, IntraCgraPktType,
+                ctrl_mem_size, data_mem_size, num_fu_inports,
+                num_fu_outports, num_tile_inports, num_tile_outports,
+                num_registers_per_reg_bank, num_tiles,
+                kernel_a_pkts, kernel_b_pkts):
+
+    CgraPayloadType = IntraCgraPktType.get_field_type(kAttrPayload)
+    DataType = CgraPayloadType.get_field_type(kAttrData)
+
+    s.src_kernel_a = TestSrcRTL(IntraCgraPktType, kernel_a_pkts)
+    s.src_kernel_b = TestSrcRTL(IntraCgraPktType, kernel_b_pkts)
+    # Without kernel_b_pkts, kernel A is sent again once the harness is
+    # reset (see reset_dut()), each run completing once.
+    num_kernels = 2 if kernel_b_pkts else 1
+    complete_pkt = IntraCgraPktType(0, num_tiles, 0, 0, 0, 0, 0, 0,
+                                    payload = CgraPayloadType(CMD_COMPLETE))
+    s.complete_signal_sink_out = TestSinkRTL(IntraCgraPktType,
+                                             [complete_pkt] * num_kernels)
+
+    s.dut = DUT(IntraCgraPktType, ctrl_mem_size, data_mem_size,
+                ctrl_mem_size, ctrl_mem_size, num_fu_inports,
+                num_fu_outports, num_tile_inports, num_tile_outports, 1,
+                num_tiles, num_registers_per_reg_bank, FunctionUnit, FuList)
+
+    s.dut.cgra_id //= 0
+    s.dut.tile_id //= 0
+    s.complete_signal_sink_out.recv //= s.dut.send_to_controller_pkt
+    for i in range(num_tile_inports):
+      s.dut.recv_data[i].val //= 0
+      s.dut.recv_data[i].msg //= DataType()
+    for i in range(num_tile_outports):
+      s.dut.send_data[i].rdy //= 1
+
+    # Kernel B is only sent once kernel A has completed.
+    s.kernel_a_completed = Wire(b1)
+
+    @update
+    def issue_kernel_a_then_b():
+      s.src_kernel_b.send.rdy @= 0
+      if s.kernel_a_completed & ~s.src_kernel_a.send.val:
+        s.dut.recv_from_controller_pkt.val @= s.src_kernel_b.send.val
+        s.dut.recv_from_controller_pkt.msg @= s.src_kernel_b.send.msg
+        s.src_kernel_a.send.rdy @= 0
+        s.src_kernel_b.send.rdy @= s.dut.recv_from_controller_pkt.rdy
+      else:
+        s.dut.recv_from_controller_pkt.val @= s.src_kernel_a.send.val
+        s.dut.recv_from_controller_pkt.msg @= s.src_kernel_a.send.msg
+        s.src_kernel_a.send.rdy @= s.dut.recv_from_controller_pkt.rdy
+
+    @update_ff
+    def update_kernel_a_completed():
+      if s.reset:
+        s.kernel_a_completed <<= 0
+      elif s.complete_signal_sink_out.recv.val & s.complete_signal_sink_out.recv.rdy:
+        s.kernel_a_completed <<= 1
+
+  def done(s):
+    return s.src_kernel_a.done() and s.src_kernel_b.done() and \
+           s.complete_signal_sink_out.done()
+
+  def line_trace(s):
+    return s.dut.line_trace()
+
+def mk_kernel_pkts(pkt, DataType, ctrl, ctrl_mem_size):
+  # Fills the ctrl memory and the const queue, with one prologue count
+  # per ctrl signal, and runs each ctrl signal once.
+  return [pkt(CMD_CONFIG, ctrl_addr = addr, ctrl = ctrl)
+          for addr in range(ctrl_mem_size)] + \
+         [pkt(CMD_CONFIG_COUNT_PER_ITER, data = DataType(ctrl_mem_size, 1)),
+          pkt(CMD_CONFIG_TOTAL_CTRL_COUNT, data = DataType(ctrl_mem_size, 1))] + \
+         [pkt(CMD_CONST, data = DataType(addr, 1))
+          for addr in range(ctrl_mem_size)] + \
+         [pkt(CMD_CONFIG_PROLOGUE_FU, ctrl_addr = addr, data = DataType(0, 1))
+          for addr in range(ctrl_mem_size)] + \
+         [pkt(CMD_LAUNCH)]
+
+def sim_kernel_switch(ctrl_mem_size, double_buffer_ctrl, cmdline_opts):
+  num_tile_inports = 4
+  num_tile_outports = 4
+  num_fu_inports = 4
+  num_fu_outports = 2
+  num_routing_outports = num_fu_inports + num_tile_outports
+  data_mem_size_global = 16
+  num_tiles = 4
+  num_registers_per_reg_bank = 16
+  TileInType = mk_bits(clog2(num_tile_inports + num_fu_inports + 1))
+  FuInType = mk_bits(clog2(num_fu_inports + 1))
+  FuOutType = mk_bits(clog2(num_fu_outports + 1))
+  RegIdxType = mk_bits(clog2(num_registers_per_reg_bank))
+  DataType = mk_data(32, 1)
+  CtrlType = mk_ctrl(num_fu_inports,
+                     num_fu_outports,
+                     num_tile_inports,
+                     num_tile_outports,
+                     num_registers_per_reg_bank)
+  DataAddrType = mk_bits(clog2(data_mem_size_global))
+  CtrlAddrType = mk_bits(clog2(ctrl_mem_size))
+  CgraPayloadType = mk_cgra_payload(DataType, DataAddrType, CtrlType,
+                                    CtrlAddrType)
+  IntraCgraPktType = mk_intra_cgra_pkt(1, 1, num_tiles, CgraPayloadType)
+  pkt = lambda cmd, **kwargs: IntraCgraPktType(0, 0, 0, 0, 0, 0, 0, 0,
+                                               payload = CgraPayloadType(cmd, **kwargs))
+
+  # Increments register 2 of bank 0 through the fu crossbar, without
+  # waiting for any data from the neighbours.
+  fu_xbar_code = [FuOutType(0) for _ in range(num_routing_outports)]
+  fu_xbar_code[num_tile_outports] = FuOutType(1)
+  ctrl = CtrlType(OPT_INC,
+                  [FuInType(1), FuInType(0), FuInType(0), FuInType(0)],
+                  [TileInType(0) for _ in range(num_routing_outports)],
+                  fu_xbar_code,
+                  read_reg_towards = [b2(READ_TOWARDS_FU), b2(0), b2(0), b2(0)],
+                  read_reg_idx = [RegIdxType(2), RegIdxType(0),
+                                  RegIdxType(0), RegIdxType(0)],
+                  write_reg_from = [b2(PORT_FU_CROSSBAR), b2(0), b2(0), b2(0)],
+                  write_reg_idx = [RegIdxType(2), RegIdxType(0),
+                                   RegIdxType(0), RegIdxType(0)])
+  kernel_pkts = mk_kernel_pkts(pkt, DataType, ctrl, ctrl_mem_size)
+  # The single-bank ctrl memory cannot be relaunched once completed, so
+  # the tile is reset and kernel A's packets are sent again as kernel B.
+  kernel_b_pkts = kernel_pkts if double_buffer_ctrl else []
+  th = KernelSwitchTestHarness(TileRTL, FlexibleFuRTL, [AdderRTL],
+                               IntraCgraPktType, ctrl_mem_size,
+                               data_mem_size_global, num_fu_inports,
+                               num_fu_outports, num_tile_inports,
+                               num_tile_outports,
+                               num_registers_per_reg_bank, num_tiles,
+                               kernel_pkts, kernel_b_pkts)
+  th.set_param("top.dut.construct", double_buffer_ctrl = double_buffer_ctrl)
+  th.elaborate()
+  th.dut.set_metadata(VerilogVerilatorImportPass.vl_Wno_list,
+                      ['UNSIGNED', 'UNOPTFLAT', 'WIDTH', 'WIDTHCONCAT',
+                       'ALWCOMBORDER'])
+  th = config_model_with_cmdline_opts(th, cmdline_opts, duts = ['dut'])
+  th.apply(DefaultPassGroup(linetrace = False))
+  th.sim_reset()
+
+  monitor = KernelSwitchMonitor(th.dut.recv_from_controller_pkt,
+                                th.dut.send_to_controller_pkt,
+                                [th.dut], num_completes = 1)
+  if double_buffer_ctrl:
+    while not th.done() and th.sim_cycle_count() < 500:
+      monitor.sample()
+      th.sim_tick()
+  else:
+    # Resets the tile right after kernel A's CMD_COMPLETE, and runs until
+    # kernel B completes, as the sink stays done once it got the first one.
+    while monitor.complete_cycle is None and th.sim_cycle_count() < 500:
+      monitor.sample()
+      th.sim_tick()
+    reset_dut(th, monitor)
+    while monitor.completes < 2 and th.sim_cycle_count() < 500:
+      monitor.sample()
+      th.sim_tick()
+  assert th.done()
+
+  report = monitor.report()
+  # Kernel B's packets go through a single port, one per cycle, before
+  # its first op.
+  assert report["num_pkts"] == len(kernel_pkts)
+  assert report["total_cycles"] >= report["num_pkts"]
+  assert sum(report["breakdown"].values()) == report["total_cycles"]
+  return {"dut": "TileRTL", "double_buffer_ctrl": double_buffer_ctrl,
+          "ctrl_mem_size": ctrl_mem_size, **report}
+
+def test_tile_kernel_switch_latency(cmdline_opts, tmp_path):
+  reports = []
+  for double_buffer_ctrl in [True, False]:
+    totals = []
+    for ctrl_mem_size in [4, 8, 16]:
+      report = sim_kernel_switch(ctrl_mem_size, double_buffer_ctrl,
+                                 cmdline_opts)
+      totals.append(report["total_cycles"])
+      reports.append(report)
+    # More ctrl signals take longer to switch.
+    assert totals == sorted(totals)
+
+  print()
+  print(format_kernel_switch_reports(reports))
+  write_kernel_switch_json(tmp_path / "kernel_switch_latency.json", reports)
+  # The reset cycles come on top of the reconfiguration.
+  num_sizes = len(reports) // 2
+  for double_buffered, baseline in zip(reports[:num_sizes], reports[num_sizes:]):
+    assert baseline["breakdown"]["reset"] == 2
+    assert baseline["total_cycles"] >= double_buffered["total_cycles"]
+
+def test_kernel_switch_monitor_in_flight_pkts():
+  # A packet of kernel A injected before the CMD_COMPLETE, but delivered
+  # after it, is not accounted for kernel B.
+  port = lambda cmd = CMD_CONFIG: SimpleNamespace(
+      val = 0, rdy = 1, msg = SimpleNamespace(payload = SimpleNamespace(cmd = cmd)))
+  inject = port()
+  complete = port(CMD_COMPLETE)
+  tile = SimpleNamespace(recv_from_controller_pkt = port(),
+                         ctrl_mem = SimpleNamespace(send_ctrl = SimpleNamespace(
+                             val = 0, msg = SimpleNamespace(operation = OPT_INC))))
+  monitor = KernelSwitchMonitor(inject, complete, [tile], num_completes = 1)
+  # (injected cmd, completed, delivered cmd, issued) per cycle.
+  cycles = [(CMD_CONST, True, None, False),
+            (CMD_CONFIG, False, CMD_CONST, False),
+            (CMD_LAUNCH, False, CMD_CONFIG, False),
+            (None, False, CMD_LAUNCH, False),
+            (None, False, None, True)]
+  for injected, completed, delivered, issued in cycles:
+    inject.val = int(injected is not None)
+    inject.msg.payload.cmd = injected
+    complete.val = int(completed)
+    tile.recv_from_controller_pkt.val = int(delivered is not None)
+    tile.recv_from_controller_pkt.msg.payload.cmd = delivered
+    tile.ctrl_mem.send_ctrl.val = int(issued)
+    monitor.sample()
+
+  report = monitor.report()
+  assert report["total_cycles"] == 4
+  assert report["num_pkts"] == 2
+  assert list(report["phases"]) == ["config", "launch"]
+  assert report["phases"]["config"]["last_deliver"] == 2
+  assert sum(report["breakdown"].values()) == report["total_cycles"]
@@ -10,6 +10,8 @@ Author : Cheng Tan
   Date : Nov 26, 2024
 """
 
+import pytest
+
 from pymtl3.passes.backends.verilog import (VerilogVerilatorImportPass)
 from pymtl3.stdlib.test_utils import (run_sim,
                                       config_model_with_cmdline_opts)
@@ -23,9 +25,11 @@ from ...fu.single.LogicRTL import LogicRTL
 from ...fu.single.MemUnitRTL import MemUnitRTL
 from ...fu.single.MulRTL import MulRTL
 from ...fu.single.PhiRTL import PhiRTL
+from ...fu.single.PipelinedMulRTL import PipelinedMulRTL
 from ...fu.single.SelRTL import SelRTL
 from ...fu.single.ShifterRTL import ShifterRTL
 from ...fu.single.ExclusiveDivRTL import ExclusiveDivRTL
+from ...fu.single.Radix4DivRTL import Radix4DivRTL
 from ...fu.single.InclusiveDivRTL import InclusiveDivRTL
 from ...fu.triple.ThreeMulAdderShifterRTL import ThreeMulAdderShifterRTL
 from ...fu.vector.VectorAdderComboRTL import VectorAdderComboRTL
@@ -36,6 +40,7 @@ from ...lib.cmd_type import *
 from ...lib.messages import *
 from ...lib.opt_type import *
 from ...lib.util.common import *
+from ...mem.data.DataMemRTL import DataMemRTL
 
 #-------------------------------------------------------------------------
 # Test harness
@@ -48,7 +53,8 @@ class TestHarness(Component):
                 ctrl_mem_size, data_mem_size, num_fu_inports,
                 num_fu_outports, num_tile_inports,
                 num_tile_outports, num_registers_per_reg_bank, src_data,
-                src_ctrl_pkt, sink_out, num_tiles, complete_signal_sink_out, num_ctrl, total_steps):
+                src_ctrl_pkt, sink_out, num_tiles, complete_signal_sink_out, num_ctrl, total_steps,
+                SecondFuList = None, preload_data = None):
 
     CgraPayloadType = IntraCgraPktType.get_field_type(kAttrPayload)
     DataType = CgraPayloadType.get_field_type(kAttrData)
@@ -66,7 +72,7 @@ class TestHarness(Component):
                 num_fu_inports, num_fu_outports, num_tile_inports,
                 num_tile_outports, 1, num_tiles,
                 num_registers_per_reg_bank,
-                FunctionUnit, FuList)
+                FunctionUnit, FuList, SecondFuList = SecondFuList)
 
     # Connects tile id.
     s.dut.cgra_id //= 0
@@ -80,7 +86,15 @@ class TestHarness(Component):
     for i in range(num_tile_outports):
       connect(s.dut.send_data[i], s.sink_out[i].recv)
 
-    if MemUnitRTL in FuList:
+    # The memory accesses go to a data memory holding `preload_data`.
+    if preload_data is not None:
+      s.data_mem = DataMemRTL(DataType, data_mem_size,
+                              preload_data = preload_data)
+      connect(s.dut.to_mem_raddr,   s.data_mem.recv_raddr[0])
+      connect(s.dut.from_mem_rdata, s.data_mem.send_rdata[0])
+      connect(s.dut.to_mem_waddr,   s.data_mem.recv_waddr[0])
+      connect(s.dut.to_mem_wdata,   s.data_mem.recv_wdata[0])
+    elif MemUnitRTL in FuList:
       s.dut.to_mem_raddr.rdy //= 0
       s.dut.from_mem_rdata.val //= 0
       s.dut.from_mem_rdata.msg //= DataType(0, 0)
@@ -104,7 +118,7 @@ class TestHarness(Component):
   def line_trace(s):
     return s.dut.line_trace()
 
-def test_tile_alu(cmdline_opts):
+def test_tile_alu(cmdline_opts, input_fifo_depths = 2, output_skid_depth = 0):
   num_tile_inports = 4
   num_tile_outports = 4
   num_fu_inports = 4
@@ -215,6 +229,9 @@ def test_tile_alu(cmdline_opts):
                    num_registers_per_reg_bank, src_data,
                    src_ctrl_pkt, sink_out, num_tiles, complete_signal_sink_out,
                    num_ctrl = 2, total_steps = 2)
+  th.set_param("top.dut.construct",
+               input_fifo_depths = input_fifo_depths,
+               output_skid_depth = output_skid_depth)
   th.elaborate()
   th.dut.set_metadata(VerilogVerilatorImportPass.vl_Wno_list,
                       ['UNSIGNED', 'UNOPTFLAT', 'WIDTH', 'WIDTHCONCAT',
@@ -222,7 +239,16 @@ def test_tile_alu(cmdline_opts):
   th = config_model_with_cmdline_opts(th, cmdline_opts, duts = ['dut'])
   run_sim(th)
 
-def test_tile_multicycle_exclusive(cmdline_opts):
+def test_tile_alu_buffer_depths(cmdline_opts):
+  # Per-inport FIFO depths and the output skid buffers only add latency,
+  # the results stay the same.
+  test_tile_alu(cmdline_opts, input_fifo_depths = [4, 1, 2, 3],
+                output_skid_depth = 2)
+  # An inport without any entry is rejected.
+  with pytest.raises(AssertionError, match = "input_fifo_depths"):
+    test_tile_alu(cmdline_opts, input_fifo_depths = [4, 1, 0, 3])
+
+def test_tile_multicycle_exclusive(cmdline_opts, DivUnit = ExclusiveDivRTL):
   num_tile_inports = 4
   num_tile_outports = 4
   num_fu_inports = 4
@@ -254,7 +280,7 @@ def test_tile_multicycle_exclusive(cmdline_opts):
             GrantRTL,
             MemUnitRTL,
             SelRTL,
-            ExclusiveDivRTL]
+            DivUnit]
   data_nbits = 32
   DataType = mk_data(data_nbits, 1)
   PredicateType = mk_predicate(1, 1)
@@ -338,6 +364,260 @@ def test_tile_multicycle_exclusive(cmdline_opts):
   th = config_model_with_cmdline_opts(th, cmdline_opts, duts = ['dut'])
   run_sim(th)
 
+def test_tile_radix4_div(cmdline_opts):
+  # The same kernel on the pipelined divider, which needs no external
+  # Verilog.
+  test_tile_multicycle_exclusive(cmdline_opts, DivUnit = Radix4DivRTL)
+
+def test_tile_pipelined_mul(cmdline_opts, PipelinedUnit = PipelinedMulRTL,
+                            operation = OPT_MUL, ref = lambda a, b: a * b):
+  num_tile_inports = 4
+  num_tile_outports = 4
+  num_fu_inports = 4
+  num_fu_outports = 2
+  ctrl_mem_size = 3
+  data_mem_size_global = 16
+  num_cgra_rows = 1
+  num_cgra_columns = 1
+  num_tiles = 4
+  num_registers_per_reg_bank = 16
+  TileInType = mk_bits(clog2(num_tile_inports + num_fu_inports + 1))
+  FuInType = mk_bits(clog2(num_fu_inports + 1))
+  FuOutType = mk_bits(clog2(num_fu_outports + 1))
+  pick_register = [FuInType(1), FuInType(2), FuInType(0), FuInType(0)]
+  DUT = TileRTL
+  FunctionUnit = FlexibleFuRTL
+  FuList = [AdderRTL, PipelinedUnit]
+  data_nbits = 32
+  DataType = mk_data(data_nbits, 1)
+  addr_nbits = clog2(data_mem_size_global)
+
+  CtrlType = mk_ctrl(num_fu_inports,
+                     num_fu_outports,
+                     num_tile_inports,
+                     num_tile_outports,
+                     num_registers_per_reg_bank)
+
+  CtrlAddrType = mk_bits(clog2(ctrl_mem_size))
+  DataAddrType = mk_bits(addr_nbits)
+
+  CgraPayloadType = mk_cgra_payload(DataType,
+                                    DataAddrType,
+                                    CtrlType,
+                                    CtrlAddrType)
+
+  IntraCgraPktType = mk_intra_cgra_pkt(num_cgra_columns,
+                                       num_cgra_rows,
+                                       num_tiles,
+                                       CgraPayloadType)
+
+  def mk_config(ctrl_addr, operation, tile_outport):
+    # The operands come from the east and the west inports, and the
+    # result goes to `tile_outport`.
+    fu_xbar_outport = [FuOutType(0) for _ in range(num_tile_outports + num_fu_inports)]
+    fu_xbar_outport[tile_outport] = FuOutType(1)
+    return IntraCgraPktType(0, 0, 0, 0, 0, 0, 0, 0,
+                            payload = CgraPayloadType(CMD_CONFIG, ctrl_addr = ctrl_addr,
+                                                      ctrl = CtrlType(operation,
+                                                                      pick_register,
+                                                                      [TileInType(0), TileInType(0), TileInType(0), TileInType(0),
+                                                                       TileInType(PORT_WEST), TileInType(PORT_EAST), TileInType(0), TileInType(0)],
+                                                                      fu_xbar_outport)))
+
+  src_ctrl_pkt = [
+      mk_config(0, operation, PORT_INDEX_EAST),
+      mk_config(1, OPT_ADD, PORT_INDEX_NORTH),
+      mk_config(2, operation, PORT_INDEX_SOUTH),
+      # The result of the pipelined operation at ctrl address 0 is not
+      # routed in the 1st iteration.
+      IntraCgraPktType(0, 0,
+                       payload = CgraPayloadType(CMD_CONFIG_PROLOGUE_FU_CROSSBAR, ctrl_addr = 0,
+                                                 ctrl = CtrlType(fu_xbar_outport = [
+                                                    FuOutType(0), FuOutType(0), FuOutType(0), FuOutType(0),
+                                                    FuOutType(0), FuOutType(0), FuOutType(0), FuOutType(0)]),
+                                                 data = DataType(1, 1))),
+      IntraCgraPktType(0, 0, 0, 0, 0, 0, 0, 0, payload = CgraPayloadType(CMD_LAUNCH))]
+
+  # The operands of the pipelined operation, ADD and pipelined operation
+  # in the 1st and 2nd iterations.
+  west = [20, 3, 40, 50, 6, 70]
+  east = [10, 10, 10, 20, 20, 20]
+  src_data = [[],
+              [],
+              [DataType(x, 1) for x in west],
+              [DataType(x, 1) for x in east]]
+
+  # The pipelined result of the 1st iteration leaves the pipeline after
+  # the ctrl moved on, and is dropped rather than routed by the next ctrl
+  # word, each other result reaches the outport of the ctrl word issuing
+  # it.
+  sink_out = [
+              [DataType(west[1] + east[1], 1), DataType(west[4] + east[4], 1)],
+              [DataType(ref(west[2], east[2]), 1), DataType(ref(west[5], east[5]), 1)],
+              [],
+              [DataType(ref(west[3], east[3]), 1)]]
+
+  complete_signal_sink_out = [IntraCgraPktType(0, num_tiles, 0, 0, 0, 0, 0, 0, payload = CgraPayloadType(CMD_COMPLETE))]
+
+  th = TestHarness(DUT, FunctionUnit, FuList,
+                   IntraCgraPktType,
+                   ctrl_mem_size,
+                   data_mem_size_global, num_fu_inports, num_fu_outports,
+                   num_tile_inports, num_tile_outports,
+                   num_registers_per_reg_bank, src_data,
+                   src_ctrl_pkt, sink_out, num_tiles, complete_signal_sink_out,
+                   num_ctrl = 3, total_steps = 6)
+  th.elaborate()
+  th.dut.set_metadata(VerilogVerilatorImportPass.vl_Wno_list,
+                      ['UNSIGNED', 'UNOPTFLAT', 'WIDTH', 'WIDTHCONCAT',
+                       'ALWCOMBORDER'])
+  th = config_model_with_cmdline_opts(th, cmdline_opts, duts = ['dut'])
+  run_sim(th)
+
+def test_tile_pipelined_radix4_div(cmdline_opts):
+  test_tile_pipelined_mul(cmdline_opts, PipelinedUnit = Radix4DivRTL,
+                          operation = OPT_DIV, ref = lambda a, b: a // b)
+
+def test_tile_spmv(cmdline_opts):
+  num_tile_inports = 4
+  num_tile_outports = 4
+  num_fu_inports = 4
+  num_fu_outports = 2
+  ctrl_mem_size = 6
+  data_mem_size_global = 16
+  num_cgra_rows = 1
+  num_cgra_columns = 1
+  num_tiles = 4
+  num_registers_per_reg_bank = 16
+  TileInType = mk_bits(clog2(num_tile_inports + num_fu_inports + 1))
+  FuInType = mk_bits(clog2(num_fu_inports + 1))
+  FuOutType = mk_bits(clog2(num_fu_outports + 1))
+  RegIdxType = mk_bits(clog2(num_registers_per_reg_bank))
+  DUT = TileRTL
+  FunctionUnit = FlexibleFuRTL
+  FuList = [AdderRTL, MulRTL, MemUnitRTL]
+  data_nbits = 32
+  DataType = mk_data(data_nbits, 1)
+  addr_nbits = clog2(data_mem_size_global)
+
+  CtrlType = mk_ctrl(num_fu_inports,
+                     num_fu_outports,
+                     num_tile_inports,
+                     num_tile_outports,
+                     num_registers_per_reg_bank)
+
+  CtrlAddrType = mk_bits(clog2(ctrl_mem_size))
+  DataAddrType = mk_bits(addr_nbits)
+
+  CgraPayloadType = mk_cgra_payload(DataType,
+                                    DataAddrType,
+                                    CtrlType,
+                                    CtrlAddrType)
+
+  IntraCgraPktType = mk_intra_cgra_pkt(num_cgra_columns,
+                                       num_cgra_rows,
+                                       num_tiles,
+                                       CgraPayloadType)
+
+  # y = A * x for a sparse A stored in the ELL format (2 nonzeros per
+  # row), i.e., the column indices stream in from the west, the values
+  # from the east, and the row indices from the north. x is located at
+  # `x_base` and y at `y_base` of the data memory.
+  x_base = 8
+  y_base = 4
+  x = [1, 2, 3, 4]
+  cols = [[0, 2], [3, 1], [2, 3]]
+  vals = [[5, 6], [2, 7], [1, 10]]
+  y = [sum(val * x[col] for col, val in zip(cols[row], vals[row]))
+       for row in range(len(cols))]
+
+  def mk_config(ctrl_addr, operation, fu_in, routing_inport = None,
+                fu_xbar_outport = None, write_reg_bank = None,
+                read_reg_banks = []):
+    # `routing_inport` maps an FU inport (i.e., register bank) to the tile
+    # inport feeding it. The result of the operation goes to the tile
+    # outport or register bank in `fu_xbar_outport`, and is written into
+    # register 0 of `write_reg_bank`. Register 0 of the `read_reg_banks`
+    # feeds their FU inports.
+    routing_xbar_outport = [TileInType(0) for _ in range(num_tile_outports + num_fu_inports)]
+    for fu_inport, tile_inport in (routing_inport or {}).items():
+      routing_xbar_outport[num_tile_outports + fu_inport] = TileInType(tile_inport)
+    fu_xbar = [FuOutType(0) for _ in range(num_tile_outports + num_fu_inports)]
+    for outport in fu_xbar_outport or []:
+      fu_xbar[outport] = FuOutType(1)
+    write_reg_from = [b2(0) for _ in range(num_fu_inports)]
+    if write_reg_bank is not None:
+      write_reg_from[write_reg_bank] = b2(2)
+    read_reg_towards = [b2(0) for _ in range(num_fu_inports)]
+    for bank in read_reg_banks:
+      read_reg_towards[bank] = b2(1)
+    return IntraCgraPktType(0, 0,
+                            payload = CgraPayloadType(CMD_CONFIG, ctrl_addr = ctrl_addr,
+                                                      ctrl = CtrlType(operation,
+                                                                      [FuInType(x) for x in fu_in],
+                                                                      routing_xbar_outport,
+                                                                      fu_xbar,
+                                                                      write_reg_from = write_reg_from,
+                                                                      write_reg_idx = [RegIdxType(0) for _ in range(num_fu_inports)],
+                                                                      read_reg_towards = read_reg_towards,
+                                                                      read_reg_idx = [RegIdxType(0) for _ in range(num_fu_inports)])))
+
+  reg_bank = lambda bank: num_tile_outports + bank
+  src_ctrl_pkt = [
+      # Gathers x[col] into register bank 0, and multiplies it with the
+      # value into register bank 2 (3 for the 2nd nonzero).
+      mk_config(0, OPT_ADD_CONST_LD, [1, 0, 0, 0], {0: PORT_WEST},
+                [reg_bank(0)], write_reg_bank = 0),
+      mk_config(1, OPT_MUL, [1, 2, 0, 0], {1: PORT_EAST},
+                [reg_bank(2)], write_reg_bank = 2, read_reg_banks = [0]),
+      mk_config(2, OPT_ADD_CONST_LD, [1, 0, 0, 0], {0: PORT_WEST},
+                [reg_bank(0)], write_reg_bank = 0),
+      mk_config(3, OPT_MUL, [1, 2, 0, 0], {1: PORT_EAST},
+                [reg_bank(3)], write_reg_bank = 3, read_reg_banks = [0]),
+      # Sums up the products, sends y[row] to the south and register bank 1,
+      # then scatters it to y_base + row.
+      mk_config(4, OPT_ADD, [3, 4, 0, 0], None,
+                [PORT_INDEX_SOUTH, reg_bank(1)], write_reg_bank = 1,
+                read_reg_banks = [2, 3]),
+      mk_config(5, OPT_STR_IDX_CONST, [1, 2, 0, 0], {0: PORT_NORTH},
+                read_reg_banks = [1]),
+      IntraCgraPktType(0, 0, payload = CgraPayloadType(CMD_CONST, data = DataType(x_base, 1))),
+      IntraCgraPktType(0, 0, payload = CgraPayloadType(CMD_CONST, data = DataType(x_base, 1))),
+      IntraCgraPktType(0, 0, payload = CgraPayloadType(CMD_CONST, data = DataType(y_base, 1))),
+      IntraCgraPktType(0, 0, payload = CgraPayloadType(CMD_LAUNCH))]
+
+  src_data = [[DataType(row, 1) for row in range(len(cols))],
+              [],
+              [DataType(col, 1) for row in cols for col in row],
+              [DataType(val, 1) for row in vals for val in row]]
+
+  sink_out = [[], [DataType(v, 1) for v in y], [], []]
+
+  complete_signal_sink_out = [IntraCgraPktType(0, num_tiles, payload = CgraPayloadType(CMD_COMPLETE))]
+
+  preload_data = [DataType(0, 1) for _ in range(x_base)] + \
+                 [DataType(v, 1) for v in x]
+
+  th = TestHarness(DUT, FunctionUnit, FuList,
+                   IntraCgraPktType,
+                   ctrl_mem_size,
+                   data_mem_size_global, num_fu_inports, num_fu_outports,
+                   num_tile_inports, num_tile_outports,
+                   num_registers_per_reg_bank, src_data,
+                   src_ctrl_pkt, sink_out, num_tiles, complete_signal_sink_out,
+                   num_ctrl = 6, total_steps = 6 * len(cols),
+                   preload_data = preload_data)
+  th.elaborate()
+  th.dut.set_metadata(VerilogVerilatorImportPass.vl_Wno_list,
+                      ['UNSIGNED', 'UNOPTFLAT', 'WIDTH', 'WIDTHCONCAT',
+                       'ALWCOMBORDER'])
+  th = config_model_with_cmdline_opts(th, cmdline_opts, duts = ['dut'])
+  run_sim(th)
+
+  # y is scattered into the data memory.
+  for row in range(len(cols)):
+    assert th.data_mem.reg_file.regs[y_base + row] == DataType(y[row], 1)
+
 def test_tile_multicycle_inclusive(cmdline_opts):
   num_tile_inports = 4
   num_tile_outports = 4
@@ -733,3 +1013,384 @@ def test_prologue_nah(cmdline_opts):
   th = config_model_with_cmdline_opts(th, cmdline_opts, duts = ['dut'])
   run_sim(th)
 
+def test_tile_back_to_back_prologue(cmdline_opts):
+  num_tile_inports = 4
+  num_tile_outports = 4
+  num_fu_inports = 4
+  num_fu_outports = 2
+  num_routing_outports = num_tile_outports + num_fu_inports
+  ctrl_mem_size = 2
+  data_mem_size_global = 16
+  num_cgra_rows = 1
+  num_cgra_columns = 1
+  num_tiles = 4
+  num_registers_per_reg_bank = 16
+  TileInType = mk_bits(clog2(num_tile_inports + num_fu_inports + 1))
+  FuInType = mk_bits(clog2(num_fu_inports + 1))
+  FuOutType = mk_bits(clog2(num_fu_outports + 1))
+  DUT = TileRTL
+  FunctionUnit = FlexibleFuRTL
+  FuList = [AdderRTL]
+  DataType = mk_data(32, 1)
+
+  CtrlType = mk_ctrl(num_fu_inports,
+                     num_fu_outports,
+                     num_tile_inports,
+                     num_tile_outports,
+                     num_registers_per_reg_bank)
+
+  CtrlAddrType = mk_bits(clog2(ctrl_mem_size))
+  DataAddrType = mk_bits(clog2(data_mem_size_global))
+
+  CgraPayloadType = mk_cgra_payload(DataType,
+                                    DataAddrType,
+                                    CtrlType,
+                                    CtrlAddrType)
+
+  IntraCgraPktType = mk_intra_cgra_pkt(num_cgra_columns,
+                                       num_cgra_rows,
+                                       num_tiles,
+                                       CgraPayloadType)
+
+  pkt = lambda cmd, **kwargs: IntraCgraPktType(0, 0, payload = CgraPayloadType(cmd, **kwargs))
+
+  # Adds the operands from the west and the east, and sends the sum to
+  # the south, for 3 steps. The 1st step is in the prologue of all the
+  # FU, the routing crossbar and the fu crossbar, i.e., it neither waits
+  # for the operands nor sends the sum.
+  fu_xbar_outport = [FuOutType(0) for _ in range(num_routing_outports)]
+  fu_xbar_outport[PORT_INDEX_SOUTH] = FuOutType(1)
+  kernel_pkts = [
+      pkt(CMD_CONFIG, ctrl_addr = 0,
+          ctrl = CtrlType(OPT_ADD,
+                          [FuInType(1), FuInType(2), FuInType(0), FuInType(0)],
+                          [TileInType(0), TileInType(0), TileInType(0), TileInType(0),
+                           TileInType(PORT_WEST), TileInType(PORT_EAST), TileInType(0), TileInType(0)],
+                          fu_xbar_outport)),
+      pkt(CMD_CONFIG_COUNT_PER_ITER, data = DataType(1, 1)),
+      pkt(CMD_CONFIG_TOTAL_CTRL_COUNT, data = DataType(3, 1)),
+      pkt(CMD_CONFIG_PROLOGUE_FU, ctrl_addr = 0, data = DataType(1, 1)),
+      pkt(CMD_CONFIG_PROLOGUE_ROUTING_CROSSBAR, ctrl_addr = 0,
+          ctrl = CtrlType(routing_xbar_outport = [
+              TileInType(PORT_WEST), TileInType(PORT_EAST), TileInType(0), TileInType(0),
+              TileInType(0), TileInType(0), TileInType(0), TileInType(0)]),
+          data = DataType(1, 1)),
+      pkt(CMD_CONFIG_PROLOGUE_FU_CROSSBAR, ctrl_addr = 0,
+          ctrl = CtrlType(fu_xbar_outport = [FuOutType(0) for _ in range(num_routing_outports)]),
+          data = DataType(1, 1)),
+      pkt(CMD_LAUNCH)]
+
+  # Kernel B is configured into the shadow bank while kernel A runs, and
+  # launched once kernel A completes. It goes through the same prologue,
+  # rather than resuming from the progress of kernel A.
+  src_ctrl_pkt = kernel_pkts + kernel_pkts
+
+  west = [1, 2, 3, 4]
+  east = [10, 20, 30, 40]
+  src_data = [[],
+              [],
+              [DataType(x, 1) for x in west],
+              [DataType(x, 1) for x in east]]
+
+  sink_out = [[],
+              [DataType(w + e, 1) for w, e in zip(west, east)],
+              [],
+              []]
+
+  complete_pkt = IntraCgraPktType(0, num_tiles, payload = CgraPayloadType(CMD_COMPLETE))
+  complete_signal_sink_out = [complete_pkt, complete_pkt]
+
+  th = TestHarness(DUT, FunctionUnit, FuList,
+                   IntraCgraPktType,
+                   ctrl_mem_size,
+                   data_mem_size_global, num_fu_inports, num_fu_outports,
+                   num_tile_inports, num_tile_outports,
+                   num_registers_per_reg_bank, src_data,
+                   src_ctrl_pkt, sink_out, num_tiles, complete_signal_sink_out,
+                   num_ctrl = 1, total_steps = 3)
+  th.set_param("top.dut.construct", double_buffer_ctrl = True)
+  th.elaborate()
+  th.dut.set_metadata(VerilogVerilatorImportPass.vl_Wno_list,
+                      ['UNSIGNED', 'UNOPTFLAT', 'WIDTH', 'WIDTHCONCAT',
+                       'ALWCOMBORDER'])
+  th = config_model_with_cmdline_opts(th, cmdline_opts, duts = ['dut'])
+  run_sim(th)
+
+def test_tile_ctrl_streaming(cmdline_opts):
+  num_tile_inports = 4
+  num_tile_outports = 4
+  num_fu_inports = 4
+  num_fu_outports = 2
+  num_routing_outports = num_tile_outports + num_fu_inports
+  # The schedule of 3 ctrl signals is longer than the ctrl memory.
+  ctrl_mem_size = 2
+  ctrl_store_size = 4
+  data_mem_size_global = 16
+  num_cgra_rows = 1
+  num_cgra_columns = 1
+  num_tiles = 4
+  num_registers_per_reg_bank = 16
+  TileInType = mk_bits(clog2(num_tile_inports + num_fu_inports + 1))
+  FuInType = mk_bits(clog2(num_fu_inports + 1))
+  FuOutType = mk_bits(clog2(num_fu_outports + 1))
+  DUT = TileRTL
+  FunctionUnit = FlexibleFuRTL
+  FuList = [AdderRTL]
+  DataType = mk_data(32, 1)
+
+  CtrlType = mk_ctrl(num_fu_inports,
+                     num_fu_outports,
+                     num_tile_inports,
+                     num_tile_outports,
+                     num_registers_per_reg_bank)
+
+  CtrlAddrType = mk_bits(clog2(ctrl_mem_size))
+  DataAddrType = mk_bits(clog2(data_mem_size_global))
+
+  CgraPayloadType = mk_cgra_payload(DataType,
+                                    DataAddrType,
+                                    CtrlType,
+                                    CtrlAddrType)
+
+  IntraCgraPktType = mk_intra_cgra_pkt(num_cgra_columns,
+                                       num_cgra_rows,
+                                       num_tiles,
+                                       CgraPayloadType)
+
+  pkt = lambda cmd, **kwargs: IntraCgraPktType(0, 0, payload = CgraPayloadType(cmd, **kwargs))
+
+  # Each ctrl signal operates on the operands from the west and the east,
+  # and sends the result to the south.
+  fu_xbar_outport = [FuOutType(0) for _ in range(num_routing_outports)]
+  fu_xbar_outport[PORT_INDEX_SOUTH] = FuOutType(1)
+  mk_ctrl_signal = lambda opt: CtrlType(opt,
+                                        [FuInType(1), FuInType(2), FuInType(0), FuInType(0)],
+                                        [TileInType(0), TileInType(0), TileInType(0), TileInType(0),
+                                         TileInType(PORT_WEST), TileInType(PORT_EAST), TileInType(0), TileInType(0)],
+                                        fu_xbar_outport)
+  schedule = [OPT_ADD, OPT_SUB, OPT_ADD]
+  # The ctrl memory and the prologues cannot be configured while
+  # streaming, which the tile reports instead of applying.
+  src_ctrl_pkt = [pkt(CMD_CONFIG_CTRL_STORE, data = DataType(i, 1), ctrl = mk_ctrl_signal(opt))
+                  for i, opt in enumerate(schedule)] + \
+                 [pkt(CMD_CONFIG, ctrl_addr = 1, ctrl = mk_ctrl_signal(OPT_SUB)),
+                  pkt(CMD_CONFIG_PROLOGUE_FU, ctrl_addr = 0, data = DataType(1, 1)),
+                  pkt(CMD_CONFIG_COUNT_PER_ITER, data = DataType(len(schedule), 1)),
+                  pkt(CMD_CONFIG_TOTAL_CTRL_COUNT, data = DataType(5, 1)),
+                  pkt(CMD_LAUNCH)]
+
+  # The 5 steps go through the 3 ctrl signals, then wrap around to the
+  # first two, without skipping the 1st step as a prologue.
+  west = [9, 8, 7, 6, 5]
+  east = [1, 2, 3, 4, 5]
+  src_data = [[],
+              [],
+              [DataType(x, 1) for x in west],
+              [DataType(x, 1) for x in east]]
+
+  sink_out = [[],
+              [DataType(10, 1), DataType(6, 1), DataType(10, 1),
+               DataType(10, 1), DataType(0, 1)],
+              [],
+              []]
+
+  complete_signal_sink_out = [
+      IntraCgraPktType(0, num_tiles,
+                       payload = CgraPayloadType(CMD_CONFIG_REJECTED, data = DataType(CMD_CONFIG, 1),
+                                                 ctrl_addr = 1)),
+      IntraCgraPktType(0, num_tiles,
+                       payload = CgraPayloadType(CMD_CONFIG_REJECTED, data = DataType(CMD_CONFIG_PROLOGUE_FU, 1),
+                                                 ctrl_addr = 0)),
+      IntraCgraPktType(0, num_tiles, payload = CgraPayloadType(CMD_COMPLETE))]
+
+  th = TestHarness(DUT, FunctionUnit, FuList,
+                   IntraCgraPktType,
+                   ctrl_mem_size,
+                   data_mem_size_global, num_fu_inports, num_fu_outports,
+                   num_tile_inports, num_tile_outports,
+                   num_registers_per_reg_bank, src_data,
+                   src_ctrl_pkt, sink_out, num_tiles, complete_signal_sink_out,
+                   num_ctrl = len(schedule), total_steps = 5)
+  th.set_param("top.dut.construct", ctrl_store_size = ctrl_store_size)
+  th.elaborate()
+  th.dut.set_metadata(VerilogVerilatorImportPass.vl_Wno_list,
+                      ['UNSIGNED', 'UNOPTFLAT', 'WIDTH', 'WIDTHCONCAT',
+                       'ALWCOMBORDER'])
+  th = config_model_with_cmdline_opts(th, cmdline_opts, duts = ['dut'])
+  run_sim(th)
+
+def test_tile_dual_issue(cmdline_opts):
+  num_tile_inports = 4
+  num_tile_outports = 4
+  num_fu_inports = 4
+  num_fu_outports = 2
+  ctrl_mem_size = 2
+  data_mem_size_global = 16
+  num_cgra_rows = 1
+  num_cgra_columns = 1
+  num_tiles = 4
+  num_registers_per_reg_bank = 16
+  TileInType = mk_bits(clog2(num_tile_inports + num_fu_inports + 1))
+  FuInType = mk_bits(clog2(num_fu_inports + 1))
+  # The outports of the second issue slot follow the ones of the first
+  # slot on the fu crossbar.
+  FuOutType = mk_bits(clog2(2 * num_fu_outports + 1))
+  DUT = TileRTL
+  FunctionUnit = FlexibleFuRTL
+  FuList = [AdderRTL]
+  SecondFuList = [MulRTL]
+  DataType = mk_data(32, 1)
+  addr_nbits = clog2(data_mem_size_global)
+
+  CtrlType = mk_ctrl(num_fu_inports,
+                     num_fu_outports,
+                     num_tile_inports,
+                     num_tile_outports,
+                     num_registers_per_reg_bank,
+                     dual_issue = True)
+
+  CtrlAddrType = mk_bits(clog2(ctrl_mem_size))
+  DataAddrType = mk_bits(addr_nbits)
+
+  CgraPayloadType = mk_cgra_payload(DataType,
+                                    DataAddrType,
+                                    CtrlType,
+                                    CtrlAddrType)
+
+  IntraCgraPktType = mk_intra_cgra_pkt(num_cgra_columns,
+                                       num_cgra_rows,
+                                       num_tiles,
+                                       CgraPayloadType)
+
+  # The adder takes the operands routed to the FU inports 0 and 1, while
+  # the multiplier takes the ones routed to the FU inports 2 and 3. Both
+  # fire in the same cycle and retire through the fu crossbar.
+  src_ctrl_pkt = [
+                     # src dst src_cgra_id dst_cgra_id cgra_src/dst_x/y
+      IntraCgraPktType(0,  0,  0,          0,          0, 0, 0, 0,
+                       payload = CgraPayloadType(CMD_CONFIG, ctrl_addr = 0,
+                                                 ctrl = CtrlType(OPT_ADD,
+                                                                 [FuInType(1), FuInType(2), FuInType(0), FuInType(0)],
+                                                                 [TileInType(0), TileInType(0), TileInType(0), TileInType(0),
+                                                                  TileInType(4), TileInType(3), TileInType(1), TileInType(2)],
+                                                                 [FuOutType(3), FuOutType(0), FuOutType(0), FuOutType(1),
+                                                                  FuOutType(0), FuOutType(0), FuOutType(0), FuOutType(0)],
+                                                                 second_operation = OPT_MUL,
+                                                                 second_fu_in = [FuInType(3), FuInType(4), FuInType(0), FuInType(0)]))),
+      IntraCgraPktType(0, 0, 0, 0, 0, 0, 0, 0, payload = CgraPayloadType(CMD_LAUNCH))]
+
+  src_data = [[DataType(3, 1)],
+              [DataType(6, 1)],
+              [DataType(4, 1)],
+              [DataType(5, 1)]]
+
+  sink_out = [
+              # 3 * 6 = 18 from the second issue slot.
+              [DataType(18, 1)],
+              [],
+              [],
+              # 5 + 4 = 9 from the first issue slot.
+              [DataType(9, 1)]]
+                                             # src  dst        src/dst cgra x/y
+  complete_signal_sink_out = [IntraCgraPktType(0,   num_tiles, 0, 0,   0, 0, 0, 0, payload = CgraPayloadType(CMD_COMPLETE))]
+
+  th = TestHarness(DUT, FunctionUnit, FuList,
+                   IntraCgraPktType,
+                   ctrl_mem_size,
+                   data_mem_size_global, num_fu_inports, num_fu_outports,
+                   num_tile_inports, num_tile_outports,
+                   num_registers_per_reg_bank, src_data,
+                   src_ctrl_pkt, sink_out, num_tiles, complete_signal_sink_out,
+                   num_ctrl = 1, total_steps = 1,
+                   SecondFuList = SecondFuList)
+  th.elaborate()
+  th.dut.set_metadata(VerilogVerilatorImportPass.vl_Wno_list,
+                      ['UNSIGNED', 'UNOPTFLAT', 'WIDTH', 'WIDTHCONCAT',
+                       'ALWCOMBORDER'])
+  th = config_model_with_cmdline_opts(th, cmdline_opts, duts = ['dut'])
+  run_sim(th)
+
+def test_tile_fu_bypass(cmdline_opts):
+  num_tile_inports = 4
+  num_tile_outports = 4
+  num_fu_inports = 4
+  num_fu_outports = 2
+  ctrl_mem_size = 2
+  data_mem_size_global = 16
+  num_cgra_rows = 1
+  num_cgra_columns = 1
+  num_tiles = 4
+  num_registers_per_reg_bank = 16
+  num_iterations = 6
+  TileInType = mk_bits(clog2(num_tile_inports + num_fu_inports + 1))
+  FuInType = mk_bits(clog2(num_fu_inports + 1))
+  FuOutType = mk_bits(clog2(num_fu_outports + 1))
+  DUT = TileRTL
+  FunctionUnit = FlexibleFuRTL
+  FuList = [AdderRTL, MulRTL]
+  DataType = mk_data(32, 1)
+  addr_nbits = clog2(data_mem_size_global)
+
+  CtrlType = mk_ctrl(num_fu_inports,
+                     num_fu_outports,
+                     num_tile_inports,
+                     num_tile_outports,
+                     num_registers_per_reg_bank,
+                     fu_bypass = True)
+
+  CtrlAddrType = mk_bits(clog2(ctrl_mem_size))
+  DataAddrType = mk_bits(addr_nbits)
+
+  CgraPayloadType = mk_cgra_payload(DataType,
+                                    DataAddrType,
+                                    CtrlType,
+                                    CtrlAddrType)
+
+  IntraCgraPktType = mk_intra_cgra_pkt(num_cgra_columns,
+                                       num_cgra_rows,
+                                       num_tiles,
+                                       CgraPayloadType)
+
+  # A single ctrl signal accumulates the data arriving at tile inport 0:
+  # the FU inport 0 takes the data via the routing crossbar, and the FU
+  # inport 1 takes the previous sum via the bypass of FU outport 0. The
+  # partial sums also go out through tile outport 0, one per cycle.
+  src_ctrl_pkt = [
+                     # src dst src_cgra_id dst_cgra_id cgra_src/dst_x/y
+      IntraCgraPktType(0,  0,  0,          0,          0, 0, 0, 0,
+                       payload = CgraPayloadType(CMD_CONFIG, ctrl_addr = 0,
+                                                 ctrl = CtrlType(OPT_ADD,
+                                                                 [FuInType(1), FuInType(2), FuInType(0), FuInType(0)],
+                                                                 [TileInType(0), TileInType(0), TileInType(0), TileInType(0),
+                                                                  TileInType(1), TileInType(0), TileInType(0), TileInType(0)],
+                                                                 [FuOutType(1), FuOutType(0), FuOutType(0), FuOutType(0),
+                                                                  FuOutType(0), FuOutType(0), FuOutType(0), FuOutType(0)],
+                                                                 fu_in_bypass = [FuOutType(0), FuOutType(1), FuOutType(0), FuOutType(0)]))),
+      IntraCgraPktType(0, 0, 0, 0, 0, 0, 0, 0, payload = CgraPayloadType(CMD_LAUNCH))]
+
+  src_data = [[DataType(x, 1) for x in range(1, num_iterations + 1)],
+              [],
+              [],
+              []]
+
+  sink_out = [[DataType(x * (x + 1) // 2, 1) for x in range(1, num_iterations + 1)],
+              [],
+              [],
+              []]
+                                             # src  dst        src/dst cgra x/y
+  complete_signal_sink_out = [IntraCgraPktType(0,   num_tiles, 0, 0,   0, 0, 0, 0, payload = CgraPayloadType(CMD_COMPLETE))]
+
+  th = TestHarness(DUT, FunctionUnit, FuList,
+                   IntraCgraPktType,
+                   ctrl_mem_size,
+                   data_mem_size_global, num_fu_inports, num_fu_outports,
+                   num_tile_inports, num_tile_outports,
+                   num_registers_per_reg_bank, src_data,
+                   src_ctrl_pkt, sink_out, num_tiles, complete_signal_sink_out,
+                   num_ctrl = 1, total_steps = num_iterations)
+  th.elaborate()
+  th.dut.set_metadata(VerilogVerilatorImportPass.vl_Wno_list,
+                      ['UNSIGNED', 'UNOPTFLAT', 'WIDTH', 'WIDTHCONCAT',
+                       'ALWCOMBORDER'])
+  th = config_model_with_cmdline_opts(th, cmdline_opts, duts = ['dut'])
+  run_sim(th)
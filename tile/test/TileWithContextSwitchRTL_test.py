@@ -34,6 +34,7 @@ from ...lib.basic.val_rdy.SourceRTL import SourceRTL as TestSrcRTL
 from ...lib.cmd_type import *
 from ...lib.messages import *
 from ...lib.opt_type import *
+from ...lib.util.common import *
 
 #-------------------------------------------------------------------------
 # Test harness
@@ -46,14 +47,16 @@ class TestHarness(Component):
                 ctrl_mem_size, data_mem_size, num_fu_inports,
                 num_fu_outports, num_tile_inports,
                 num_tile_outports, num_registers_per_reg_bank, src_data,
-                src_ctrl_pkt, sink_out, num_tiles, complete_signal_sink_out):
+                src_ctrl_pkt, sink_out, num_tiles, complete_signal_sink_out,
+                num_context_slots = 0, ctrl_pkt_interval_delay = 0):
 
     CgraPayloadType = IntraCgraPktType.get_field_type(kAttrPayload)
     DataType = CgraPayloadType.get_field_type(kAttrData)
     s.num_tile_inports = num_tile_inports
     s.num_tile_outports = num_tile_outports
 
-    s.src_ctrl_pkt = TestSrcRTL(IntraCgraPktType, src_ctrl_pkt)
+    s.src_ctrl_pkt = TestSrcRTL(IntraCgraPktType, src_ctrl_pkt,
+                                interval_delay = ctrl_pkt_interval_delay)
     s.src_data = [TestSrcRTL(DataType, src_data[i])
                   for i in range(num_tile_inports)]
     s.sink_out = [TestSinkRTL(DataType, sink_out[i])
@@ -65,7 +68,8 @@ class TestHarness(Component):
                 num_fu_inports, num_fu_outports, num_tile_inports,
                 num_tile_outports, 1, num_tiles,
                 num_registers_per_reg_bank,
-                FunctionUnit, FuList)
+                FunctionUnit, FuList,
+                num_context_slots = num_context_slots)
 
     # Connects tile id.
     s.dut.cgra_id //= 0
@@ -87,6 +91,9 @@ class TestHarness(Component):
       s.dut.to_mem_wdata.rdy //= 0
 
   def done(s):
+    if not s.src_ctrl_pkt.done():
+      return False
+
     for i in range(s.num_tile_inports):
       if not s.src_data[i].done():
         return False
@@ -103,7 +110,8 @@ class TestHarness(Component):
   def line_trace(s):
     return s.dut.line_trace()
 
-def test_tile_alu(cmdline_opts):
+def test_tile_alu(cmdline_opts, input_fifo_depths = DEFAULT_TILE_INPUT_FIFO_DEPTH,
+                  output_skid_depth = 0):
   num_tile_inports = 4
   num_tile_outports = 4
   num_fu_inports = 4
@@ -245,6 +253,9 @@ def test_tile_alu(cmdline_opts):
                    num_tile_inports, num_tile_outports,
                    num_registers_per_reg_bank, src_data,
                    src_ctrl_pkt, sink_out, num_tiles, complete_signal_sink_out)
+  th.set_param("top.dut.construct",
+               input_fifo_depths = input_fifo_depths,
+               output_skid_depth = output_skid_depth)
   th.elaborate()
   th.dut.set_metadata(VerilogVerilatorImportPass.vl_Wno_list,
                       ['UNSIGNED', 'UNOPTFLAT', 'WIDTH', 'WIDTHCONCAT',
@@ -252,3 +263,240 @@ def test_tile_alu(cmdline_opts):
   th = config_model_with_cmdline_opts(th, cmdline_opts, duts = ['dut'])
   run_sim(th)
 
+def test_tile_alu_buffer_depths(cmdline_opts):
+  # The pause and resume behave the same behind deeper input FIFOs and
+  # the output skid buffers.
+  test_tile_alu(cmdline_opts, input_fifo_depths = [4, 1, 2, 3],
+                output_skid_depth = 2)
+
+
+def mk_context_switch_types(num_registers_per_reg_bank):
+  num_tile_inports = 4
+  num_tile_outports = 4
+  num_fu_inports = 4
+  num_fu_outports = 2
+  ctrl_mem_size = 2
+  data_mem_size_global = 16
+  num_tiles = 4
+  DataType = mk_data(32, 1)
+  CtrlType = mk_ctrl(num_fu_inports,
+                     num_fu_outports,
+                     num_tile_inports,
+                     num_tile_outports,
+                     num_registers_per_reg_bank)
+  CgraPayloadType = mk_cgra_payload(DataType,
+                                    mk_bits(clog2(data_mem_size_global)),
+                                    CtrlType,
+                                    mk_bits(clog2(ctrl_mem_size)))
+  IntraCgraPktType = mk_intra_cgra_pkt(1, 1, num_tiles, CgraPayloadType)
+  return DataType, CtrlType, CgraPayloadType, IntraCgraPktType
+
+def mk_context_switch_th(num_registers_per_reg_bank, src_data, src_ctrl_pkt,
+                         sink_out, complete_signal_sink_out,
+                         num_context_slots = 2, ctrl_pkt_interval_delay = 0):
+  DataType, CtrlType, CgraPayloadType, IntraCgraPktType = \
+      mk_context_switch_types(num_registers_per_reg_bank)
+  return TestHarness(TileWithContextSwitchRTL, FlexibleFuRTL,
+                     [AdderRTL, PhiRTL, MemUnitRTL], IntraCgraPktType,
+                     2, 16, 4, 2, 4, 4, num_registers_per_reg_bank,
+                     src_data, src_ctrl_pkt, sink_out, 4,
+                     complete_signal_sink_out,
+                     num_context_slots = num_context_slots,
+                     ctrl_pkt_interval_delay = ctrl_pkt_interval_delay)
+
+def test_tile_save_restore_context(cmdline_opts):
+  num_registers_per_reg_bank = 16
+  DataType, CtrlType, CgraPayloadType, IntraCgraPktType = \
+      mk_context_switch_types(num_registers_per_reg_bank)
+  TileInType = mk_bits(clog2(4 + 4 + 1))
+  FuInType = mk_bits(clog2(4 + 1))
+  FuOutType = mk_bits(clog2(2 + 1))
+  pkt = lambda cmd, **kwargs: IntraCgraPktType(0, 0, payload = CgraPayloadType(cmd, **kwargs))
+
+  # Accumulates the constants into register 0 of bank 0, i.e., r0 += const,
+  # which is also sent out via the north outport.
+  accumulate = CtrlType(OPT_ADD_CONST,
+                        [FuInType(1), FuInType(0), FuInType(0), FuInType(0)],
+                        [TileInType(0) for _ in range(8)],
+                        [FuOutType(1), FuOutType(0), FuOutType(0), FuOutType(0),
+                         FuOutType(1), FuOutType(0), FuOutType(0), FuOutType(0)],
+                        write_reg_from = [b2(PORT_FU_CROSSBAR), b2(0), b2(0), b2(0)],
+                        read_reg_towards = [b2(1), b2(0), b2(0), b2(0)])
+  # Seeds r0 with the data from the north inport.
+  seed = CtrlType(OPT_NAH,
+                  [FuInType(0) for _ in range(4)],
+                  [TileInType(0), TileInType(0), TileInType(0), TileInType(0),
+                   TileInType(PORT_NORTH), TileInType(0), TileInType(0), TileInType(0)],
+                  [FuOutType(0) for _ in range(8)],
+                  write_reg_from = [b2(PORT_ROUTING_CROSSBAR), b2(0), b2(0), b2(0)])
+  consts = [pkt(CMD_CONST, data = DataType(v, 1)) for v in [1, 2, 3, 4]]
+
+  src_ctrl_pkt = [
+      pkt(CMD_CONFIG, ctrl_addr = 0, ctrl = accumulate),
+      pkt(CMD_CONFIG, ctrl_addr = 1, ctrl = seed),
+      # r0 = 5.
+      pkt(CMD_CONFIG_CTRL_LOWER_BOUND, data = DataType(1, 1)),
+      pkt(CMD_CONFIG_TOTAL_CTRL_COUNT, data = DataType(1, 1)),
+      pkt(CMD_LAUNCH),
+      pkt(CMD_TERMINATE)] + consts + [
+      # r0 = 5 + 1 = 6, then 6 + 2 = 8, the kernel being preempted after
+      # its 2nd step out of 4 by saving its context into slot 1.
+      pkt(CMD_CONFIG_CTRL_LOWER_BOUND, data = DataType(0, 1)),
+      pkt(CMD_CONFIG_TOTAL_CTRL_COUNT, data = DataType(2, 1)),
+      pkt(CMD_LAUNCH),
+      pkt(CMD_SAVE_CONTEXT, data = DataType(1, 1)),
+      pkt(CMD_TERMINATE),
+      # Another kernel clobbers r0, the const queue and the step count,
+      # i.e., r0 = 8 + 100 = 108.
+      pkt(CMD_CONST, data = DataType(100, 1)),
+      pkt(CMD_CONFIG_TOTAL_CTRL_COUNT, data = DataType(1, 1)),
+      pkt(CMD_LAUNCH),
+      pkt(CMD_TERMINATE)] + consts + [
+      # Resumes the preempted kernel from its 3rd step, i.e., r0 = 8 + 3 =
+      # 11, then 11 + 4 = 15.
+      pkt(CMD_CONFIG_TOTAL_CTRL_COUNT, data = DataType(4, 1)),
+      pkt(CMD_RESTORE_CONTEXT, data = DataType(1, 1)),
+      pkt(CMD_RESUME)]
+
+  src_data = [[DataType(5, 1)], [], [], []]
+  sink_out = [[DataType(v, 1) for v in [6, 8, 108, 11, 15]], [], [], []]
+  complete_signal_sink_out = \
+      [IntraCgraPktType(0, 4, 0, 0, 0, 0, 0, 0, payload = CgraPayloadType(CMD_COMPLETE))
+       for _ in range(4)]
+
+  # Leaves the kernels enough cycles to complete before the next command.
+  th = mk_context_switch_th(num_registers_per_reg_bank, src_data,
+                            src_ctrl_pkt, sink_out, complete_signal_sink_out,
+                            ctrl_pkt_interval_delay = 4)
+  th.elaborate()
+  th.dut.set_metadata(VerilogVerilatorImportPass.vl_Wno_list,
+                      ['UNSIGNED', 'UNOPTFLAT', 'WIDTH', 'WIDTHCONCAT',
+                       'ALWCOMBORDER'])
+  th = config_model_with_cmdline_opts(th, cmdline_opts, duts = ['dut'])
+  run_sim(th)
+
+def test_tile_save_restore_mid_prologue(cmdline_opts):
+  num_registers_per_reg_bank = 4
+  DataType, CtrlType, CgraPayloadType, IntraCgraPktType = \
+      mk_context_switch_types(num_registers_per_reg_bank)
+  TileInType = mk_bits(clog2(4 + 4 + 1))
+  FuInType = mk_bits(clog2(4 + 1))
+  FuOutType = mk_bits(clog2(2 + 1))
+  pkt = lambda cmd, **kwargs: IntraCgraPktType(0, 0, payload = CgraPayloadType(cmd, **kwargs))
+
+  # Adds the operands from the west and the east, and sends the sum to
+  # the south.
+  fu_xbar_outport = [FuOutType(0) for _ in range(8)]
+  fu_xbar_outport[PORT_INDEX_SOUTH] = FuOutType(1)
+  add = CtrlType(OPT_ADD,
+                 [FuInType(1), FuInType(2), FuInType(0), FuInType(0)],
+                 [TileInType(0), TileInType(0), TileInType(0), TileInType(0),
+                  TileInType(PORT_WEST), TileInType(PORT_EAST), TileInType(0), TileInType(0)],
+                 fu_xbar_outport)
+  # The first `count` steps are in the prologue of all the FU, the
+  # routing crossbar and the fu crossbar.
+  prologue = lambda count: [
+      pkt(CMD_CONFIG_PROLOGUE_FU, ctrl_addr = 0, data = DataType(count, 1)),
+      pkt(CMD_CONFIG_PROLOGUE_ROUTING_CROSSBAR, ctrl_addr = 0,
+          ctrl = CtrlType(routing_xbar_outport = [
+              TileInType(PORT_WEST), TileInType(PORT_EAST), TileInType(0), TileInType(0),
+              TileInType(0), TileInType(0), TileInType(0), TileInType(0)]),
+          data = DataType(count, 1)),
+      pkt(CMD_CONFIG_PROLOGUE_FU_CROSSBAR, ctrl_addr = 0,
+          ctrl = CtrlType(fu_xbar_outport = [FuOutType(0) for _ in range(8)]),
+          data = DataType(count, 1))]
+
+  src_ctrl_pkt = [
+      pkt(CMD_CONFIG, ctrl_addr = 0, ctrl = add)] + prologue(2) + [
+      # The kernel is preempted after its 1st step out of 4, i.e., in the
+      # middle of its prologue, while the operands of its 3rd and 4th
+      # steps are already waiting in the input FIFOs.
+      pkt(CMD_CONFIG_TOTAL_CTRL_COUNT, data = DataType(1, 1)),
+      pkt(CMD_LAUNCH),
+      pkt(CMD_SAVE_CONTEXT, data = DataType(1, 1)),
+      pkt(CMD_TERMINATE)] + \
+      prologue(0) + [
+      # Another kernel without prologue consumes the next operands.
+      pkt(CMD_LAUNCH),
+      pkt(CMD_TERMINATE)] + \
+      prologue(2) + [
+      # Resumes the preempted kernel from its 2nd step, which is still in
+      # the prologue.
+      pkt(CMD_CONFIG_TOTAL_CTRL_COUNT, data = DataType(4, 1)),
+      pkt(CMD_RESTORE_CONTEXT, data = DataType(1, 1)),
+      pkt(CMD_RESUME)]
+
+  src_data = [[],
+              [],
+              [DataType(v, 1) for v in [1, 2, 5]],
+              [DataType(v, 1) for v in [10, 20, 50]]]
+  sink_out = [[],
+              [DataType(v, 1) for v in [55, 11, 22]],
+              [],
+              []]
+  complete_signal_sink_out = \
+      [IntraCgraPktType(0, 4, 0, 0, 0, 0, 0, 0, payload = CgraPayloadType(CMD_COMPLETE))
+       for _ in range(3)]
+
+  th = mk_context_switch_th(num_registers_per_reg_bank, src_data,
+                            src_ctrl_pkt, sink_out, complete_signal_sink_out,
+                            ctrl_pkt_interval_delay = 4)
+  th.elaborate()
+  th.dut.set_metadata(VerilogVerilatorImportPass.vl_Wno_list,
+                      ['UNSIGNED', 'UNOPTFLAT', 'WIDTH', 'WIDTHCONCAT',
+                       'ALWCOMBORDER'])
+  th = config_model_with_cmdline_opts(th, cmdline_opts, duts = ['dut'])
+  run_sim(th)
+
+def test_context_switch_latency():
+  # Measures the cycles a tile takes to save/restore its context, and from
+  # accepting CMD_SAVE_CONTEXT to resuming the kernel, i.e., a preemption
+  # followed by CMD_TERMINATE, CMD_RESTORE_CONTEXT and CMD_RESUME. The
+  # table is printed, e.g., with `pytest -s`.
+  print()
+  print(f"{'regs/bank':>9} {'context bits':>12} {'save':>4} {'restore':>7} "
+        f"{'save-to-resume':>14}")
+  for num_registers_per_reg_bank in [4, 8, 16, 32]:
+    DataType, CtrlType, CgraPayloadType, IntraCgraPktType = \
+        mk_context_switch_types(num_registers_per_reg_bank)
+    pkt = lambda cmd, **kwargs: IntraCgraPktType(0, 0, payload = CgraPayloadType(cmd, **kwargs))
+    src_ctrl_pkt = [pkt(CMD_SAVE_CONTEXT, data = DataType(1, 1)),
+                    pkt(CMD_TERMINATE),
+                    pkt(CMD_RESTORE_CONTEXT, data = DataType(1, 1)),
+                    pkt(CMD_RESUME)]
+    th = mk_context_switch_th(num_registers_per_reg_bank, [[], [], [], []],
+                              src_ctrl_pkt, [[], [], [], []], [])
+    th.elaborate()
+    th.apply(DefaultPassGroup())
+    th.sim_reset()
+
+    context = th.dut.context_save_restore
+    save_cycles = 0
+    restore_cycles = 0
+    ncycles = 0
+    save_cycle = None
+    while not th.dut.ctrl_mem.start_iterate_ctrl and ncycles < 200:
+      if (save_cycle is None) and context.recv_cmd.val & context.recv_cmd.rdy:
+        save_cycle = ncycles
+      save_cycles += int(context.saving)
+      restore_cycles += int(context.restoring)
+      th.sim_tick()
+      ncycles += 1
+    save_to_resume = ncycles - save_cycle
+    context_bits = sum(reg.nbits for mem in context.context_mem
+                       for reg in mem.regs) // len(context.saved_progress) + \
+                   context.saved_ctrl_addr[0].nbits + \
+                   context.saved_times[0].nbits + \
+                   context.saved_const_rd_cur[0].nbits + \
+                   context.saved_progress[0].nbits + \
+                   sum(counter.nbits for counter in context.saved_prologue_counter[0]) + \
+                   sum(reg.nbits for mem in context.fifo_mem
+                       for reg in mem.regs) // len(context.saved_progress) + \
+                   sum(count.nbits for count in context.saved_fifo_count[0])
+    print(f"{num_registers_per_reg_bank:>9} {context_bits:>12} "
+          f"{save_cycles:>4} {restore_cycles:>7} {save_to_resume:>14}")
+
+    # All the banks are bursted at once, one register index per cycle.
+    assert save_cycles == num_registers_per_reg_bank
+    assert restore_cycles == num_registers_per_reg_bank
+    assert save_to_resume < 2 * num_registers_per_reg_bank + 8
@@ -37,10 +37,19 @@ Author : Bohan Cui
 #     RegIdxType = your_RegIdxType,
 #     CtrlAddrType = your_CtrlAddrType,
 #     DataAddrType = your_DataAddrType,
+#     pack_config = whether_to_pack_the_config_pkts,
+#     num_prologue_slots = num_prologue_slots_of_the_crossbars,
+#     elide_config = whether_to_elide_the_config_pkts,
 # )
 # ```
 # 2. make the packets
 # pkts = script_factory.makeVectorCGRAPkts()
+# 3. (with pack_config) check the packet count of each tile before and after
+# packing
+# script_factory.num_config_pkts
+# 4. (with elide_config) check the packet count of the kernel before and after
+# eliding
+# script_factory.config_elision_report
 
 import sys
 import os
@@ -58,6 +67,9 @@ if project_root not in sys.path:
     sys.path.insert(0, project_root)
 
 from lib.opt_type import *
+from lib.util.common import DEFAULT_TILE_INPUT_FIFO_DEPTH
+from lib.util.config_helper import check_prologue_slots, elide_config_pkts, pack_config_pkts
+from lib.util.schedule_helper import derive_prologue_counts
 
 # Global configuration for register cluster size (number of registers per cluster).
 # This can be overridden by ScriptFactory initialization.
@@ -85,7 +97,7 @@ yaml_to_VectorCGRA_map = {
     "SHL": OPT_LLS,
     "VFMUL": None, # ?
     "FADD_FADD": None, #?
-    "FMUL_FADD": None, #?
+    "FMUL_FADD": OPT_FMUL_FADD,
     "DATA_MOV": None, #?
     "CTRL_MOV": None, #?
     "RESERVE": None, #?
@@ -101,7 +113,21 @@ yaml_to_VectorCGRA_map = {
     
     "NE": OPT_NE,
     "MUL_ADD": OPT_MUL_ADD,
-    "DATA_MOV": OPT_PAS
+    "DATA_MOV": OPT_PAS,
+
+    # Lane-wise vector ops.
+    "VEC_LT": OPT_VEC_LT,
+    "VEC_GT": OPT_VEC_GT,
+    "VEC_EQ": OPT_VEC_EQ,
+    "VEC_MIN": OPT_VEC_MIN,
+    "VEC_MAX": OPT_VEC_MAX,
+    "VEC_SEL": OPT_VEC_SEL,
+    "VEC_REDUCE_MIN": OPT_VEC_REDUCE_MIN,
+    "VEC_REDUCE_MAX": OPT_VEC_REDUCE_MAX,
+
+    # Indexed memory accesses, i.e., gather and scatter.
+    "LD_INDEXED": OPT_LD_IDX,
+    "ST_INDEXED": OPT_STR_IDX,
     
 }
 
@@ -109,6 +135,9 @@ yaml_to_VectorCGRA_map_const = {
     "NE": OPT_NE_CONST,
     "ADD": OPT_ADD_CONST,
     "MUL_ADD": OPT_MUL_CONST_ADD,
+    "FMUL_FADD": OPT_FMUL_CONST_FADD,
+    "LD_INDEXED": OPT_ADD_CONST_LD,
+    "ST_INDEXED": OPT_STR_IDX_CONST,
 }
 
 
@@ -419,6 +448,7 @@ class TileSignals:
                 loop_times,
                 ii,
                 instructions,
+                prologue_counts,
                 CMD_CONST_input,
                 CMD_CONFIG_COUNT_PER_ITER_input,
                 CMD_CONFIG_TOTAL_CTRL_COUNT_input,
@@ -441,6 +471,7 @@ class TileSignals:
         self.FuInType = FuInType
         self.id_ = id_
         self.instructions = instructions
+        self.prologue_counts = prologue_counts
         self.loop_times = loop_times
         self.ii = ii
         self.B1Type = B1Type
@@ -461,114 +492,42 @@ class TileSignals:
         self.CMD_LAUNCH_ = CMD_LAUNCH_input
         
         
-    def makeProloguePackets(self, instruction):
-        print(f"Making prologue packets for instruction {instruction}")
-        pkts = []
-        pkts.append(self.makePrologueFUPackets(instruction)) # always prologue FU
-        take_up_fu_operation_idx = -1
-        for idx, operation in enumerate(instruction['operations']):
-            if _is_take_up_fu_operation(operation):
-                if take_up_fu_operation_idx != -1:
-                    raise ValueError("Only one take up fu operation is allowed")
-                take_up_fu_operation_idx = idx
-        take_up_fu_operation = None  
-        if take_up_fu_operation_idx != -1:
-            take_up_fu_operation = instruction['operations'][take_up_fu_operation_idx]
-            # TODO: fix the logic for only having non-take up fu operation
-        else:
-            raise ValueError("No take up fu operation found")
-        try:
-            src_operands = take_up_fu_operation['src_operands']
-        except Exception as e:
-            src_operands = []
-        for src_operand in src_operands:
-            if _type(src_operand) == 'PORT':
-                print(f"src_operand is PORT, add Prologue. {src_operand}")
-                if src_operand['operand'] == 'NORTH':
-                    routing_xbar_idx = 0 # here is from 0, strange.
-                elif src_operand['operand'] == 'SOUTH':
-                    routing_xbar_idx = 1
-                elif src_operand['operand'] == 'WEST':
-                    routing_xbar_idx = 2
-                elif src_operand['operand'] == 'EAST':
-                    routing_xbar_idx = 3
-                pkts.append(self.makePrologueRoutingCrossbarPackets(instruction, routing_xbar_idx))
-        
-        try:
-            dst_operands = take_up_fu_operation['dst_operands']
-        except Exception as e:
-            dst_operands = []
-
-        for dst_operand in dst_operands:
-            if _type(dst_operand) == 'REG':
-                pkts.append(self.makePrologueFUCrossbarPackets(instruction))
-        return pkts
-    
-    def makePhiConstProloguePackets(self, instruction):
-        print(f"Making phi const prologue packets for instruction {instruction}")
-        for operation in instruction['operations']:
-            if operation['opcode'] == 'PHI_CONST':
-                phi_const_operation = operation
-                break
-        if phi_const_operation is None:
-            raise ValueError("No PHI_CONST operation found")
-        try:
-            src_operands = phi_const_operation['src_operands']
-        except Exception as e:
-            src_operands = []
-            
+    def makeProloguePackets(self):
+        # The prologue counts are derived from the modulo schedule of the
+        # whole kernel (see lib/util/schedule_helper.py).
         pkts = []
-        
-        for src_operand in src_operands:
-            if _type(src_operand) == 'PORT':
-                if src_operand['operand'] == 'NORTH':
-                    routing_xbar_idx = 0
-                elif src_operand['operand'] == 'SOUTH':
-                    routing_xbar_idx = 1
-                elif src_operand['operand'] == 'WEST':
-                    routing_xbar_idx = 2
-                elif src_operand['operand'] == 'EAST':
-                    routing_xbar_idx = 3
-                pkts.append(self.makePrologueRoutingCrossbarPackets(instruction, routing_xbar_idx))
-                
-        print(f"Phi const prologue packets: {pkts}")
+        for ctrl_addr, count in sorted(self.prologue_counts['fu'].items()):
+            pkts.append(self.makePrologueFUPackets(ctrl_addr, count))
+        for (ctrl_addr, port_idx), count in sorted(self.prologue_counts['routing_crossbar'].items()):
+            pkts.append(self.makePrologueRoutingCrossbarPackets(ctrl_addr, port_idx, count))
+        for (ctrl_addr, fu_outport), count in sorted(self.prologue_counts['fu_crossbar'].items()):
+            pkts.append(self.makePrologueFUCrossbarPackets(ctrl_addr, fu_outport, count))
         return pkts
     
-    
-    def makePrologueFUPackets(self, instruction):
+    def makePrologueFUPackets(self, ctrl_addr, count):
         return self.IntraCgraPktType(0, self.id_, 
-                                     payload = self.CgraPayloadType(self.CMD_CONFIG_PROLOGUE_FU_, ctrl_addr = self.CtrlAddrType(instruction['timestep'] % self.ii),
-                                                                     data = self.DataType(1, 1)))
-    def makePrologueRoutingCrossbarPackets(self, instruction, routing_xbar_idx):
+                                     payload = self.CgraPayloadType(self.CMD_CONFIG_PROLOGUE_FU_, ctrl_addr = self.CtrlAddrType(ctrl_addr),
+                                                                     data = self.DataType(count, 1)))
+    def makePrologueRoutingCrossbarPackets(self, ctrl_addr, port_idx, count):
+        # The routing crossbar inport is encoded from 1, as in the routing of the ctrl signals.
         return self.IntraCgraPktType(0, self.id_, 
-                                     payload = self.CgraPayloadType(self.CMD_CONFIG_PROLOGUE_ROUTING_CROSSBAR_, ctrl_addr = self.CtrlAddrType(instruction['timestep'] % self.ii),
-                                                                     ctrl = self.CtrlType(routing_xbar_outport = [self.TileInType(routing_xbar_idx)] + [self.TileInType(0)] * 7),
-                                                                     data = self.DataType(1, 1)))
-    def makePrologueFUCrossbarPackets(self, instruction):
+                                     payload = self.CgraPayloadType(self.CMD_CONFIG_PROLOGUE_ROUTING_CROSSBAR_, ctrl_addr = self.CtrlAddrType(ctrl_addr),
+                                                                     ctrl = self.CtrlType(routing_xbar_outport = [self.TileInType(port_idx + 1)] + [self.TileInType(0)] * 7),
+                                                                     data = self.DataType(count, 1)))
+    def makePrologueFUCrossbarPackets(self, ctrl_addr, fu_outport, count):
         return self.IntraCgraPktType(0, self.id_, 
-                                     payload = self.CgraPayloadType(self.CMD_CONFIG_PROLOGUE_FU_CROSSBAR_, ctrl_addr = self.CtrlAddrType(instruction['timestep'] % self.ii),
-                                                                     ctrl = self.CtrlType(fu_xbar_outport = [self.FuOutType(0)] * 8),
-                                                                     data = self.DataType(1, 1)))
+                                     payload = self.CgraPayloadType(self.CMD_CONFIG_PROLOGUE_FU_CROSSBAR_, ctrl_addr = self.CtrlAddrType(ctrl_addr),
+                                                                     ctrl = self.CtrlType(fu_xbar_outport = [self.FuOutType(fu_outport)] + [self.FuOutType(0)] * 7),
+                                                                     data = self.DataType(count, 1)))
     def makeTileSignals(self):
         consts = []
         all_signals = []
         all_instruction_signals = []
-        prologue_signals = []
+        prologue_signals = self.makeProloguePackets()
         has_addrs = []
         
         # build all the instruction signals and get all the const
         for instruction in self.instructions:
-            if instruction['timestep'] >= self.ii:
-                prologue_signals.extend(self.makeProloguePackets(instruction))
-            
-            has_phi_const = False # cope with special PHI_CONST operation
-            for operation in instruction['operations']:
-                if operation['opcode'] == 'PHI_CONST':
-                    has_phi_const = True
-                    break
-            if has_phi_const:
-                prologue_signals.extend(self.makePhiConstProloguePackets(instruction))
-                
             has_addrs.append(instruction['timestep'] % self.ii)
             
             instruction_signals = InstructionSignals(
@@ -689,7 +648,11 @@ class ScriptFactory:
                  RegIdxType,
                  CtrlAddrType,
                  DataAddrType,
-                 num_registers_per_reg_bank=None):
+                 num_registers_per_reg_bank=None,
+                 input_fifo_depth=DEFAULT_TILE_INPUT_FIFO_DEPTH,
+                 pack_config=False,
+                 num_prologue_slots=None,
+                 elide_config=False):
         # Allow overriding the default register cluster size.
         global REG_CLUSTER_SIZE
         if num_registers_per_reg_bank is not None:
@@ -718,11 +681,28 @@ class ScriptFactory:
         self.RegIdxType = RegIdxType
         self.CtrlAddrType = CtrlAddrType
         self.DataAddrType = DataAddrType
+        self.input_fifo_depth = input_fifo_depth
+        # Packing needs the real packet types (see lib/util/config_helper.py).
+        self.pack_config = pack_config
+        # (number of packets, number of packets after packing) of each tile.
+        self.num_config_pkts = {}
+        # The prologue slots of the tile crossbars, None for the full table.
+        self.num_prologue_slots = num_prologue_slots
+        # Eliding is applied before packing (see lib/util/config_helper.py).
+        self.elide_config = elide_config
+        # The packet counts of the kernel before and after eliding, along
+        # with the packets elided by each step (see elide_config_pkts).
+        self.config_elision_report = {}
     
     def makeVectorCGRAPkts(self):
         
         pkts = {}
+        self.config_elision_report = {"num_pkts": 0, "num_elided_pkts": 0,
+                                      "duplicates": 0, "unused_tile_pkts": 0,
+                                      "nop_ctrl_pkts": 0, "unused_tiles": []}
         cores = self.yaml_struct['array_config']['cores']
+        # derive the prologue counts from the modulo schedule, which must not stall
+        prologue_counts = derive_prologue_counts(self.yaml_struct, self.ii, self.input_fifo_depth)
         
         
         for core in cores:
@@ -743,6 +723,7 @@ class ScriptFactory:
                 loop_times = self.loop_times, 
                 ii = self.ii, 
                 instructions = instructions,
+                prologue_counts = prologue_counts[(x, y)],
                 CMD_CONST_input = self.CMD_CONST_,
                 CMD_CONFIG_COUNT_PER_ITER_input = self.CMD_CONFIG_COUNT_PER_ITER_,
                 CMD_CONFIG_TOTAL_CTRL_COUNT_input = self.CMD_CONFIG_TOTAL_CTRL_COUNT_,
@@ -758,6 +739,15 @@ class ScriptFactory:
                 DataAddrType = self.DataAddrType,
                 )
             tile_signals = tile_signals.makeTileSignals()
+            check_prologue_slots(tile_signals, self.num_prologue_slots)
+            if self.elide_config:
+                tile_signals, report = elide_config_pkts(tile_signals, self.IntraCgraPktType)
+                for key, value in report.items():
+                    self.config_elision_report[key] += value
+            if self.pack_config:
+                packed_tile_signals = pack_config_pkts(tile_signals, self.IntraCgraPktType)
+                self.num_config_pkts[(x, y)] = (len(tile_signals), len(packed_tile_signals))
+                tile_signals = packed_tile_signals
             pkts[(x, y)] = tile_signals
             
         return pkts
@@ -0,0 +1,125 @@
+"""
+==========================================================================
+schedule_helper_test.py
+==========================================================================
+Test cases for deriving the prologue counts from the modulo schedule of
+a mapped kernel.
+
+  Date : Oct 19, 2026
+"""
+
+import os
+
+import pytest
+import yaml
+
+from ...lib.util.common import *
+from ...lib.util.schedule_helper import *
+
+FIR_YAML = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                        "fir_acceptance_test.yaml")
+
+def mk_operation(opcode, src_operands, dst_operands):
+  return {'opcode': opcode,
+          'src_operands': [{'operand': operand} for operand in src_operands],
+          'dst_operands': [{'operand': operand} for operand in dst_operands]}
+
+def mk_kernel(tiles):
+  # `tiles` maps the (column, row) of each tile to its [(timestep, operation)].
+  return {'array_config': {'cores': [
+      {'column': x, 'row': y, 'core_id': str(i),
+       'entries': [{'entry_id': "entry0",
+                    'instructions': [{'timestep': timestep,
+                                      'operations': [operation]}
+                                     for timestep, operation in instructions]}]}
+      for i, ((x, y), instructions) in enumerate(tiles.items())]}}
+
+def test_fir_prologue_counts():
+  with open(FIR_YAML) as yaml_file:
+    kernel = yaml.load(yaml_file, Loader = yaml.FullLoader)
+  prologue_counts, issues = analyze_modulo_schedule(kernel, 4)
+  assert issues == []
+  # The ADD at timestep 4 of tile (0, 0) is in the 2nd stage, and receives
+  # from the north.
+  assert prologue_counts[(0, 0)] == {
+      'fu': {0: 1},
+      'routing_crossbar': {(0, PORT_INDEX_NORTH): 1},
+      'fu_crossbar': {(0, SCHEDULE_FU_OUTPORT): 1}}
+  # The RETURN at timestep 6 does not send its result anywhere.
+  assert prologue_counts[(1, 0)] == {
+      'fu': {1: 1, 2: 1},
+      'routing_crossbar': {(1, PORT_INDEX_NORTH): 1, (1, PORT_INDEX_WEST): 1},
+      'fu_crossbar': {(1, SCHEDULE_FU_OUTPORT): 1}}
+  # The PHI_CONST skips the first arrival of the operand carried from the
+  # GRANT_PREDICATE of the previous iteration.
+  assert prologue_counts[(0, 2)] == {
+      'fu': {},
+      'routing_crossbar': {(0, PORT_INDEX_EAST): 1},
+      'fu_crossbar': {}}
+
+def test_multi_stage_prologue_counts():
+  # A recurrence spanning two iterations with II = 2, i.e., the PHI_CONST
+  # receives the operand sent at timestep 3 of two iterations before.
+  kernel = mk_kernel({
+    (0, 0): [(0, mk_operation("PHI_CONST", ["0", "NORTH"], ["EAST"]))],
+    (1, 0): [(1, mk_operation("ADD", ["WEST", "1"], ["NORTH"]))],
+    (1, 1): [(2, mk_operation("MUL", ["SOUTH", "2"], ["WEST"]))],
+    (0, 1): [(3, mk_operation("ADD", ["EAST", "3"], ["SOUTH"]))],
+  })
+  prologue_counts = derive_prologue_counts(kernel, 2)
+  assert prologue_counts[(0, 0)] == {
+      'fu': {},
+      'routing_crossbar': {(0, PORT_INDEX_NORTH): 2},
+      'fu_crossbar': {}}
+  assert prologue_counts[(1, 0)] == {
+      'fu': {}, 'routing_crossbar': {}, 'fu_crossbar': {}}
+  assert prologue_counts[(1, 1)] == {
+      'fu': {0: 1},
+      'routing_crossbar': {(0, PORT_INDEX_SOUTH): 1},
+      'fu_crossbar': {(0, SCHEDULE_FU_OUTPORT): 1}}
+  assert prologue_counts[(0, 1)] == {
+      'fu': {1: 1},
+      'routing_crossbar': {(1, PORT_INDEX_EAST): 1},
+      'fu_crossbar': {(1, SCHEDULE_FU_OUTPORT): 1}}
+
+def test_stalling_schedules():
+  # Two instructions sharing ctrl_addr 0.
+  _, issues = analyze_modulo_schedule(mk_kernel({
+    (0, 0): [(0, mk_operation("ADD", ["$0", "1"], ["$0"])),
+             (2, mk_operation("ADD", ["$0", "1"], ["$1"]))],
+  }), 2)
+  assert len(issues) == 1 and "share ctrl_addr 0" in issues[0]
+
+  # A non-PHI receiving the operand of the previous iteration.
+  _, issues = analyze_modulo_schedule(mk_kernel({
+    (0, 0): [(1, mk_operation("ADD", ["$0", "1"], ["EAST"]))],
+    (1, 0): [(0, mk_operation("ADD", ["WEST", "1"], ["$0"]))],
+  }), 2)
+  assert len(issues) == 1 and "is not a PHI" in issues[0]
+
+  # An operand never received, and an operand never sent.
+  _, issues = analyze_modulo_schedule(mk_kernel({
+    (0, 0): [(0, mk_operation("ADD", ["$0", "1"], ["EAST"]))],
+    (1, 0): [(1, mk_operation("ADD", ["NORTH", "1"], ["$0"]))],
+    (1, 1): [(0, mk_operation("ADD", ["$0", "1"], ["$0"]))],
+  }), 2)
+  assert len(issues) == 2
+  assert "no operand is sent to timestep 1 through NORTH" in issues[0]
+  assert "received 0 time(s)" in issues[1]
+
+  # Operands held across 3 iterations, and a too deep prologue.
+  kernel = mk_kernel({
+    (0, 0): [(0, mk_operation("ADD", ["$0", "1"], ["EAST"]))],
+    (1, 0): [(5, mk_operation("ADD", ["WEST", "1"], ["$0"]))],
+    (1, 1): [(2 * (PROLOGUE_MAX_COUNT + 1), mk_operation("ADD", ["$0", "1"], ["$0"]))],
+  })
+  _, issues = analyze_modulo_schedule(kernel, 2)
+  assert len(issues) == 3
+  assert "holds up to 3 operands" in issues[0]
+  assert f"fu prologue count {PROLOGUE_MAX_COUNT + 1}" in issues[1]
+  assert f"fu_crossbar prologue count {PROLOGUE_MAX_COUNT + 1}" in issues[2]
+  # Deeper input FIFOs absorb the operands.
+  _, issues = analyze_modulo_schedule(kernel, 2, fifo_depth = 3)
+  assert len(issues) == 2
+  with pytest.raises(ValueError):
+    derive_prologue_counts(kernel, 2, fifo_depth = 3)
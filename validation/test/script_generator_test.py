@@ -0,0 +1,198 @@
+"""
+==========================================================================
+script_generator_test.py
+==========================================================================
+Test cases for packing the configuration packets made by ScriptFactory
+out of a mapped kernel.
+
+  Date : Oct 19, 2026
+"""
+
+import copy
+import os
+
+import pytest
+
+from pymtl3 import *
+
+from ..script_generator import ScriptFactory
+from ...lib.cmd_type import *
+from ...lib.messages import *
+from ...lib.opt_type import *
+from ...lib.util.common import *
+from ...lib.util.config_helper import check_prologue_slots, format_config_elision_reports
+
+FIR_YAML = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                        "fir_acceptance_test.yaml")
+
+num_tile_inports = 4
+num_tile_outports = 4
+num_fu_inports = 4
+num_fu_outports = 2
+num_registers_per_reg_bank = 8
+ctrl_mem_size = 6
+data_mem_size_global = 128
+num_cgra_columns = 4
+num_cgra_rows = 1
+num_tiles = 16
+
+TileInType = mk_bits(clog2(num_tile_inports + 1))
+FuInType = mk_bits(clog2(num_fu_inports + 1))
+FuOutType = mk_bits(clog2(num_fu_outports + 1))
+DataAddrType = mk_bits(clog2(data_mem_size_global))
+RegIdxType = mk_bits(clog2(num_registers_per_reg_bank))
+DataType = mk_data(32, 1)
+CtrlType = mk_ctrl(num_fu_inports,
+                   num_fu_outports,
+                   num_tile_inports,
+                   num_tile_outports,
+                   num_registers_per_reg_bank)
+CtrlAddrType = mk_bits(clog2(ctrl_mem_size))
+CgraPayloadType = mk_cgra_payload(DataType,
+                                  DataAddrType,
+                                  CtrlType,
+                                  CtrlAddrType)
+IntraCgraPktType = mk_intra_cgra_pkt(num_cgra_columns,
+                                     num_cgra_rows,
+                                     num_tiles,
+                                     CgraPayloadType)
+
+def mk_script_factory(pack_config, num_prologue_slots = None,
+                      elide_config = False):
+  return ScriptFactory(path = FIR_YAML,
+                       CtrlType = CtrlType,
+                       IntraCgraPktType = IntraCgraPktType,
+                       CgraPayloadType = CgraPayloadType,
+                       TileInType = TileInType,
+                       FuOutType = FuOutType,
+                       CMD_CONFIG_input = CMD_CONFIG,
+                       FuInType = FuInType,
+                       ii = 4,
+                       loop_times = 10,
+                       CMD_CONST_input = CMD_CONST,
+                       CMD_CONFIG_COUNT_PER_ITER_input = CMD_CONFIG_COUNT_PER_ITER,
+                       CMD_CONFIG_TOTAL_CTRL_COUNT_input = CMD_CONFIG_TOTAL_CTRL_COUNT,
+                       CMD_CONFIG_PROLOGUE_FU_input = CMD_CONFIG_PROLOGUE_FU,
+                       CMD_CONFIG_PROLOGUE_ROUTING_CROSSBAR_input = CMD_CONFIG_PROLOGUE_ROUTING_CROSSBAR,
+                       CMD_CONFIG_PROLOGUE_FU_CROSSBAR_input = CMD_CONFIG_PROLOGUE_FU_CROSSBAR,
+                       CMD_LAUNCH_input = CMD_LAUNCH,
+                       DataType = DataType,
+                       B1Type = b1,
+                       B2Type = b2,
+                       RegIdxType = RegIdxType,
+                       CtrlAddrType = CtrlAddrType,
+                       DataAddrType = DataAddrType,
+                       num_registers_per_reg_bank = num_registers_per_reg_bank,
+                       pack_config = pack_config,
+                       num_prologue_slots = num_prologue_slots,
+                       elide_config = elide_config)
+
+def configured_state(pkts):
+  # What the ctrl memory of a tile holds after receiving the packets, along
+  # with the other packets in order. The entries left to the default NOP
+  # hold None.
+  operation_nbits = CtrlType.get_field_type(kAttrOperation).nbits
+  prologue_count_nbits = clog2(PROLOGUE_MAX_COUNT + 1)
+  ctrls = {}
+  prologue_counts = {}
+  others = []
+  for pkt in pkts:
+    payload = pkt.payload
+    addr = int(payload.ctrl_addr)
+    if payload.cmd in [CMD_CONFIG, CMD_CONFIG_PACKED, CMD_CONFIG_PACKED_OPS]:
+      num_entries = 1 if payload.cmd == CMD_CONFIG else int(payload.data_addr)
+      for i in range(num_entries):
+        ctrl = copy.deepcopy(payload.ctrl)
+        if payload.cmd == CMD_CONFIG_PACKED_OPS:
+          ctrl.operation = (int(payload.data.payload) >> (i * operation_nbits)) & \
+                           ((1 << operation_nbits) - 1)
+        ctrls[addr + i] = ctrl
+    elif payload.cmd == CMD_CONFIG_DEFAULT_NOP:
+      for i in range(int(payload.data_addr)):
+        ctrls[addr + i] = None
+    elif payload.cmd == CMD_CONFIG_PROLOGUE_FU:
+      prologue_counts[('fu', addr)] = int(payload.data.payload)
+    elif payload.cmd == CMD_CONFIG_PROLOGUE_FU_PACKED:
+      for i in range(int(payload.data_addr)):
+        prologue_counts[('fu', addr + i)] = \
+            (int(payload.data.payload) >> (i * prologue_count_nbits)) & PROLOGUE_MAX_COUNT
+    elif payload.cmd == CMD_CONFIG_PROLOGUE_ROUTING_CROSSBAR:
+      for inport in payload.ctrl.routing_xbar_outport:
+        if int(inport) != 0:
+          prologue_counts[('routing_crossbar', addr, int(inport))] = int(payload.data.payload)
+    elif payload.cmd == CMD_CONFIG_PROLOGUE_FU_CROSSBAR:
+      prologue_counts[('fu_crossbar', addr, int(payload.ctrl.fu_xbar_outport[0]))] = \
+          int(payload.data.payload)
+    else:
+      others.append(pkt)
+  return ctrls, prologue_counts, others
+
+def test_fir_packed_config():
+  pkts = mk_script_factory(pack_config = False).makeVectorCGRAPkts()
+  script_factory = mk_script_factory(pack_config = True)
+  packed_pkts = script_factory.makeVectorCGRAPkts()
+
+  print()
+  print(f"{'tile':<8} {'pkts':>6} {'packed':>6}")
+  for tile, (num_pkts, num_packed_pkts) in script_factory.num_config_pkts.items():
+    print(f"{str(tile):<8} {num_pkts:>6} {num_packed_pkts:>6}")
+    assert num_pkts == len(pkts[tile])
+    assert num_packed_pkts == len(packed_pkts[tile])
+    # Packing never changes what the tile ends up configured with.
+    assert configured_state(packed_pkts[tile]) == configured_state(pkts[tile])
+
+  # The identical NAH entries of tile (0, 0) are packed, and tile (1, 0)
+  # receives the same routing prologue count through both its north and
+  # west inports, along with the FU prologue counts of two entries.
+  assert script_factory.num_config_pkts[(0, 0)] == (11, 10)
+  assert script_factory.num_config_pkts[(1, 0)] == (12, 10)
+  num_pkts = sum(num_pkts for num_pkts, _ in script_factory.num_config_pkts.values())
+  num_packed_pkts = sum(num_packed_pkts for _, num_packed_pkts in script_factory.num_config_pkts.values())
+  assert (num_pkts, num_packed_pkts) == (57, 53)
+
+def test_fir_prologue_slots():
+  pkts = mk_script_factory(pack_config = False).makeVectorCGRAPkts()
+  # Tile (1, 0) receives through both its north and west inports during
+  # the prologue of ctrl address 1.
+  assert check_prologue_slots(pkts[(1, 0)], None) == 2
+  assert max(check_prologue_slots(tile_pkts, None) for tile_pkts in pkts.values()) == 2
+  mk_script_factory(pack_config = True, num_prologue_slots = 2).makeVectorCGRAPkts()
+  # A single slot would leave one of the routing prologues uncounted.
+  with pytest.raises(AssertionError, match = "routing_crossbar"):
+    mk_script_factory(pack_config = False, num_prologue_slots = 1).makeVectorCGRAPkts()
+
+def test_fir_elided_config():
+  pkts = mk_script_factory(pack_config = False).makeVectorCGRAPkts()
+  script_factory = mk_script_factory(pack_config = True, elide_config = True)
+  elided_pkts = script_factory.makeVectorCGRAPkts()
+  report = script_factory.config_elision_report
+
+  print()
+  print(format_config_elision_reports([{"kernel": "fir", **report}]))
+  assert report["num_pkts"] == sum(len(tile_pkts) for tile_pkts in pkts.values())
+  for tile, tile_pkts in pkts.items():
+    ctrls, prologue_counts, others = configured_state(tile_pkts)
+    elided_ctrls, elided_prologue_counts, elided_others = \
+        configured_state(elided_pkts[tile])
+    assert elided_prologue_counts == prologue_counts
+    # Every tile is still launched, and thus sends CMD_COMPLETE.
+    assert elided_others == others
+    assert others[-1].payload.cmd == CMD_LAUNCH
+    # Only the entries doing nothing are left to the default NOP.
+    assert elided_ctrls.keys() == ctrls.keys()
+    for addr, ctrl in elided_ctrls.items():
+      if ctrl is None:
+        assert ctrls[addr].operation == OPT_NAH
+        assert all(outport == 0 for outport in ctrls[addr].routing_xbar_outport)
+        assert all(outport == 0 for outport in ctrls[addr].fu_xbar_outport)
+      else:
+        assert ctrl == ctrls[addr]
+
+  # The two NAH entries of each of the tiles (0, 0), (1, 0), (1, 1) and
+  # (1, 2) are left to a single default NOP range, spanning the entries
+  # written in between, and packing applies on top.
+  assert (report["num_pkts"], report["num_elided_pkts"]) == (57, 53)
+  assert report["nop_ctrl_pkts"] == 4
+  assert report["unused_tiles"] == []
+  num_packed_pkts = sum(len(tile_pkts) for tile_pkts in elided_pkts.values())
+  assert num_packed_pkts < report["num_elided_pkts"]